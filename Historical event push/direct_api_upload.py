@@ -16,13 +16,15 @@ Date: August 2025
 """
 
 import pandas as pd
-import requests
 import json
 import sys
 import os
 from datetime import datetime
 import getpass
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class DirectEarthRangerUploader:
     """Direct API uploader for EarthRanger"""
     
@@ -32,6 +34,8 @@ class DirectEarthRangerUploader:
         self.token_url = f"{server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
     
     def authenticate(self, username, password):
         """Authenticate and get access token"""
@@ -46,7 +50,7 @@ class DirectEarthRangerUploader:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -67,7 +71,7 @@ class DirectEarthRangerUploader:
         try:
             url = f"{self.api_base}/activity/events"
             params = {'limit': 1}
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
             return response.status_code == 200
         except:
             return False
@@ -76,7 +80,7 @@ class DirectEarthRangerUploader:
         """Upload a single event"""
         try:
             url = f"{self.api_base}/activity/events"
-            response = requests.post(url, headers=self.headers, data=json.dumps(event_data))
+            response = self.session.post(url, headers=self.headers, data=json.dumps(event_data))
             
             if response.status_code in [200, 201]:
                 return {'success': True, 'data': response.json()}
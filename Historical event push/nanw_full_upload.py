@@ -17,7 +17,6 @@ Requirements:
 """
 
 import pandas as pd
-import requests
 import json
 import sys
 import os
@@ -25,6 +24,9 @@ from datetime import datetime, timedelta
 import getpass
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class NANWFullUploader:
     """Direct API uploader for NANW monitoring events"""
     
@@ -34,6 +36,8 @@ class NANWFullUploader:
         self.token_url = f"{server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
     
     def authenticate(self, username, password):
         """Authenticate and get access token"""
@@ -47,7 +51,7 @@ class NANWFullUploader:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -68,7 +72,7 @@ class NANWFullUploader:
         try:
             url = f"{self.api_base}/activity/events"
             params = {'limit': 1}
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
             return response.status_code == 200
         except:
             return False
@@ -77,7 +81,7 @@ class NANWFullUploader:
         """Upload a single event"""
         try:
             url = f"{self.api_base}/activity/events"
-            response = requests.post(url, headers=self.headers, data=json.dumps(event_data))
+            response = self.session.post(url, headers=self.headers, data=json.dumps(event_data))
             
             if response.status_code in [200, 201]:
                 return {'success': True, 'data': response.json()}
@@ -13,7 +13,6 @@ Requirements:
 """
 
 import pandas as pd
-import requests
 import json
 import sys
 import os
@@ -21,6 +20,9 @@ from datetime import datetime, timedelta
 import getpass
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class NANWResumeUploader:
     """Direct API uploader for NANW monitoring events"""
     
@@ -30,6 +32,8 @@ class NANWResumeUploader:
         self.token_url = f"{server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
     
     def authenticate(self, username, password):
         """Authenticate and get access token"""
@@ -43,7 +47,7 @@ class NANWResumeUploader:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -64,7 +68,7 @@ class NANWResumeUploader:
         try:
             url = f"{self.api_base}/activity/events"
             params = {'limit': 1}
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
             return response.status_code == 200
         except:
             return False
@@ -73,7 +77,7 @@ class NANWResumeUploader:
         """Upload a single event"""
         try:
             url = f"{self.api_base}/activity/events"
-            response = requests.post(url, headers=self.headers, data=json.dumps(event_data))
+            response = self.session.post(url, headers=self.headers, data=json.dumps(event_data))
             
             if response.status_code in [200, 201]:
                 return {'success': True, 'data': response.json()}
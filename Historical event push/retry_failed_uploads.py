@@ -15,10 +15,14 @@ Date: August 2025
 import json
 import sys
 import time
+import os
 import requests
 from datetime import datetime
 import getpass
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class RetryUploader:
     """Retry failed uploads with better error handling"""
     
@@ -28,6 +32,8 @@ class RetryUploader:
         self.token_url = f"{server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
     
     def authenticate(self, username, password):
         """Authenticate and get access token"""
@@ -41,7 +47,7 @@ class RetryUploader:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -61,7 +67,7 @@ class RetryUploader:
         """Upload single event with retry logic"""
         for attempt in range(retry_count):
             try:
-                response = requests.post(
+                response = self.session.post(
                     f"{self.api_base}/activity/events/",
                     headers=self.headers,
                     json=event_data,
@@ -16,11 +16,15 @@ Date: August 2025
 """
 
 import pandas as pd
-import requests
+import os
+import sys
 import json
 import getpass
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class EarthRangerCoordinateUpdater:
     """Update coordinates for existing EarthRanger events"""
     
@@ -30,6 +34,8 @@ class EarthRangerCoordinateUpdater:
         self.token_url = f"{server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
     
     def authenticate(self, username, password):
         """Authenticate and get access token"""
@@ -43,7 +49,7 @@ class EarthRangerCoordinateUpdater:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -68,7 +74,7 @@ class EarthRangerCoordinateUpdater:
                 'include_details': 'true',
                 'limit': 200
             }
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -85,7 +91,7 @@ class EarthRangerCoordinateUpdater:
         """Update an event with new data"""
         try:
             url = f"{self.api_base}/activity/events/{event_id}"
-            response = requests.patch(url, headers=self.headers, data=json.dumps(updated_data))
+            response = self.session.patch(url, headers=self.headers, data=json.dumps(updated_data))
             
             if response.status_code in [200, 204]:
                 return {'success': True}
@@ -1,4 +1,5 @@
 import streamlit as st
+import hashlib
 import os
 import sys
 import pandas as pd
@@ -9,6 +10,8 @@ from datetime import datetime
 import tempfile
 import zipfile
 import json
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Resolve project root so shared.auth is importable when executed via exec()
@@ -33,10 +36,16 @@ from utils import (
     compress_image_if_needed,
     batch_rename_preview
 )
+from streaming_upload import ExistingBlobIndex, upload_with_retry
+from image_store import ProcessedImageStore
+from shared.jobs import JobCancelled, get_runner, poll_job  # noqa: E402
 
 # This module always runs in camera-trap mode (not survey mode)
 CAMERA_TRAP_MODE = True
 
+# Default number of parallel uploads (adjustable in the sidebar on the upload step)
+UPLOAD_MAX_WORKERS = 8
+
 # Page configuration - handled by main Twiga Tools app
 # st.set_page_config(
 #     page_title="Giraffe Image Management System",
@@ -95,6 +104,20 @@ def init_session_state():
     # Reset incompatible country/site combinations
     validate_country_site_compatibility()
 
+def get_image_store():
+    """Return (creating if needed) this session's disk-backed processed-image store"""
+    store = st.session_state.get('image_store')
+    if store is None or not store.alive:
+        store = ProcessedImageStore()
+        st.session_state.image_store = store
+    return store
+
+def clear_image_store():
+    """Delete this session's processed image files (new batch / reset)"""
+    store = st.session_state.pop('image_store', None)
+    if store is not None:
+        store.cleanup()
+
 def validate_country_site_compatibility():
     """Ensure selected country and site are compatible with current structure"""
     countries_sites = st.session_state.get('countries_sites', {})
@@ -378,10 +401,20 @@ def site_selection():
     
     return False
 
+def fast_stream_upload_job(ctx, uploaded_file, bucket, metadata):
+    """Background job (shared.jobs): stream_upload_from_zip with job progress and cancel"""
+    from streaming_upload import stream_upload_from_zip
+
+    def progress_callback(current, total, filename, status):
+        ctx.check()
+        status_icon = {'success': '✅', 'exists': '⏭️', 'skipped': '⚠️', 'error': '❌', 'resumed': '🔁'}.get(status, '📤')
+        ctx.progress(current / total, f"{status_icon} [{current}/{total}] {filename}")
+
+    ctx.progress(0.0, "🚀 Streaming upload in progress...")
+    return stream_upload_from_zip(uploaded_file, bucket, metadata, progress_callback)
+
 def handle_fast_stream_upload(uploaded_file):
     """Handle fast streaming upload directly from ZIP to GCS"""
-    from streaming_upload import stream_upload_from_zip
-    
     st.subheader("🚀 Fast Stream Upload")
     
     # Get bucket
@@ -403,20 +436,10 @@ def handle_fast_stream_upload(uploaded_file):
     if st.button("✅ Start Upload", type="primary"):
         try:
             bucket = get_storage_client().bucket(bucket_name)
-            
-            # Create progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            stats_container = st.empty()
-            
-            def progress_callback(current, total, filename, status):
-                progress_bar.progress(current / total)
-                status_icon = {'success': '✅', 'exists': '⏭️', 'skipped': '⚠️', 'error': '❌'}.get(status, '📤')
-                status_text.text(f"{status_icon} [{current}/{total}] {filename}")
-            
-            # Stream upload
-            st.info("🚀 Streaming upload in progress...")
-            results = stream_upload_from_zip(
+            # Stream upload as a background job polled below; an interrupted
+            # run resumes from its checkpoint when started again
+            st.session_state.fast_upload_job = get_runner().submit(
+                fast_stream_upload_job,
                 uploaded_file,
                 bucket,
                 {
@@ -427,12 +450,25 @@ def handle_fast_stream_upload(uploaded_file):
                     'camera_type': st.session_state.camera_type,
                     'survey_date': st.session_state.metadata['survey_date']
                 },
-                progress_callback
+                label=f"Camera trap stream upload ({bucket_name})",
             )
-            
-            # Clear progress
-            progress_bar.empty()
-            status_text.empty()
+        except Exception as e:
+            st.error(f"❌ Upload failed: {str(e)}")
+            st.info("Please check your bucket permissions and try again.")
+    
+    if st.session_state.get('fast_upload_job'):
+        job_id = st.session_state.fast_upload_job
+        status = poll_job(job_id)
+        st.session_state.fast_upload_job = None
+        if status is None:
+            st.warning("The upload job is no longer available — click Start Upload again.")
+        elif status['state'] == 'cancelled':
+            st.info("Upload cancelled — start it again with the same ZIP to resume.")
+        elif status['state'] != 'done':
+            st.error(f"❌ Upload failed: {status.get('error') or status['state']}")
+            st.info("Please check your bucket permissions and try again.")
+        else:
+            results = get_runner().result(job_id)
             
             # Show results
             st.success(f"🎉 Upload complete!")
@@ -443,10 +479,15 @@ def handle_fast_stream_upload(uploaded_file):
             with col2:
                 st.metric("✅ Uploaded", results['uploaded'])
             with col3:
-                st.metric("⏭️ Skipped", results['skipped'])
+                st.metric("⏭️ Skipped", results['skipped'] + results.get('resumed', 0))
             with col4:
                 st.metric("❌ Failed", results['failed'])
             
+            if results.get('resumed'):
+                st.info(f"🔁 Resumed an interrupted upload: {results['resumed']} files were already done.")
+            if results['failed']:
+                st.warning("⚠️ Some files failed. Run the upload again with the same ZIP to retry only the remaining files.")
+            
             # Detailed results
             if st.checkbox("Show detailed results"):
                 import pandas as pd
@@ -454,14 +495,11 @@ def handle_fast_stream_upload(uploaded_file):
                 st.dataframe(df, use_container_width=True)
             
             st.session_state.processed_images = []
+            clear_image_store()
             st.session_state.site_selection_complete = False
             
             if st.button("🔄 Upload Another Folder"):
                 st.rerun()
-                
-        except Exception as e:
-            st.error(f"❌ Upload failed: {str(e)}")
-            st.info("Please check your bucket permissions and try again.")
     
     return False
 
@@ -695,8 +733,11 @@ def image_processing():
         # Store the month groupings in session state for later processing
         st.session_state.image_months = image_months
         
-        # Process images using utility functions
+        # Process images using utility functions. Image bytes go to the
+        # disk-backed store; session state only keeps keys, sizes and metadata.
         processed_images = []
+        clear_image_store()
+        image_store = get_image_store()
         
         # Get camera trap info from metadata if available
         station = st.session_state.metadata.get('station')
@@ -755,11 +796,14 @@ def image_processing():
                 # Compress if needed
                 compressed_data = compress_image_if_needed(image_data)
                 
+                stored = image_store.put(preview['new_name'], compressed_data)
+                
                 month_processed_images.append({
                     'original_name': uploaded_file.name,
                     'new_filename': preview['new_name'],
-                    'data': compressed_data,
-                    'size': len(compressed_data),
+                    'store_key': stored['store_key'],
+                    'path': stored['path'],
+                    'size': stored['size'],
                     'original_size': len(image_data),
                     'metadata': img_metadata,
                     'compressed': len(compressed_data) < len(image_data),
@@ -902,7 +946,7 @@ def image_processing():
         for idx, img in enumerate(processed_images[:3]):  # Show first 3 images
             with cols[idx]:
                 try:
-                    pil_image = Image.open(io.BytesIO(img['data']))
+                    pil_image = Image.open(io.BytesIO(image_store.read(img)))
                     month_info = img.get('month_folder', 'unknown')
                     st.image(pil_image, caption=f"{img['new_filename']} (→{month_info})", use_column_width=True)
                     
@@ -931,6 +975,121 @@ def image_processing():
     
     return False
 
+def _upload_key(bucket_name, upload_jobs):
+    """Job key of an upload: the same images to the same bucket paths are one upload"""
+    h = hashlib.sha256(f"camera_trap_upload\0{bucket_name}".encode())
+    for job in upload_jobs:
+        h.update(f"\0{job['blob_name']}".encode())
+    return h.hexdigest()[:32]
+
+def upload_images_job(ctx, bucket, upload_jobs, image_store, max_workers, backup_session=None):
+    """
+    Background job (shared.jobs): upload the processed images in parallel
+    (no overwrite), then the backup metadata JSON when `backup_session` is
+    given and anything was uploaded.
+
+    Returns a JSON-able summary: uploaded_count, upload_details,
+    skipped_files, failed_uploads, backup_blob and backup_error.
+    """
+    total_files = len(upload_jobs)
+    uploaded_count = 0
+    failed_uploads = []
+    skipped_files = []
+    upload_details = []
+    
+    # One prefix listing per month folder replaces a blob.exists() call per image
+    ctx.progress(0.0, "Listing existing files in the bucket...")
+    existing = ExistingBlobIndex(bucket)
+    for prefix in sorted({job['folder_path'] for job in upload_jobs}):
+        existing.names_under(prefix)
+    
+    def upload_one(job):
+        """Upload one image with its metadata in a single request (worker thread)"""
+        try:
+            # Check if file exists (NO OVERWRITE ALLOWED)
+            if existing.exists(job['blob_name'], job['folder_path']):
+                return 'exists', job, None
+            blob = bucket.blob(job['blob_name'])
+            # Metadata set before upload is sent with the object, so no patch() is needed
+            blob.metadata = job['metadata']
+            content_type = mimetypes.guess_type(job['img']['new_filename'])[0] or 'image/jpeg'
+            # Read lazily so only in-flight images are held in memory
+            status = upload_with_retry(blob, image_store.read(job['img']), content_type=content_type)
+            return status, job, None
+        except Exception as e:
+            return 'error', job, str(e)
+    
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(upload_one, job) for job in upload_jobs]
+        for future in as_completed(futures):
+            if ctx.cancelled:
+                # Drop the queued uploads; the in-flight ones finish
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise JobCancelled()
+            status, job, error = future.result()
+            done += 1
+            img = job['img']
+            img_month = job['month_folder']
+            
+            if status == 'exists':
+                skipped_files.append(f"{img['new_filename']} (already exists)")
+                message = f"⏭️ {img['new_filename']} already exists"
+            elif status == 'error':
+                failed_uploads.append(f"{img['new_filename']}: {error}")
+                message = f"❌ Error uploading {img['new_filename']}"
+            else:
+                # Track upload details
+                upload_details.append({
+                    'filename': img['new_filename'],
+                    'size_mb': img['size'] / (1024*1024),
+                    'blob_path': job['blob_name'],
+                    'folder_path': job['folder_path'],
+                    'month_folder': img_month,
+                    'upload_time': datetime.now().isoformat()
+                })
+                uploaded_count += 1
+                year = img_month[:4]
+                month = img_month[4:6]
+                # month_folder can be 'unknown' when the image had no usable date
+                month_name = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'][int(month)-1] if month.isdigit() and 1 <= int(month) <= 12 else month
+                message = f"✅ Uploaded {img['new_filename']} → {img_month} ({month_name} {year}) ({uploaded_count}/{total_files})"
+            ctx.progress(done / total_files, message)
+    
+    summary = {
+        'uploaded_count': uploaded_count,
+        'upload_details': upload_details,
+        'skipped_files': skipped_files,
+        'failed_uploads': failed_uploads,
+        'backup_blob': None,
+        'backup_error': None,
+    }
+    
+    # Create backup metadata file if requested
+    if backup_session is not None and uploaded_count > 0:
+        try:
+            backup_metadata = {
+                'upload_session': {
+                    'timestamp': datetime.now().isoformat(),
+                    **backup_session['session'],
+                    'total_files': total_files,
+                    'successful_uploads': uploaded_count,
+                    'skipped_files': len(skipped_files),
+                    'failed_uploads': len(failed_uploads)
+                },
+                'files': upload_details,
+                'skipped_files': skipped_files,
+                'failed_files': failed_uploads
+            }
+            
+            backup_blob_name = f"{backup_session['folder_path']}_upload_metadata_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            backup_blob = bucket.blob(backup_blob_name)
+            backup_blob.upload_from_string(json.dumps(backup_metadata, indent=2))
+            summary['backup_blob'] = backup_blob_name
+        except Exception as e:
+            summary['backup_error'] = str(e)
+    return summary
+
 def upload_to_gcs():
     """Upload processed images to Google Cloud Storage"""
     st.header("☁️ Upload to Google Cloud Storage")
@@ -1082,135 +1241,117 @@ def upload_to_gcs():
         # Get the bucket
         bucket = get_storage_client().bucket(bucket_name)
         
-        # Create progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        uploaded_count = 0
-        failed_uploads = []
-        skipped_files = []
-        upload_details = []
+        # Work out every destination path and its metadata up front (session state
+        # is only touched on this thread; workers just upload)
+        survey_mode = st.session_state.get('survey_mode', False)
+        survey_type = st.session_state.get('survey_type', 'survey_vehicle')
+        camera_trap_mode = st.session_state.get('camera_trap_mode', False)
+        camera_type = st.session_state.get('camera_type', 'camera_fence')
         
-        for idx, img in enumerate(st.session_state.processed_images):
-            try:
-                # Get the correct folder path for this image based on its month
-                img_month = img.get('month_folder', 'unknown')
-                
-                # Determine the correct folder path based on mode and image's month
-                survey_mode = st.session_state.get('survey_mode', False)
-                survey_type = st.session_state.get('survey_type', 'survey_vehicle')
-                camera_trap_mode = st.session_state.get('camera_trap_mode', False)
-                camera_type = st.session_state.get('camera_type', 'camera_fence')
-                
-                if survey_mode:
-                    # Survey mode: bucket/survey/survey_[type]/yyyymm/
-                    img_folder_path = f"survey/{survey_type}/{img_month}/"
-                elif camera_trap_mode:
-                    # Camera trap mode with station subfolders: camera_trap/TYPE/yyyymm/SITE/CAMERA/
-                    # Updated structure: camera_trap/camera_fence/202410/S015/S015_C024/
-                    station = st.session_state.metadata.get('station', 'UNKNOWN').upper()
-                    camera = st.session_state.metadata.get('camera', 'UNKNOWN').upper()
-                    # Create full camera identifier as STATION_CAMERA (e.g., S015_C024)
-                    full_camera = f"{station}_{camera}"
-                    img_folder_path = f"camera_trap/{camera_type}/{img_month}/{station}/{full_camera}/"
-                else:
-                    # Legacy mode: bucket/COUNTRY_SITE_yyyymm/
-                    legacy_folder = f"{st.session_state.metadata['country']}_{st.session_state.metadata['site']}_{img_month}"
-                    img_folder_path = f"{legacy_folder}/"
-                
+        upload_jobs = []
+        for img in st.session_state.processed_images:
+            # Get the correct folder path for this image based on its month
+            img_month = img.get('month_folder', 'unknown')
+            
+            if survey_mode:
+                # Survey mode: bucket/survey/survey_[type]/yyyymm/
+                img_folder_path = f"survey/{survey_type}/{img_month}/"
+            elif camera_trap_mode:
+                # Camera trap mode with station subfolders: camera_trap/TYPE/yyyymm/SITE/CAMERA/
+                # Updated structure: camera_trap/camera_fence/202410/S015/S015_C024/
+                station = st.session_state.metadata.get('station', 'UNKNOWN').upper()
+                camera = st.session_state.metadata.get('camera', 'UNKNOWN').upper()
+                # Create full camera identifier as STATION_CAMERA (e.g., S015_C024)
+                full_camera = f"{station}_{camera}"
+                img_folder_path = f"camera_trap/{camera_type}/{img_month}/{station}/{full_camera}/"
+            else:
+                # Legacy mode: bucket/COUNTRY_SITE_yyyymm/
+                legacy_folder = f"{st.session_state.metadata['country']}_{st.session_state.metadata['site']}_{img_month}"
+                img_folder_path = f"{legacy_folder}/"
+            
+            # Create comprehensive metadata using utility function
+            metadata = create_metadata_dict(
+                st.session_state.metadata['site'],
+                st.session_state.metadata['survey_date'],
+                st.session_state.metadata.get('photographer'),
+                st.session_state.metadata.get('camera_model'),
+                st.session_state.metadata.get('notes'),
+                img['original_name']
+            )
+            
+            # Add image-specific metadata
+            metadata.update({
+                'folder_name': folder_name,
+                'country': st.session_state.metadata['country'],
+                'file_size_bytes': str(img['size']),
+                'original_size_bytes': str(img.get('original_size', img['size'])),
+                'compressed': str(img.get('compressed', False)),
+                'image_format': img['metadata'].get('format', 'Unknown'),
+                'image_width': str(img['metadata'].get('width', 0)),
+                'image_height': str(img['metadata'].get('height', 0)),
+                'survey_year': str(st.session_state.metadata['survey_year']),
+                'survey_month': str(st.session_state.metadata['survey_month'])
+            })
+            
+            upload_jobs.append({
+                'img': img,
+                'month_folder': img_month,
+                'folder_path': img_folder_path,
                 # Construct blob name using the image-specific folder path
-                blob_name = img_folder_path + img['new_filename']
-                
-                # Check if file exists (NO OVERWRITE ALLOWED)
-                blob = bucket.blob(blob_name)
-                if blob.exists():
-                    skipped_files.append(f"{img['new_filename']} (already exists)")
-                    continue
-                
-                # Upload image data
-                blob.upload_from_string(img['data'])
-                
-                # Create comprehensive metadata using utility function
-                metadata = create_metadata_dict(
-                    st.session_state.metadata['site'],
-                    st.session_state.metadata['survey_date'],
-                    st.session_state.metadata.get('photographer'),
-                    st.session_state.metadata.get('camera_model'),
-                    st.session_state.metadata.get('notes'),
-                    img['original_name']
-                )
-                
-                # Add image-specific metadata
-                metadata.update({
-                    'folder_name': folder_name,
+                'blob_name': img_folder_path + img['new_filename'],
+                'metadata': metadata,
+            })
+        
+        # The upload runs as a background job keyed on the bucket and paths:
+        # reruns of this page attach to it instead of starting it again, and
+        # a finished upload is shown rather than repeated.
+        upload_key = _upload_key(bucket_name, upload_jobs)
+        record = st.session_state.get('gcs_upload')
+        if not record or record['key'] != upload_key:
+            backup_session = {
+                'folder_path': folder_path,
+                'session': {
                     'country': st.session_state.metadata['country'],
-                    'file_size_bytes': str(img['size']),
-                    'original_size_bytes': str(img.get('original_size', img['size'])),
-                    'compressed': str(img.get('compressed', False)),
-                    'image_format': img['metadata'].get('format', 'Unknown'),
-                    'image_width': str(img['metadata'].get('width', 0)),
-                    'image_height': str(img['metadata'].get('height', 0)),
-                    'survey_year': str(st.session_state.metadata['survey_year']),
-                    'survey_month': str(st.session_state.metadata['survey_month'])
-                })
-                
-                blob.metadata = metadata
-                blob.patch()
-                
-                # Track upload details
-                upload_details.append({
-                    'filename': img['new_filename'],
-                    'size_mb': img['size'] / (1024*1024),
-                    'blob_path': blob_name,
-                    'folder_path': img_folder_path,
-                    'month_folder': img_month,
-                    'upload_time': datetime.now().isoformat()
-                })
-                
-                uploaded_count += 1
-                progress = (uploaded_count + len(skipped_files)) / total_files
-                progress_bar.progress(progress)
-                year = img_month[:4]
-                month = img_month[4:6]
-                month_name = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'][int(month)-1]
-                status_text.text(f"✅ Uploaded {img['new_filename']} → {img_month} ({month_name} {year}) ({uploaded_count}/{total_files})")
-                
-            except Exception as e:
-                error_msg = f"{img['new_filename']}: {str(e)}"
-                failed_uploads.append(error_msg)
-                st.error(f"❌ Error uploading {error_msg}")
+                    'site': st.session_state.metadata['site'],
+                    'survey_year': st.session_state.metadata['survey_year'],
+                    'survey_month': st.session_state.metadata['survey_month'],
+                    'photographer': st.session_state.metadata.get('photographer'),
+                    'folder_name': folder_name,
+                    'folder_format': 'COUNTRY_SITE_YYYYMM',
+                    'bucket_name': bucket_name,
+                },
+            } if create_backup else None
+            record = {'key': upload_key, 'job_id': get_runner().submit(
+                upload_images_job, bucket, upload_jobs, get_image_store(),
+                st.session_state.get('upload_workers', UPLOAD_MAX_WORKERS), backup_session,
+                key=upload_key, label=f"Camera trap upload ({total_files} images → {bucket_name})",
+            )}
+            st.session_state.gcs_upload = record
         
-        # Create backup metadata file if requested
-        if create_backup and uploaded_count > 0:
-            try:
-                backup_metadata = {
-                    'upload_session': {
-                        'timestamp': datetime.now().isoformat(),
-                        'country': st.session_state.metadata['country'],
-                        'site': st.session_state.metadata['site'],
-                        'survey_year': st.session_state.metadata['survey_year'],
-                        'survey_month': st.session_state.metadata['survey_month'],
-                        'photographer': st.session_state.metadata.get('photographer'),
-                        'folder_name': folder_name,
-                        'folder_format': 'COUNTRY_SITE_YYYYMM',
-                        'bucket_name': bucket_name,
-                        'total_files': total_files,
-                        'successful_uploads': uploaded_count,
-                        'skipped_files': len(skipped_files),
-                        'failed_uploads': len(failed_uploads)
-                    },
-                    'files': upload_details,
-                    'skipped_files': skipped_files,
-                    'failed_files': failed_uploads
-                }
-                
-                backup_blob_name = f"{folder_path}_upload_metadata_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                backup_blob = bucket.blob(backup_blob_name)
-                backup_blob.upload_from_string(json.dumps(backup_metadata, indent=2))
-                st.info(f"📋 Metadata backup saved to: {backup_blob_name}")
-                
-            except Exception as e:
-                st.warning(f"⚠️ Could not create metadata backup: {str(e)}")
+        status = poll_job(record['job_id'])
+        if status is None or status['state'] != 'done':
+            if status is None:
+                st.warning("The upload job is no longer available.")
+            elif status['state'] == 'cancelled':
+                st.info("Upload cancelled — files already uploaded are kept and will be skipped next time.")
+            else:
+                st.error(f"❌ Upload failed: {status.get('error') or status['state']}")
+            if st.button("🔁 Restart upload", type="primary"):
+                st.session_state.gcs_upload = None
+                st.rerun()
+            return
+        
+        summary = get_runner().result(record['job_id'])
+        uploaded_count = summary['uploaded_count']
+        upload_details = summary['upload_details']
+        skipped_files = summary['skipped_files']
+        failed_uploads = summary['failed_uploads']
+        for error_msg in failed_uploads:
+            st.error(f"❌ Error uploading {error_msg}")
+        if summary['backup_blob']:
+            st.info(f"📋 Metadata backup saved to: {summary['backup_blob']}")
+        elif summary['backup_error']:
+            st.warning(f"⚠️ Could not create metadata backup: {summary['backup_error']}")
         
         # Show completion summary
         if uploaded_count == total_files:
@@ -1361,6 +1502,7 @@ def upload_to_gcs():
         if st.button("🔄 Upload Another Folder", type="secondary"):
             # Clear processed images and folder name to start fresh
             st.session_state.processed_images = []
+            clear_image_store()
             st.session_state.folder_name = None
             st.session_state.site_selection_complete = False
             st.rerun()
@@ -1397,11 +1539,20 @@ def main():
 
     # Step 3: Upload
     st.sidebar.markdown("### Step 3: Upload to Cloud ⏳")
+    st.sidebar.number_input(
+        "Parallel uploads",
+        min_value=1,
+        max_value=32,
+        value=UPLOAD_MAX_WORKERS,
+        key="upload_workers",
+        help="How many images upload at once. Lower this on slow or unreliable connections."
+    )
     upload_to_gcs()
     
     # Reset button
     st.sidebar.markdown("---")
     if st.sidebar.button("🔄 Reset Application"):
+        clear_image_store()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
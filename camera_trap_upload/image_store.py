@@ -0,0 +1,116 @@
+"""
+Disk-backed store for processed camera trap images
+
+image_processing() used to keep every processed image's bytes in
+st.session_state.processed_images until the upload finished. The app runs as one
+shared process for all users, so a few concurrent uploads could exhaust the
+container's memory and take the app down for everyone.
+
+Images now go through a ProcessedImageStore: session state keeps only a handle
+plus each image's key, size and metadata, and bytes are read lazily at preview /
+upload time. A process-wide memory budget (shared by all sessions) keeps small
+batches in RAM; anything beyond it spills to a per-session temp directory, the
+same approach ER2WB uses for renamed images. The directory is removed on reset,
+after a finished upload, or when the session is garbage-collected, and leftovers
+from crashed sessions are swept when a new store is created.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+
+# Total bytes of processed images held in RAM across all sessions before spilling to disk
+MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+STORE_PREFIX = "camera_trap_imgs_"
+# Temp dirs older than this are assumed abandoned (session ended without cleanup)
+STALE_AFTER_SECONDS = 24 * 60 * 60
+
+# Process-wide in-memory tier: {store_dir: {key: bytes}}
+_memory = {}
+_memory_used = 0
+_memory_lock = threading.Lock()
+
+
+def _release_memory(directory):
+    """Drop a store's in-memory images and return their bytes to the budget"""
+    global _memory_used
+    with _memory_lock:
+        entries = _memory.pop(directory, {})
+        _memory_used -= sum(len(data) for data in entries.values())
+
+
+def _remove_store(directory):
+    _release_memory(directory)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def sweep_stale_stores(max_age_seconds=STALE_AFTER_SECONDS):
+    """Delete temp dirs left behind by sessions that ended without cleaning up"""
+    tmp_root = tempfile.gettempdir()
+    cutoff = time.time() - max_age_seconds
+    for name in os.listdir(tmp_root):
+        path = os.path.join(tmp_root, name)
+        if name.startswith(STORE_PREFIX) and os.path.isdir(path):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+class ProcessedImageStore:
+    """
+    Per-session image store with a shared memory budget and disk spill.
+
+    Only this small handle lives in st.session_state. When it is garbage-collected
+    (session ended or state reset) its temp directory and memory entries are freed.
+    """
+
+    def __init__(self, memory_budget_bytes=None):
+        sweep_stale_stores()
+        self.directory = tempfile.mkdtemp(prefix=STORE_PREFIX)
+        self.memory_budget_bytes = (
+            MEMORY_BUDGET_BYTES if memory_budget_bytes is None else memory_budget_bytes
+        )
+        self._finalizer = weakref.finalize(self, _remove_store, self.directory)
+
+    def put(self, name, data):
+        """
+        Store image bytes under a filename.
+
+        Returns:
+            dict: {'store_key', 'path', 'size'} - path is None while the image is held in memory
+        """
+        global _memory_used
+        key = re.sub(r'[^\w.\-]', '_', name)
+        with _memory_lock:
+            if _memory_used + len(data) <= self.memory_budget_bytes:
+                _memory.setdefault(self.directory, {})[key] = data
+                _memory_used += len(data)
+                return {'store_key': key, 'path': None, 'size': len(data)}
+
+        path = os.path.join(self.directory, key)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return {'store_key': key, 'path': path, 'size': len(data)}
+
+    def read(self, record):
+        """Load the bytes for a record returned by put() (or an image dict containing it)"""
+        with _memory_lock:
+            data = _memory.get(self.directory, {}).get(record['store_key'])
+        if data is not None:
+            return data
+        with open(record['path'], 'rb') as f:
+            return f.read()
+
+    def cleanup(self):
+        """Free memory and delete the temp directory now"""
+        self._finalizer()
+
+    @property
+    def alive(self):
+        return self._finalizer.alive
@@ -1,160 +1,354 @@
 """
 Streaming upload module for camera trap images
 Uploads directly from ZIP to Google Cloud Storage without loading all images into memory
+
+The ZIP is spooled to a temporary file (or read in place when given a path) and its
+central directory is walked once. EXIF dates are decoded from the first 64 KB of each
+member, so peak memory is roughly max_workers x the largest image, not the archive size.
+
+Uploads run through a bounded worker pool. Existing blob names are listed once per
+camera_trap/<type>/<yyyymm>/<station>/ prefix instead of calling blob.exists() per file,
+and a local checkpoint lets an interrupted run resume without re-checking completed files.
 """
 
 import zipfile
-import io
-from PIL import Image
-from PIL.ExifTags import TAGS
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import hashlib
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import streamlit as st
 
+from shared.exif import EXIF_HEADER_BYTES, get_exif_datetime
+
+try:
+    from google.api_core.exceptions import PreconditionFailed
+except ImportError:  # google-cloud-storage not installed
+    PreconditionFailed = None
+
+# Upload engine defaults
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 4
+RETRY_BACKOFF_SECONDS = 1.0
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "gcf_camera_trap_checkpoints")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tiff', '.tif')
+SPOOL_CHUNK_BYTES = 8 * 1024 * 1024
+
 def extract_exif_date_fast(image_data):
-    """Fast EXIF date extraction - minimal processing"""
-    try:
-        img = Image.open(io.BytesIO(image_data))
-        exif = img._getexif()
-        if exif:
-            for tag_id, value in exif.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag == 'DateTimeOriginal':
-                    dt = datetime.strptime(value, '%Y:%m:%d %H:%M:%S')
-                    return dt, dt.strftime('%Y%m%d')
-        return None, None
-    except:
-        return None, None
+    """Fast EXIF date extraction - reads only the EXIF header"""
+    dt = get_exif_datetime(image_data)
+    if dt:
+        return dt, dt.strftime('%Y%m%d')
+    return None, None
+
+def spool_zip_to_disk(zip_file, chunk_size=SPOOL_CHUNK_BYTES):
+    """
+    Copy an uploaded ZIP to a temporary file in fixed-size chunks.
+
+    Avoids getvalue(), which would make another full in-memory copy of the archive.
+    
+    Returns:
+        str: Path of the temporary file (caller removes it)
+    """
+    if hasattr(zip_file, 'seek'):
+        zip_file.seek(0)
+    fd, path = tempfile.mkstemp(suffix='.zip', prefix='gcf_camera_trap_')
+    with os.fdopen(fd, 'wb') as out:
+        shutil.copyfileobj(zip_file, out, chunk_size)
+    return path
 
 def generate_new_filename(original_name, country, site, station, camera, date_str):
     """Generate standardized filename"""
-    import os
     name_without_ext, ext = os.path.splitext(original_name)
     return f"{country}_{site}_{station}_{camera}_{date_str}_{name_without_ext}{ext.upper()}"
 
-def stream_upload_from_zip(zip_file, bucket, metadata, progress_callback=None):
+
+class ExistingBlobIndex:
+    """
+    Lazily lists existing blob names, one bucket listing per prefix.
+
+    Thread-safe: concurrent workers asking about the same prefix wait for a
+    single listing rather than each issuing their own.
+    """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self._names = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _prefix_lock(self, prefix):
+        with self._guard:
+            return self._locks.setdefault(prefix, threading.Lock())
+
+    def names_under(self, prefix):
+        """Return the set of blob names under prefix, listing it on first use"""
+        with self._prefix_lock(prefix):
+            if prefix not in self._names:
+                self._names[prefix] = {b.name for b in self.bucket.list_blobs(prefix=prefix)}
+            return self._names[prefix]
+
+    def exists(self, blob_path, prefix):
+        """True if blob_path was present when prefix was listed"""
+        return blob_path in self.names_under(prefix)
+
+
+class UploadCheckpoint:
+    """
+    Append-only record of ZIP members already uploaded for one run.
+
+    Each line is "<zip member>\\t<blob path>". On resume, members listed here are
+    skipped without being read or checked against the bucket.
+    """
+
+    def __init__(self, run_key, checkpoint_dir=CHECKPOINT_DIR):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        digest = hashlib.sha1(run_key.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(checkpoint_dir, f"{digest}.tsv")
+        self.completed = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    member, _, blob_path = line.rstrip('\n').partition('\t')
+                    if member:
+                        self.completed[member] = blob_path
+
+    def mark_done(self, member, blob_path):
+        with self._lock:
+            self.completed[member] = blob_path
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{member}\t{blob_path}\n")
+
+    def clear(self):
+        """Remove the checkpoint once a run has finished cleanly"""
+        with self._lock:
+            self.completed = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def upload_with_retry(blob, data, content_type='image/jpeg', max_retries=DEFAULT_MAX_RETRIES,
+                      backoff=RETRY_BACKOFF_SECONDS, **upload_kwargs):
+    """
+    Upload bytes to a blob, retrying transient failures with jittered exponential backoff.
+
+    Uses if_generation_match=0 so the upload only creates new objects; a blob that
+    appeared since the prefix listing is reported as existing rather than overwritten.
+
+    Returns:
+        str: 'success' or 'exists'
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            blob.upload_from_string(data, content_type=content_type,
+                                    if_generation_match=0, **upload_kwargs)
+            return 'success'
+        except Exception as e:
+            if PreconditionFailed is not None and isinstance(e, PreconditionFailed):
+                return 'exists'
+            if attempt >= max_retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+
+
+def _run_key(zip_file, bucket, metadata):
+    """Identify an upload run so a restart finds its checkpoint"""
+    if isinstance(zip_file, (str, os.PathLike)):
+        zip_name, zip_size = os.fspath(zip_file), os.path.getsize(zip_file)
+    else:
+        zip_name, zip_size = getattr(zip_file, 'name', ''), getattr(zip_file, 'size', '')
+    return "|".join(str(p) for p in (
+        getattr(bucket, 'name', ''), zip_name, zip_size, metadata['camera_type'],
+        metadata['station'].upper(), metadata['camera'].upper(),
+    ))
+
+
+def stream_upload_from_zip(zip_file, bucket, metadata, progress_callback=None,
+                           max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                           checkpoint_dir=CHECKPOINT_DIR):
     """
     Stream upload images directly from ZIP to GCS
     
     Args:
-        zip_file: Uploaded ZIP file object
+        zip_file: Uploaded ZIP file object, or a local path to a ZIP
         bucket: GCS bucket object
         metadata: Dict with country, site, station, camera, camera_type, fallback_date
         progress_callback: Optional callback function for progress updates
+        max_workers: Number of concurrent upload workers
+        max_retries: Retries per file on transient upload errors
+        checkpoint_dir: Directory for resume checkpoints (None disables resuming)
         
     Returns:
         dict: Upload statistics
     """
-    country = metadata['country'].upper()
-    site = metadata['site'].upper()
-    station = metadata['station'].upper()
-    camera = metadata['camera'].upper()
-    camera_type = metadata['camera_type']
-    fallback_date = metadata['survey_date']
-    
     results = {
         'uploaded': 0,
         'skipped': 0,
         'failed': 0,
+        'resumed': 0,
         'total': 0,
         'details': []
     }
     
-    # First pass: count total images
-    zip_data = zip_file.getvalue()
-    with zipfile.ZipFile(io.BytesIO(zip_data), 'r') as zip_ref:
-        image_files = [f for f in zip_ref.filelist 
-                      if not f.is_dir() and 
-                      any(f.filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.tiff', '.tif'])]
-        results['total'] = len(image_files)
+    # Read local paths in place; spool uploaded files to disk rather than RAM
+    if isinstance(zip_file, (str, os.PathLike)):
+        zip_path, spooled = os.fspath(zip_file), False
+    else:
+        zip_path, spooled = spool_zip_to_disk(zip_file), True
+    
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # Single walk of the central directory
+            image_files = [f for f in zip_ref.infolist()
+                           if not f.is_dir() and f.filename.lower().endswith(IMAGE_EXTENSIONS)]
+            results['total'] = len(image_files)
+            if image_files:
+                _upload_members(zip_ref, image_files, zip_file, bucket, metadata, results,
+                                progress_callback, max_workers, max_retries, checkpoint_dir)
+    finally:
+        if spooled:
+            os.remove(zip_path)
+    
+    return results
+
+
+def _upload_members(zip_ref, image_files, zip_file, bucket, metadata, results,
+                    progress_callback, max_workers, max_retries, checkpoint_dir):
+    """Upload the selected ZIP members through a bounded worker pool"""
+    country = metadata['country'].upper()
+    site = metadata['site'].upper()
+    station = metadata['station'].upper()
+    camera = metadata['camera'].upper()
+    camera_type = metadata['camera_type']
+    fallback_date = metadata['survey_date']
+    
+    checkpoint = None
+    if checkpoint_dir:
+        checkpoint = UploadCheckpoint(_run_key(zip_file, bucket, metadata), checkpoint_dir)
+    existing = ExistingBlobIndex(bucket)
     
-    if results['total'] == 0:
-        return results
+    def process_member(zip_ref, file_info):
+        """Read, rename and upload one ZIP member. Runs in a worker thread."""
+        # Get just the filename (not full path in ZIP)
+        original_name = file_info.filename.split('/')[-1]
+        
+        # Skip files over 50MB (checked before reading the member)
+        size_mb = file_info.file_size / (1024 * 1024)
+        if size_mb > 50:
+            return 'skipped', {
+                'file': original_name,
+                'status': 'Skipped (>50MB)',
+                'size_mb': f"{size_mb:.2f}"
+            }
+        
+        # Read image data from ZIP; EXIF is decoded from the header only
+        with zip_ref.open(file_info) as member:
+            header = member.read(EXIF_HEADER_BYTES)
+            dt_obj, date_str = extract_exif_date_fast(header)
+            image_data = header + member.read()
+        
+        # Use fallback date if no EXIF
+        if not date_str:
+            date_str = fallback_date.strftime('%Y%m%d')
+            month_key = f"{fallback_date.year}{fallback_date.month:02d}"
+        else:
+            month_key = f"{dt_obj.year}{dt_obj.month:02d}"
+        
+        # Generate new filename
+        new_filename = generate_new_filename(
+            original_name, country, site, station, camera, date_str
+        )
+        
+        # Build GCS path: camera_trap/TYPE/yyyymm/STATION/STATION_CAMERA/filename
+        full_camera = f"{station}_{camera}"
+        station_prefix = f"camera_trap/{camera_type}/{month_key}/{station}/"
+        blob_path = f"{station_prefix}{full_camera}/{new_filename}"
+        
+        # Check against the station/month listing (one bucket listing per prefix)
+        status = 'exists' if existing.exists(blob_path, station_prefix) else None
+        if status is None:
+            # Upload directly to GCS (no local storage)
+            status = upload_with_retry(bucket.blob(blob_path), image_data,
+                                       content_type='image/jpeg', max_retries=max_retries)
+        
+        if checkpoint:
+            checkpoint.mark_done(file_info.filename, blob_path)
+        
+        if status == 'exists':
+            return 'exists', {
+                'file': original_name,
+                'new_name': new_filename,
+                'status': 'Already exists',
+                'path': blob_path
+            }
+        return 'success', {
+            'file': original_name,
+            'new_name': new_filename,
+            'status': 'Success',
+            'path': blob_path,
+            'size_mb': f"{size_mb:.2f}",
+            'date_source': 'EXIF' if dt_obj else 'Fallback'
+        }
     
-    # Second pass: process and upload
-    with zipfile.ZipFile(io.BytesIO(zip_data), 'r') as zip_ref:
-        for idx, file_info in enumerate(image_files):
+    # Second pass: process and upload through a bounded worker pool.
+    # Progress callbacks run on this thread so Streamlit widgets can be updated safely.
+    done_count = 0
+    
+    def record(status, detail, filename):
+        nonlocal done_count
+        done_count += 1
+        if status == 'success':
+            results['uploaded'] += 1
+        elif status == 'error':
+            results['failed'] += 1
+        elif status == 'resumed':
+            results['resumed'] += 1
+        else:
+            results['skipped'] += 1
+        results['details'].append(detail)
+        if progress_callback:
+            progress_callback(done_count, results['total'], filename, status)
+    
+    def drain(futures):
+        for future in futures:
+            file_info = pending.pop(future)
             try:
-                # Get just the filename (not full path in ZIP)
-                original_name = file_info.filename.split('/')[-1]
-                
-                # Read image data from ZIP
-                image_data = zip_ref.read(file_info.filename)
-                
-                # Skip files over 50MB
-                size_mb = len(image_data) / (1024 * 1024)
-                if size_mb > 50:
-                    results['skipped'] += 1
-                    results['details'].append({
-                        'file': original_name,
-                        'status': 'Skipped (>50MB)',
-                        'size_mb': f"{size_mb:.2f}"
-                    })
-                    if progress_callback:
-                        progress_callback(idx + 1, results['total'], original_name, 'skipped')
-                    continue
-                
-                # Extract EXIF date (fast)
-                dt_obj, date_str = extract_exif_date_fast(image_data)
-                
-                # Use fallback date if no EXIF
-                if not date_str:
-                    date_str = fallback_date.strftime('%Y%m%d')
-                    month_key = f"{fallback_date.year}{fallback_date.month:02d}"
-                else:
-                    month_key = f"{dt_obj.year}{dt_obj.month:02d}"
-                
-                # Generate new filename
-                new_filename = generate_new_filename(
-                    original_name, country, site, station, camera, date_str
-                )
-                
-                # Build GCS path: camera_trap/TYPE/yyyymm/STATION/STATION_CAMERA/filename
-                full_camera = f"{station}_{camera}"
-                blob_path = f"camera_trap/{camera_type}/{month_key}/{station}/{full_camera}/{new_filename}"
-                
-                # Check if exists
-                blob = bucket.blob(blob_path)
-                if blob.exists():
-                    results['skipped'] += 1
-                    results['details'].append({
-                        'file': original_name,
-                        'new_name': new_filename,
-                        'status': 'Already exists',
-                        'path': blob_path
-                    })
-                    if progress_callback:
-                        progress_callback(idx + 1, results['total'], original_name, 'exists')
-                    continue
-                
-                # Upload directly to GCS (no local storage)
-                blob.upload_from_string(
-                    image_data,
-                    content_type='image/jpeg'
-                )
-                
-                results['uploaded'] += 1
-                results['details'].append({
-                    'file': original_name,
-                    'new_name': new_filename,
-                    'status': 'Success',
-                    'path': blob_path,
-                    'size_mb': f"{size_mb:.2f}",
-                    'date_source': 'EXIF' if dt_obj else 'Fallback'
-                })
-                
-                if progress_callback:
-                    progress_callback(idx + 1, results['total'], original_name, 'success')
-                
+                status, detail = future.result()
             except Exception as e:
-                results['failed'] += 1
-                results['details'].append({
-                    'file': original_name if 'original_name' in locals() else file_info.filename,
+                status, detail = 'error', {
+                    'file': file_info.filename.split('/')[-1],
                     'status': f'Error: {str(e)}',
-                })
-                if progress_callback:
-                    progress_callback(idx + 1, results['total'], 
-                                    original_name if 'original_name' in locals() else file_info.filename, 
-                                    'error')
+                }
+            record(status, detail, detail['file'])
     
-    return results
+    pending = {}
+    max_in_flight = max_workers * 2
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file_info in image_files:
+            if checkpoint and file_info.filename in checkpoint.completed:
+                original_name = file_info.filename.split('/')[-1]
+                record('resumed', {
+                    'file': original_name,
+                    'status': 'Already uploaded (resumed)',
+                    'path': checkpoint.completed[file_info.filename]
+                }, original_name)
+                continue
+            
+            # Keep a bounded number of files in flight so memory stays flat
+            if len(pending) >= max_in_flight:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                drain(finished)
+            
+            pending[executor.submit(process_member, zip_ref, file_info)] = file_info
+        
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            drain(finished)
+    
+    # A clean run needs no checkpoint; keep it if anything failed so a retry resumes
+    if checkpoint and results['failed'] == 0:
+        checkpoint.clear()
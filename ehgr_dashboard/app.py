@@ -6,10 +6,17 @@ from ecoscope.io.earthranger import EarthRangerIO
 from pandas import json_normalize, to_datetime
 import requests
 import os
+import sys
 from pathlib import Path
 import geopandas as gpd
 from shapely.geometry import LineString
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.event_store import load_events  # noqa: E402
+
 
 def _zoom_for_extent(df, lat_col="lat", lon_col="lon"):
     """Estimate a reasonable mapbox zoom level from the spread of points."""
@@ -114,12 +121,11 @@ def main():
         since = "2024-07-01T00:00:00Z"
         until = datetime.now().strftime("%Y-%m-%dT23:59:59Z")
         try:
-            events = er.get_events(
+            events = load_events(
+                er,
                 event_category="monitoring_nam",
                 since=since,
-                until=until,
-                include_details=True,
-                include_notes=False
+                until=until
             )
             if events.empty:
                 return pd.DataFrame(), pd.DataFrame()
@@ -1247,12 +1253,11 @@ def render_camera_tab(username, password, EARTHRANGER_SERVER, start_date, end_da
         since = "2024-01-01T00:00:00Z"
         until = datetime.now().strftime("%Y-%m-%dT23:59:59Z")
         try:
-            events = er.get_events(
+            events = load_events(
+                er,
                 event_type="64ffa5d9-6fec-4ed7-bdbd-54e761c767a0",
                 since=since,
-                until=until,
-                include_details=True,
-                include_notes=True
+                until=until
             )
             if events.empty:
                 return pd.DataFrame()
@@ -1388,12 +1393,11 @@ def render_weather_tab(username, password, EARTHRANGER_SERVER, start_date, end_d
         since = "2024-01-01T00:00:00Z"
         until = datetime.now().strftime("%Y-%m-%dT23:59:59Z")
         try:
-            events = er.get_events(
+            events = load_events(
+                er,
                 event_type="f3fbb844-3749-40c9-8bc5-82878c37169a",
                 since=since,
-                until=until,
-                include_details=True,
-                include_notes=True
+                until=until
             )
             if events.empty:
                 return pd.DataFrame()
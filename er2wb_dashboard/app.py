@@ -20,6 +20,9 @@ import pandas as pd
 import streamlit as st
 from ecoscope.io.earthranger import EarthRangerIO
 
+from shared.exif import read_exif
+from shared.jobs import get_runner, poll_job
+
 # ─── Constants ────────────────────────────────────────────────────────────────
 
 COUNTRY_EVENT_UUIDS = {
@@ -456,18 +459,7 @@ def dest_point(lon: float, lat: float, bearing_deg: float, distance_m: float):
 
 def get_exif_datetime(img_bytes: bytes) -> datetime:
     """Extract DateTimeOriginal from JPEG EXIF; falls back to now()."""
-    try:
-        from PIL import Image
-        from PIL.ExifTags import TAGS
-        img  = Image.open(io.BytesIO(img_bytes))
-        exif = img._getexif()
-        if exif:
-            for tag_id, val in exif.items():
-                if TAGS.get(tag_id) == "DateTimeOriginal":
-                    return datetime.strptime(val, "%Y:%m:%d %H:%M:%S")
-    except Exception:
-        pass
-    return datetime.now()
+    return read_exif(img_bytes).datetime_original or datetime.now()
 
 
 def get_exif_gps_direction(img_bytes: bytes):
@@ -475,24 +467,7 @@ def get_exif_gps_direction(img_bytes: bytes):
     Extract GPSImgDirection from JPEG EXIF (ZMB only).
     Returns bearing in degrees, or None if not present.
     """
-    try:
-        from PIL import Image
-        from PIL.ExifTags import TAGS, GPSTAGS
-        img  = Image.open(io.BytesIO(img_bytes))
-        exif = img._getexif()
-        if not exif:
-            return None
-        for tag_id, val in exif.items():
-            if TAGS.get(tag_id) == "GPSInfo":
-                for gps_tag_id, gps_val in val.items():
-                    if GPSTAGS.get(gps_tag_id) == "GPSImgDirection":
-                        if hasattr(gps_val, "__float__"):
-                            return float(gps_val)
-                        if isinstance(gps_val, tuple) and len(gps_val) == 2:
-                            return gps_val[0] / gps_val[1]
-    except Exception:
-        pass
-    return None
+    return read_exif(img_bytes).gps_img_direction
 
 
 def _excel_bytes(df: pd.DataFrame) -> bytes:
@@ -1220,6 +1195,52 @@ def build_download_zip(renamed_paths: dict, gs_data: pd.DataFrame,
     return buf.read(), len(matched)
 
 
+# ─── Background jobs (shared.jobs) ────────────────────────────────────────────
+
+def rename_images_job(ctx, uploaded_zip, country: str, site: str, initials: str,
+                      images_dir: str, compress: bool = False, quality: int = 85) -> tuple:
+    """
+    Background job: copy the uploaded ZIP to disk and run process_images_zip
+    on it. Returns process_images_zip's (renamed_paths, rename_log,
+    gps_lookup).
+    """
+    zip_tmp_path = None
+    try:
+        # Stream the upload straight to disk in chunks instead of
+        # reading it into a single in-memory bytes blob — for a
+        # ~1GB ZIP that avoids a ~1GB resident copy on top of
+        # whatever the decoded/renamed images need.
+        ctx.progress(0.0, "Reading upload…")
+        uploaded_zip.seek(0)
+        fd, zip_tmp_path = tempfile.mkstemp(suffix=".zip", prefix="er2wb_upload_")
+        with os.fdopen(fd, "wb") as out_f:
+            shutil.copyfileobj(uploaded_zip, out_f)
+
+        def on_progress(p):
+            ctx.check()
+            ctx.progress(p, f"Processing images… {int(p * 100)}%")
+
+        return process_images_zip(zip_tmp_path, country, site, initials, images_dir,
+                                  compress=compress, quality=quality, on_progress=on_progress)
+    finally:
+        # The uploaded ZIP itself is only needed transiently — the
+        # renamed images now live in images_dir, so drop the upload
+        # copy right away regardless of success/failure.
+        if zip_tmp_path and os.path.exists(zip_tmp_path):
+            try:
+                os.remove(zip_tmp_path)
+            except OSError:
+                pass
+        gc.collect()
+
+
+def build_zip_job(ctx, renamed_paths: dict, gs_data: pd.DataFrame,
+                  country: str, site: str, prefix: str = "GS") -> tuple:
+    """Background job: build_download_zip. Returns (zip_bytes, n_matched_images)."""
+    ctx.progress(0.1, "Packaging images + GS Excel…")
+    return build_download_zip(renamed_paths, gs_data, country, site, prefix=prefix)
+
+
 # ─── Streamlit UI ─────────────────────────────────────────────────────────────
 
 def main():
@@ -1740,32 +1761,37 @@ def main():
         elif not initials.strip():
             st.error("No initials — enter your initials in the Step 1 Wildbook platform section.")
         else:
-            progress_bar = st.progress(0, text="Processing images…")
-            zip_tmp_path = None
+            # NOTE: previously cleared images_dir here before every run, which
+            # meant uploading a second (smaller, e.g. workaround-for-timeout)
+            # batch silently wiped out the first batch's results. Batches now
+            # accumulate instead — use "Start Over" to clear everything.
+            #
+            # Renaming runs as a background job polled below, so a large ZIP
+            # doesn't hold the page and a rerun doesn't lose the batch.
+            st.session_state.rename_job = get_runner().submit(
+                rename_images_job, uploaded_zip, country, site, initials,
+                _get_images_tmp_dir(),
+                compress=_do_compress,
+                quality=_compress_quality or 85,
+                label=f"ER2WB rename ({uploaded_zip.name})",
+            )
+
+    if st.session_state.get("rename_job"):
+        job_id = st.session_state.rename_job
+        status = poll_job(job_id)
+        st.session_state.rename_job = None
+        if status is None:
+            st.warning("The rename job is no longer available — click Rename again.")
+        elif status["state"] == "cancelled":
+            st.info("Renaming cancelled — images renamed before the cancel are kept on disk "
+                    "but not added to this batch.")
+        elif status["state"] != "done":
+            st.error(f"❌ {status.get('error') or status['state']}")
+            if status.get("traceback"):
+                st.code(status["traceback"])
+        else:
             try:
-                # Stream the upload straight to disk in chunks instead of
-                # reading it into a single in-memory bytes blob — for a
-                # ~1GB ZIP that avoids a ~1GB resident copy on top of
-                # whatever the decoded/renamed images need.
-                fd, zip_tmp_path = tempfile.mkstemp(suffix=".zip", prefix="er2wb_upload_")
-                with os.fdopen(fd, "wb") as out_f:
-                    shutil.copyfileobj(uploaded_zip, out_f)
-
-                images_dir = _get_images_tmp_dir()
-                # NOTE: previously cleared images_dir here before every run, which
-                # meant uploading a second (smaller, e.g. workaround-for-timeout)
-                # batch silently wiped out the first batch's results. Batches now
-                # accumulate instead — use "Start Over" to clear everything.
-
-                renamed_paths, log, gps_lookup = process_images_zip(
-                    zip_tmp_path,
-                    country, site, initials, images_dir,
-                    compress=_do_compress,
-                    quality=_compress_quality or 85,
-                    on_progress=lambda p: progress_bar.progress(
-                        p, text=f"Processing images… {int(p * 100)}%"),
-                )
-                progress_bar.empty()
+                renamed_paths, log, gps_lookup = get_runner().result(job_id)
 
                 st.session_state.renamed_files.update(renamed_paths)
                 st.session_state.rename_log = pd.concat(
@@ -1800,19 +1826,8 @@ def main():
                                "Wildbook data has been refreshed.")
 
             except Exception as exc:
-                progress_bar.empty()
                 st.error(f"❌ {exc}")
                 st.exception(exc)
-            finally:
-                # The uploaded ZIP itself is only needed transiently — the
-                # renamed images now live in images_dir, so drop the upload
-                # copy right away regardless of success/failure.
-                if zip_tmp_path and os.path.exists(zip_tmp_path):
-                    try:
-                        os.remove(zip_tmp_path)
-                    except OSError:
-                        pass
-                gc.collect()
 
     # ══════════════════════════════════════════════════════════════════════════
     # STEP 4 — Download ZIP
@@ -1827,12 +1842,29 @@ def main():
         st.info("Complete Step 3 (rename images) before building the ZIP.")
 
     if st.button("Build Download ZIP", type="primary", disabled=not can_build):
-        with st.spinner("Packaging images + GS Excel…"):
+        st.session_state.zip_job = get_runner().submit(
+            build_zip_job,
+            dict(st.session_state.renamed_files),
+            st.session_state.gs_data,
+            country, site, prefix=prefix,
+            label="ER2WB download ZIP",
+        )
+
+    if st.session_state.get("zip_job"):
+        job_id = st.session_state.zip_job
+        status = poll_job(job_id)
+        st.session_state.zip_job = None
+        if status is None:
+            st.warning("The packaging job is no longer available — click Build again.")
+        elif status["state"] == "cancelled":
+            st.info("Packaging cancelled.")
+        elif status["state"] != "done":
+            st.error(f"❌ {status.get('error') or status['state']}")
+            if status.get("traceback"):
+                st.code(status["traceback"])
+        else:
             try:
-                zip_bytes, n = build_download_zip(
-                    st.session_state.renamed_files,
-                    st.session_state.gs_data,
-                    country, site, prefix=prefix)
+                zip_bytes, n = get_runner().result(job_id)
                 st.session_state.download_zip = zip_bytes
                 st.session_state.n_matched    = n
 
@@ -6,6 +6,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import json
 import os
+import sys
 import requests as req_lib
 from pandas import json_normalize
 from pathlib import Path
@@ -42,6 +43,13 @@ except ImportError:
     ECOSCOPE_AVAILABLE = False
     st.warning("⚠️ Ecoscope package not available. Please install ecoscope to use this dashboard.")
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_pool import get_er_io  # noqa: E402
+from shared.event_store import load_events  # noqa: E402
+
 def _main_implementation():
     """Main application logic"""
     init_session_state()
@@ -297,18 +305,13 @@ def get_biological_sample_events(start_date=None, end_date=None, max_results=100
     
     try:
         # Create EarthRanger connection using stored credentials
-        er_io = EarthRangerIO(
-            server=st.session_state.server_url,
-            username=st.session_state.username,
-            password=st.session_state.password
-        )
+        er_io = get_er_io(st.session_state.server_url, st.session_state.username, st.session_state.password)
         
-        # Build parameters for ecoscope get_events - OPTIMIZED
+        # Parameters for the shared event store - veterinary events are shared
+        # with the Mortality and Translocation dashboards, so after the first
+        # load only events updated since the last sync are fetched
         kwargs = {
             'event_category': 'veterinary',
-            'include_details': True,
-            'include_notes': False,  # Disabled notes to speed up fetching
-            'max_results': max_results,
             'drop_null_geometry': True  # Drop null geometry to speed up processing
         }
         
@@ -318,11 +321,11 @@ def get_biological_sample_events(start_date=None, end_date=None, max_results=100
         if end_date:
             kwargs['until'] = end_date.strftime('%Y-%m-%dT23:59:59Z')
         
-        # Get events using ecoscope with optimized settings
+        # Read from the event store (refreshes only what changed)
         import warnings
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore")  # Suppress all warnings for speed
-            gdf_events = er_io.get_events(**kwargs)
+            gdf_events = load_events(er_io, **kwargs)
         
         if gdf_events.empty:
             return pd.DataFrame()
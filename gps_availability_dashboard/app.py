@@ -4,12 +4,19 @@ Quick summary of GPS tracking data available by subject group.
 """
 
 import json
+import sys
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from ecoscope.io.earthranger import EarthRangerIO
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_client import ERClient  # noqa: E402
+
 ER_SERVER = "https://twiga.pamdas.org"
 
 MANUFACTURER_DISPLAY = {
@@ -222,36 +229,66 @@ def load_subjects_for_group(username, password, group_id):
 
 
 @st.cache_data(ttl=3600)
-def load_subject_sources_raw(username, password, subject_id):
-    er = get_er_client(username, password)
-    try:
-        result = er.get_subject_sources(subject_id=subject_id)
-        if isinstance(result, list):
-            return result
-        if isinstance(result, pd.DataFrame):
-            return result.to_dict('records')
-        return []
-    except Exception:
-        return []
+def load_source_manufacturers(username, password):
+    """Every subject → source assignment with the source's provider and collar manufacturer.
+
+    One paged subjectsources/ pull and one paged sources/ pull, joined here,
+    instead of a subject/<id>/sources request per giraffe. Shared by the
+    summary and detail tables. One row per (subject_id, source_id).
+    """
+    client = ERClient.from_earthranger_io(get_er_client(username, password), max_workers=4)
+    assignments = pd.DataFrame(client.get_all("subjectsources/", {"include_inactive": "true"}, page_size=500))
+    sources = pd.DataFrame(client.get_all("sources/", page_size=500))
+    return _join_source_manufacturers(assignments, sources)
+
+
+# ── Subject → manufacturer lookup ─────────────────────────────────────────────
+
+SOURCE_MFR_COLUMNS = ['subject_id', 'source_id', 'provider', 'collar_manufacturer']
+
 
+def _ref_id(val):
+    """Related-object id from a subjectsources field (plain id or nested dict)."""
+    if isinstance(val, dict):
+        val = val.get('id')
+    return str(val).strip() if val else None
 
-# ── Parse source assignments ──────────────────────────────────────────────────
 
-def _parse_source_assignments(raw_assignments):
-    providers = []
-    mfr_names = set()
-    for item in raw_assignments:
-        prov = item.get('provider', '')
-        if prov and prov not in EXCLUDED_PROVIDERS:
-            providers.append(prov)
-        additional = item.get('additional') or {}
-        collar_mfr = additional.get('collar_manufacturer', '').strip()
-        if collar_mfr:
-            mfr_names.add(collar_mfr)
-        elif prov and prov not in EXCLUDED_PROVIDERS:
-            mfr_names.add(MANUFACTURER_DISPLAY.get(prov, prov))
-    manufacturer = ", ".join(sorted(mfr_names)) if mfr_names else ""
-    return providers, manufacturer
+def _join_source_manufacturers(assignments, sources):
+    if (assignments.empty or sources.empty or 'id' not in sources.columns
+            or not {'subject', 'source'}.issubset(assignments.columns)):
+        return pd.DataFrame(columns=SOURCE_MFR_COLUMNS)
+
+    links = pd.DataFrame({
+        'subject_id': assignments['subject'].map(_ref_id),
+        'source_id':  assignments['source'].map(_ref_id),
+    }).dropna().drop_duplicates()
+
+    additional = sources['additional'] if 'additional' in sources.columns else pd.Series(None, index=sources.index)
+    info = pd.DataFrame({
+        'source_id':           sources['id'].astype(str),
+        'provider':            sources['provider'].fillna('').astype(str)
+                               if 'provider' in sources.columns else '',
+        'collar_manufacturer': [str(a.get('collar_manufacturer') or '').strip() if isinstance(a, dict) else ''
+                                for a in additional],
+    }).drop_duplicates('source_id')
+
+    return links.merge(info, on='source_id', how='inner')[SOURCE_MFR_COLUMNS].reset_index(drop=True)
+
+
+def _manufacturer_labels(source_mfr, keep_excluded):
+    """Display manufacturer per assignment row.
+
+    collar_manufacturer from the source's additional data wins; otherwise the
+    provider's display name. Excluded providers (relays, Movebank…) are shown
+    raw when keep_excluded, else blank.
+    """
+    provider = source_mfr['provider']
+    excluded = provider.isin(EXCLUDED_PROVIDERS) | provider.eq('')
+    by_provider = provider.map(MANUFACTURER_DISPLAY).fillna(provider)
+    by_provider = by_provider.where(~excluded, provider if keep_excluded else '')
+    collar = source_mfr['collar_manufacturer']
+    return collar.where(collar != '', by_provider)
 
 
 # ── Helper utilities ──────────────────────────────────────────────────────────
@@ -268,12 +305,33 @@ def _fmt_date(val, fmt='%y-%m-%d'):
         return ""
 
 
-def _last_fix_from_subject(subject):
+def _column(df, name, default=None):
+    return df[name] if name in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+
+def _truthy(values):
+    present = values.notna()
+    return present & values.astype(object).where(present, None).map(bool)
+
+
+def _to_utc(values):
+    """Vectorized parse of date values to UTC (NaT where empty or unparseable)."""
+    values = values.where(_truthy(values), None)
+    return pd.to_datetime(values, utc=True, errors='coerce', format='mixed')
+
+
+def _last_fix_column(subjects_df):
+    """First non-empty of last_position_date / last_observation_date per subject."""
+    last_fix = pd.Series(None, index=subjects_df.index, dtype=object)
     for field in ('last_position_date', 'last_observation_date'):
-        val = subject.get(field)
-        if val:
-            return val
-    return None
+        vals = _column(subjects_df, field).astype(object)
+        last_fix = last_fix.where(last_fix.notna(), vals.where(_truthy(vals), None))
+    return last_fix
+
+
+def _total_days_column(start_vals, end_vals):
+    days = (_to_utc(end_vals) - _to_utc(start_vals)).dt.days
+    return days.astype('Int64').astype(object).where(days.notna(), "")
 
 
 def _total_days(start_val, end_val):
@@ -291,93 +349,69 @@ def _total_days(start_val, end_val):
 
 # ── Build per-subject detail rows ─────────────────────────────────────────────
 
-def build_detail_rows(group_name, subjects_df, username, password, load_mfr, embargo_df):
-    embargo_status = format_embargo_status(get_active_embargoes(group_name, embargo_df))
-    rows = []
-    for _, subject in subjects_df.iterrows():
-        sid          = str(subject.get('id', ''))
-        last_fix     = _last_fix_from_subject(subject)
-        is_active    = bool(subject.get('is_active', False))
-        deploy_start = subject.get('created_at')
-        sex          = (subject.get('sex') or '').strip()
-
-        if is_active:
-            deploy_end_fmt = "Active"
-            end_for_days   = last_fix
-        else:
-            end_date       = last_fix or subject.get('updated_at')
-            deploy_end_fmt = _fmt_date(end_date)
-            end_for_days   = end_date
-
-        days = _total_days(deploy_start, end_for_days)
-
-        base = {
-            'Subject':      subject.get('name', sid),
-            'Group':        group_name,
-            'Sex':          sex,
-            'Active':       is_active,
-            'Deploy Start': _fmt_date(deploy_start),
-            'Deploy End':   deploy_end_fmt,
-            'Last Fix':     _fmt_date(last_fix),
-            'Total Days':   days,
-            'Embargo':      embargo_status,
-        }
-
-        if load_mfr:
-            raw = load_subject_sources_raw(username, password, sid)
-            if raw:
-                for item in raw:
-                    prov       = item.get('provider', '')
-                    additional = item.get('additional') or {}
-                    collar_mfr = additional.get('collar_manufacturer', '').strip()
-                    if collar_mfr:
-                        mfr = collar_mfr
-                    elif prov and prov not in EXCLUDED_PROVIDERS:
-                        mfr = MANUFACTURER_DISPLAY.get(prov, prov)
-                    else:
-                        mfr = prov
-                    rows.append({**base, 'Manufacturer': mfr})
-            else:
-                rows.append({**base, 'Manufacturer': ''})
-        else:
-            rows.append(base)
+def build_detail_rows(group_name, subjects_df, source_mfr, embargo_df):
+    """Per-subject detail table for one group.
 
-    return rows
+    source_mfr is load_source_manufacturers() output, or None to leave out the
+    Manufacturer column. Subjects with several sources get one row per source.
+    """
+    embargo_status = format_embargo_status(get_active_embargoes(group_name, embargo_df))
+    subjects_df  = subjects_df.reset_index(drop=True)
+    sid          = _column(subjects_df, 'id', '').astype(str)
+    last_fix     = _last_fix_column(subjects_df)
+    is_active    = _column(subjects_df, 'is_active', False).astype(bool)
+    deploy_start = _column(subjects_df, 'created_at').astype(object)
+    end_date     = last_fix.where(last_fix.notna(), _column(subjects_df, 'updated_at').astype(object))
+    end_for_days = last_fix.where(is_active, end_date)
+
+    detail = pd.DataFrame({
+        'Subject':      _column(subjects_df, 'name').fillna(sid) if 'name' in subjects_df.columns else sid,
+        'Group':        group_name,
+        'Sex':          _column(subjects_df, 'sex', '').fillna('').astype(str).str.strip(),
+        'Active':       is_active,
+        'Deploy Start': deploy_start.map(_fmt_date),
+        'Deploy End':   end_date.map(_fmt_date).where(~is_active, "Active"),
+        'Last Fix':     last_fix.map(_fmt_date),
+        'Total Days':   _total_days_column(deploy_start, end_for_days),
+        'Embargo':      embargo_status,
+    }).reset_index(drop=True)
+
+    if source_mfr is None:
+        return detail
+
+    mfr = pd.DataFrame({
+        'subject_id':   source_mfr['subject_id'],
+        'Manufacturer': _manufacturer_labels(source_mfr, keep_excluded=True),
+    })
+    detail = (detail.assign(subject_id=sid.to_numpy())
+              .merge(mfr, on='subject_id', how='left')
+              .drop(columns='subject_id'))
+    detail['Manufacturer'] = detail['Manufacturer'].fillna('')
+    return detail
 
 
 # ── Summary table builder ─────────────────────────────────────────────────────
 
-def build_summary_row(group_name, subjects_df, username, password, load_mfr, embargo_df):
-    deploy_starts     = []
-    last_fixes        = []
-    all_manufacturers = set()
-    has_active        = False
-
-    for _, subject in subjects_df.iterrows():
-        sid       = str(subject.get('id', ''))
-        is_active = bool(subject.get('is_active', False))
-        if is_active:
-            has_active = True
+def build_summary_row(group_name, subjects_df, source_mfr, embargo_df):
+    """One summary row for a group; source_mfr as for build_detail_rows()."""
+    subjects_df = subjects_df.reset_index(drop=True)
+    has_active = bool(_column(subjects_df, 'is_active', False).astype(bool).any())
 
-        created = subject.get('created_at')
-        if created:
-            try:
-                deploy_starts.append(pd.to_datetime(created))
-            except Exception:
-                pass
+    # Earliest deployment / latest fix — compared in UTC, displayed as stored
+    created = _column(subjects_df, 'created_at').astype(object)
+    last_fix = _last_fix_column(subjects_df)
+    created_utc, last_fix_utc = _to_utc(created), _to_utc(last_fix)
+    data_start = created[created_utc.idxmin()] if created_utc.notna().any() else None
+    data_end   = last_fix[last_fix_utc.idxmax()] if last_fix_utc.notna().any() else None
 
-        lf = _last_fix_from_subject(subject)
-        if lf:
-            try:
-                last_fixes.append(pd.to_datetime(lf))
-            except Exception:
-                pass
-
-        if load_mfr:
-            raw = load_subject_sources_raw(username, password, sid)
-            _, mfr = _parse_source_assignments(raw)
-            if mfr:
-                all_manufacturers.add(mfr)
+    all_manufacturers = set()
+    if source_mfr is not None:
+        in_group = source_mfr[source_mfr['subject_id'].isin(_column(subjects_df, 'id', '').astype(str))]
+        labels = _manufacturer_labels(in_group, keep_excluded=False)
+        per_subject = labels[labels != ''].groupby(in_group['subject_id']).agg(
+            lambda s: ", ".join(sorted(set(s)))
+        )
+        all_manufacturers = set(per_subject)
 
     n_active = int(subjects_df['is_active'].sum()) if 'is_active' in subjects_df.columns else "?"
 
@@ -391,9 +425,6 @@ def build_summary_row(group_name, subjects_df, username, password, load_mfr, emb
     else:
         sex_summary = "—"
 
-    data_start = min(deploy_starts) if deploy_starts else None
-    data_end   = max(last_fixes)   if last_fixes   else None
-
     if has_active:
         deploy_end = "Active"
     elif data_end:
@@ -415,7 +446,7 @@ def build_summary_row(group_name, subjects_df, username, password, load_mfr, emb
         'Total Days':    _total_days(data_start, data_end),
         'Deploy Start':  _fmt_date(data_start),
         'Deploy End':    deploy_end,
-        'Manufacturers': ", ".join(sorted(all_manufacturers)) if all_manufacturers else ("—" if not load_mfr else ""),
+        'Manufacturers': ", ".join(sorted(all_manufacturers)) if all_manufacturers else ("—" if source_mfr is None else ""),
         'Embargo':       embargo_status,
     }
 
@@ -593,12 +624,19 @@ def _main_impl():
     st.markdown("---")
     st.subheader("📊 Group Summary")
 
-    summary_rows = []
-    with st.spinner("Loading deployment info for summary…"):
-        for group_name, subjects_df in all_subjects.items():
-            summary_rows.append(
-                build_summary_row(group_name, subjects_df, username, password, load_mfr, embargo_df)
-            )
+    source_mfr = None
+    if load_mfr:
+        with st.spinner("Loading GPS manufacturer info…"):
+            try:
+                source_mfr = load_source_manufacturers(username, password)
+            except Exception as e:
+                st.warning(f"Could not load GPS manufacturer info: {e}")
+                source_mfr = pd.DataFrame(columns=SOURCE_MFR_COLUMNS)
+
+    summary_rows = [
+        build_summary_row(group_name, subjects_df, source_mfr, embargo_df)
+        for group_name, subjects_df in all_subjects.items()
+    ]
 
     summary_df = pd.DataFrame(summary_rows)
     if not load_mfr:
@@ -644,21 +682,16 @@ def _main_impl():
     st.markdown("---")
     st.subheader("📋 Subject Detail")
 
-    detail_rows = []
-    with st.spinner("Loading per-subject deployment details…"):
-        for group_name, subjects_df in all_subjects.items():
-            detail_rows.extend(
-                build_detail_rows(group_name, subjects_df, username, password, load_mfr, embargo_df)
-            )
+    detail_df = pd.concat(
+        [build_detail_rows(group_name, subjects_df, source_mfr, embargo_df)
+         for group_name, subjects_df in all_subjects.items()],
+        ignore_index=True,
+    )
 
-    if not detail_rows:
+    if detail_df.empty:
         st.info("No subject detail data available.")
         return
 
-    detail_df = pd.DataFrame(detail_rows)
-    if not load_mfr:
-        detail_df = detail_df.drop(columns=['Manufacturer'], errors='ignore')
-
     st.dataframe(detail_df, use_container_width=True, hide_index=True)
 
     # Download
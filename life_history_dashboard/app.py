@@ -7,15 +7,23 @@ Covers veterinary, translocation, monitoring/tag-update, and survey events.
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+import hashlib
 import json
+import sys
+import threading
+from importlib.util import find_spec
 from pathlib import Path
 
-# Ecoscope imports for EarthRanger integration
-try:
-    from ecoscope.io.earthranger import EarthRangerIO
-    ECOSCOPE_AVAILABLE = True
-except ImportError:
-    ECOSCOPE_AVAILABLE = False
+# Ecoscope is needed for EarthRanger logins (made through shared.er_pool)
+ECOSCOPE_AVAILABLE = find_spec("ecoscope") is not None
+
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_client import ERClient  # noqa: E402
+from shared.er_pool import get_er_io  # noqa: E402
+from shared.event_store import CACHE_DIR, private_dir  # noqa: E402
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Configuration
@@ -102,11 +110,7 @@ def authenticate_earthranger():
             return
         with st.spinner("🔐 Authenticating with EarthRanger…"):
             try:
-                er_io = EarthRangerIO(
-                    server=st.session_state.lh_server_url,
-                    username=username,
-                    password=password,
-                )
+                er_io = get_er_io(st.session_state.lh_server_url, username, password)
                 # Quick connectivity test
                 er_io.get_subjects(limit=1)
                 st.session_state.lh_authenticated = True
@@ -121,11 +125,7 @@ def authenticate_earthranger():
 
 def get_er_connection():
     """Return an authenticated EarthRangerIO connection."""
-    return EarthRangerIO(
-        server=st.session_state.lh_server_url,
-        username=st.session_state.lh_username,
-        password=st.session_state.lh_password,
-    )
+    return get_er_io(st.session_state.lh_server_url, st.session_state.lh_username, st.session_state.lh_password)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -139,7 +139,7 @@ def load_subjects(_username: str, _password: str):
     Returns a DataFrame with columns: subject_id, name, subject_subtype,
     is_active, subject_group_label, _group_debug.
     """
-    er_io = EarthRangerIO(server=SERVER_URL, username=_username, password=_password)
+    er_io = get_er_io(SERVER_URL, _username, _password)
 
     # ------------------------------------------------------------------
     # 1. Fetch subjects
@@ -251,60 +251,56 @@ def load_subjects(_username: str, _password: str):
     return small_df
 
 
+# Events per page. Kept small: large pages time out (504) on related_subjects
+# queries, so throughput comes from fetching a few pages at once instead.
+EVENT_PAGE_SIZE = 50
+# Concurrent page requests per subject — bounded so the server isn't pushed
+# back into 504s; ERClient retries a 504 page with backoff
+EVENT_PAGE_WORKERS = 4
+# Background warm-up of the most-viewed individuals after login
+PREFETCH_TOP_N = 5
+VIEW_COUNTS_FILE = CACHE_DIR / "life_history_views.json"
+
+
 @st.cache_data(ttl=1800, show_spinner=False)
 def load_events_for_subject(_username: str, _password: str, subject_id: str):
     """
     Fetch all events linked to a specific subject UUID via the ER REST API.
 
-    Uses er_io._get() with manual pagination (page_size=100) instead of
-    get_objects_multithreaded() to avoid 504 timeout errors caused by the
-    large default page size and parallel thread load on the server.
+    The first page (EVENT_PAGE_SIZE events) reports the total `count`; the
+    remaining pages are then requested EVENT_PAGE_WORKERS at a time and
+    reassembled in order. Small pages and a bounded pool avoid the 504
+    timeouts that big pages / unbounded get_objects_multithreaded() caused.
+
+    Makes no st.* calls, so prefetch_subject_events() can warm the cache from
+    a background thread.
 
     Returns (df, debug_lines).
     """
-    er_io = EarthRangerIO(server=SERVER_URL, username=_username, password=_password)
+    er_io = get_er_io(SERVER_URL, _username, _password)
+    client = ERClient.from_earthranger_io(er_io, max_workers=EVENT_PAGE_WORKERS)
     debug: list[str] = []
 
     filter_payload = json.dumps({"related_subjects": [subject_id]})
     debug.append(f"Querying ER for subject {subject_id}")
     debug.append(f"Filter: {filter_payload}")
 
-    PAGE_SIZE = 50
     all_results: list[dict] = []
-    page = 1
-
-    while True:
-        try:
-            response = er_io._get(
-                "activity/events/",
-                params={
-                    "filter": filter_payload,
-                    "page_size": PAGE_SIZE,
-                    "page": page,
-                },
-            )
-            # _get() returns parsed JSON — either a list or {"results": [...], "count": N}
-            if isinstance(response, list):
-                results = response
-                more_pages = False
-            elif isinstance(response, dict):
-                results = response.get("results") or []
-                total_count = response.get("count", 0)
-                more_pages = page * PAGE_SIZE < total_count
-            else:
-                results = []
-                more_pages = False
-
+    pages = client.iter_pages(
+        "activity/events/",
+        {"filter": filter_payload},
+        page_size=EVENT_PAGE_SIZE,
+        max_page_size=EVENT_PAGE_SIZE,
+    )
+    page = 0
+    try:
+        for page, results in enumerate(pages, start=1):
             debug.append(f"  Page {page}: {len(results)} events")
             all_results.extend(results)
-
-            if not results or not more_pages or len(results) < PAGE_SIZE:
-                break
-            page += 1
-
-        except Exception as exc:
-            debug.append(f"  Page {page} ERROR: {exc}")
-            break
+    except Exception as exc:
+        # Keep whatever arrived before the failure
+        debug.append(f"  Page {page + 1} ERROR: {exc}")
+    debug.append(f"Requests: {client.stats['requests']} ({client.stats['retries']} retried)")
 
     debug.append(f"Total raw events fetched: {len(all_results)}")
 
@@ -329,6 +325,61 @@ def load_events_for_subject(_username: str, _password: str, subject_id: str):
     return combined, debug
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Most-viewed prefetch
+# ──────────────────────────────────────────────────────────────────────────────
+
+_views_lock = threading.Lock()
+
+
+def _user_key(username: str) -> str:
+    """View counts are stored per user under a hash, not the username itself."""
+    return hashlib.sha256(f"{SERVER_URL}|{username}".encode()).hexdigest()[:16]
+
+
+def _read_view_counts() -> dict:
+    try:
+        private_dir(VIEW_COUNTS_FILE.parent)
+        return json.loads(VIEW_COUNTS_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def record_subject_view(username: str, subject_id: str) -> None:
+    """Count one view of a subject by this user (persisted across restarts)."""
+    with _views_lock:
+        counts = _read_view_counts()
+        user_counts = counts.setdefault(_user_key(username), {})
+        user_counts[subject_id] = user_counts.get(subject_id, 0) + 1
+        try:
+            private_dir(VIEW_COUNTS_FILE.parent)
+            tmp = VIEW_COUNTS_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(counts))
+            tmp.replace(VIEW_COUNTS_FILE)
+        except OSError:
+            pass   # counts are only a prefetch hint
+
+
+def most_viewed_subjects(username: str, n: int = PREFETCH_TOP_N) -> list:
+    """This user's n most-viewed subject ids, most viewed first."""
+    counts = _read_view_counts().get(_user_key(username), {})
+    return sorted(counts, key=counts.get, reverse=True)[:n]
+
+
+def prefetch_subject_events(username: str, password: str, subject_ids: list) -> threading.Thread:
+    """Warm load_events_for_subject's cache for subject_ids on a daemon thread."""
+    def _run():
+        for sid in subject_ids:
+            try:
+                load_events_for_subject(username, password, sid)
+            except Exception:
+                pass   # a failed warm-up just means a normal load later
+
+    thread = threading.Thread(target=_run, name="life-history-prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Display helpers
 # ──────────────────────────────────────────────────────────────────────────────
@@ -478,6 +529,7 @@ def main():
         if st.button("🔓 Disconnect", key="lh_logout"):
             for k in ["lh_authenticated", "lh_username", "lh_password"]:
                 st.session_state[k] = "" if k != "lh_authenticated" else False
+            st.session_state.pop("lh_prefetch_started", None)
             st.cache_data.clear()
             st.rerun()
 
@@ -494,6 +546,22 @@ def main():
         st.error("No subjects found. Please check your EarthRanger connection.")
         return
 
+    # ── Background prefetch of this user's most-viewed individuals ────────────
+    with st.sidebar:
+        prefetch = st.checkbox(
+            "⚡ Prefetch my most-viewed individuals",
+            value=True,
+            key="lh_prefetch",
+            help=f"Loads events for your {PREFETCH_TOP_N} most-viewed individuals in the background after login.",
+        )
+    if prefetch and not st.session_state.get("lh_prefetch_started"):
+        st.session_state.lh_prefetch_started = True
+        known = set(subjects_df["subject_id"].astype(str))
+        top_ids = [sid for sid in most_viewed_subjects(st.session_state.lh_username) if sid in known]
+        if top_ids:
+            prefetch_subject_events(st.session_state.lh_username, st.session_state.lh_password, top_ids)
+            st.sidebar.caption(f"Warming events for {len(top_ids)} individual(s) in the background…")
+
     # ── Subject group debug ───────────────────────────────────────────────────
     with st.expander("🐛 Debug: subject group loading", expanded=False):
         debug_text = subjects_df["_group_debug"].iloc[0] if "_group_debug" in subjects_df.columns else "No debug info"
@@ -577,6 +645,9 @@ def main():
     selected_row = filtered_subjects[filtered_subjects["_label"] == selected_label].iloc[0]
     subject_id = str(selected_row["subject_id"])
     subject_name = selected_row["name"]
+    if st.session_state.get("lh_last_viewed") != subject_id:
+        st.session_state.lh_last_viewed = subject_id
+        record_subject_view(st.session_state.lh_username, subject_id)
 
     # ── Subject summary banner ────────────────────────────────────────────────
     st.markdown("---")
@@ -599,7 +670,7 @@ def main():
         st.write(f"📡 Querying EarthRanger events endpoint")
         st.write(f"🔑 Subject UUID: `{subject_id}`")
         st.write(f"🔗 Filter: `{{\"related_subjects\": [\"{subject_id}\"]}}`")
-        st.write("⏳ Fetching pages of 50 events at a time — please wait…")
+        st.write(f"⏳ Fetching {EVENT_PAGE_SIZE} events per page, {EVENT_PAGE_WORKERS} pages at a time — please wait…")
         subject_events, event_debug = load_events_for_subject(
             _username=st.session_state.lh_username,
             _password=st.session_state.lh_password,
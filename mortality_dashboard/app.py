@@ -6,6 +6,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import json
 import os
+import sys
 from pathlib import Path
 
 # Ecoscope imports for EarthRanger integration
@@ -16,6 +17,12 @@ except ImportError:
     ECOSCOPE_AVAILABLE = False
     st.warning("⚠️ Ecoscope package not available. Please install ecoscope to use this dashboard.")
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.event_store import load_events  # noqa: E402
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -120,12 +127,9 @@ def get_mortality_events(start_date=None, end_date=None, _debug=False):
             password=st.session_state.password
         )
         
-        # Build parameters for ecoscope get_events
+        # Parameters for the shared event store (details and notes always included)
         kwargs = {
             'event_category': 'veterinary',
-            'include_details': True,
-            'include_notes': True,
-            'max_results': 1000,
             'drop_null_geometry': False
         }
         
@@ -148,8 +152,9 @@ def get_mortality_events(start_date=None, end_date=None, _debug=False):
             if _debug:
                 st.write(f"Debug: until = {until_str}")
         
-        # Get events using ecoscope (all veterinary events)
-        gdf_events = er_io.get_events(**kwargs)
+        # All veterinary events, served from the on-disk store shared with the
+        # Genetic and Translocation dashboards (only changes are refetched)
+        gdf_events = load_events(er_io, **kwargs)
         
         if gdf_events.empty:
             return pd.DataFrame()
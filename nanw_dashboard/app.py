@@ -3,13 +3,24 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import math
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 from ecoscope.io.earthranger import EarthRangerIO
 from pandas import json_normalize, to_datetime
 import requests
 import os
+import sys
 from pathlib import Path
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_client import ERClient  # noqa: E402
+from shared.er_pool import get_er_io  # noqa: E402
+from shared.event_store import load_events  # noqa: E402
+
 # Try to load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -173,12 +184,11 @@ def load_species_data(event_type, since, until, event_category="monitoring_nanw"
         password=password
     )
 
-    events = er.get_events(
+    events = load_events(
+        er,
         event_category=event_category,
         since=since,
-        until=until,
-        include_details=True,
-        include_notes=False
+        until=until
     )
     flat = json_normalize(events.to_dict(orient="records"))
 
@@ -288,6 +298,127 @@ filtered_ele = filter_by_date(df_ele)
 
 
 #### MOVEMENT STATISTICS SECTION (giraffe only) #######################
+EARTH_RADIUS_KM = 6371
+# Concurrent per-subject observation requests
+TRACK_FETCH_WORKERS = 8
+TRACK_COLUMNS = ["subject_id", "fixtime", "lat", "lon"]
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_subject_track(subject_id, since, until):
+    """GPS fixes for one subject in [since, until] as subject_id/fixtime/lat/lon.
+
+    Cached per (subject, date window). Safe to call from worker threads — it
+    makes no st.* calls.
+    """
+    er = get_er_io(EARTHRANGER_SERVER, username, password)
+    # A failing subject is reported and skipped, so don't sit in long retries
+    client = ERClient.from_earthranger_io(er, max_workers=1, max_retries=1)
+    params = {"subject_id": subject_id, "since": since, "until": until, "page_size": 4000}
+    # observations/ pages with a cursor, so follow `next` links
+    fixes = [
+        (obs.get("recorded_at"), loc.get("latitude"), loc.get("longitude"))
+        for page in client.iter_next("observations/", params)
+        for obs in page
+        if isinstance(loc := obs.get("location"), dict)
+    ]
+    track = pd.DataFrame(fixes, columns=["fixtime", "lat", "lon"])
+    track["fixtime"] = pd.to_datetime(track["fixtime"], utc=True, format="ISO8601")
+    track[["lat", "lon"]] = track[["lat", "lon"]].apply(pd.to_numeric, errors="coerce").astype(float)
+    track = track.dropna().sort_values("fixtime", kind="stable")
+    track.insert(0, "subject_id", subject_id)
+    return track.reset_index(drop=True)
+
+
+def load_tracks(subject_ids, since, until):
+    """Fetch every subject's track concurrently.
+
+    Returns (tracks, errors): all fixes stacked in subject_ids order, and
+    {subject_id: error message} for subjects whose request failed.
+    """
+    tracks, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=TRACK_FETCH_WORKERS) as pool:
+        futures = {pool.submit(load_subject_track, sid, since, until): sid for sid in subject_ids}
+        for future in as_completed(futures):
+            sid = futures[future]
+            try:
+                tracks[sid] = future.result()
+            except Exception as exc:
+                errors[sid] = str(exc)
+    ordered = [tracks[sid] for sid in subject_ids if sid in tracks and not tracks[sid].empty]
+    stacked = pd.concat(ordered, ignore_index=True) if ordered else pd.DataFrame(columns=TRACK_COLUMNS)
+    return stacked, errors
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works elementwise on arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def core_hull_area_km2(tracks, core=0.95):
+    """Per-subject area (km²) of the convex hull around the `core` share of fixes
+    closest to the subject's centroid (at least 3 points; 0 when degenerate).
+    """
+    from scipy.spatial import ConvexHull
+
+    sid = tracks["subject_id"]
+    centroid = tracks.groupby(sid, sort=False)[["lat", "lon"]].transform("mean")
+    ranked = tracks.assign(_dist=haversine_km(centroid["lat"], centroid["lon"], tracks["lat"], tracks["lon"]))
+    ranked = ranked.sort_values(["subject_id", "_dist"], kind="stable")
+    n_core = ranked.groupby("subject_id")["_dist"].transform("size").mul(core).astype(int).clip(lower=3)
+    ranked = ranked[ranked.groupby("subject_id").cumcount() < n_core]
+
+    areas = {}
+    for subject_id, pts in ranked.groupby("subject_id", sort=False):
+        try:
+            hull = ConvexHull(pts[["lon", "lat"]].to_numpy())
+            areas[subject_id] = hull.volume * (111 * 111)  # 2D volume is area; deg² → km²
+        except Exception:
+            areas[subject_id] = 0
+    return pd.Series(areas, dtype=float)
+
+
+def movement_statistics(tracks):
+    """Distance, daily rate and 95% core home range for every subject in `tracks`.
+
+    tracks holds the stacked fixes of all subjects (TRACK_COLUMNS); subjects
+    with fewer than 2 fixes are dropped. One row per subject, in input order.
+    """
+    counts = tracks.groupby("subject_id", sort=False).size()
+    tracks = tracks[tracks["subject_id"].isin(counts.index[counts >= 2])]
+    if tracks.empty:
+        return pd.DataFrame(columns=["subject_id", "total_distance_km", "days_active",
+                                     "avg_km_per_day", "home_range_km2", "n_observations"])
+    tracks = tracks.sort_values(["subject_id", "fixtime"], kind="stable").reset_index(drop=True)
+
+    # Step lengths between consecutive fixes of the same subject
+    sid = tracks["subject_id"]
+    same_subject = sid.eq(sid.shift())
+    steps = haversine_km(tracks["lat"].shift(), tracks["lon"].shift(), tracks["lat"], tracks["lon"])
+    tracks["step_km"] = np.where(same_subject, steps, 0.0)
+
+    per_subject = tracks.groupby("subject_id", sort=False).agg(
+        total_distance_km=("step_km", "sum"),
+        first_fix=("fixtime", "min"),
+        last_fix=("fixtime", "max"),
+        n_observations=("fixtime", "size"),
+    )
+    per_subject["days_active"] = (per_subject["last_fix"] - per_subject["first_fix"]).dt.days.clip(lower=1)
+    per_subject["avg_km_per_day"] = per_subject["total_distance_km"] / per_subject["days_active"]
+
+    area = core_hull_area_km2(tracks)
+    many = per_subject["n_observations"] >= 3
+    per_subject["home_range_km2"] = area.reindex(per_subject.index).where(many, 0).fillna(0)
+
+    order = [s for s in counts.index if s in per_subject.index]
+    return per_subject.loc[order].reset_index()[[
+        "subject_id", "total_distance_km", "days_active", "avg_km_per_day",
+        "home_range_km2", "n_observations",
+    ]]
+
+
 def render_movement_statistics(id_to_name, start_date, end_date):
     st.subheader("📊 Movement Statistics")
     st.info("Calculate distance traveled and home ranges for tagged giraffes during the selected date range.")
@@ -295,134 +426,38 @@ def render_movement_statistics(id_to_name, start_date, end_date):
     if st.button("🔄 Calculate Movement Statistics", use_container_width=True):
         with st.spinner("Fetching trajectory data and calculating statistics..."):
             try:
-                import numpy as np
-                from shapely.geometry import MultiPoint
-                from scipy.spatial import ConvexHull
-
-                er = EarthRangerIO(
-                    server=EARTHRANGER_SERVER,
-                    username=username,
-                    password=password
-                )
-
-                hoanib_subject_ids = [s["id"] for s in hoanib_gps_subjects]
-                subjects_to_process = hoanib_subject_ids
+                subjects_to_process = [s["id"] for s in hoanib_gps_subjects]
 
                 st.info(f"Checking {len(subjects_to_process)} GPS-collared Hoanib giraffe(s) for observations...")
 
                 since_str = datetime.combine(start_date, datetime.min.time()).isoformat() + "Z"
                 until_str = datetime.combine(end_date, datetime.max.time()).isoformat() + "Z"
 
-                movement_stats = []
+                tracks, errors = load_tracks(subjects_to_process, since_str, until_str)
+                n_fixes = tracks.groupby("subject_id").size()
 
                 for subject_id in subjects_to_process:
-                    try:
-                        subject_name = id_to_name.get(subject_id, f"Unknown ({subject_id})")
-
-                        try:
-                            trajectories = er.get_subject_observations(
-                                subject_ids=[subject_id],
-                                since=since_str,
-                                until=until_str
-                            )
-                        except Exception as api_error:
-                            error_msg = str(api_error)
-                            if "Expecting value" in error_msg or "JSON" in error_msg:
-                                st.info(f"⏭️ Skipping {subject_name}: No GPS data available (empty API response)")
-                            else:
-                                st.warning(f"⚠️ API error for {subject_name}: {error_msg}")
-                            continue
-
-                        if trajectories is None:
-                            st.info(f"⏭️ Skipping {subject_name}: No GPS data returned from API")
-                            continue
-
-                        gdf = trajectories
-
-                        if gdf.empty:
-                            st.info(f"⏭️ Skipping {subject_name}: No GPS observations in date range")
-                            continue
-
-                        n_obs = len(gdf)
-
-                        if n_obs < 2:
-                            st.info(f"⏭️ Skipping {subject_name}: Only {n_obs} GPS point(s) in date range (need at least 2)")
-                            continue
-
-                        gdf = gdf.sort_values('fixtime')
-
-                        def haversine_distance(lat1, lon1, lat2, lon2):
-                            """Calculate distance between two points in km"""
-                            R = 6371  # Earth radius in km
-                            lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-                            dlat = lat2 - lat1
-                            dlon = lon2 - lon1
-                            a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-                            c = 2 * np.arcsin(np.sqrt(a))
-                            return R * c
-
-                        lats = gdf.geometry.y.values
-                        lons = gdf.geometry.x.values
-
-                        distances = []
-                        for i in range(n_obs - 1):
-                            dist = haversine_distance(lats[i], lons[i], lats[i+1], lons[i+1])
-                            distances.append(dist)
-
-                        total_distance = sum(distances)
-
-                        first_date = pd.to_datetime(gdf['fixtime'].min())
-                        last_date = pd.to_datetime(gdf['fixtime'].max())
-                        days_active = max(1, (last_date - first_date).days)
-
-                        avg_km_per_day = total_distance / days_active
-
-                        coords = np.column_stack([gdf.geometry.x.values, gdf.geometry.y.values])
-
-                        if len(coords) < 3:
-                            home_range_area = 0
+                    subject_name = id_to_name.get(subject_id, f"Unknown ({subject_id})")
+                    n_obs = int(n_fixes.get(subject_id, 0))
+                    if subject_id in errors:
+                        error_msg = errors[subject_id]
+                        if "Expecting value" in error_msg or "JSON" in error_msg:
+                            st.info(f"⏭️ Skipping {subject_name}: No GPS data available (empty API response)")
                         else:
-                            points = MultiPoint(coords)
-                            centroid = points.centroid
-
-                            distances_from_center = []
-                            for coord in coords:
-                                dist = haversine_distance(centroid.y, centroid.x, coord[1], coord[0])
-                                distances_from_center.append((dist, coord))
-
-                            distances_from_center.sort(key=lambda x: x[0])
-                            n_points_95 = max(3, int(len(distances_from_center) * 0.95))
-                            coords_95 = [coord for _, coord in distances_from_center[:n_points_95]]
-
-                            if len(coords_95) >= 3:
-                                try:
-                                    hull = ConvexHull(coords_95)
-                                    area_deg2 = hull.volume  # In 2D, volume is actually area
-                                    home_range_area = area_deg2 * (111 * 111)  # Convert to km²
-                                except Exception:
-                                    home_range_area = 0
-                            else:
-                                home_range_area = 0
-
-                        movement_stats.append({
-                            'subject_id': subject_id,
-                            'subject_name': subject_name,
-                            'total_distance_km': total_distance,
-                            'days_active': days_active,
-                            'avg_km_per_day': avg_km_per_day,
-                            'home_range_km2': home_range_area,
-                            'n_observations': n_obs
-                        })
-
-                    except Exception as e:
-                        st.warning(f"Could not process data for {subject_name}: {str(e)}")
-                        continue
-
-                if not movement_stats:
+                            st.warning(f"⚠️ API error for {subject_name}: {error_msg}")
+                    elif n_obs == 0:
+                        st.info(f"⏭️ Skipping {subject_name}: No GPS observations in date range")
+                    elif n_obs < 2:
+                        st.info(f"⏭️ Skipping {subject_name}: Only {n_obs} GPS point(s) in date range (need at least 2)")
+
+                stats_df = movement_statistics(tracks)
+                stats_df.insert(1, "subject_name", [
+                    id_to_name.get(sid, f"Unknown ({sid})") for sid in stats_df["subject_id"]
+                ])
+
+                if stats_df.empty:
                     st.warning("No movement data available for the selected date range.")
                 else:
-                    stats_df = pd.DataFrame(movement_stats)
-
                     st.subheader("🏆 Movement Champions")
 
                     col_stat1, col_stat2 = st.columns(2)
@@ -488,7 +523,7 @@ def render_movement_statistics(id_to_name, start_date, end_date):
 
             except ImportError as e:
                 st.error(f"Missing required package: {str(e)}")
-                st.info("Please ensure you have the required packages installed: numpy, shapely, scipy")
+                st.info("Please ensure you have the required packages installed: numpy, scipy")
             except Exception as e:
                 import traceback
                 st.error(f"Error calculating movement statistics: {str(e)}")
@@ -10,9 +10,17 @@ from ecoscope.io.earthranger import EarthRangerIO
 import geopandas as gpd
 import tempfile
 import os
+import sys
 import zipfile
+from pathlib import Path
 from shapely.geometry import LineString, shape
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.jobs import get_runner, poll_job  # noqa: E402
+
 # Optional imports for map
 try:
     import folium
@@ -279,6 +287,268 @@ def download_patrol_tracks(er_io, patrol_type_value, since, until, subject_name=
         import traceback
         return None, f"{str(e)}\n\n{traceback.format_exc()}"
 
+def _export_basename(patrol_type, start_date, end_date):
+    """Shapefile name: patroltype_yymmdd_yymmdd"""
+    start_str = start_date.strftime('%y%m%d')
+    end_str = end_date.strftime('%y%m%d')
+    # Clean patrol type for filename (remove spaces, special chars)
+    if patrol_type:
+        if isinstance(patrol_type, list):
+            # Multiple patrol types - join them
+            patrol_type_clean = "_".join("".join(c if c.isalnum() else "_" for c in pt) for pt in patrol_type[:3])  # Limit to first 3 to avoid too long filename
+        else:
+            patrol_type_clean = "".join(c if c.isalnum() else "_" for c in patrol_type)
+    else:
+        patrol_type_clean = "all_patrols"
+    return f"{patrol_type_clean}_{start_str}_{end_str}"
+
+def _shapefile_zip(gdf, base_filename):
+    """Zipped shapefile (.shp/.shx/.dbf/.prj/.cpg) of the patrol tracks, as bytes"""
+    # Prepare shapefile-friendly column names (max 10 chars)
+    # Rename columns: patrol → ptrl to save characters
+    gdf_export = gdf.copy()
+    column_mapping = {
+        'patrol_id': 'ptrl_id',
+        'patrol_sn': 'ptrl_sn',
+        'patrol_type': 'ptrl_type',
+        'subject_id': 'subj_id',
+        'subject_name': 'subj_name',
+        'patrol_start_time': 'ptrl_start',
+        'patrol_end_time': 'ptrl_end',
+        'distance_km': 'dist_km',
+        'num_points': 'num_pts'
+    }
+    # Only rename columns that exist
+    gdf_export = gdf_export.rename(columns={k: v for k, v in column_mapping.items() if k in gdf_export.columns})
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shapefile_path = os.path.join(tmpdir, f"{base_filename}.shp")
+        gdf_export.to_file(shapefile_path)
+
+        # Create a zip file with all shapefile components
+        zip_path = os.path.join(tmpdir, f"{base_filename}.zip")
+
+        with zipfile.ZipFile(zip_path, 'w') as zipf:
+            for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
+                file_path = shapefile_path.replace('.shp', ext)
+                if os.path.exists(file_path):
+                    # Add files to zip with the base filename
+                    zipf.write(file_path, f"{base_filename}{ext}")
+
+        # Read the zip file for download
+        with open(zip_path, 'rb') as f:
+            return f.read()
+
+def download_tracks_job(ctx, er_io, patrol_type_value, since, until, subject_name, base_filename):
+    """
+    Background job (shared.jobs): download the patrol tracks and build the
+    shapefile ZIP.
+
+    Returns (tracks GeoDataFrame or None, download error, ZIP bytes or None,
+    shapefile error).
+    """
+    ctx.progress(0.1, "Downloading patrol tracks...")
+    gdf, error = download_patrol_tracks(er_io, patrol_type_value, since, until, subject_name=subject_name)
+    if error or gdf is None:
+        return None, error, None, None
+    ctx.check()
+    ctx.progress(0.9, "Writing shapefile...")
+    try:
+        return gdf, None, _shapefile_zip(gdf, base_filename), None
+    except Exception as e:
+        return gdf, None, None, str(e)
+
+def _event_geometry(row):
+    """Point geometry from an event's geojson"""
+    if 'geojson' in row and row['geojson']:
+        try:
+            if isinstance(row['geojson'], dict):
+                return shape(row['geojson'])
+        except:
+            pass
+    return None
+
+def extract_events_job(ctx, er_io, patrol_ids, since, until, patrol_type):
+    """
+    Background job (shared.jobs): fetch the events of every segment of the
+    downloaded patrols with full event details, and unnest them for display
+    and export.
+
+    Returns (events GeoDataFrame or None, list of warning messages).
+    """
+    warnings = []
+    # Get the original patrols dataframe with patrol_segments
+    # Use patrol_type_value instead of patrol_type since we have the value, not UUID
+    patrols_df = er_io.get_patrols(
+        since=since,
+        until=until,
+        patrol_type_value=patrol_type,
+        status=['done', 'active']
+    )
+
+    # Filter to only the patrol IDs we have in our downloaded tracks
+    patrols_df = patrols_df[patrols_df['id'].isin(patrol_ids)].copy()
+    if patrols_df.empty:
+        warnings.append("No matching patrols found")
+        return None, warnings
+
+    # Extract all patrol segment IDs from the matched patrols
+    # Also create mappings for patrol_id, patrol_name, and subject/leader name
+    patrol_segment_ids = []
+    segment_to_patrol_map = {}  # Maps segment_id -> patrol_id
+    segment_to_patrol_name_map = {}  # Maps segment_id -> patrol_name/title
+    segment_to_subject_map = {}  # Maps segment_id -> subject/leader name
+
+    for _, patrol in patrols_df.iterrows():
+        patrol_id = patrol['id']
+        patrol_name = patrol.get('title', patrol.get('serial_number', ''))
+
+        # Extract leader/subject name from first segment
+        leader_name = ''
+        for segment in patrol.get('patrol_segments', []):
+            if 'id' in segment:
+                segment_id = segment['id']
+                patrol_segment_ids.append(segment_id)
+                segment_to_patrol_map[segment_id] = patrol_id
+                segment_to_patrol_name_map[segment_id] = patrol_name
+
+                # Extract leader name if not already extracted
+                if not leader_name and 'leader' in segment:
+                    leader_data = segment['leader']
+                    if isinstance(leader_data, dict):
+                        leader_name = leader_data.get('name', leader_data.get('username', ''))
+                    else:
+                        leader_name = str(leader_data) if leader_data else ''
+
+                segment_to_subject_map[segment_id] = leader_name
+
+    if not patrol_segment_ids:
+        warnings.append("No patrol segments found")
+        return None, warnings
+
+    # Get events for each patrol segment with full details
+    all_events = []
+    n_segments = len(patrol_segment_ids)
+    for idx, segment_id in enumerate(patrol_segment_ids):
+        ctx.check()
+        ctx.progress(idx / n_segments, f"Processing segment {idx + 1}/{n_segments}...")
+        try:
+            # Use get_patrol_segment_events which correctly filters to patrol segment
+            events_df = er_io.get_patrol_segment_events(
+                patrol_segment_id=segment_id,
+                include_details=True,
+                include_notes=True,
+                include_related_events=False,
+                include_files=False
+            )
+            if events_df.empty:
+                continue
+
+            # Add patrol_id, patrol_name, and patrol_leader from our mappings
+            events_df['patrol_id'] = segment_to_patrol_map.get(segment_id, '')
+            events_df['patrol_name'] = segment_to_patrol_name_map.get(segment_id, '')
+            events_df['patrol_leader'] = segment_to_subject_map.get(segment_id, '')
+
+            # Convert to GeoDataFrame with geometry from geojson, dropping events without geometry
+            events_df['geometry'] = events_df.apply(_event_geometry, axis=1)
+            events_gdf = events_df[events_df['geometry'].notna()].copy()
+            if events_gdf.empty:
+                continue
+            events_gdf = gpd.GeoDataFrame(events_gdf, geometry='geometry', crs=4326)
+
+            # Now fetch full details for each event by event ID (only if 'id' column exists)
+            if 'id' in events_gdf.columns:
+                # Filter out any None or NaN values
+                event_ids = [eid for eid in events_gdf['id'].tolist() if eid and pd.notna(eid)]
+                if event_ids:
+                    ctx.progress(idx / n_segments, f"Segment {idx + 1}/{n_segments}: Fetching details for {len(event_ids)} events...")
+
+                    # Batch event IDs to avoid URL length limits (414 error)
+                    # Process in chunks of 50 event IDs at a time
+                    batch_size = 50
+                    detailed_events_list = []
+                    for batch_idx in range(0, len(event_ids), batch_size):
+                        batch_event_ids = event_ids[batch_idx:batch_idx + batch_size]
+                        try:
+                            # Fetch events with details using event IDs
+                            detailed_events_batch = er_io.get_events(
+                                event_ids=batch_event_ids,
+                                include_details=True,
+                                include_notes=True
+                            )
+                            if not detailed_events_batch.empty:
+                                detailed_events_list.append(detailed_events_batch)
+                        except Exception as batch_err:
+                            warnings.append(f"Could not fetch details for event batch {batch_idx//batch_size + 1}: {str(batch_err)[:100]}")
+
+                    # Combine all batches
+                    if detailed_events_list:
+                        detailed_events = pd.concat(detailed_events_list, ignore_index=True)
+                        if 'event_details' in detailed_events.columns and 'id' in detailed_events.columns:
+                            # Merge event_details back into events_gdf
+                            try:
+                                detailed_events_subset = detailed_events[['id', 'event_details']].copy()
+                                events_gdf = events_gdf.merge(detailed_events_subset, on='id', how='left')
+                            except Exception as merge_err:
+                                warnings.append(f"Could not merge event details: {str(merge_err)[:100]}")
+
+            all_events.append(events_gdf)
+        except Exception as e:
+            warnings.append(f"Could not get events for segment {segment_id}: {e}")
+
+    if not all_events:
+        return None, warnings
+
+    ctx.progress(0.95, "Unnesting event details...")
+    events_combined = gpd.GeoDataFrame(pd.concat(all_events, ignore_index=True))
+    # Extract coordinates from geometry
+    if 'geometry' in events_combined.columns:
+        events_combined['longitude'] = events_combined.geometry.x
+        events_combined['latitude'] = events_combined.geometry.y
+
+
+    # Extract time from geojson.properties.datetime if time column doesn't exist
+    if 'time' not in events_combined.columns and 'geojson' in events_combined.columns:
+        def extract_datetime(geojson):
+            if isinstance(geojson, dict):
+                props = geojson.get('properties', {})
+                if isinstance(props, dict):
+                    dt_str = props.get('datetime')
+                    if dt_str:
+                        return pd.to_datetime(dt_str, utc=True)
+            return None
+        events_combined['time'] = events_combined['geojson'].apply(extract_datetime)
+
+    # Extract reported_by name (subject_name)
+    if 'reported_by' in events_combined.columns:
+        events_combined['subject_name'] = events_combined['reported_by'].apply(
+            lambda x: x.get('name', '') if isinstance(x, dict) else ''
+        )
+
+    # Unnest event_details
+    if 'event_details' in events_combined.columns:
+        # Extract event_details fields into separate columns
+        event_details_df = pd.json_normalize(events_combined['event_details'])
+        # Add prefix to avoid column name conflicts
+        event_details_df.columns = ['detail_' + col for col in event_details_df.columns]
+        # Combine with main dataframe - preserve geometry
+        geometry_col = events_combined.geometry
+        events_combined = pd.concat([events_combined.reset_index(drop=True), event_details_df], axis=1)
+        # Restore as GeoDataFrame
+        events_combined = gpd.GeoDataFrame(events_combined, geometry=geometry_col.reset_index(drop=True), crs=4326)
+
+    # Extract coordinates from location dict if it exists
+    if 'location' in events_combined.columns:
+        events_combined['location_lat'] = events_combined['location'].apply(
+            lambda x: x.get('latitude') if isinstance(x, dict) else None
+        )
+        events_combined['location_lon'] = events_combined['location'].apply(
+            lambda x: x.get('longitude') if isinstance(x, dict) else None
+        )
+
+    return events_combined, warnings
+
+
 # Main app
 st.title("🗺️ Patrol shapefile downloader")
 st.markdown("Download patrol tracks from EarthRanger as shapefiles, with optional associated events")
@@ -433,156 +703,135 @@ if st.session_state.authenticated:
     
     # Download button for patrol tracks
     if st.button("🔽 Download patrol tracks", type="primary", use_container_width=True):
-        with st.spinner("Downloading patrol tracks..."):
-            gdf, error = download_patrol_tracks(
-                st.session_state.er_io,
-                patrol_type,
-                since,
-                until,
-                subject_name=subject_name_filter if subject_name_filter else None
-            )
-            
+        # The download and shapefile run as a background job polled below, so
+        # a rerun or dropped connection doesn't lose them.
+        st.session_state.patrol_tracks_job = get_runner().submit(
+            download_tracks_job,
+            st.session_state.er_io,
+            patrol_type,
+            since,
+            until,
+            subject_name_filter if subject_name_filter else None,
+            _export_basename(patrol_type, start_date, end_date),
+            label="Patrol track download",
+            owner=getattr(st.session_state.er_io, "username", None) or "",
+        )
+        st.session_state.patrol_tracks = None
+
+    if st.session_state.get("patrol_tracks_job"):
+        job_id = st.session_state.patrol_tracks_job
+        st.info("Downloading patrol tracks...")
+        status = poll_job(job_id)
+        st.session_state.patrol_tracks_job = None
+        if status is None:
+            st.warning("The download job is no longer available — click Download again.")
+        elif status["state"] == "done":
+            gdf, error, zip_data, zip_error = get_runner().result(job_id)
             if error:
                 st.error(f"❌ Error: {error}")
             elif gdf is not None:
-                st.success(f"✅ Successfully downloaded {len(gdf)} patrol track(s)!")
-                
                 # Store the downloaded patrols in session state for events extraction
                 st.session_state.downloaded_patrols_gdf = gdf
-                
-                # Display map preview
-                st.subheader("📍 Map preview")
-                if HAS_FOLIUM:
-                    try:
-                        # Calculate center point
-                        bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
-                        center_lat = (bounds[1] + bounds[3]) / 2
-                        center_lon = (bounds[0] + bounds[2]) / 2
-                        
-                        # Create map
-                        m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
-                        
-                        # Add each track to the map
-                        colors = ['blue', 'red', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige', 'darkblue', 'darkgreen']
-                        for idx, row in gdf.iterrows():
-                            color = colors[idx % len(colors)]
-                            coords = [(coord[1], coord[0]) for coord in row.geometry.coords]  # lat, lon
-                            
-                            folium.PolyLine(
-                                coords,
-                                color=color,
-                                weight=3,
-                                opacity=0.8,
-                                popup=f"{row.get('patrol_title', 'Patrol')}<br>Points: {row.get('num_points', 'N/A')}<br>Distance: {row.get('distance_km', 0):.2f} km"
-                            ).add_to(m)
-                            
-                            # Add start marker
-                            folium.CircleMarker(
-                                coords[0],
-                                radius=5,
-                                color=color,
-                                fill=True,
-                                popup=f"Start: {row.get('patrol_title', '')}",
-                            ).add_to(m)
-                            
-                            # Add end marker
-                            folium.CircleMarker(
-                                coords[-1],
-                                radius=5,
-                                color=color,
-                                fill=True,
-                                fillColor='white',
-                                popup=f"End: {row.get('patrol_title', '')}",
-                            ).add_to(m)
-                        
-                        # Fit bounds
-                        m.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
-                        
-                        # Display map
-                        folium_static(m, width=800, height=500)
-                        
-                    except Exception as e:
-                        st.warning(f"Could not create map preview: {e}")
-                else:
-                    st.info("💡 Install folium and streamlit-folium to see map preview:\n```pip install folium streamlit-folium```")
-                
-                # Display preview
-                st.subheader("Data preview")
-                # Create display DataFrame without geometry and some redundant columns
-                cols_to_drop = ['geometry', 'start_time', 'end_time']
-                display_df = gdf.drop(columns=[col for col in cols_to_drop if col in gdf.columns]).copy()
-                st.dataframe(display_df)
-                
-                # Show summary statistics
-                col5, col6, col7 = st.columns(3)
-                with col5:
-                    st.metric("Total tracks", len(gdf))
-                with col6:
-                    st.metric("Total points", gdf['num_points'].sum())
-                with col7:
-                    st.metric("Total distance (km)", f"{gdf['distance_km'].sum():.2f}")
-                
-                # Save to shapefile
-                try:
-                    # Format filename: patroltype_yymmdd_yymmdd
-                    start_str = start_date.strftime('%y%m%d')
-                    end_str = end_date.strftime('%y%m%d')
-                    # Clean patrol type for filename (remove spaces, special chars)
-                    if patrol_type:
-                        if isinstance(patrol_type, list):
-                            # Multiple patrol types - join them
-                            patrol_type_clean = "_".join("".join(c if c.isalnum() else "_" for c in pt) for pt in patrol_type[:3])  # Limit to first 3 to avoid too long filename
-                        else:
-                            patrol_type_clean = "".join(c if c.isalnum() else "_" for c in patrol_type)
-                    else:
-                        patrol_type_clean = "all_patrols"
-                    base_filename = f"{patrol_type_clean}_{start_str}_{end_str}"
-                    
-                    # Prepare shapefile-friendly column names (max 10 chars)
-                    # Rename columns: patrol → ptrl to save characters
-                    gdf_export = gdf.copy()
-                    column_mapping = {
-                        'patrol_id': 'ptrl_id',
-                        'patrol_sn': 'ptrl_sn',
-                        'patrol_type': 'ptrl_type',
-                        'subject_id': 'subj_id',
-                        'subject_name': 'subj_name',
-                        'patrol_start_time': 'ptrl_start',
-                        'patrol_end_time': 'ptrl_end',
-                        'distance_km': 'dist_km',
-                        'num_points': 'num_pts'
-                    }
-                    # Only rename columns that exist
-                    gdf_export = gdf_export.rename(columns={k: v for k, v in column_mapping.items() if k in gdf_export.columns})
-                    
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        shapefile_path = os.path.join(tmpdir, f"{base_filename}.shp")
-                        gdf_export.to_file(shapefile_path)
-                        
-                        # Create a zip file with all shapefile components
-                        zip_path = os.path.join(tmpdir, f"{base_filename}.zip")
-                        
-                        with zipfile.ZipFile(zip_path, 'w') as zipf:
-                            for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
-                                file_path = shapefile_path.replace('.shp', ext)
-                                if os.path.exists(file_path):
-                                    # Add files to zip with the base filename
-                                    zipf.write(file_path, f"{base_filename}{ext}")
-                        
-                        # Read the zip file for download
-                        with open(zip_path, 'rb') as f:
-                            zip_data = f.read()
-                        
-                        st.download_button(
-                            label="📥 Download Shapefile (ZIP)",
-                            data=zip_data,
-                            file_name=f"{base_filename}.zip",
-                            mime="application/zip",
-                            use_container_width=True
-                        )
-                except Exception as e:
-                    st.error(f"❌ Error creating shapefile: {e}")
-    
+                st.session_state.patrol_tracks = {
+                    "zip": zip_data,
+                    "zip_error": zip_error,
+                    "filename": _export_basename(patrol_type, start_date, end_date),
+                }
+                st.session_state.patrol_events = None
+        elif status["state"] == "cancelled":
+            st.info("Download cancelled.")
+        else:
+            st.error(f"❌ Error: {status.get('error') or status['state']}")
+
+    # Rendered from session_state so the preview survives the download click
+    tracks = st.session_state.get("patrol_tracks")
+    if tracks and st.session_state.get("downloaded_patrols_gdf") is not None:
+        gdf = st.session_state.downloaded_patrols_gdf
+        st.success(f"✅ Successfully downloaded {len(gdf)} patrol track(s)!")
+
+        # Display map preview
+        st.subheader("📍 Map preview")
+        if HAS_FOLIUM:
+            try:
+                # Calculate center point
+                bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
+                center_lat = (bounds[1] + bounds[3]) / 2
+                center_lon = (bounds[0] + bounds[2]) / 2
+
+                # Create map
+                m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
+
+                # Add each track to the map
+                colors = ['blue', 'red', 'green', 'purple', 'orange', 'darkred', 'lightred', 'beige', 'darkblue', 'darkgreen']
+                for idx, row in gdf.iterrows():
+                    color = colors[idx % len(colors)]
+                    coords = [(coord[1], coord[0]) for coord in row.geometry.coords]  # lat, lon
+
+                    folium.PolyLine(
+                        coords,
+                        color=color,
+                        weight=3,
+                        opacity=0.8,
+                        popup=f"{row.get('patrol_title', 'Patrol')}<br>Points: {row.get('num_points', 'N/A')}<br>Distance: {row.get('distance_km', 0):.2f} km"
+                    ).add_to(m)
+
+                    # Add start marker
+                    folium.CircleMarker(
+                        coords[0],
+                        radius=5,
+                        color=color,
+                        fill=True,
+                        popup=f"Start: {row.get('patrol_title', '')}",
+                    ).add_to(m)
+
+                    # Add end marker
+                    folium.CircleMarker(
+                        coords[-1],
+                        radius=5,
+                        color=color,
+                        fill=True,
+                        fillColor='white',
+                        popup=f"End: {row.get('patrol_title', '')}",
+                    ).add_to(m)
+
+                # Fit bounds
+                m.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]])
+
+                # Display map
+                folium_static(m, width=800, height=500)
+
+            except Exception as e:
+                st.warning(f"Could not create map preview: {e}")
+        else:
+            st.info("💡 Install folium and streamlit-folium to see map preview:\n```pip install folium streamlit-folium```")
+
+        # Display preview
+        st.subheader("Data preview")
+        # Create display DataFrame without geometry and some redundant columns
+        cols_to_drop = ['geometry', 'start_time', 'end_time']
+        display_df = gdf.drop(columns=[col for col in cols_to_drop if col in gdf.columns]).copy()
+        st.dataframe(display_df)
+
+        # Show summary statistics
+        col5, col6, col7 = st.columns(3)
+        with col5:
+            st.metric("Total tracks", len(gdf))
+        with col6:
+            st.metric("Total points", gdf['num_points'].sum())
+        with col7:
+            st.metric("Total distance (km)", f"{gdf['distance_km'].sum():.2f}")
+
+        if tracks["zip_error"]:
+            st.error(f"❌ Error creating shapefile: {tracks['zip_error']}")
+        else:
+            st.download_button(
+                label="📥 Download Shapefile (ZIP)",
+                data=tracks["zip"],
+                file_name=f"{tracks['filename']}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+
     # Events extraction section
     st.markdown("---")
     st.subheader("📋 Extract patrol events")
@@ -597,389 +846,208 @@ if st.session_state.authenticated:
         
         # Button to extract events
         if st.button("📥 Extract patrol events", type="primary", use_container_width=True):
-            with st.spinner("Extracting events from patrols..."):
+            st.session_state.patrol_events_job = get_runner().submit(
+                extract_events_job,
+                st.session_state.er_io,
+                gdf_patrols['patrol_id'].unique().tolist(),
+                since,
+                until,
+                patrol_type,
+                label=f"Patrol events ({len(gdf_patrols)} patrols)",
+                owner=getattr(st.session_state.er_io, "username", None) or "",
+            )
+            st.session_state.patrol_events = None
+
+        if st.session_state.get("patrol_events_job"):
+            job_id = st.session_state.patrol_events_job
+            st.info("Extracting events from patrols...")
+            status = poll_job(job_id)
+            st.session_state.patrol_events_job = None
+            if status is None:
+                st.warning("The extraction job is no longer available — click Extract again.")
+            elif status["state"] == "done":
+                events_combined, warnings = get_runner().result(job_id)
+                for message in warnings:
+                    st.warning(message)
+                if events_combined is None or events_combined.empty:
+                    st.info("No events found for these patrols")
+                else:
+                    st.session_state.patrol_events = events_combined
+            elif status["state"] == "cancelled":
+                st.info("Extraction cancelled.")
+            else:
+                st.error(f"❌ Error extracting events: {status.get('error') or status['state']}")
+                if status.get("traceback"):
+                    st.error(status["traceback"])
+
+        events_combined = st.session_state.get("patrol_events")
+        if events_combined is not None:
+            st.success(f"✅ Successfully extracted {len(events_combined)} event(s)!")
+
+            # Display map preview with both patrols and events
+            st.subheader("📍 Events map preview")
+            if HAS_FOLIUM:
                 try:
-                    # Get the original patrols dataframe with patrol_segments
-                    # Use patrol_type_value instead of patrol_type since we have the value, not UUID
-                    patrols_df = st.session_state.er_io.get_patrols(
-                        since=since,
-                        until=until,
-                        patrol_type_value=patrol_type,
-                        status=['done', 'active']
-                    )
-                    
-                    # Filter to only the patrol IDs we have in our downloaded tracks
-                    patrol_ids = gdf_patrols['patrol_id'].unique().tolist()
-                    patrols_df = patrols_df[patrols_df['id'].isin(patrol_ids)].copy()
-                    
-                    if patrols_df.empty:
-                        st.warning("No matching patrols found")
-                    else:
-                        # Get events using get_events with patrol segments to include full details
-                        try:
-                            # Extract all patrol segment IDs from the matched patrols
-                            # Also create mappings for patrol_id, patrol_name, and subject/leader name
-                            patrol_segment_ids = []
-                            segment_to_patrol_map = {}  # Maps segment_id -> patrol_id
-                            segment_to_patrol_name_map = {}  # Maps segment_id -> patrol_name/title
-                            segment_to_subject_map = {}  # Maps segment_id -> subject/leader name
-                            
-                            for _, patrol in patrols_df.iterrows():
-                                patrol_id = patrol['id']
-                                patrol_name = patrol.get('title', patrol.get('serial_number', ''))
-                                
-                                # Extract leader/subject name from first segment
-                                leader_name = ''
-                                for segment in patrol.get('patrol_segments', []):
-                                    if 'id' in segment:
-                                        segment_id = segment['id']
-                                        patrol_segment_ids.append(segment_id)
-                                        segment_to_patrol_map[segment_id] = patrol_id
-                                        segment_to_patrol_name_map[segment_id] = patrol_name
-                                        
-                                        # Extract leader name if not already extracted
-                                        if not leader_name and 'leader' in segment:
-                                            leader_data = segment['leader']
-                                            if isinstance(leader_data, dict):
-                                                leader_name = leader_data.get('name', leader_data.get('username', ''))
-                                            else:
-                                                leader_name = str(leader_data) if leader_data else ''
-                                        
-                                        segment_to_subject_map[segment_id] = leader_name
-                            
-                            if not patrol_segment_ids:
-                                st.warning("No patrol segments found")
-                                events_combined = gpd.GeoDataFrame()
-                            else:
-                                # Get events for each patrol segment with full details
-                                all_events = []
-                                progress_bar = st.progress(0)
-                                status_text = st.empty()
-                                
-                                for idx, segment_id in enumerate(patrol_segment_ids):
-                                    status_text.text(f"Processing segment {idx + 1}/{len(patrol_segment_ids)}...")
-                                    try:
-                                        # Use get_patrol_segment_events which correctly filters to patrol segment
-                                        events_df = st.session_state.er_io.get_patrol_segment_events(
-                                            patrol_segment_id=segment_id,
-                                            include_details=True,
-                                            include_notes=True,
-                                            include_related_events=False,
-                                            include_files=False
-                                        )
-                                        
-                                        if not events_df.empty:
-                                            # Add patrol_id, patrol_name, and patrol_leader from our mappings
-                                            events_df['patrol_id'] = segment_to_patrol_map.get(segment_id, '')
-                                            events_df['patrol_name'] = segment_to_patrol_name_map.get(segment_id, '')
-                                            events_df['patrol_leader'] = segment_to_subject_map.get(segment_id, '')
-                                            
-                                            # Convert to GeoDataFrame with geometry from geojson
-                                            def extract_geometry(row):
-                                                if 'geojson' in row and row['geojson']:
-                                                    try:
-                                                        if isinstance(row['geojson'], dict):
-                                                            return shape(row['geojson'])
-                                                    except:
-                                                        pass
-                                                return None
-                                            
-                                            events_df['geometry'] = events_df.apply(extract_geometry, axis=1)
-                                            # Filter out events without geometry
-                                            events_gdf = events_df[events_df['geometry'].notna()].copy()
-                                            
-                                            if events_gdf.empty:
-                                                status_text.text(f"Segment {idx + 1}/{len(patrol_segment_ids)}: No events with valid geometry")
-                                                continue
-                                            
-                                            events_gdf = gpd.GeoDataFrame(events_gdf, geometry='geometry', crs=4326)
-                                            
-                                            # Now fetch full details for each event by event ID (only if 'id' column exists)
-                                            has_details = False
-                                            if 'id' in events_gdf.columns and len(events_gdf) > 0:
-                                                event_ids = events_gdf['id'].tolist()
-                                                # Filter out any None or NaN values
-                                                event_ids = [eid for eid in event_ids if eid and pd.notna(eid)]
-                                                
-                                                if event_ids:
-                                                    status_text.text(f"Segment {idx + 1}/{len(patrol_segment_ids)}: Fetching details for {len(event_ids)} events...")
-                                                    
-                                                    # Batch event IDs to avoid URL length limits (414 error)
-                                                    # Process in chunks of 50 event IDs at a time
-                                                    batch_size = 50
-                                                    detailed_events_list = []
-                                                    
-                                                    for batch_idx in range(0, len(event_ids), batch_size):
-                                                        batch_event_ids = event_ids[batch_idx:batch_idx + batch_size]
-                                                        try:
-                                                            # Fetch events with details using event IDs
-                                                            detailed_events_batch = st.session_state.er_io.get_events(
-                                                                event_ids=batch_event_ids,
-                                                                include_details=True,
-                                                                include_notes=True
-                                                            )
-                                                            if not detailed_events_batch.empty:
-                                                                detailed_events_list.append(detailed_events_batch)
-                                                        except Exception as batch_err:
-                                                            st.warning(f"Could not fetch details for event batch {batch_idx//batch_size + 1}: {str(batch_err)[:100]}")
-                                                    
-                                                    # Combine all batches
-                                                    if detailed_events_list:
-                                                        detailed_events = pd.concat(detailed_events_list, ignore_index=True)
-                                                        
-                                                        if not detailed_events.empty and 'event_details' in detailed_events.columns and 'id' in detailed_events.columns:
-                                                            # Merge event_details back into events_gdf
-                                                            # Reset index to use 'id' for merging
-                                                            try:
-                                                                detailed_events_subset = detailed_events[['id', 'event_details']].copy()
-                                                                events_gdf = events_gdf.merge(detailed_events_subset, on='id', how='left')
-                                                                has_details = True
-                                                            except Exception as merge_err:
-                                                                st.warning(f"Could not merge event details: {str(merge_err)[:100]}")
-                                                                has_details = False
-                                            
-                                            status_text.text(f"Segment {idx + 1}/{len(patrol_segment_ids)}: Found {len(events_gdf)} events (details: {has_details})")
-                                            all_events.append(events_gdf)
-                                        else:
-                                            status_text.text(f"Segment {idx + 1}/{len(patrol_segment_ids)}: No events")
-                                    except Exception as e:
-                                        status_text.text(f"Segment {idx + 1}/{len(patrol_segment_ids)}: Error - {str(e)[:50]}")
-                                        st.warning(f"Could not get events for segment {segment_id}: {e}")
-                                    
-                                    progress_bar.progress((idx + 1) / len(patrol_segment_ids))
-                                
-                                progress_bar.empty()
-                                status_text.empty()
-                                
-                                # Combine all events
-                                if all_events:
-                                    events_combined = gpd.GeoDataFrame(pd.concat(all_events, ignore_index=True))
-                                else:
-                                    events_combined = gpd.GeoDataFrame()
-                            
-                            if events_combined.empty:
-                                st.info("No events found for these patrols")
-                            else:
-                                    st.success(f"✅ Successfully extracted {len(events_combined)} event(s)!")
-                                    
-                                    # Extract coordinates from geometry
-                                    if 'geometry' in events_combined.columns:
-                                        events_combined['longitude'] = events_combined.geometry.x
-                                        events_combined['latitude'] = events_combined.geometry.y
-                                    
-                                    
-                                    # Extract time from geojson.properties.datetime if time column doesn't exist
-                                    if 'time' not in events_combined.columns and 'geojson' in events_combined.columns:
-                                        def extract_datetime(geojson):
-                                            if isinstance(geojson, dict):
-                                                props = geojson.get('properties', {})
-                                                if isinstance(props, dict):
-                                                    dt_str = props.get('datetime')
-                                                    if dt_str:
-                                                        return pd.to_datetime(dt_str, utc=True)
-                                            return None
-                                        events_combined['time'] = events_combined['geojson'].apply(extract_datetime)
-                                    
-                                    # Extract reported_by name (subject_name)
-                                    if 'reported_by' in events_combined.columns:
-                                        events_combined['subject_name'] = events_combined['reported_by'].apply(
-                                            lambda x: x.get('name', '') if isinstance(x, dict) else ''
-                                        )
-                                    
-                                    # Unnest event_details
-                                    if 'event_details' in events_combined.columns:
-                                        # Extract event_details fields into separate columns
-                                        event_details_df = pd.json_normalize(events_combined['event_details'])
-                                        # Add prefix to avoid column name conflicts
-                                        event_details_df.columns = ['detail_' + col for col in event_details_df.columns]
-                                        # Combine with main dataframe - preserve geometry
-                                        geometry_col = events_combined.geometry
-                                        events_combined = pd.concat([events_combined.reset_index(drop=True), event_details_df], axis=1)
-                                        # Restore as GeoDataFrame
-                                        events_combined = gpd.GeoDataFrame(events_combined, geometry=geometry_col.reset_index(drop=True), crs=4326)
-                                    
-                                    # Extract coordinates from location dict if it exists
-                                    if 'location' in events_combined.columns:
-                                        events_combined['location_lat'] = events_combined['location'].apply(
-                                            lambda x: x.get('latitude') if isinstance(x, dict) else None
-                                        )
-                                        events_combined['location_lon'] = events_combined['location'].apply(
-                                            lambda x: x.get('longitude') if isinstance(x, dict) else None
-                                        )
-                                    
-                                    # Display map preview with both patrols and events
-                                    st.subheader("📍 Events map preview")
-                                    if HAS_FOLIUM:
-                                        try:
-                                            # Calculate center point from events
-                                            events_bounds = events_combined.total_bounds  # [minx, miny, maxx, maxy]
-                                            center_lat = (events_bounds[1] + events_bounds[3]) / 2
-                                            center_lon = (events_bounds[0] + events_bounds[2]) / 2
-                                            
-                                            # Create map
-                                            m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
-                                            
-                                            # Add patrol tracks
-                                            patrol_colors = ['blue', 'darkblue', 'lightblue', 'cadetblue']
-                                            for idx, row in gdf_patrols.iterrows():
-                                                color = patrol_colors[idx % len(patrol_colors)]
-                                                coords = [(coord[1], coord[0]) for coord in row.geometry.coords]  # lat, lon
-                                                
-                                                folium.PolyLine(
-                                                    coords,
-                                                    color=color,
-                                                    weight=3,
-                                                    opacity=0.6,
-                                                    popup=f"Patrol: {row.get('patrol_sn', 'N/A')}",
-                                                ).add_to(m)
-                                            
-                                            # Add event markers
-                                            event_colors = {
-                                                'default': 'red'
-                                            }
-                                            
-                                            for idx, row in events_combined.iterrows():
-                                                lat = row.geometry.y
-                                                lon = row.geometry.x
-                                                
-                                                # Get event type for popup
-                                                event_type = row.get('event_type', 'Event')
-                                                event_time = row.get('time', 'N/A')
-                                                patrol_sn = row.get('patrol_serial_number', 'N/A')
-                                                
-                                                popup_text = f"<b>{event_type}</b><br>Time: {event_time}<br>Patrol: {patrol_sn}"
-                                                
-                                                folium.CircleMarker(
-                                                    location=[lat, lon],
-                                                    radius=6,
-                                                    color='red',
-                                                    fill=True,
-                                                    fillColor='red',
-                                                    fillOpacity=0.7,
-                                                    popup=popup_text,
-                                                ).add_to(m)
-                                            
-                                            # Fit bounds to show both patrols and events
-                                            all_bounds = [
-                                                [events_bounds[1], events_bounds[0]], 
-                                                [events_bounds[3], events_bounds[2]]
-                                            ]
-                                            m.fit_bounds(all_bounds)
-                                            
-                                            # Display map
-                                            folium_static(m, width=800, height=500)
-                                            
-                                        except Exception as e:
-                                            st.warning(f"Could not create map preview: {e}")
-                                    else:
-                                        st.info("💡 Install folium and streamlit-folium to see map preview")
-                                    
-                                    # Display data preview
-                                    st.subheader("Events data preview")
-                                    # Create display DataFrame without geometry and geojson
-                                    display_cols = [col for col in events_combined.columns if col not in ['geometry', 'geojson']]
-                                    display_df = events_combined[display_cols].copy()
-                                    
-                                    # Clean up the display
-                                    # Remove unwanted columns
-                                    cols_to_remove = ['level_8', 'index', 'location', 'reported_by', 'event_details', 
-                                                     'geojson', 'attributes', 'notes', 'patrols', 'patrol_segments',
-                                                     'is_contained_in', 'related_subjects',
-                                                     'location_lat', 'location_lon', 'message', 'provenance',
-                                                     'event_category', 'priority_label', 'comment', 'end_time',
-                                                     'sort_at', 'icon_id', 'url', 'image_url', 'external_source']
-                                    display_df = display_df.drop(columns=[col for col in cols_to_remove if col in display_df.columns])
-                                    
-                                    # Rename columns for better readability
-                                    rename_mapping = {
-                                        'id': 'event_id',
-                                        'time': 'event_datetime'
-                                    }
-                                    # Only rename columns that exist
-                                    rename_mapping = {k: v for k, v in rename_mapping.items() if k in display_df.columns}
-                                    if rename_mapping:
-                                        display_df = display_df.rename(columns=rename_mapping)
-                                    
-                                    # Reorder columns to put important ones first
-                                    preferred_order = ['event_id', 'patrol_id', 'patrol_name', 'patrol_leader', 
-                                                      'serial_number', 'event_type', 'subject_name', 
-                                                      'longitude', 'latitude', 'event_datetime', 
-                                                      'priority', 'title', 'state', 
-                                                      'updated_at', 'created_at', 'is_collection']
-                                    
-                                    # Add all detail_ columns after the main columns
-                                    detail_cols = sorted([col for col in display_df.columns if col.startswith('detail_')])
-                                    preferred_order.extend(detail_cols)
-                                    
-                                    # Get columns in preferred order (only if they exist)
-                                    ordered_cols = [col for col in preferred_order if col in display_df.columns]
-                                    # Add remaining columns
-                                    remaining_cols = [col for col in display_df.columns if col not in ordered_cols]
-                                    display_df = display_df[ordered_cols + remaining_cols]
-                                    
-                                    st.dataframe(display_df)
-                                    
-                                    # Show summary statistics
-                                    col_e1, col_e2 = st.columns(2)
-                                    with col_e1:
-                                        st.metric("Total events", len(events_combined))
-                                    with col_e2:
-                                        if 'event_type' in events_combined.columns:
-                                            st.metric("Event types", events_combined['event_type'].nunique())
-                                    
-                                    # Save to CSV
-                                    try:
-                                        start_str = start_date.strftime('%y%m%d')
-                                        end_str = end_date.strftime('%y%m%d')
-                                        patrol_type_clean = "".join(c if c.isalnum() else "_" for c in patrol_type)
-                                        base_filename = f"{patrol_type_clean}_events_{start_str}_{end_str}"
-                                        
-                                        # Prepare CSV export - remove geometry and geojson columns
-                                        events_export = events_combined.copy()
-                                        cols_to_remove_export = ['geometry', 'geojson']
-                                        events_export = events_export.drop(columns=[col for col in cols_to_remove_export if col in events_export.columns])
-                                        
-                                        # Remove same columns as display
-                                        cols_to_remove_from_export = ['level_8', 'index', 'location', 'reported_by', 'event_details', 
-                                                                     'geojson', 'attributes', 'notes', 'patrols', 
-                                                                     'patrol_segments', 'is_contained_in', 'related_subjects', 
-                                                                     'location_lat', 'location_lon', 
-                                                                     'message', 'provenance', 'event_category', 'priority_label', 
-                                                                     'comment', 'end_time', 'sort_at', 'icon_id', 'url', 
-                                                                     'image_url', 'external_source']
-                                        events_export = events_export.drop(columns=[col for col in cols_to_remove_from_export if col in events_export.columns])
-                                        
-                                        # Apply same renaming as display
-                                        rename_mapping = {
-                                            'id': 'event_id',
-                                            'time': 'event_datetime'
-                                        }
-                                        # Only rename columns that exist
-                                        rename_mapping = {k: v for k, v in rename_mapping.items() if k in events_export.columns}
-                                        if rename_mapping:
-                                            events_export = events_export.rename(columns=rename_mapping)
-                                        
-                                        # Convert to CSV
-                                        csv_data = events_export.to_csv(index=False)
-                                        
-                                        st.download_button(
-                                            label="📥 Download Events CSV",
-                                            data=csv_data,
-                                            file_name=f"{base_filename}.csv",
-                                            mime="text/csv",
-                                            use_container_width=True
-                                        )
-                                    except Exception as e:
-                                        st.error(f"❌ Error creating events CSV: {e}")
-                        except Exception as e:
-                            st.error(f"❌ Error extracting patrol events: {e}")
-                            import traceback
-                            st.error(traceback.format_exc())
-                
+                    # Calculate center point from events
+                    events_bounds = events_combined.total_bounds  # [minx, miny, maxx, maxy]
+                    center_lat = (events_bounds[1] + events_bounds[3]) / 2
+                    center_lon = (events_bounds[0] + events_bounds[2]) / 2
+
+                    # Create map
+                    m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
+
+                    # Add patrol tracks
+                    patrol_colors = ['blue', 'darkblue', 'lightblue', 'cadetblue']
+                    for idx, row in gdf_patrols.iterrows():
+                        color = patrol_colors[idx % len(patrol_colors)]
+                        coords = [(coord[1], coord[0]) for coord in row.geometry.coords]  # lat, lon
+
+                        folium.PolyLine(
+                            coords,
+                            color=color,
+                            weight=3,
+                            opacity=0.6,
+                            popup=f"Patrol: {row.get('patrol_sn', 'N/A')}",
+                        ).add_to(m)
+
+                    # Add event markers
+                    event_colors = {
+                        'default': 'red'
+                    }
+
+                    for idx, row in events_combined.iterrows():
+                        lat = row.geometry.y
+                        lon = row.geometry.x
+
+                        # Get event type for popup
+                        event_type = row.get('event_type', 'Event')
+                        event_time = row.get('time', 'N/A')
+                        patrol_sn = row.get('patrol_serial_number', 'N/A')
+
+                        popup_text = f"<b>{event_type}</b><br>Time: {event_time}<br>Patrol: {patrol_sn}"
+
+                        folium.CircleMarker(
+                            location=[lat, lon],
+                            radius=6,
+                            color='red',
+                            fill=True,
+                            fillColor='red',
+                            fillOpacity=0.7,
+                            popup=popup_text,
+                        ).add_to(m)
+
+                    # Fit bounds to show both patrols and events
+                    all_bounds = [
+                        [events_bounds[1], events_bounds[0]], 
+                        [events_bounds[3], events_bounds[2]]
+                    ]
+                    m.fit_bounds(all_bounds)
+
+                    # Display map
+                    folium_static(m, width=800, height=500)
+
                 except Exception as e:
-                    st.error(f"❌ Error extracting events: {e}")
-                    import traceback
-                    st.error(traceback.format_exc())
+                    st.warning(f"Could not create map preview: {e}")
+            else:
+                st.info("💡 Install folium and streamlit-folium to see map preview")
+
+            # Display data preview
+            st.subheader("Events data preview")
+            # Create display DataFrame without geometry and geojson
+            display_cols = [col for col in events_combined.columns if col not in ['geometry', 'geojson']]
+            display_df = events_combined[display_cols].copy()
+
+            # Clean up the display
+            # Remove unwanted columns
+            cols_to_remove = ['level_8', 'index', 'location', 'reported_by', 'event_details', 
+                             'geojson', 'attributes', 'notes', 'patrols', 'patrol_segments',
+                             'is_contained_in', 'related_subjects',
+                             'location_lat', 'location_lon', 'message', 'provenance',
+                             'event_category', 'priority_label', 'comment', 'end_time',
+                             'sort_at', 'icon_id', 'url', 'image_url', 'external_source']
+            display_df = display_df.drop(columns=[col for col in cols_to_remove if col in display_df.columns])
+
+            # Rename columns for better readability
+            rename_mapping = {
+                'id': 'event_id',
+                'time': 'event_datetime'
+            }
+            # Only rename columns that exist
+            rename_mapping = {k: v for k, v in rename_mapping.items() if k in display_df.columns}
+            if rename_mapping:
+                display_df = display_df.rename(columns=rename_mapping)
+
+            # Reorder columns to put important ones first
+            preferred_order = ['event_id', 'patrol_id', 'patrol_name', 'patrol_leader', 
+                              'serial_number', 'event_type', 'subject_name', 
+                              'longitude', 'latitude', 'event_datetime', 
+                              'priority', 'title', 'state', 
+                              'updated_at', 'created_at', 'is_collection']
+
+            # Add all detail_ columns after the main columns
+            detail_cols = sorted([col for col in display_df.columns if col.startswith('detail_')])
+            preferred_order.extend(detail_cols)
+
+            # Get columns in preferred order (only if they exist)
+            ordered_cols = [col for col in preferred_order if col in display_df.columns]
+            # Add remaining columns
+            remaining_cols = [col for col in display_df.columns if col not in ordered_cols]
+            display_df = display_df[ordered_cols + remaining_cols]
+
+            st.dataframe(display_df)
+
+            # Show summary statistics
+            col_e1, col_e2 = st.columns(2)
+            with col_e1:
+                st.metric("Total events", len(events_combined))
+            with col_e2:
+                if 'event_type' in events_combined.columns:
+                    st.metric("Event types", events_combined['event_type'].nunique())
+
+            # Save to CSV
+            try:
+                start_str = start_date.strftime('%y%m%d')
+                end_str = end_date.strftime('%y%m%d')
+                patrol_type_clean = "".join(c if c.isalnum() else "_" for c in patrol_type)
+                base_filename = f"{patrol_type_clean}_events_{start_str}_{end_str}"
+
+                # Prepare CSV export - remove geometry and geojson columns
+                events_export = events_combined.copy()
+                cols_to_remove_export = ['geometry', 'geojson']
+                events_export = events_export.drop(columns=[col for col in cols_to_remove_export if col in events_export.columns])
+
+                # Remove same columns as display
+                cols_to_remove_from_export = ['level_8', 'index', 'location', 'reported_by', 'event_details', 
+                                             'geojson', 'attributes', 'notes', 'patrols', 
+                                             'patrol_segments', 'is_contained_in', 'related_subjects', 
+                                             'location_lat', 'location_lon', 
+                                             'message', 'provenance', 'event_category', 'priority_label', 
+                                             'comment', 'end_time', 'sort_at', 'icon_id', 'url', 
+                                             'image_url', 'external_source']
+                events_export = events_export.drop(columns=[col for col in cols_to_remove_from_export if col in events_export.columns])
+
+                # Apply same renaming as display
+                rename_mapping = {
+                    'id': 'event_id',
+                    'time': 'event_datetime'
+                }
+                # Only rename columns that exist
+                rename_mapping = {k: v for k, v in rename_mapping.items() if k in events_export.columns}
+                if rename_mapping:
+                    events_export = events_export.rename(columns=rename_mapping)
+
+                # Convert to CSV
+                csv_data = events_export.to_csv(index=False)
+
+                st.download_button(
+                    label="📥 Download Events CSV",
+                    data=csv_data,
+                    file_name=f"{base_filename}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            except Exception as e:
+                st.error(f"❌ Error creating events CSV: {e}")
     else:
         st.info("👆 Download patrol tracks first to enable event extraction")
     
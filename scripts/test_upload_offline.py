@@ -0,0 +1,72 @@
+"""
+Offline check for the upload step of upload_camera_trap.py.
+
+Runs the --offline path (LocalBucket) three times on a small fake renamed
+folder, no Google Cloud connection needed:
+
+    1. first run uploads every photo and writes .upload_manifest.json
+    2. a re-run skips everything from the manifest
+    3. with the manifest deleted, a re-run finds everything already in the
+       bucket folder and uploads nothing again
+
+    python scripts/test_upload_offline.py
+"""
+
+import importlib.util
+import tempfile
+from pathlib import Path
+
+_script = Path(__file__).resolve().parent / "upload_camera_trap.py"
+_spec = importlib.util.spec_from_file_location("upload_camera_trap", _script)
+uct = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(uct)
+
+
+def make_renamed_folder(root: Path) -> list:
+    """(local_path, blob_name) pairs laid out like main() builds them."""
+    files = []
+    for station in ("S001", "S002"):
+        for cam in ("C001", "C002"):
+            cam_dir = root / "202604" / station / f"{station}_{cam}"
+            cam_dir.mkdir(parents=True)
+            for i in range(5):
+                f = cam_dir / f"NAM_EHGR_{station}_{cam}_2026041{i}_IMAG{i:04d}.JPG"
+                f.write_bytes(f"{station}{cam}{i}".encode() * 100)
+                files.append((f, f"camera_trap/camera_fence/202604/{station}/{station}_{cam}/{f.name}"))
+    return files
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        output_root = tmp / "202604_renamed"
+        files = make_renamed_folder(output_root)
+        bucket = uct.LocalBucket(tmp / "bucket")
+        manifest_path = output_root / uct.UPLOAD_MANIFEST_NAME
+
+        counts = uct.upload_files(bucket, files, output_root, workers=4)
+        assert counts == {"uploaded": len(files), "exists": 0, "failed": 0}, counts
+        assert manifest_path.exists()
+        for local_path, blob_name in files:
+            assert (bucket.root / blob_name).read_bytes() == local_path.read_bytes()
+        print(f"[OK] first run uploaded {counts['uploaded']} photos")
+
+        counts = uct.upload_files(bucket, files, output_root, workers=4)
+        assert counts == {"uploaded": 0, "exists": len(files), "failed": 0}, counts
+        print("[OK] re-run skipped everything from the manifest")
+
+        manifest_path.unlink()
+        counts = uct.upload_files(bucket, files, output_root, workers=4)
+        assert counts == {"uploaded": 0, "exists": len(files), "failed": 0}, counts
+        assert manifest_path.exists()
+        print("[OK] re-run without the manifest found everything in the bucket")
+
+        # A photo that reaches the bucket between the listing and the upload
+        # is not overwritten
+        local_path, blob_name = files[0]
+        assert uct._upload_one(bucket, local_path, blob_name, retries=0) == "exists"
+        print("[OK] existing objects are never overwritten")
+
+
+if __name__ == "__main__":
+    main()
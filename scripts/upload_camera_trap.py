@@ -30,22 +30,44 @@ FILENAME FORMAT:
 
     The original filename stem is preserved, making each file uniquely
     traceable back to the camera card. Safe to run on a second batch
-    for the same camera — already-uploaded files are skipped (-n flag).
+    for the same camera — already-uploaded files are skipped.
 
 BATCHING:
     - Run on batch 1 in May  → uploads 202605/ photos
     - Run on batch 2 in June → new 202606/ photos upload fine;
-      any remaining 202605/ photos that already exist are skipped (-n flag)
+      any remaining 202605/ photos that already exist are skipped
 
 USAGE:
     python upload_camera_trap.py
     python upload_camera_trap.py "D:\\NAM\\EHGR\\camera_trap\\camera_fence\\202604"
+    python upload_camera_trap.py "D:\\...\\202604" --mode hardlink --workers 8
+
+    --mode            copy | hardlink | reflink  (see TRANSFER_MODE below)
+    --workers         parallel workers for reading dates and copying
+    --upload-workers  parallel uploads (default UPLOAD_WORKERS)
+    --offline DIR     upload into a local folder instead of the bucket
+
+RE-RUNS:
+    Photos renamed by an earlier run (same file, same size and date) are
+    remembered in 202604_renamed/.rename_manifest.json and are not read
+    or copied again.
 
 REQUIREMENTS:
-    pip install Pillow
-    gcloud auth login
+    pip install Pillow google-cloud-storage
+    gcloud auth application-default login
     gcloud config set project gcf-camera-traps
 
+    Uploads run in-process with google-cloud-storage: one client and one
+    connection pool for the whole run, one listing per destination folder,
+    and parallel uploads. Results are written to
+    202604_renamed/.upload_manifest.json so an interrupted run resumes
+    where it stopped. If google-cloud-storage is not installed, or only
+    `gcloud auth login` has been run (no application-default login), the
+    script falls back to gsutil.
+
+    --offline DIR uploads into a local folder laid out like the bucket
+    instead of Google Cloud, for testing without a connection.
+
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
   EDIT THIS SECTION to add your known station / camera folder names
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -126,27 +148,76 @@ CAMERA_ID_OVERRIDES: dict[tuple[str, str], str] = {
 CAMERA_TYPES = {"camera_fence", "camera_water", "camera_grid"}
 IMAGE_EXTS   = {".jpg", ".jpeg", ".png", ".tif", ".tiff"}
 
+# ── Renaming speed ────────────────────────────────────────────────────────────
+# How the renamed TrapTagger copies are made:
+#   "copy"      full copy of every photo (safe everywhere, slowest)
+#   "hardlink"  no copy — the renamed file is a second name for the original.
+#               Only works when the renamed folder is on the same drive.
+#   "reflink"   copy-on-write clone (Linux btrfs/XFS); same drive only.
+# If linking is not possible the script falls back to a normal copy.
+TRANSFER_MODE = "copy"
+# Parallel workers for reading photo dates and copying (None = one per CPU core)
+RENAME_WORKERS = None
+# Parallel uploads to Google Cloud. Lower this on a very slow connection.
+UPLOAD_WORKERS = 8
+UPLOAD_RETRIES = 4
+
 # ─────────────────────────────────────────────────────────────────────────────
 
+import argparse
+import json
+import os
+import random
 import re
 import shutil
 import subprocess
 import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+import time
 
 # Resolved at startup by check_dependencies()
 _GSUTIL_BIN: str = "gsutil"
+_NATIVE_GCS: bool = False
+
+try:
+    from google.api_core.exceptions import PreconditionFailed
+except ImportError:
+    class PreconditionFailed(Exception):
+        """Raised when an upload would overwrite an existing object."""
+
+try:
+    from google.auth.exceptions import DefaultCredentialsError
+except ImportError:
+    class DefaultCredentialsError(Exception):
+        """Raised when no application-default credentials are set up."""
+
+# Remembers which photos were already renamed so a re-run skips them
+RENAME_MANIFEST_NAME = ".rename_manifest.json"
+# Per-file upload results, used to resume an interrupted upload
+UPLOAD_MANIFEST_NAME = ".upload_manifest.json"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+try:
+    from shared.exif import get_exif_datetime as _fast_exif_datetime
+except ImportError:
+    _fast_exif_datetime = None
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def check_dependencies() -> None:
-    global _GSUTIL_BIN
+def check_dependencies(offline: bool = False) -> None:
+    global _GSUTIL_BIN, _NATIVE_GCS
+    try:
+        import google.cloud.storage  # noqa: F401
+        _NATIVE_GCS = True
+    except ImportError:
+        _NATIVE_GCS = False
     # On Windows, gsutil is installed as a .cmd wrapper; try both names.
     gsutil_path = shutil.which("gsutil") or shutil.which("gsutil.cmd")
-    if gsutil_path is None:
+    if gsutil_path is None and not (_NATIVE_GCS or offline):
         print()
         print("  !! Something is missing on this computer.")
         print()
@@ -161,7 +232,7 @@ def check_dependencies() -> None:
         print()
         input("  Press Enter to close.")
         sys.exit(1)
-    _GSUTIL_BIN = gsutil_path
+    _GSUTIL_BIN = gsutil_path or "gsutil"
     try:
         import PIL  # noqa: F401
     except ImportError:
@@ -217,6 +288,10 @@ def apply_camera_id_override(camera_id: str, date_str: str) -> str:
 
 
 def get_exif_datetime(path: Path) -> datetime | None:
+    # Header-only reader from the repo's shared/ folder when the script is run
+    # from a checkout; a copy of this file on its own falls back to Pillow.
+    if _fast_exif_datetime is not None:
+        return _fast_exif_datetime(path)
     try:
         from PIL import Image
         from PIL.ExifTags import TAGS
@@ -232,6 +307,230 @@ def get_exif_datetime(path: Path) -> datetime | None:
     return None
 
 
+def load_rename_manifest(output_root: Path) -> dict:
+    """
+    Load the record of photos renamed by earlier runs.
+
+    Keys are source paths; values hold the source size/mtime, the EXIF date
+    that was read (YYYYMMDD or None) and the renamed file's path relative to
+    output_root.
+    """
+    path = output_root / RENAME_MANIFEST_NAME
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_rename_manifest(output_root: Path, manifest: dict) -> None:
+    path = output_root / RENAME_MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def _manifest_entry(manifest: dict, img_path: Path):
+    """Return the manifest entry for img_path if the source file is unchanged."""
+    entry = manifest.get(str(img_path))
+    if not entry:
+        return None
+    try:
+        stat = img_path.stat()
+    except OSError:
+        return None
+    if entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return entry
+
+
+def scan_exif_dates(paths: list, workers) -> list:
+    """Read EXIF DateTimeOriginal for many photos in a process pool."""
+    if len(paths) < 200:
+        return [get_exif_datetime(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(get_exif_datetime, paths, chunksize=64))
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    """Copy-on-write clone via the Linux FICLONE ioctl."""
+    import fcntl
+    FICLONE = 0x40049409
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dest)
+
+
+def transfer_file(src: Path, dest: Path, mode: str) -> str:
+    """
+    Put a renamed copy of src at dest using the requested mode.
+
+    Falls back to a normal copy when linking is not possible (different
+    drive, unsupported filesystem). Returns the mode actually used.
+    """
+    if dest.exists():
+        dest.unlink()
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            _reflink(src, dest)
+            return "reflink"
+        except (OSError, ImportError):
+            if dest.exists():
+                dest.unlink()
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+# ── Cloud upload ─────────────────────────────────────────────────────────────
+
+class LocalBucket:
+    """
+    Stand-in for a google-cloud-storage Bucket backed by a local folder.
+
+    Implements the calls the uploader makes (list_blobs, blob,
+    upload_from_filename with if_generation_match=0) so an upload can be
+    rehearsed or tested without a connection: --offline DIR.
+    """
+
+    class _Blob:
+        def __init__(self, root: Path, name: str):
+            self.name = name
+            self._path = root / name
+
+        def upload_from_filename(self, filename, if_generation_match=None, **kwargs):
+            if if_generation_match == 0 and self._path.exists():
+                raise PreconditionFailed(f"{self.name} already exists")
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(filename, self._path)
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.name = self.root.name
+
+    def blob(self, name: str):
+        return LocalBucket._Blob(self.root, name)
+
+    def list_blobs(self, prefix: str = ""):
+        base = self.root / prefix
+        if not base.is_dir():
+            return []
+        return [LocalBucket._Blob(self.root, p.relative_to(self.root).as_posix())
+                for p in base.rglob("*") if p.is_file()]
+
+
+def get_gcs_bucket(bucket_name: str):
+    """
+    One client (and connection pool) for the whole run.
+
+    Raises DefaultCredentialsError when `gcloud auth application-default
+    login` has not been run.
+    """
+    from google.cloud import storage
+    client = storage.Client(project="gcf-camera-traps")
+    return client.bucket(bucket_name)
+
+
+def load_upload_manifest(output_root: Path) -> dict:
+    """{blob_name: {"status": "uploaded"|"exists"|"failed", ...}} from earlier runs."""
+    try:
+        with open(output_root / UPLOAD_MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_upload_manifest(output_root: Path, manifest: dict) -> None:
+    path = output_root / UPLOAD_MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _upload_one(bucket, local_path: Path, blob_name: str, retries: int) -> str:
+    """Upload a file without overwriting; retry transient errors with backoff."""
+    for attempt in range(retries + 1):
+        try:
+            bucket.blob(blob_name).upload_from_filename(str(local_path), if_generation_match=0)
+            return "uploaded"
+        except PreconditionFailed:
+            return "exists"
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(2 ** attempt + random.uniform(0, 1))
+
+
+def upload_files(bucket, files: list, output_root: Path, workers: int = UPLOAD_WORKERS,
+                 retries: int = UPLOAD_RETRIES, on_progress=None) -> dict:
+    """
+    Upload (local_path, blob_name) pairs that are not already in the bucket.
+
+    Each destination station folder is listed once to find what is already
+    there, and files already recorded as done in the upload manifest are
+    skipped without listing. Results are saved to the manifest as they come
+    in so an interrupted run can resume.
+
+    Returns:
+        dict: counts for "uploaded", "exists" and "failed"
+    """
+    manifest = load_upload_manifest(output_root)
+    counts = {"uploaded": 0, "exists": 0, "failed": 0}
+
+    pending = []
+    for local_path, blob_name in files:
+        if manifest.get(blob_name, {}).get("status") in ("uploaded", "exists"):
+            counts["exists"] += 1
+        else:
+            pending.append((local_path, blob_name))
+
+    # One listing per camera_trap/<type>/<yyyymm>/<station>/ prefix
+    prefixes = {blob_name.rsplit("/", 2)[0] + "/" for _, blob_name in pending}
+    existing = set()
+    for prefix in sorted(prefixes):
+        existing.update(b.name for b in bucket.list_blobs(prefix=prefix))
+
+    to_upload = []
+    for local_path, blob_name in pending:
+        if blob_name in existing:
+            counts["exists"] += 1
+            manifest[blob_name] = {"status": "exists"}
+        else:
+            to_upload.append((local_path, blob_name))
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_upload_one, bucket, local_path, blob_name, retries): (local_path, blob_name)
+            for local_path, blob_name in to_upload
+        }
+        for future in as_completed(futures):
+            local_path, blob_name = futures[future]
+            try:
+                status = future.result()
+                entry = {"status": status, "size": local_path.stat().st_size}
+            except Exception as e:
+                status = "failed"
+                entry = {"status": status, "error": str(e)}
+            counts[status] += 1
+            manifest[blob_name] = entry
+            done += 1
+            if done % 100 == 0:
+                save_upload_manifest(output_root, manifest)
+            if on_progress:
+                on_progress(done, len(to_upload))
+
+    save_upload_manifest(output_root, manifest)
+    return counts
+
+
 def auto_detect_from_path(p: Path) -> dict:
     """
     Detect camera_type and input_yyyymm from the folder path.
@@ -252,7 +551,22 @@ def auto_detect_from_path(p: Path) -> dict:
 
 # ── Main ──────────────────────────────────────────────────────────────────────
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="GCF camera trap rename + upload")
+    parser.add_argument("folder", nargs="?", help="camera trap month folder")
+    parser.add_argument("--mode", choices=("copy", "hardlink", "reflink"),
+                        default=TRANSFER_MODE, help="how renamed files are created")
+    parser.add_argument("--workers", type=int, default=RENAME_WORKERS,
+                        help="parallel workers for EXIF reading and copying")
+    parser.add_argument("--upload-workers", type=int, default=UPLOAD_WORKERS,
+                        help="parallel uploads to Google Cloud")
+    parser.add_argument("--offline", metavar="DIR",
+                        help="upload into a local folder instead of the bucket (testing)")
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
 
     print()
     print("=" * 60)
@@ -277,7 +591,7 @@ def main() -> None:
     # ── Check tools are installed ─────────────────────────────────────────────
     print()
     print("  Checking that everything needed is installed on this computer...")
-    check_dependencies()
+    check_dependencies(offline=bool(args.offline))
     print("  All good — tools are ready.")
 
     # ── 1. Input folder ───────────────────────────────────────────────────────
@@ -293,9 +607,9 @@ def main() -> None:
     print("  Example:  D:\\NAM\\EHGR\\camera_trap\\camera_fence\\202604")
     print()
 
-    if len(sys.argv) > 1:
-        input_folder = Path(sys.argv[1])
-        print(f"  Folder provided: {sys.argv[1]}")
+    if args.folder:
+        input_folder = Path(args.folder)
+        print(f"  Folder provided: {args.folder}")
     else:
         raw = input("  Folder path: ").strip()
         input_folder = Path(raw) if raw else Path(".")
@@ -491,15 +805,41 @@ def main() -> None:
     no_exif_count = 0
     gcs_manifest: dict = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
 
+    transfer_mode = args.mode
+    if transfer_mode != "copy" and input_folder.stat().st_dev != output_root.stat().st_dev:
+        print("  NOTE: The renamed folder is on a different drive from the photos,")
+        print("  so linking is not possible. Making normal copies instead.")
+        print()
+        transfer_mode = "copy"
+
+    # Photos renamed by an earlier run are skipped (no date read, no copy)
+    rename_manifest = load_rename_manifest(output_root)
+    all_images = [(cam, img_path) for cam in cameras_found for img_path in cam["images"]]
+    cached = {img_path: _manifest_entry(rename_manifest, img_path) for _, img_path in all_images}
+    to_scan = [img_path for _, img_path in all_images if cached[img_path] is None]
+
+    if len(to_scan) < len(all_images):
+        print(f"  {len(all_images) - len(to_scan)} photos were already renamed in an earlier run"
+              " and will be skipped.")
+    if to_scan:
+        print(f"  Reading the date from {len(to_scan)} photos...")
+    exif_dates = dict(zip(to_scan, scan_exif_dates(to_scan, args.workers)))
+
+    transfers = []   # (src, dest) still to be created
     for cam in cameras_found:
         station_id = cam["station_id"]
         camera_id  = cam["camera_id"]  # base ID from CAMERA_STATION_MAP
         print(f"  Processing camera:  {cam['folder'].name}  →  {station_id}/{camera_id}  ({len(cam['images'])} photos)")
 
         for img_path in cam["images"]:
-            exif_dt = get_exif_datetime(img_path)
-            if exif_dt:
-                date_str = exif_dt.strftime("%Y%m%d")
+            entry = cached[img_path]
+            if entry is not None:
+                exif_date = entry["exif_date"]
+            else:
+                exif_dt   = exif_dates[img_path]
+                exif_date = exif_dt.strftime("%Y%m%d") if exif_dt else None
+            if exif_date:
+                date_str = exif_date
             else:
                 date_str = fallback_date.strftime("%Y%m%d")
                 no_exif_count += 1
@@ -516,11 +856,29 @@ def main() -> None:
             final_name   = f"{COUNTRY}_{SITE}_{station_id}_{effective_camera_id}_{date_str}_{orig_stem}{ext}"
 
             out_dir = output_root / month_folder / station_id / station_cam
-            out_dir.mkdir(parents=True, exist_ok=True)
             dest = out_dir / final_name
-            shutil.copy2(img_path, dest)
+            rel_dest = str(dest.relative_to(output_root))
+            if entry is None or entry.get("dest") != rel_dest or not dest.exists():
+                transfers.append((img_path, dest))
+            stat = img_path.stat()
+            rename_manifest[str(img_path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "exif_date": exif_date,
+                "dest": rel_dest,
+            }
             gcs_manifest[month_folder][station_id][station_cam].append(dest)
 
+    # Create the renamed files in parallel (copying is I/O bound)
+    for out_dir in {dest.parent for _, dest in transfers}:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    if transfers:
+        print()
+        print(f"  Creating {len(transfers)} renamed files ({transfer_mode})...")
+        with ThreadPoolExecutor(max_workers=args.workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            list(pool.map(lambda t: transfer_file(t[0], t[1], transfer_mode), transfers))
+    save_rename_manifest(output_root, rename_manifest)
+
     renamed_total = sum(
         len(files)
         for months in gcs_manifest.values()
@@ -556,7 +914,7 @@ def main() -> None:
     print()
     print("  You can use this folder to upload to TrapTagger now if you like.")
 
-    # ── 6. Upload via gsutil ──────────────────────────────────────────────────
+    # ── 6. Upload to Google Cloud ──────────────────────────────────────────────────
     print()
     print("─" * 60)
     print("  STEP 5B OF 5 — Upload to Google Cloud Storage")
@@ -592,31 +950,88 @@ def main() -> None:
     any_failed     = False
     total_uploaded = 0
 
-    for month_folder in sorted(gcs_manifest):
-        month_label = datetime.strptime(month_folder + "01", "%Y%m%d").strftime("%B %Y")
-        print(f"  Uploading {month_label} photos...")
-        for station_id in sorted(gcs_manifest[month_folder]):
-            for station_cam, file_list in sorted(gcs_manifest[month_folder][station_id].items()):
-                gcs_dest = (
-                    f"gs://{bucket}/camera_trap/{camera_type}"
-                    f"/{month_folder}/{station_id}/{station_cam}/"
-                )
-                print(f"    {station_cam}:  {len(file_list)} photos  →  cloud")
-                result = subprocess.run(
-                    [_GSUTIL_BIN, "-m", "cp", "-n", "-I", gcs_dest],
-                    input="\n".join(str(f) for f in file_list),
-                    text=True,
-                    shell=(sys.platform == "win32"),
-                )
-                if result.returncode == 0:
-                    total_uploaded += len(file_list)
-                    print(f"    {station_cam}:  uploaded successfully")
-                else:
-                    print()
-                    print(f"    !! Upload failed for {station_cam}.")
-                    print(f"       This sometimes happens due to a connection problem.")
-                    print(f"       Re-run the script on the same folder to try again.")
-                    any_failed = True
+    target    = None
+    use_gsutil = not (args.offline or _NATIVE_GCS)
+    if args.offline:
+        target = LocalBucket(args.offline)
+    elif _NATIVE_GCS:
+        try:
+            target = get_gcs_bucket(bucket)
+        except DefaultCredentialsError:
+            print("  NOTE: Google Cloud sign-in for the fast uploader is not set up.")
+            print("  To use it next time, run this command once:")
+            print("    gcloud auth application-default login")
+            print()
+            if shutil.which(_GSUTIL_BIN):
+                print("  Uploading with gsutil for now.")
+                print()
+                use_gsutil = True
+            else:
+                print("  Then run this script again on the same folder.")
+                any_failed = True
+        except Exception as e:
+            print()
+            print(f"    !! Could not connect to Google Cloud: {e}")
+            any_failed = True
+
+    if target is not None:
+        upload_list = [
+            (f, f"camera_trap/{camera_type}/{month_folder}/{station_id}/{station_cam}/{f.name}")
+            for month_folder, stations in gcs_manifest.items()
+            for station_id, cams in stations.items()
+            for station_cam, file_list in cams.items()
+            for f in file_list
+        ]
+        try:
+            print(f"  Uploading {len(upload_list)} photos ({args.upload_workers} at a time)...")
+
+            def show_progress(done, total):
+                if done == total or done % 50 == 0:
+                    print(f"    {done} / {total} new photos uploaded")
+
+            counts = upload_files(target, upload_list, output_root,
+                                  workers=args.upload_workers, on_progress=show_progress)
+            total_uploaded = counts["uploaded"] + counts["exists"]
+            print(f"    {counts['uploaded']} uploaded, {counts['exists']} already in the cloud,"
+                  f" {counts['failed']} failed")
+            if counts["failed"]:
+                print()
+                print("    !! Some photos could not be uploaded.")
+                print(f"       Details: {output_root / UPLOAD_MANIFEST_NAME}")
+                print("       Re-run the script on the same folder to try again.")
+                any_failed = True
+        except Exception as e:
+            print()
+            print(f"    !! Could not connect to Google Cloud: {e}")
+            print("       Check your internet connection and that you have run:")
+            print("         gcloud auth application-default login")
+            any_failed = True
+    elif use_gsutil:
+        for month_folder in sorted(gcs_manifest):
+            month_label = datetime.strptime(month_folder + "01", "%Y%m%d").strftime("%B %Y")
+            print(f"  Uploading {month_label} photos...")
+            for station_id in sorted(gcs_manifest[month_folder]):
+                for station_cam, file_list in sorted(gcs_manifest[month_folder][station_id].items()):
+                    gcs_dest = (
+                        f"gs://{bucket}/camera_trap/{camera_type}"
+                        f"/{month_folder}/{station_id}/{station_cam}/"
+                    )
+                    print(f"    {station_cam}:  {len(file_list)} photos  →  cloud")
+                    result = subprocess.run(
+                        [_GSUTIL_BIN, "-m", "cp", "-n", "-I", gcs_dest],
+                        input="\n".join(str(f) for f in file_list),
+                        text=True,
+                        shell=(sys.platform == "win32"),
+                    )
+                    if result.returncode == 0:
+                        total_uploaded += len(file_list)
+                        print(f"    {station_cam}:  uploaded successfully")
+                    else:
+                        print()
+                        print(f"    !! Upload failed for {station_cam}.")
+                        print(f"       This sometimes happens due to a connection problem.")
+                        print(f"       Re-run the script on the same folder to try again.")
+                        any_failed = True
 
     print()
     print("=" * 60)
@@ -3,10 +3,14 @@ Multi-Model SECR Analysis Dashboard
 ====================================
 
 Spatially-Explicit Capture-Recapture analysis with multiple model comparison.
-Uses Murray Efford's 'secr' CRAN package to fit and compare detection function models
-(HN, HR, EX) crossed with density and behavioural-response structures.
+Uses Murray Efford's 'secr' CRAN package to fit and compare null models for the
+half-normal, hazard-rate and exponential detection functions (HN, HR, EX).
 
-REQUIRED R PACKAGE: secr  (CRAN — no GitHub compilation needed)
+Null models (HN, HR, EX) can also be fitted in-process by secr_engine.py,
+without R. That engine is not yet validated against secr.fit outputs
+(secr_engine_benchmark.py), so R stays the default engine when it is available.
+
+OPTIONAL R PACKAGE: secr  (CRAN — no GitHub compilation needed)
 Installation: R -e "install.packages(c('secr','jsonlite'))"
 
 Author: Giraffe Conservation Foundation
@@ -20,7 +24,11 @@ import sys
 import os
 from pathlib import Path
 import io
+import json
 import re
+import subprocess
+import tempfile
+import time
 from datetime import datetime
 
 try:
@@ -49,6 +57,10 @@ try:
         GiraffeSpotterClient,
         prepare_bailey_data
     )
+    from secr_analysis.capture_history import build_capture_history
+    from secr_analysis.fit_cache import FitCache, data_fingerprint, file_digest, run_fingerprint
+    from secr_analysis.secr_engine import DEFAULT_MODELS, DETECTFNS, run_secr
+    from shared.jobs import get_runner, poll_job
     SECR_AVAILABLE = True
 except ImportError as e:
     SECR_AVAILABLE = False
@@ -122,6 +134,97 @@ def ensure_r_packages():
     return {'ok': success, 'rscript': rscript, 'message': msg}
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# MODEL FITTING JOB
+# Runs on the shared job runner (shared.jobs) so the page stays responsive
+# while R works, and a cancel kills the Rscript process.
+# ─────────────────────────────────────────────────────────────────────────────
+R_TIMEOUT = 600  # seconds
+
+
+def fit_secr_job(ctx, captures_df, traps_df, n_transients, models, rscript=None, use_fit_cache=True):
+    """
+    Background job: fit the model set with the built-in engine, or with
+    secr_multi_model.R when `rscript` is given.
+
+    Returns a dict with 'results_dict', 'aic_table', 'source' ('fitted',
+    'cache', 'R' or 'R cache') and 'lookup' (the built-in engine's
+    FitCache.last_lookup); or with 'error', 'hints' and R's 'stdout' /
+    'stderr' when R could not produce results.
+    """
+    fit_cache = FitCache() if use_fit_cache else None
+
+    if rscript is None:
+        # Built-in engine: same inputs and outputs as the R script, in-process
+        ctx.progress(0.1, f"Fitting {len(models)} model(s)...")
+        results_dict, aic_df = run_secr(
+            captures_df, traps_df, n_transients=n_transients, models=models, cache=fit_cache
+        )
+        lookup = fit_cache.last_lookup if fit_cache is not None else None
+        return {'results_dict': results_dict, 'aic_table': aic_df,
+                'source': 'cache' if lookup and lookup['results'] else 'fitted', 'lookup': lookup}
+
+    r_script = Path(__file__).parent / "secr_multi_model.R"
+    if not r_script.exists():
+        return {'error': f"R script not found: {r_script}",
+                'hints': ["Make sure secr_multi_model.R is in the secr_analysis directory"]}
+
+    # R runs are cached whole, keyed on the inputs, models and R script
+    r_run_key = None
+    if fit_cache is not None:
+        r_data_key = data_fingerprint(captures_df, traps_df, engine=f"R-{file_digest(r_script)}")
+        r_run_key = run_fingerprint(r_data_key, n_transients, models)
+        cached_r = fit_cache.get_results(r_run_key)
+        if cached_r is not None:
+            results_dict, aic_df = cached_r
+            return {'results_dict': results_dict, 'aic_table': aic_df, 'source': 'R cache', 'lookup': None}
+
+    # Prepare data for R (secr format)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        captures_df.to_csv(tmpdir / 'captures.csv', index=False)   # Session, ID, Occasion, Detector
+        traps_df.to_csv(tmpdir / 'traps.csv', index=False)         # Detector, x, y
+        (tmpdir / 'transients.txt').write_text(str(n_transients))  # single integer for R to pick up
+        output_dir = tmpdir / "results"
+        output_dir.mkdir()
+
+        cmd = [rscript, str(r_script), str(tmpdir), str(output_dir), json.dumps(models)]
+        ctx.progress(0.1, "Running R SECR analysis (may take 1–5 minutes)...")
+
+        # Write stdout/stderr to temp files to avoid Windows pipe-buffer deadlock
+        stdout_file = tmpdir / "r_stdout.txt"
+        stderr_file = tmpdir / "r_stderr.txt"
+        with open(stdout_file, 'w') as fout, open(stderr_file, 'w') as ferr:
+            proc = subprocess.Popen(cmd, stdout=fout, stderr=ferr)
+            # Poll instead of wait(), so a cancel or the timeout stops R
+            deadline = time.monotonic() + R_TIMEOUT
+            while proc.poll() is None:
+                if ctx.cancelled or time.monotonic() > deadline:
+                    proc.kill()
+                    proc.wait()
+                    ctx.check()
+                    raise subprocess.TimeoutExpired(cmd, R_TIMEOUT)
+                time.sleep(1)
+        output = {'stdout': stdout_file.read_text(errors='replace'),
+                  'stderr': stderr_file.read_text(errors='replace')}
+
+        if proc.returncode != 0:
+            return {'error': "R script failed", 'hints': [f"**Full command:** {' '.join(cmd)}"], **output}
+
+        results_file = output_dir / "secr_results.json"
+        aic_file = output_dir / "aic_table.csv"
+        if not (results_file.exists() and aic_file.exists()):
+            return {'error': "Could not load results from R",
+                    'hints': ["secr_results.json / aic_table.csv were not written"], **output}
+        with open(results_file) as f:
+            results_dict = json.load(f)
+        aic_df = pd.read_csv(aic_file)
+
+    if r_run_key is not None:
+        fit_cache.put_results(r_run_key, results_dict, aic_df)
+    return {'results_dict': results_dict, 'aic_table': aic_df, 'source': 'R', 'lookup': None}
+
+
 def main():
     """Main Streamlit app"""
 
@@ -139,14 +242,14 @@ def main():
     1. Downloads patrol tracks from EarthRanger (survey effort)
     2. Downloads encounter data from GiraffeSpotter
     3. Matches encounters to patrol occasions (spatial-temporal)
-    4. Fits multiple SECR models — detection function × g0 structure:
-       - **HN** (Half-normal) × null / time / behavioural response
-       - **HR** (Hazard-rate) × null / time / behavioural response
-       - **EX** (Exponential) × null / time / behavioural response
-    5. Compares **9+ models by AICc** and computes Akaike weights
+    4. Fits up to 3 SECR models — one null model (constant D, g0, σ) per detection function:
+       - **HN** (Half-normal)
+       - **HR** (Hazard-rate)
+       - **EX** (Exponential)
+    5. Compares the selected models **by AICc** and computes Akaike weights
     6. Reports model-averaged population estimate + best-model CIs
     
-    **Package:** Murray Efford's `secr` (CRAN) — installs in seconds, no GitHub required
+    **Engines:** Murray Efford's `secr` (CRAN), or the built-in maximum-likelihood SECR (NumPy/SciPy, no R needed; not yet validated against `secr`)
     """)
     
     # ── R environment check (runs once, cached) ─────────────────────────────────
@@ -154,15 +257,9 @@ def main():
         r_env = ensure_r_packages()
 
     if not r_env['ok']:
-        st.error(f"❌ R not ready: {r_env['message']}")
-        st.markdown("""
-        **Install R** from https://www.r-project.org/ then open R and run:
-        ```r
-        install.packages(c('secr', 'jsonlite'))
-        ```
-        Then refresh this page.
-        """)
-        return
+        st.info(f"ℹ️ R not available ({r_env['message']}) — SECR models will be fitted with the built-in "
+                "Python engine, which is not yet validated against `secr`. To use the R `secr` package, install R from "
+                "https://www.r-project.org/, run `install.packages(c('secr', 'jsonlite'))` and refresh this page.")
     else:
         label = '✅ R ready' if 'already' in r_env['message'] else '✅ secr installed'
         st.success(f"{label} — `{Path(r_env['rscript']).parent.parent.name}`")
@@ -367,7 +464,10 @@ When unchecked, only encounters with identified individuals will be used (strict
                                 end_date=end_date.strftime('%Y-%m-%d'),
                                 size=2000
                             )
-                            
+                            if gs_client.last_download.get('cached'):
+                                st.caption(f"♻️ {gs_client.last_download['cached']} unchanged encounters reused from "
+                                           f"the local cache, {gs_client.last_download['hydrated']} fetched")
+
                             if encounters and len(encounters) > 0:
                                 # Prepare data for Bailey analysis
                                 secr_data = prepare_bailey_data(encounters, include_unidentified=include_unidentified)
@@ -808,166 +908,143 @@ When unchecked, only encounters with identified individuals will be used (strict
             
             st.markdown("**Models to Fit:**")
             st.info("""
-            Will compare up to **9 models** (detection function × g0 structure):
+            Will compare up to **3 models** — one null model (constant D, g₀ and σ) per detection function:
             
-            | Detection function | Null | Time-varying | Behavioural response |
-            |---|---|---|---|
-            | **HN** Half-normal: g(d) = g₀·exp(−d²/2σ²) | ✓ | ✓ | ✓ |
-            | **HR** Hazard-rate: 1−exp(−(d/σ)−z) | ✓ | ✓ | ✓ |
-            | **EX** Exponential: g(d) = g₀·exp(−d/σ) | ✓ | ✓ | ✓ |
+            | Model | Detection function |
+            |---|---|
+            | **HN.null** | Half-normal: g(d) = g₀·exp(−d²/2σ²) |
+            | **HR.null** | Hazard-rate: 1−exp(−(d/σ)−z) |
+            | **EX.null** | Exponential: g(d) = g₀·exp(−d/σ) |
             
             Models ranked by **AICc** with Akaike weights. Model-averaged N̂ also reported.
             """)
             
-            # Run models button
+            # Engine and model set. R is the default whenever it is available:
+            # the built-in engine has not yet been checked against secr.fit
+            # outputs (secr_engine_benchmark.py r_reference/).
             r_env = ensure_r_packages()  # guaranteed cached — instant
-            if not r_env['ok']:
+            engine_options = ["Python (built-in, not yet validated)", "R secr package"]
+            fit_engine = st.radio(
+                "Fitting engine", engine_options, index=1 if r_env['ok'] else 0,
+                horizontal=True, key="secr_fit_engine",
+                help="The R engine runs Efford's secr package. The built-in engine fits the same D~1 "
+                     "models by maximum likelihood in seconds without R, but its results have not yet "
+                     "been validated against secr."
+            )
+            selected_models = st.multiselect(
+                "Models", DEFAULT_MODELS, default=DEFAULT_MODELS, key="secr_models",
+                format_func=lambda m: f"{m} ({DETECTFNS[m.split('.')[0]]})"
+            )
+            use_r = fit_engine == engine_options[1]
+            use_fit_cache = st.checkbox(
+                "Reuse cached fits", value=True, key="secr_use_fit_cache",
+                help="Unchanged encounters, transients and models return the stored results instantly; "
+                     "with the built-in engine, adding a model only fits the new one."
+            )
+            
+            # Run models button
+            if use_r and not r_env['ok']:
                 st.error("❌ R is not available — see banner at top of page")
+            elif not selected_models:
+                st.warning("Select at least one model to fit")
             elif st.button("🚀 Fit SECR Models (Compare Detection Functions)", type="primary", use_container_width=True, key="run_oscr"):
-                with st.spinner("Fitting SECR models (this may take 1–3 minutes)..."):
-                    try:
-                        import tempfile
-                        import json
-                        import subprocess
-                        
-                        # Prepare data for R (secr format)
-                        with tempfile.TemporaryDirectory() as tmpdir:
-                            tmpdir = Path(tmpdir)
-                            
-                            individuals = sorted(secr_data['individual_id'].unique())
-                            occasions   = sorted(secr_data[occasion_col].unique())
-                            occ_map     = {o: i + 1 for i, o in enumerate(occasions)}  # 1-indexed
+                individuals = sorted(secr_data['individual_id'].unique())
+                occasions   = sorted(secr_data[occasion_col].unique())  # Occasion 1, 2, ...
 
-                            # ── Split residents / transients ─────────────────
-                            occ_per_ind = secr_data.groupby('individual_id')[occasion_col].nunique()
-                            resident_ids  = occ_per_ind[occ_per_ind >= 2].index
-                            transient_ids = occ_per_ind[occ_per_ind < 2].index
-                            n_transients  = len(transient_ids)
-                            residents_data = secr_data[secr_data['individual_id'].isin(resident_ids)]
+                # ── Split residents / transients ─────────────────
+                occ_per_ind = secr_data.groupby('individual_id')[occasion_col].nunique()
+                resident_ids  = occ_per_ind[occ_per_ind >= 2].index
+                transient_ids = occ_per_ind[occ_per_ind < 2].index
+                n_transients  = len(transient_ids)
+                residents_data = secr_data[secr_data['individual_id'].isin(resident_ids)]
 
-                            st.info(
-                                f"👥 **Residents** (seen on ≥2 occasions): {len(resident_ids)}  |  "
-                                f"**Transients** (seen once): {n_transients}  |  "
-                                f"**Total unique individuals**: {len(individuals)}"
-                            )
-
-                            if len(resident_ids) < 2:
-                                st.error("❌ Fewer than 2 residents (individuals seen on ≥2 occasions). "
-                                         "SECR cannot run — try a broader date range or different grouping.")
-                                st.stop()
-                            
-                            # Build trap lookup: unique (x,y) → trap_id
-                            has_xy = 'x' in secr_data.columns and 'y' in secr_data.columns
-                            if has_xy:
-                                traps_xy = residents_data[['x', 'y']].drop_duplicates().reset_index(drop=True)
-                                traps_xy.index = traps_xy.index + 1  # 1-indexed trap IDs
-                                trap_key = {(r.x, r.y): idx for idx, r in traps_xy.iterrows()}
+                if len(resident_ids) < 2:
+                    st.error("❌ Fewer than 2 residents (individuals seen on ≥2 occasions). "
+                             "SECR cannot run — try a broader date range or different grouping.")
+                    st.stop()
 
-                                # captures.csv: residents only (Session, ID, Occasion, Detector)
-                                cap_rows = []
-                                for _, row in residents_data.iterrows():
-                                    det_id = trap_key.get((row['x'], row['y']), 1)
-                                    cap_rows.append({
-                                        'Session':  'S1',
-                                        'ID':       str(row['individual_id']),
-                                        'Occasion': occ_map[row[occasion_col]],
-                                        'Detector': det_id
-                                    })
-                                pd.DataFrame(cap_rows).to_csv(tmpdir / 'captures.csv', index=False)
+                if not ('x' in secr_data.columns and 'y' in secr_data.columns):
+                    # No x/y — stop and tell user to re-download
+                    st.error("❌ No coordinate data found in encounter records.")
+                    st.warning("""
+                    **Action required:** Your GiraffeSpotter encounters are missing GPS coordinates,
+                    or the data was downloaded before the coordinate fix was applied.
 
-                                # traps.csv: Detector, x, y
-                                traps_out = traps_xy.copy()
-                                traps_out.index.name = 'Detector'
-                                traps_out.reset_index().to_csv(tmpdir / 'traps.csv', index=False)
+                    **Please go back to Step 2 and re-download the encounters.**
+                    SECR requires real spatial coordinates — a dummy grid cannot produce
+                    meaningful density or abundance estimates.
+                    """)
+                    st.stop()
 
-                                # transients.txt: single integer for R to pick up
-                                (tmpdir / 'transients.txt').write_text(str(n_transients))
-                            else:
-                                # No x/y — stop and tell user to re-download
-                                st.error("❌ No coordinate data found in encounter records.")
-                                st.warning("""
-                                **Action required:** Your GiraffeSpotter encounters are missing GPS coordinates,
-                                or the data was downloaded before the coordinate fix was applied.
+                # Detectors are the distinct (x, y) points, numbered in order of appearance
+                ch = build_capture_history(residents_data, occasion_col=occasion_col,
+                                           xy_cols=('x', 'y'), occasions=occasions)
 
-                                **Please go back to Step 2 and re-download the encounters.**
-                                SECR requires real spatial coordinates — a dummy grid cannot produce
-                                meaningful density or abundance estimates.
-                                """)
-                                st.stop()
+                # Fitting runs as a background job polled below, so R's 1–5
+                # minutes don't hold the page and a rerun doesn't lose the fit.
+                st.session_state.secr_fit_job = get_runner().submit(
+                    fit_secr_job, ch.secr_captures(), ch.secr_traps(), n_transients, list(selected_models),
+                    rscript=r_env['rscript'] if use_r else None, use_fit_cache=use_fit_cache,
+                    label=f"SECR fit ({', '.join(selected_models)})",
+                )
+                st.session_state.secr_fit_meta = {
+                    'n_transients': n_transients,
+                    'n_residents': len(resident_ids),
+                    'n_individuals': len(individuals),
+                }
+                st.session_state.secr_results = None
 
-                            # Call R script
-                            r_script = Path(__file__).parent / "secr_multi_model.R"
-                            
-                            if not r_script.exists():
-                                st.error(f"❌ R script not found: {r_script}")
-                                st.info("Make sure secr_multi_model.R is in the secr_analysis directory")
-                                st.info(f"**Expected location:** {r_script}")
-                            else:
-                                # Run R script
-                                output_dir = tmpdir / "results"
-                                output_dir.mkdir()
-                                
-                                # Use the already-verified Rscript path from ensure_r_packages()
-                                rscript_cmd = r_env['rscript']
-                                cmd = [rscript_cmd, str(r_script), str(tmpdir), str(output_dir)]
-                                
-                                st.info(f"🔧 Running R SECR analysis (may take 1–5 minutes)...")
-                                st.code(f"Command: {rscript_cmd} secr_multi_model.R")
-                                
-                                # Write stdout/stderr to temp files to avoid Windows pipe-buffer deadlock
-                                stdout_file = tmpdir / "r_stdout.txt"
-                                stderr_file = tmpdir / "r_stderr.txt"
-                                with open(stdout_file, 'w') as fout, open(stderr_file, 'w') as ferr:
-                                    proc = subprocess.run(cmd, stdout=fout, stderr=ferr, timeout=600)
-                                stdout_txt = stdout_file.read_text(errors='replace')
-                                stderr_txt = stderr_file.read_text(errors='replace')
-                                
-                                class _result:
-                                    returncode = proc.returncode
-                                    stdout = stdout_txt
-                                    stderr = stderr_txt
-                                result = _result()
-                                
-                                if result.returncode != 0:
-                                    st.error("❌ R script failed")
-                                    st.warning("**R stderr:**")
-                                    st.code(result.stderr)
-                                    st.warning("**R stdout:**")
-                                    st.code(result.stdout)
-                                    st.info(f"**Full command:** {' '.join(cmd)}")
-                                    # The auto-installer should have caught this, but just in case:
-                                    if "there is no package called 'secr'" in result.stderr:
-                                        st.error("⚠️ secr package missing from R library. "
-                                                 "Clear the Streamlit cache and reload to re-run the installer.")
-                                else:
-                                    # Load results
-                                    results_file = output_dir / "secr_results.json"
-                                    aic_file = output_dir / "aic_table.csv"
-                                        
-                                    if results_file.exists() and aic_file.exists():
-                                        with open(results_file) as f:
-                                            results_dict = json.load(f)
-                                        
-                                        aic_df = pd.read_csv(aic_file)
-                                        
-                                        # Store results
-                                        st.session_state.secr_results = {
-                                            'results_dict': results_dict,
-                                            'aic_table': aic_df,
-                                            'n_transients': n_transients,
-                                            'n_residents': len(resident_ids)
-                                        }
-                                        
-                                        st.success("✅ Model fitting complete!")
-                                        st.balloons()
-                                        
-                                    else:
-                                        st.error("❌ Could not load results from R")
-                                        st.info(f"Expected files not found in {output_dir}")
-                                    
-                    except Exception as e:
-                        st.error(f"❌ Analysis failed: {str(e)}")
-                        st.exception(e)
+            if st.session_state.get('secr_fit_job'):
+                job_id = st.session_state.secr_fit_job
+                meta = st.session_state.secr_fit_meta
+                st.info(
+                    f"👥 **Residents** (seen on ≥2 occasions): {meta['n_residents']}  |  "
+                    f"**Transients** (seen once): {meta['n_transients']}  |  "
+                    f"**Total unique individuals**: {meta['n_individuals']}"
+                )
+                status = poll_job(job_id)
+                st.session_state.secr_fit_job = None
+                if status is None:
+                    st.warning("The fitting job is no longer available — click Fit again.")
+                elif status["state"] == "done":
+                    fit = get_runner().result(job_id)
+                    if fit.get('error'):
+                        st.error(f"❌ {fit['error']}")
+                        for hint in fit.get('hints', []):
+                            st.info(hint)
+                        if 'stderr' in fit:
+                            st.warning("**R stderr:**")
+                            st.code(fit['stderr'])
+                            st.warning("**R stdout:**")
+                            st.code(fit['stdout'])
+                            # The auto-installer should have caught this, but just in case:
+                            if "there is no package called 'secr'" in fit['stderr']:
+                                st.error("⚠️ secr package missing from R library. "
+                                         "Clear the Streamlit cache and reload to re-run the installer.")
+                    else:
+                        st.session_state.secr_results = {
+                            'results_dict': fit['results_dict'],
+                            'aic_table': fit['aic_table'],
+                            'n_transients': meta['n_transients'],
+                            'n_residents': meta['n_residents']
+                        }
+                        lookup = fit.get('lookup')
+                        if fit['source'] == 'cache':
+                            st.success("✅ Loaded cached results (same encounters and models)")
+                        elif fit['source'] == 'R cache':
+                            st.success("✅ Loaded cached R results (same encounters and models)")
+                        else:
+                            if lookup and lookup['reused']:
+                                st.caption(f"♻️ Reused cached fits: {', '.join(lookup['reused'])} — "
+                                           f"fitted: {', '.join(lookup['fitted'])}")
+                            st.success("✅ Model fitting complete!")
+                            st.balloons()
+                elif status["state"] == "cancelled":
+                    st.info("Model fitting cancelled.")
+                else:
+                    st.error(f"❌ Analysis failed: {status.get('error') or status['state']}")
+                    if status.get("traceback"):
+                        st.code(status["traceback"])
 
     else:
         st.info("👆 Please download and prepare GiraffeSpotter encounter data to continue")
@@ -12,8 +12,34 @@ Date: February 2026
 
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+import hashlib
+import json
 import os
+import sqlite3
+import tempfile
+
+try:
+    from shared.event_store import CACHE_DIR, private_dir
+except ImportError:
+    CACHE_DIR = Path(os.environ.get("GCF_CACHE_DIR", Path(tempfile.gettempdir()) / "gcf_cache"))
+
+    def private_dir(path):
+        path = Path(path)
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return path
+
+try:
+    from secr_analysis.bailey_engine import (
+        DEFAULT_REPLICATES, DEFAULT_THRESHOLDS, estimate_windows, sensitivity_table,
+    )
+    from secr_analysis.capture_history import build_capture_history
+except ImportError:
+    from bailey_engine import DEFAULT_REPLICATES, DEFAULT_THRESHOLDS, estimate_windows, sensitivity_table
+    from capture_history import build_capture_history
 
 try:
     from pywildbook import WildbookClient
@@ -34,7 +60,7 @@ class BaileyAnalysis:
     3. Add transients to get total population estimate
     """
     
-    def __init__(self, capture_data, occasion_col='occasion'):
+    def __init__(self, capture_data, occasion_col='occasion', verbose=True):
         """
         Initialize Bailey's analysis
         
@@ -45,37 +71,44 @@ class BaileyAnalysis:
         occasion_col : str
             Column name to use as occasion identifier (default: 'occasion')
             If 'occasion' column exists, uses that. Otherwise falls back to 'date'
+        verbose : bool
+            Print progress and results (default: True)
         """
         self.capture_data = capture_data.copy()
+        self.verbose = verbose
         
         # Determine which column to use for occasions
         if occasion_col in self.capture_data.columns:
             self.occasion_col = occasion_col
             self.unique_occasions = sorted(self.capture_data[occasion_col].unique())
-            print(f"\n📊 Bailey's Triple Catch Analysis Initialized")
-            print(f"  • Using '{occasion_col}' as occasion identifier")
-            print(f"  • Total encounters: {len(self.capture_data)}")
-            print(f"  • Unique individuals: {self.capture_data['individual_id'].nunique()}")
-            print(f"  • Survey occasions: {len(self.unique_occasions)}")
+            self._log(f"\n📊 Bailey's Triple Catch Analysis Initialized")
+            self._log(f"  • Using '{occasion_col}' as occasion identifier")
+            self._log(f"  • Total encounters: {len(self.capture_data)}")
+            self._log(f"  • Unique individuals: {self.capture_data['individual_id'].nunique()}")
+            self._log(f"  • Survey occasions: {len(self.unique_occasions)}")
             if len(self.unique_occasions) >= 3:
-                print(f"    - Occasion 1: {self.unique_occasions[0]}")
-                print(f"    - Occasion 2: {self.unique_occasions[1]}")
-                print(f"    - Occasion 3: {self.unique_occasions[2]}")
+                self._log(f"    - Occasion 1: {self.unique_occasions[0]}")
+                self._log(f"    - Occasion 2: {self.unique_occasions[1]}")
+                self._log(f"    - Occasion 3: {self.unique_occasions[2]}")
         else:
             # Fall back to date-based occasions
             self.occasion_col = 'date'
             if 'date' in self.capture_data.columns:
                 self.capture_data['date'] = pd.to_datetime(self.capture_data['date'])
             self.unique_occasions = sorted(self.capture_data['date'].unique())
-            print(f"\n📊 Bailey's Triple Catch Analysis Initialized")
-            print(f"  • Using 'date' as occasion identifier (no 'occasion' column found)")
-            print(f"  • Total encounters: {len(self.capture_data)}")
-            print(f"  • Unique individuals: {self.capture_data['individual_id'].nunique()}")
-            print(f"  • Survey dates: {len(self.unique_occasions)}")
+            self._log(f"\n📊 Bailey's Triple Catch Analysis Initialized")
+            self._log(f"  • Using 'date' as occasion identifier (no 'occasion' column found)")
+            self._log(f"  • Total encounters: {len(self.capture_data)}")
+            self._log(f"  • Unique individuals: {self.capture_data['individual_id'].nunique()}")
+            self._log(f"  • Survey dates: {len(self.unique_occasions)}")
             if len(self.unique_occasions) >= 3:
-                print(f"    - Day 1: {self.unique_occasions[0]}")
-                print(f"    - Day 2: {self.unique_occasions[1]}")
-                print(f"    - Day 3: {self.unique_occasions[2]}")
+                self._log(f"    - Day 1: {self.unique_occasions[0]}")
+                self._log(f"    - Day 2: {self.unique_occasions[1]}")
+                self._log(f"    - Day 3: {self.unique_occasions[2]}")
+    
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
     
     def classify_residents_transients(self, min_captures=2):
         """
@@ -97,20 +130,20 @@ class BaileyAnalysis:
         residents = capture_counts[capture_counts['total_captures'] >= min_captures].copy()
         transients = capture_counts[capture_counts['total_captures'] < min_captures].copy()
         
-        print(f"\n📋 Classification Results (min_captures={min_captures})")
-        print(f"=" * 60)
+        self._log(f"\n📋 Classification Results (min_captures={min_captures})")
+        self._log(f"=" * 60)
         
         # Capture frequency distribution
-        print(f"\nCapture frequency distribution:")
+        self._log(f"\nCapture frequency distribution:")
         max_captures = capture_counts['total_captures'].max()
         for i in range(1, int(max_captures) + 1):
             n = sum(capture_counts['total_captures'] == i)
             pct = round(100 * n / len(capture_counts), 1)
-            print(f"  {i} capture(s): {n} individuals ({pct}%)")
+            self._log(f"  {i} capture(s): {n} individuals ({pct}%)")
         
-        print(f"\nClassification:")
-        print(f"  • Residents (≥{min_captures} captures): {len(residents)} individuals")
-        print(f"  • Transients (<{min_captures} captures): {len(transients)} individuals")
+        self._log(f"\nClassification:")
+        self._log(f"  • Residents (≥{min_captures} captures): {len(residents)} individuals")
+        self._log(f"  • Transients (<{min_captures} captures): {len(transients)} individuals")
         
         return residents, transients
     
@@ -134,47 +167,43 @@ class BaileyAnalysis:
         # Classify residents and transients
         residents, transients = self.classify_residents_transients()
         
+        # Individuals x first three occasions
+        occ1, occ2, occ3 = self.unique_occasions[:3]
+        ch = build_capture_history(self.capture_data, occasion_col=self.occasion_col,
+                                   occasions=[occ1, occ2, occ3])
+        
         # Filter to residents if requested
         if residents_only:
-            resident_ids = residents['individual_id'].tolist()
-            analysis_data = self.capture_data[self.capture_data['individual_id'].isin(resident_ids)].copy()
-            print(f"\n🔍 Using residents only for Bailey's estimate")
+            ch = ch.subset(ch.ids.isin(residents['individual_id']))
+            self._log(f"\n🔍 Using residents only for Bailey's estimate")
         else:
-            analysis_data = self.capture_data.copy()
-            print(f"\n🔍 Using all individuals for Bailey's estimate")
+            self._log(f"\n🔍 Using all individuals for Bailey's estimate")
         
-        # Get individuals captured on each of first 3 occasions
-        occ1 = self.unique_occasions[0]
-        occ2 = self.unique_occasions[1]
-        occ3 = self.unique_occasions[2]
-        
-        occ1_ids = set(analysis_data[analysis_data[self.occasion_col] == occ1]['individual_id'].unique())
-        occ2_ids = set(analysis_data[analysis_data[self.occasion_col] == occ2]['individual_id'].unique())
-        occ3_ids = set(analysis_data[analysis_data[self.occasion_col] == occ3]['individual_id'].unique())
+        seen1, seen2, seen3 = ch.by_occasion().T
         
         # Sample statistics
-        n1 = len(occ1_ids)
-        n2 = len(occ2_ids)
-        n3 = len(occ3_ids)
-        m12 = len(occ1_ids & occ2_ids)  # Seen on both occasion 1 and 2
-        m13 = len(occ1_ids & occ3_ids)  # Seen on both occasion 1 and 3
-        m23 = len(occ2_ids & occ3_ids)  # Seen on both occasion 2 and 3
-        m123 = len(occ1_ids & occ2_ids & occ3_ids)  # Seen on all 3 occasions
-        
-        print(f"\n📊 Sample Statistics")
-        print(f"=" * 60)
-        print(f"  Occasion 1 ({occ1}): {n1} individuals")
-        print(f"  Occasion 2 ({occ2}): {n2} individuals")
-        print(f"  Occasion 3 ({occ3}): {n3} individuals")
-        print(f"  Recaptures 1&2: {m12}")
-        print(f"  Recaptures 1&3: {m13}")
-        print(f"  Recaptures 2&3: {m23}")
-        print(f"  All 3 occasions: {m123}")
+        n1 = int(seen1.sum())
+        n2 = int(seen2.sum())
+        n3 = int(seen3.sum())
+        m12 = int((seen1 & seen2).sum())  # Seen on both occasion 1 and 2
+        m13 = int((seen1 & seen3).sum())  # Seen on both occasion 1 and 3
+        m23 = int((seen2 & seen3).sum())  # Seen on both occasion 2 and 3
+        m123 = int((seen1 & seen2 & seen3).sum())  # Seen on all 3 occasions
+        
+        self._log(f"\n📊 Sample Statistics")
+        self._log(f"=" * 60)
+        self._log(f"  Occasion 1 ({occ1}): {n1} individuals")
+        self._log(f"  Occasion 2 ({occ2}): {n2} individuals")
+        self._log(f"  Occasion 3 ({occ3}): {n3} individuals")
+        self._log(f"  Recaptures 1&2: {m12}")
+        self._log(f"  Recaptures 1&3: {m13}")
+        self._log(f"  Recaptures 2&3: {m23}")
+        self._log(f"  All 3 occasions: {m123}")
         
         # Check if we can calculate estimate
         if m23 == 0:
-            print(f"\n⚠️ No recaptures between occasions 2 and 3")
-            print(f"Cannot calculate population estimate")
+            self._log(f"\n⚠️ No recaptures between occasions 2 and 3")
+            self._log(f"Cannot calculate population estimate")
             return None
         
         # Chapman's estimator (modified Petersen for closed population)
@@ -193,23 +222,23 @@ class BaileyAnalysis:
         ci_lower = N_chapman - 1.96 * se_chapman
         ci_upper = N_chapman + 1.96 * se_chapman
         
-        print(f"\n🔬 Chapman's Estimator (Residents Only)")
-        print(f"=" * 60)
-        print(f"  M (marked by occasion 2): {M}")
-        print(f"  n (sample occasion 3): {n}")
-        print(f"  m (recaptures occasion 3): {m}")
-        print(f"  N̂ = {N_chapman:.1f}")
-        print(f"  SE = {se_chapman:.1f}")
-        print(f"  95% CI: ({ci_lower:.1f}, {ci_upper:.1f})")
+        self._log(f"\n🔬 Chapman's Estimator (Residents Only)")
+        self._log(f"=" * 60)
+        self._log(f"  M (marked by occasion 2): {M}")
+        self._log(f"  n (sample occasion 3): {n}")
+        self._log(f"  m (recaptures occasion 3): {m}")
+        self._log(f"  N̂ = {N_chapman:.1f}")
+        self._log(f"  SE = {se_chapman:.1f}")
+        self._log(f"  95% CI: ({ci_lower:.1f}, {ci_upper:.1f})")
         
         # Add transients for total estimate
         N_total = N_chapman + len(transients)
         
-        print(f"\n🦒 Total Population Estimate")
-        print(f"=" * 60)
-        print(f"  Resident estimate: {N_chapman:.1f}")
-        print(f"  Transient count: {len(transients)}")
-        print(f"  Total estimate: {N_total:.1f}")
+        self._log(f"\n🦒 Total Population Estimate")
+        self._log(f"=" * 60)
+        self._log(f"  Resident estimate: {N_chapman:.1f}")
+        self._log(f"  Transient count: {len(transients)}")
+        self._log(f"  Total estimate: {N_total:.1f}")
         
         # Compile results
         results = {
@@ -248,6 +277,147 @@ class BaileyAnalysis:
         }
         
         return results
+    
+    def estimate_windows(self, thresholds=DEFAULT_THRESHOLDS, season_col=None, bootstrap_method=None,
+                         replicates=DEFAULT_REPLICATES, seed=None, max_workers=None, pool=None):
+        """
+        Estimates for every sliding triple of occasions and resident threshold
+        
+        Parameters:
+        -----------
+        thresholds : sequence of int
+            Minimum captures to be classified as resident (1 = all individuals)
+        season_col : str, optional
+            Column to estimate each season separately
+        bootstrap_method : None, 'nonparametric' or 'parametric'
+            Adds percentile bootstrap CIs with `replicates` replicates
+        
+        Returns:
+        --------
+        results : DataFrame
+            One row per (season, threshold, window) — see bailey_engine.estimate_windows
+        """
+        results = estimate_windows(
+            self.capture_data, occasion_col=self.occasion_col, season_col=season_col,
+            thresholds=thresholds, bootstrap_method=bootstrap_method, replicates=replicates,
+            seed=seed, max_workers=max_workers, pool=pool,
+        )
+        self._log(f"\n📊 {len(results)} window estimates "
+                  f"({results['season'].nunique() if len(results) else 0} season(s), thresholds {list(thresholds)})")
+        return results
+    
+    def sensitivity_table(self, results=None, value='N_total', **kwargs):
+        """
+        Estimates by window (rows) and resident threshold (columns)
+        
+        Parameters:
+        -----------
+        results : DataFrame, optional
+            estimate_windows() output (default: computed with its defaults)
+        value : str
+            Results column to tabulate, e.g. 'N_total', 'N_resident', 'CV'
+        """
+        if results is None:
+            results = self.estimate_windows(**kwargs)
+        return sensitivity_table(results, value=value)
+
+
+# Encounters fetched in parallel while the next search page is requested
+HYDRATE_WORKERS = 8
+# Search hits per request
+SEARCH_PAGE_SIZE = 100
+# Search-hit fields that change whenever the encounter is edited
+MODIFIED_KEYS = ('modified', 'dateModified', 'lastModified', 'version')
+
+
+def extract_encounter_id(enc):
+    """Encounter ID from a search hit or encounter record"""
+    for key in ('encounterId', 'encounter_id', 'encounterID', 'id', '_id'):
+        value = enc.get(key)
+        if value:
+            return value
+    return None
+
+
+def encounter_modified(hit):
+    """
+    Change marker for a search hit: its modified date / version when the
+    index carries one, otherwise a hash of the hit itself (the indexed copy
+    is rewritten whenever the encounter changes).
+    """
+    for key in MODIFIED_KEYS:
+        value = hit.get(key)
+        if value not in (None, ''):
+            return str(value)
+    return hashlib.sha256(json.dumps(hit, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class EncounterCache:
+    """
+    Hydrated GiraffeSpotter encounters on disk, keyed by encounter ID and
+    modified marker, so a repeat download for the same location only fetches
+    encounters that are new or have changed since.
+
+    One SQLite file per (site, username) under the shared cache dir.
+    Thread-safe: every call opens its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        private_dir(self.path.parent)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS encounters ("
+                "encounter_id TEXT PRIMARY KEY, modified TEXT NOT NULL, "
+                "body TEXT NOT NULL, fetched TEXT NOT NULL)"
+            )
+
+    @classmethod
+    def for_account(cls, base_url, username, cache_dir=None):
+        """The cache for a (base_url, username) pair"""
+        key = hashlib.sha256(f"{base_url.rstrip('/')}|{username or ''}".encode()).hexdigest()[:16]
+        return cls(Path(cache_dir or CACHE_DIR) / f"giraffespotter_encounters_{key}.sqlite3")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_many(self, markers):
+        """{encounter_id: record} for the cached encounters whose marker still matches"""
+        if not markers:
+            return {}
+        found = {}
+        ids = list(markers)
+        with closing(self._connect()) as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT encounter_id, modified, body FROM encounters "
+                    f"WHERE encounter_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for enc_id, modified, body in rows:
+                    if markers[enc_id] == modified:
+                        found[enc_id] = json.loads(body)
+        return found
+
+    def put_many(self, entries):
+        """Store (encounter_id, modified, record) triples, replacing older copies"""
+        fetched = datetime.now(timezone.utc).isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO encounters (encounter_id, modified, body, fetched) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(encounter_id) DO UPDATE SET modified=excluded.modified, "
+                "body=excluded.body, fetched=excluded.fetched",
+                [(enc_id, modified, json.dumps(record, default=str), fetched)
+                 for enc_id, modified, record in entries],
+            )
+
+    def clear(self):
+        """Drop every cached encounter"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM encounters")
 
 
 class GiraffeSpotterClient:
@@ -255,7 +425,8 @@ class GiraffeSpotterClient:
     Connect to GiraffeSpotter (Wildbook) using pywildbook library
     """
     
-    def __init__(self, base_url='https://giraffespotter.org'):
+    def __init__(self, base_url='https://giraffespotter.org', client=None,
+                 use_cache=True, cache_dir=None, max_workers=HYDRATE_WORKERS):
         """
         Initialize GiraffeSpotter client
         
@@ -263,14 +434,31 @@ class GiraffeSpotterClient:
         -----------
         base_url : str
             Base URL for GiraffeSpotter instance (default: giraffespotter.org without www)
+        client : object, optional
+            Client with the WildbookClient interface to use instead of a new
+            WildbookClient (e.g. FakeWildbookClient for offline runs)
+        use_cache : bool
+            Keep hydrated encounters on disk and reuse unchanged ones
+        cache_dir : str or Path, optional
+            Directory for the encounter cache (default: the shared cache dir)
+        max_workers : int
+            Encounters hydrated concurrently
         """
+        self.base_url = base_url
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.username = None
+        self.last_download = {}
+        self.authenticated = False
+        if client is not None:
+            self.client = client
+            return
         try:
             self.client = WildbookClient(base_url=base_url)
-            self.authenticated = False
         except Exception as e:
             print(f"❌ Failed to initialize WildbookClient: {str(e)}")
             self.client = None
-            self.authenticated = False
     
     def login(self, username, password):
         """
@@ -300,6 +488,7 @@ class GiraffeSpotterClient:
             # Check if authentication was successful
             if self.client.is_authenticated:
                 self.authenticated = True
+                self.username = username
                 print("✅ Successfully authenticated with GiraffeSpotter")
                 return True
             else:
@@ -326,11 +515,15 @@ class GiraffeSpotterClient:
         size : int
             Maximum number of results to fetch
         hydrate : bool
-            If True, fetch full encounter records to include coordinates
+            If True, fetch full encounter records to include coordinates.
+            Records are fetched `max_workers` at a time, overlapping with the
+            search paging; unchanged encounters come from the local cache
         
         Returns:
         --------
         encounters : list of dicts
+            In search order. Counts of the run ('hits', 'cached', 'hydrated',
+            'failed') are left in `self.last_download`
         """
         if not self.authenticated or self.client is None:
             print("❌ Not authenticated. Please login first.")
@@ -356,55 +549,92 @@ class GiraffeSpotterClient:
         else:
             query = None
         
-        def extract_encounter_id(enc):
-            for key in ('encounterId', 'encounter_id', 'encounterID', 'id', '_id'):
-                value = enc.get(key)
-                if value:
-                    return value
-            return None
+        cache = None
+        if hydrate and self.use_cache:
+            try:
+                cache = EncounterCache.for_account(self.base_url, self.username, self.cache_dir)
+            except Exception as e:
+                print(f"⚠️ Encounter cache unavailable: {str(e)}")
+        stats = {'hits': 0, 'cached': 0, 'hydrated': 0, 'failed': 0}
 
+        def fetch_encounter(enc_id):
+            try:
+                full_encounter = self.client.get_encounter(enc_id)
+            except Exception:
+                return None
+            return full_encounter if isinstance(full_encounter, dict) else None
+
+        # Hits are hydrated on the pool while the next search page is fetched;
+        # each slot holds a record, or (future, hit, enc_id, marker) until resolved
+        pool = ThreadPoolExecutor(max_workers=self.max_workers) if hydrate else None
         try:
             # Search encounters with pagination
-            all_encounters = []
+            slots = []
             offset = 0
-            batch_size = min(100, size)
+            batch_size = min(SEARCH_PAGE_SIZE, size)
             
-            while len(all_encounters) < size:
+            while len(slots) < size:
                 result = self.client.search_encounters(query, from_=offset, size=batch_size)
                 hits = result.get('hits', [])
                 
                 if not hits:
                     break
 
-                for hit in hits:
-                    if len(all_encounters) >= size:
-                        break
-
-                    if hydrate:
-                        enc_id = extract_encounter_id(hit)
-                        if enc_id:
-                            try:
-                                full_encounter = self.client.get_encounter(enc_id)
-                                if isinstance(full_encounter, dict):
-                                    all_encounters.append(full_encounter)
-                                    continue
-                            except Exception:
-                                pass
-                    all_encounters.append(hit)
+                hits = hits[:size - len(slots)]
+                stats['hits'] += len(hits)
+                if hydrate:
+                    ids = [extract_encounter_id(hit) for hit in hits]
+                    markers = {enc_id: encounter_modified(hit) for enc_id, hit in zip(ids, hits) if enc_id}
+                    cached = cache.get_many(markers) if cache is not None else {}
+                    for hit, enc_id in zip(hits, ids):
+                        if enc_id in cached:
+                            slots.append(cached[enc_id])
+                            stats['cached'] += 1
+                        elif enc_id:
+                            slots.append((pool.submit(fetch_encounter, enc_id), hit, enc_id, markers[enc_id]))
+                        else:
+                            slots.append(hit)
+                else:
+                    slots.extend(hits)
 
-                print(f"  Retrieved {len(all_encounters)} encounters...")
+                print(f"  Retrieved {len(slots)} encounters...")
                 
-                if len(all_encounters) >= result.get('total', 0):
+                if len(slots) >= result.get('total', 0):
                     break
                 
                 offset += batch_size
-            
+
+            all_encounters, fresh = [], []
+            for slot in slots:
+                if not isinstance(slot, tuple):
+                    all_encounters.append(slot)
+                    continue
+                future, hit, enc_id, marker = slot
+                full_encounter = future.result()
+                if full_encounter is None:
+                    # Keep the search hit (no coordinates) rather than drop the encounter
+                    all_encounters.append(hit)
+                    stats['failed'] += 1
+                else:
+                    all_encounters.append(full_encounter)
+                    fresh.append((enc_id, marker, full_encounter))
+                    stats['hydrated'] += 1
+            if cache is not None and fresh:
+                cache.put_many(fresh)
+
+            self.last_download = stats
+            if hydrate:
+                print(f"  Hydrated {stats['hydrated']} encounters, {stats['cached']} unchanged from cache"
+                      + (f", {stats['failed']} failed" if stats['failed'] else ""))
             print(f"✅ Downloaded {len(all_encounters)} encounter records")
             return all_encounters
                 
         except Exception as e:
             print(f"❌ Download error: {str(e)}")
             return None
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
 
 
 def prepare_bailey_data(wildbook_encounters, include_unidentified=True):
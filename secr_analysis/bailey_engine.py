@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Bailey's Triple Catch Engine
+============================
+
+Vectorized Bailey/Chapman estimates for every sliding triple of survey
+occasions and several resident thresholds at once, with bootstrap
+confidence intervals — the sensitivity tables that otherwise take one
+manual `BaileyAnalysis.bailey_triple_catch()` run per window.
+
+* each individual's detections in a window are a 3-bit mask (bit 0 = first
+  occasion of the window, bit 1 = second, bit 2 = third); individuals below
+  the resident threshold go in a ninth "transient" cell
+* a (threshold, window) cell is summarised by its 9 pattern counts, and n1,
+  n2, n3, m12, m13, m23, m123 are one matrix product of those counts, so
+  estimates and bootstrap replicates are computed for all cells together
+* nonparametric bootstrap resamples individuals (a multinomial draw over the
+  9 cells); parametric bootstrap simulates the residents from the fitted
+  Chapman model (N̂ animals, per-occasion capture probabilities n_j / N̂)
+  with transients held fixed; `bias_boot` (mean replicate minus estimate)
+  shows how far the estimator is from the simulated truth
+* replicates are drawn in fixed-size chunks with their own seeds, spread
+  over worker processes; results depend on the seed only, not on the
+  number of workers
+
+The estimator is the one in `BaileyAnalysis.bailey_triple_catch` and
+`residents_only_analysis_parameterized.R` (Chapman with m = m23, Seber SE).
+
+    from secr_analysis.bailey_engine import estimate_windows, sensitivity_table
+
+    results = estimate_windows(bailey_data, occasion_col='date', season_col='season',
+                               thresholds=(1, 2, 3), bootstrap_method='nonparametric')
+    sensitivity_table(results, value='N_total')
+
+Author: Giraffe Conservation Foundation
+Date: February 2026
+"""
+
+import logging
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from secr_analysis.capture_history import build_capture_history
+except ImportError:
+    from capture_history import build_capture_history
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLDS = (1, 2, 3)
+BOOTSTRAP_METHODS = ('nonparametric', 'parametric')
+DEFAULT_REPLICATES = 2000
+# Replicates per chunk (one seed and one worker task each)
+CHUNK_REPLICATES = 250
+Z_95 = 1.96
+
+# 8 capture patterns + transients
+N_CELLS = 9
+TRANSIENT_CELL = 8
+STATISTICS = ['n1', 'n2', 'n3', 'm12', 'm13', 'm23', 'm123']
+# (pattern, statistic) indicator: pattern k counts towards n1 if bit 0 is set, ...
+_STAT_BITS = [0b001, 0b010, 0b100, 0b011, 0b101, 0b110, 0b111]
+STAT_MATRIX = np.array([[int(k & bits == bits) for bits in _STAT_BITS] for k in range(8)])
+
+
+# ─── Capture patterns ─────────────────────────────────────────────────────────
+
+def window_patterns(seen):
+    """
+    3-bit capture pattern of each individual in each sliding window
+
+    Parameters:
+    -----------
+    seen : (individuals, occasions) bool array
+
+    Returns:
+    --------
+    (individuals, occasions - 2) uint8 array of values 0-7
+    """
+    seen = np.asarray(seen, dtype=np.uint8)
+    return seen[:, :-2] | (seen[:, 1:-1] << 1) | (seen[:, 2:] << 2)
+
+
+def pattern_counts(patterns, records, thresholds):
+    """
+    Pattern counts per (threshold, window)
+
+    Parameters:
+    -----------
+    patterns : (individuals, windows) array from window_patterns
+    records : (individuals,) encounters per individual
+    thresholds : sequence of int
+        Minimum encounters to count as a resident
+
+    Returns:
+    --------
+    (thresholds, windows, 9) int array; cell 8 counts the transients
+    """
+    n, W = patterns.shape
+    resident = np.asarray(records)[None, :] >= np.asarray(thresholds)[:, None]      # (T, n)
+    cells = np.where(resident[:, :, None], patterns[None, :, :], TRANSIENT_CELL)     # (T, n, W)
+    index = (np.arange(len(thresholds))[:, None, None] * W + np.arange(W)) * N_CELLS + cells
+    counts = np.bincount(index.ravel(), minlength=len(thresholds) * W * N_CELLS)
+    return counts.reshape(len(thresholds), W, N_CELLS)
+
+
+# ─── Estimator ────────────────────────────────────────────────────────────────
+
+def chapman(counts):
+    """
+    Chapman estimates from pattern counts, over any leading dimensions
+
+    Parameters:
+    -----------
+    counts : (..., 9) array of pattern counts
+
+    Returns:
+    --------
+    dict of arrays: the sample statistics, M, N_resident, SE, CI_lower,
+    CI_upper, transients and N_total (NaN where m23 == 0)
+    """
+    counts = np.asarray(counts)
+    stats = counts[..., :8] @ STAT_MATRIX
+    out = {name: stats[..., i] for i, name in enumerate(STATISTICS)}
+    M = out['n1'] + out['n2'] - out['m12']      # Marked by the end of occasion 2
+    n, m = out['n3'], out['m23']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = m > 0
+        N = np.where(valid, (M + 1) * (n + 1) / (m + 1) - 1, np.nan)
+        se = np.where(valid, np.sqrt((M + 1) * (n + 1) * (M - m) * (n - m) / ((m + 1) ** 2 * (m + 2))), np.nan)
+    out.update({
+        'M': M,
+        'N_resident': N,
+        'SE': se,
+        'CI_lower': N - Z_95 * se,
+        'CI_upper': N + Z_95 * se,
+        'transients': counts[..., TRANSIENT_CELL],
+        'N_total': N + counts[..., TRANSIENT_CELL],
+    })
+    return out
+
+
+# ─── Bootstrap ────────────────────────────────────────────────────────────────
+
+def _parametric_probs(counts):
+    """Per-cell simulation sizes and pattern probabilities under the fitted model"""
+    est = chapman(counts)
+    N = np.round(est['N_resident'])
+    valid = np.isfinite(N)
+    N = np.where(valid, N, 0).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.stack([est['n1'], est['n2'], est['n3']], axis=-1) / np.maximum(N, 1)[:, None]
+    p = np.clip(p, 0, 1)
+    bits = (np.arange(8)[:, None] >> np.arange(3)) & 1                            # (8, 3)
+    probs = np.prod(np.where(bits[None], p[:, None, :], 1 - p[:, None, :]), axis=-1)  # (C, 8)
+    return N, probs, valid
+
+
+def _bootstrap_chunk(counts, method, replicates, seed):
+    """
+    One chunk of bootstrap replicates for every cell
+
+    Returns:
+    --------
+    (replicates, cells) arrays of resident and total estimates
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.asarray(counts, dtype=np.int64)
+    if method == 'nonparametric':
+        size = counts.sum(axis=1)
+        probs = counts / np.maximum(size, 1)[:, None]
+        draws = rng.multinomial(size, probs, size=(replicates, len(counts)))
+    else:
+        size, probs, valid = _parametric_probs(counts)
+        residents = rng.multinomial(size, probs, size=(replicates, len(counts)))
+        transients = np.broadcast_to(counts[:, TRANSIENT_CELL], (replicates, len(counts)))
+        draws = np.concatenate([residents, transients[..., None]], axis=-1)
+        draws[:, ~valid] = 0
+    est = chapman(draws)
+    return est['N_resident'], est['N_total']
+
+
+def bootstrap(counts, method='nonparametric', replicates=DEFAULT_REPLICATES, seed=None,
+              max_workers=None, pool=None):
+    """
+    Bootstrap replicates of the resident and total estimates
+
+    Parameters:
+    -----------
+    counts : (cells, 9) array of pattern counts
+    method : 'nonparametric' (resample individuals) or 'parametric'
+        (simulate from the fitted Chapman model)
+    replicates : int
+    seed : int, optional
+    max_workers : int, optional
+        Worker processes (default: one per CPU); 1 runs in-process
+    pool : Executor, optional
+        Existing process pool to run on (e.g. the shared job runner's)
+
+    Returns:
+    --------
+    N_resident, N_total : (replicates, cells) arrays; NaN where a replicate
+    had no m23 recaptures
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Unknown bootstrap method '{method}' — expected one of {BOOTSTRAP_METHODS}")
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, N_CELLS)
+    sizes = [min(CHUNK_REPLICATES, replicates - start) for start in range(0, replicates, CHUNK_REPLICATES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(counts, method, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    own_pool = None
+    if pool is None and workers > 1 and len(jobs) > 1:
+        own_pool = pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        if pool is None:
+            chunks = [_bootstrap_chunk(*job) for job in jobs]
+        else:
+            chunks = [future.result() for future in [pool.submit(_bootstrap_chunk, *job) for job in jobs]]
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
+
+    return (np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]))
+
+
+def _percentile_ci(samples, level):
+    """Percentile interval and SE over replicates, ignoring failed (NaN) replicates"""
+    alpha = (1 - level) / 2
+    lower = np.full(samples.shape[1], np.nan)
+    upper = np.full(samples.shape[1], np.nan)
+    se = np.full(samples.shape[1], np.nan)
+    ok = np.isfinite(samples).sum(axis=0) >= 2
+    if ok.any():
+        lower[ok], upper[ok] = np.nanquantile(samples[:, ok], [alpha, 1 - alpha], axis=0)
+        se[ok] = np.nanstd(samples[:, ok], axis=0, ddof=1)
+    return lower, upper, se
+
+
+# ─── Results ──────────────────────────────────────────────────────────────────
+
+def _season_counts(df, id_col, occasion_col, thresholds):
+    """Pattern counts and window labels for one season's encounters"""
+    ch = build_capture_history(df, id_col=id_col, occasion_col=occasion_col)
+    occasions = list(ch.occasions)
+    if len(occasions) < 3:
+        return None, []
+    counts = pattern_counts(window_patterns(ch.by_occasion()), ch.records, thresholds)
+    windows = [occasions[w:w + 3] for w in range(len(occasions) - 2)]
+    return counts, windows
+
+
+def estimate_windows(df, id_col='individual_id', occasion_col='occasion', season_col=None,
+                     thresholds=DEFAULT_THRESHOLDS, bootstrap_method=None,
+                     replicates=DEFAULT_REPLICATES, level=0.95, seed=None,
+                     max_workers=None, pool=None):
+    """
+    Bailey/Chapman estimates for every sliding triple of occasions and every
+    resident threshold, per season
+
+    Parameters:
+    -----------
+    df : DataFrame
+        One row per encounter
+    id_col, occasion_col : str
+        Individual and occasion columns
+    season_col : str, optional
+        Estimate each season separately (windows and resident status
+        within the season)
+    thresholds : sequence of int
+        Minimum encounters to count as a resident (1 = all individuals)
+    bootstrap_method : None, 'nonparametric' or 'parametric'
+    replicates : int
+        Bootstrap replicates per estimate
+    level : float
+        Bootstrap confidence level
+    seed : int, optional
+        Bootstrap seed
+    max_workers, pool : see bootstrap()
+
+    Returns:
+    --------
+    results : DataFrame
+        One row per (season, threshold, window): occasions, sample
+        statistics, Chapman estimate with normal CI, transients, N_total,
+        and with a bootstrap, percentile CIs (N_resident_lcl/ucl,
+        N_total_lcl/ucl), the bootstrap SE and bias (mean replicate minus
+        N_resident) and the number of valid replicates
+    """
+    thresholds = [int(t) for t in thresholds]
+    groups = df.groupby(season_col, sort=True) if season_col else [('all', df)]
+
+    frames, all_counts = [], []
+    for season, season_df in groups:
+        counts, windows = _season_counts(season_df, id_col, occasion_col, thresholds)
+        if counts is None:
+            logger.info("Season %s: fewer than 3 occasions — skipped", season)
+            continue
+        T, W = counts.shape[:2]
+        frame = pd.DataFrame({
+            'season': season,
+            'threshold': np.repeat(thresholds, W),
+            'window': np.tile(np.arange(1, W + 1), T),
+            'occasion1': [w[0] for w in windows] * T,
+            'occasion2': [w[1] for w in windows] * T,
+            'occasion3': [w[2] for w in windows] * T,
+            'individuals': season_df[id_col].nunique(),
+        })
+        frames.append(frame)
+        all_counts.append(counts.reshape(T * W, N_CELLS))
+        logger.info("Season %s: %d occasions, %d windows x %d thresholds", season, W + 2, W, T)
+
+    if not frames:
+        return pd.DataFrame()
+    results = pd.concat(frames, ignore_index=True)
+    counts = np.concatenate(all_counts)
+
+    est = chapman(counts)
+    results['residents'] = results['individuals'] - est['transients']
+    for name in STATISTICS + ['M', 'N_resident', 'SE', 'CI_lower', 'CI_upper', 'transients', 'N_total']:
+        results[name] = est[name]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results['CV'] = 100 * results['SE'] / results['N_resident']
+
+    if bootstrap_method:
+        N_res, N_tot = bootstrap(counts, method=bootstrap_method, replicates=replicates, seed=seed,
+                                 max_workers=max_workers, pool=pool)
+        results['bootstrap'] = bootstrap_method
+        results['replicates_valid'] = np.isfinite(N_res).sum(axis=0)
+        results['N_resident_lcl'], results['N_resident_ucl'], results['SE_boot'] = _percentile_ci(N_res, level)
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)   # all-NaN cells
+            results['bias_boot'] = np.nanmean(N_res, axis=0) - results['N_resident'].to_numpy()
+        results['N_total_lcl'], results['N_total_ucl'], _ = _percentile_ci(N_tot, level)
+        logger.info("%s bootstrap: %d replicates x %d estimates", bootstrap_method, replicates, len(results))
+    return results
+
+
+def sensitivity_table(results, value='N_total', index=('season', 'window'), columns='threshold'):
+    """
+    Pivot estimate_windows() results, e.g. N_total by window (rows) and
+    resident threshold (columns)
+    """
+    return results.pivot_table(index=list(index), columns=columns, values=value, aggfunc='first')
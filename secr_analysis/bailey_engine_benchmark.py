@@ -0,0 +1,105 @@
+"""
+Validation and timing of the Bailey's Triple Catch engine (bailey_engine.py).
+
+Simulates a multi-season survey (residents with a per-occasion capture
+probability, plus transients seen once) and:
+
+* checks every (season, threshold, window) estimate against a manual
+  `BaileyAnalysis.bailey_triple_catch()` run on that window's encounters
+* times the manual re-runs against one estimate_windows() pass
+* times nonparametric and parametric bootstraps and checks they do not
+  depend on the number of worker processes
+
+    python secr_analysis/bailey_engine_benchmark.py [replicates]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from secr_analysis.bailey_analysis import BaileyAnalysis  # noqa: E402
+from secr_analysis.bailey_engine import estimate_windows, sensitivity_table  # noqa: E402
+
+
+# ─── Fixture ──────────────────────────────────────────────────────────────────
+
+def make_fixture(seed=5, seasons=('2024-dry', '2024-wet', '2025-dry'), occasions=10,
+                 residents=600, p=0.3, transients=200):
+    """Encounters (individual_id, occasion, season), one row per sighting"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in seasons:
+        hits = rng.random((residents, occasions)) < p
+        ind, occ = np.nonzero(hits)
+        frames.append(pd.DataFrame({
+            'individual_id': [f"R{i:04d}" for i in ind] + [f"T-{season}-{i:04d}" for i in range(transients)],
+            'occasion': np.concatenate([occ + 1, rng.integers(1, occasions + 1, transients)]),
+            'season': season,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def manual_windows(df, thresholds):
+    """One bailey_triple_catch() per season, window and threshold — the loop the engine replaces"""
+    rows = []
+    for season, season_df in df.groupby('season'):
+        occasions = sorted(season_df['occasion'].unique())
+        for t in thresholds:
+            for w in range(len(occasions) - 2):
+                window_df = season_df[season_df['occasion'].isin(occasions[w:w + 3])]
+                # Resident status counts the whole season, as in the engine
+                counts = season_df.groupby('individual_id').size()
+                window_df = window_df.assign(keep=window_df['individual_id'].map(counts) >= t)
+                analysis = BaileyAnalysis(window_df[window_df['keep']], verbose=False)
+                result = analysis.bailey_triple_catch(residents_only=False)
+                rows.append({'season': season, 'threshold': t, 'window': w + 1,
+                             'N_resident': result['resident_estimate']['N'] if result else np.nan})
+    return pd.DataFrame(rows)
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    replicates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    thresholds = (1, 2, 3)
+    df = make_fixture()
+    print(f"Fixture: {len(df)} encounters, {df['individual_id'].nunique()} individuals, "
+          f"{df['season'].nunique()} seasons")
+
+    start = time.perf_counter()
+    manual = manual_windows(df, thresholds)
+    t_manual = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = estimate_windows(df, season_col='season', thresholds=thresholds)
+    t_engine = time.perf_counter() - start
+
+    merged = manual.merge(results, on=['season', 'threshold', 'window'], suffixes=('_manual', ''))
+    assert len(merged) == len(manual) == len(results)
+    assert np.allclose(merged['N_resident_manual'], merged['N_resident'].round(1), equal_nan=True), \
+        "engine estimates differ from bailey_triple_catch"
+    print(f"✓ {len(results)} estimates match bailey_triple_catch")
+    print(f"  manual re-runs {t_manual:.2f} s   engine {t_engine * 1000:.1f} ms\n")
+
+    for method in ('nonparametric', 'parametric'):
+        start = time.perf_counter()
+        boot = estimate_windows(df, season_col='season', thresholds=thresholds,
+                                bootstrap_method=method, replicates=replicates, seed=1)
+        elapsed = time.perf_counter() - start
+        pooled = estimate_windows(df, season_col='season', thresholds=thresholds,
+                                  bootstrap_method=method, replicates=replicates, seed=1, max_workers=2)
+        assert np.allclose(boot['N_total_lcl'], pooled['N_total_lcl'], equal_nan=True), \
+            "bootstrap depends on the number of workers"
+        print(f"{method:<14} {replicates} replicates x {len(boot)} estimates: {elapsed:.2f} s")
+
+    print()
+    print(sensitivity_table(boot, value='N_total').round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
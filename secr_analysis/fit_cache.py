@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+SECR Fit Cache
+==============
+
+Persistent cache of SECR model fits keyed by a fingerprint of the inputs,
+so "Fit SECR Models" on unchanged encounters returns the previous
+secr_results.json and AIC table instantly instead of re-running the
+1–5 minute fit.
+
+Two levels, in one SQLite file under the shared cache dir:
+
+* results — the full secr_results.json / aic_table.csv of a run, keyed by
+  (data fingerprint, transients, model set, engine)
+* fits — one native-engine fit per model, keyed by (data fingerprint,
+  model), so adding a model to the set only fits the new one
+
+The data fingerprint hashes the captures with each detector replaced by its
+coordinates, plus the trap layout and number of occasions: re-downloading
+the same encounters in another order gives the same key.
+
+    from secr_analysis.fit_cache import FitCache
+    from secr_analysis.secr_engine import run_secr
+
+    results_dict, aic_df = run_secr(captures, traps, n_transients, models, cache=FitCache())
+
+Author: Giraffe Conservation Foundation
+Date: February 2026
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from shared.event_store import CACHE_DIR, private_dir
+except ImportError:
+    CACHE_DIR = Path(os.environ.get("GCF_CACHE_DIR", Path(tempfile.gettempdir()) / "gcf_cache"))
+
+    def private_dir(path):
+        path = Path(path)
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return path
+
+
+def _sha256(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """Short content hash of a file, e.g. the R script as an engine version"""
+    return _sha256(Path(path).read_bytes())[:12]
+
+
+def data_fingerprint(captures, traps, n_occasions=None, engine='native'):
+    """
+    Content hash of secr-format inputs
+
+    Parameters:
+    -----------
+    captures : DataFrame
+        Session, ID, Occasion, Detector (as captures.csv)
+    traps : DataFrame
+        Detector, x, y (as traps.csv)
+    n_occasions : int, optional
+        Survey occasions (default: the highest Occasion in captures)
+    engine : str
+        Engine and version; part of the key so engine changes miss the cache
+    """
+    xy = traps.assign(Detector=traps['Detector'].astype(str)).set_index('Detector')[['x', 'y']]
+    located = xy.loc[captures['Detector'].astype(str)]
+    rows = pd.DataFrame({
+        'ID': captures['ID'].astype(str).to_numpy(),
+        'Occasion': captures['Occasion'].astype(int).to_numpy(),
+        'x': located['x'].to_numpy(dtype=float),
+        'y': located['y'].to_numpy(dtype=float),
+    }).sort_values(['ID', 'Occasion', 'x', 'y'])
+    layout = xy.astype(float).sort_values(['x', 'y'])
+    n_occasions = int(n_occasions or captures['Occasion'].max())
+    return _sha256(
+        engine, n_occasions,
+        rows.to_csv(index=False, float_format='%.17g'),
+        layout.to_csv(index=False, float_format='%.17g'),
+    )
+
+
+def run_fingerprint(data_key, n_transients, models):
+    """Key of one run: inputs, transients and the (unordered) model set"""
+    return _sha256(data_key, int(n_transients), json.dumps(sorted(models)))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class FitCache:
+    """
+    SECR results and per-model fits on disk.
+
+    Thread-safe: every call opens its own connection. `last_lookup` records
+    what the latest run_secr() call reused: {'results': bool, 'reused':
+    [models], 'fitted': [models]}.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(CACHE_DIR) / "secr_fits.sqlite3")
+        private_dir(self.path.parent)
+        self.last_lookup = None
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "run_key TEXT PRIMARY KEY, results TEXT NOT NULL, "
+                "aic_table TEXT NOT NULL, created TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fits ("
+                "data_key TEXT NOT NULL, model TEXT NOT NULL, fit TEXT NOT NULL, "
+                "created TEXT NOT NULL, PRIMARY KEY (data_key, model))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # ── full runs ────────────────────────────────────────────────────────────
+    def get_results(self, run_key):
+        """(results_dict, aic_df) of a cached run, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT results, aic_table FROM results WHERE run_key = ?", (run_key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), pd.read_csv(io.StringIO(row[1]))
+
+    def put_results(self, run_key, results, aic_df):
+        """Store a run's secr_results.json contents and AIC table"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (run_key, results, aic_table, created) VALUES (?, ?, ?, ?)",
+                (run_key, json.dumps(results, default=_json_default), aic_df.to_csv(index=False),
+                 datetime.now(timezone.utc).isoformat()),
+            )
+
+    # ── per-model fits ───────────────────────────────────────────────────────
+    def get_fits(self, data_key, models):
+        """{model: fit} for the requested models already fitted to these inputs"""
+        models = list(models)
+        if not models:
+            return {}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT model, fit FROM fits WHERE data_key = ? AND model IN ({','.join('?' * len(models))})",
+                [data_key, *models],
+            ).fetchall()
+        return {model: json.loads(fit) for model, fit in rows}
+
+    def put_fits(self, data_key, fits):
+        """Store fit_detectfn() results (each carries its model label)"""
+        created = datetime.now(timezone.utc).isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fits (data_key, model, fit, created) VALUES (?, ?, ?, ?)",
+                [(data_key, fit['label'], json.dumps(fit, default=_json_default), created) for fit in fits],
+            )
+
+    def clear(self):
+        """Drop every cached run and fit"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM fits")
@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Native SECR Likelihood Engine
+=============================
+
+Maximum-likelihood spatially explicit capture-recapture (SECR) in NumPy/SciPy,
+so the SECR step no longer needs an R installation and a `secr_multi_model.R`
+subprocess with CSV round trips.
+
+The model follows Efford's `secr.fit` for the model set the R script fits
+(D~1, g0~1, sigma~1 on proximity detectors):
+
+* detection functions HN (half-normal), HR (hazard-rate) and EX (exponential)
+* full likelihood with Poisson N, integrated over a mask of candidate
+  activity centres; (mask points x traps) distances are computed once and
+  every history's probability over the mask is one matrix product
+* D on the log link, g0 on the logit link, sigma and z on the log link;
+  D is profiled out while optimising and the variance-covariance matrix
+  comes from a numerical Hessian at the MLE
+* the default mask matches `make.mask(traps, buffer = 4 * spacing, type =
+  'traprect')` (64 cells across), so log-likelihoods and AICc tables can be
+  compared with the R output (see secr_engine_benchmark.py)
+
+Several detection functions are fitted in parallel worker processes, and
+with `cache=FitCache()` (fit_cache.py) repeat runs and already-fitted
+models come from disk.
+
+    from secr_analysis.secr_engine import run_secr
+
+    results_dict, aic_df = run_secr(captures, traps, n_transients=4)
+    # captures: Session, ID, Occasion, Detector (as captures.csv)
+    # traps:    Detector, x, y                  (as traps.csv)
+
+or, as a drop-in for the R script:
+
+    python secr_analysis/secr_engine.py <data_dir> <output_dir> [models_json]
+
+Author: Giraffe Conservation Foundation
+Date: February 2026
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.spatial.distance import cdist
+from scipy.special import expit, gammaln, logit, logsumexp
+
+try:
+    from secr_analysis.capture_history import build_capture_history
+    from secr_analysis.fit_cache import data_fingerprint, run_fingerprint
+except ImportError:
+    from capture_history import build_capture_history
+    from fit_cache import data_fingerprint, run_fingerprint
+
+DETECTFNS = {
+    'HN': 'Half-normal',
+    'HR': 'Hazard-rate',
+    'EX': 'Exponential',
+}
+# Same labels as the R script's default model set
+DEFAULT_MODELS = ['HN.null', 'HR.null', 'EX.null']
+# make.mask(type = 'traprect') defaults used by secr_multi_model.R
+MASK_NX = 64
+MASK_BUFFER_SPACINGS = 4
+Z_CRIT = 1.959964
+# Bump when the likelihood, mask or fit output changes, to invalidate cached fits
+ENGINE_VERSION = 1
+
+
+# ─── Data ─────────────────────────────────────────────────────────────────────
+
+class CaptureData:
+    """
+    Proximity-detector capture histories (capture_history.py) reduced to
+    what the likelihood needs.
+
+    counts[i, k] is the number of occasions individual i was detected at
+    trap k; with detection constant over occasions that is sufficient.
+    """
+
+    def __init__(self, captures, traps, n_occasions=None):
+        """
+        Parameters:
+        -----------
+        captures : DataFrame
+            Columns ID, Occasion (1-based), Detector (case-insensitive, as captures.csv)
+        traps : DataFrame
+            Columns Detector, x, y (metres, as traps.csv)
+        n_occasions : int, optional
+            Number of occasions (default: the highest occasion, as make.capthist)
+        """
+        captures = captures.rename(columns=str.lower)
+        traps = traps.rename(columns=str.lower)
+        self.trap_ids = traps['detector'].astype(str).to_numpy()
+        self.traps_xy = traps[['x', 'y']].to_numpy(dtype=float)
+
+        detectors = captures['detector'].astype(str)
+        unknown = ~detectors.isin(self.trap_ids)
+        if unknown.any():
+            raise ValueError(f"Detectors not in traps: {sorted(set(detectors[unknown]))[:5]}")
+        occasion = captures['occasion'].astype(int)
+        self.n_occasions = int(n_occasions or occasion.max())
+
+        self.history = build_capture_history(
+            pd.DataFrame({'id': captures['id'].astype(str), 'occasion': occasion, 'detector': detectors}),
+            id_col='id', occasion_col='occasion', trap_col='detector',
+            occasions=range(1, self.n_occasions + 1), traps=self.trap_ids, traps_xy=self.traps_xy,
+        )
+        self.ids = self.history.ids
+        self.counts = self.history.by_trap()
+        self.total_captures = self.history.n_detections
+
+        # Multinomial coefficient over distinct histories (secr's logmultinom)
+        self.logmultinom = gammaln(self.n + 1) - gammaln(self.history.history_multiplicities() + 1).sum()
+
+    @property
+    def n(self):
+        return len(self.ids)
+
+    def rpsv(self):
+        """Root pooled spatial variance of repeat detections (secr's sigma start value)"""
+        weights = self.counts
+        n_det = weights.sum(axis=1)
+        keep = n_det > 1
+        if not keep.any():
+            return np.nan
+        w = weights[keep]
+        centre = (w @ self.traps_xy) / n_det[keep, None]
+        sq = ((self.traps_xy[None, :, :] - centre[:, None, :]) ** 2).sum(axis=2)
+        return float(np.sqrt((w * sq).sum() / (n_det[keep] - 1).sum() / 2))
+
+
+def trap_spacing(traps_xy):
+    """Median nearest-neighbour distance between detectors (secr's spacing())"""
+    if len(traps_xy) < 2:
+        return np.nan
+    d = cdist(traps_xy, traps_xy)
+    d[d <= 0] = np.inf
+    return float(np.median(d.min(axis=1)))
+
+
+def make_mask(traps_xy, buffer=None, nx=MASK_NX):
+    """
+    Rectangular mask of cell centres around the traps, as
+    make.mask(traps, buffer, type = 'traprect', nx = 64).
+
+    Returns:
+    --------
+    points : (M, 2) array, cell_area_ha : float
+    """
+    if buffer is None:
+        buffer = MASK_BUFFER_SPACINGS * trap_spacing(traps_xy)
+    xl = traps_xy[:, 0].min() - buffer, traps_xy[:, 0].max() + buffer
+    yl = traps_xy[:, 1].min() - buffer, traps_xy[:, 1].max() + buffer
+    spacing = (xl[1] - xl[0]) / nx
+    x = np.arange(xl[0] + spacing / 2, xl[1] + 1e-9 * spacing, spacing)
+    y = np.arange(yl[0] + spacing / 2, yl[1] + 1e-9 * spacing, spacing)
+    xx, yy = np.meshgrid(x, y)
+    return np.column_stack([xx.ravel(), yy.ravel()]), spacing ** 2 / 10_000
+
+
+# ─── Likelihood ───────────────────────────────────────────────────────────────
+
+def _log_detection(dist, detectfn, g0, sigma, z=None):
+    """log g(d) for every (mask point, trap) distance"""
+    if detectfn == 'HN':
+        shape = -dist ** 2 / (2 * sigma ** 2)
+    elif detectfn == 'EX':
+        shape = -dist / sigma
+    elif detectfn == 'HR':
+        with np.errstate(divide='ignore', over='ignore'):
+            shape = np.log(-np.expm1(-(dist / sigma) ** -z))
+    else:
+        raise ValueError(f"Unknown detection function: {detectfn}")
+    return np.log(g0) + shape
+
+
+def _unpack(beta, detectfn):
+    g0 = float(np.clip(expit(beta[1]), 1e-12, 1 - 1e-12))
+    z = np.exp(beta[3]) if detectfn == 'HR' else None
+    return np.exp(beta[0]), g0, np.exp(beta[2]), z
+
+
+class _Likelihood:
+    """log L(beta) for one dataset, mask and detection function"""
+
+    def __init__(self, data, mask_xy, cell_area, detectfn):
+        self.data = data
+        self.detectfn = detectfn
+        self.cell_area = cell_area
+        self.dist = cdist(mask_xy, data.traps_xy)          # (M, K), computed once
+
+    def _parts(self, g0, sigma, z):
+        """(sum_i log sum_m Pr(w_i | m), sum_m p.(m)) for detection parameters"""
+        log_g = _log_detection(self.dist, self.detectfn, g0, sigma, z)
+        log_miss = np.log1p(-np.exp(log_g))                  # log(1 - g), (M, K)
+        counts, S = self.data.counts, self.data.n_occasions
+        log_pr = counts @ log_g.T + (S - counts) @ log_miss.T   # (n, M)
+        pdot = -np.expm1(S * log_miss.sum(axis=1))
+        return logsumexp(log_pr, axis=1).sum(), pdot.sum()
+
+    def loglik(self, beta):
+        D, g0, sigma, z = _unpack(beta, self.detectfn)
+        hist, pdot_sum = self._parts(g0, sigma, z)
+        n, a = self.data.n, self.cell_area * pdot_sum
+        return (n * np.log(D) + n * np.log(self.cell_area) - D * a
+                - gammaln(n + 1) + self.data.logmultinom + hist)
+
+    def profile(self, theta):
+        """-log L with D at its conditional MLE n / a(theta)"""
+        D, g0, sigma, z = _unpack(np.r_[0.0, theta], self.detectfn)
+        hist, pdot_sum = self._parts(g0, sigma, z)
+        a = self.cell_area * pdot_sum
+        if not np.isfinite(hist) or a <= 0:
+            return np.inf
+        n = self.data.n
+        return -(n * np.log(n / a) + n * np.log(self.cell_area) - n
+                 - gammaln(n + 1) + self.data.logmultinom + hist)
+
+    def esa(self, beta):
+        """Effective sampling area a(theta), hectares"""
+        _, g0, sigma, z = _unpack(beta, self.detectfn)
+        return self.cell_area * self._parts(g0, sigma, z)[1]
+
+
+def _hessian(f, x, rel_step=1e-4):
+    """Central-difference Hessian of f at x"""
+    x = np.asarray(x, dtype=float)
+    h = rel_step * np.maximum(np.abs(x), 1.0)
+    k = len(x)
+    H = np.empty((k, k))
+    f0 = f(x)
+    for i in range(k):
+        ei = np.zeros(k)
+        ei[i] = h[i]
+        H[i, i] = (f(x + ei) - 2 * f0 + f(x - ei)) / h[i] ** 2
+        for j in range(i):
+            ej = np.zeros(k)
+            ej[j] = h[j]
+            H[i, j] = H[j, i] = (f(x + ei + ej) - f(x + ei - ej) - f(x - ei + ej) + f(x - ei - ej)) / (4 * h[i] * h[j])
+    return H
+
+
+# ─── Fitting ──────────────────────────────────────────────────────────────────
+
+def _start_values(data, detectfn):
+    """Candidate (logit g0, log sigma[, log z]) starts around the data's RPSV"""
+    sigma0 = data.rpsv()
+    if not np.isfinite(sigma0) or sigma0 <= 0:
+        sigma0 = trap_spacing(data.traps_xy)
+    if not np.isfinite(sigma0) or sigma0 <= 0:
+        sigma0 = 1000.0
+    starts = []
+    for g0 in (0.05, 0.2, 0.5):
+        for mult in (0.5, 1.0, 2.0):
+            theta = [logit(g0), np.log(sigma0 * mult)]
+            if detectfn == 'HR':
+                theta.append(np.log(5.0))
+            starts.append(np.array(theta))
+    return starts
+
+
+def _interval(est, se, link):
+    """Back-transformed Wald interval on the link scale"""
+    if not np.isfinite(se):
+        return np.nan, np.nan
+    if link == 'logit':
+        b = logit(est)
+        return float(expit(b - Z_CRIT * se)), float(expit(b + Z_CRIT * se))
+    return float(est * np.exp(-Z_CRIT * se)), float(est * np.exp(Z_CRIT * se))
+
+
+def fit_detectfn(data, mask_xy, cell_area, detectfn='HN', label=None):
+    """
+    Fit D~1 g0~1 sigma~1 with one detection function.
+
+    Returns:
+    --------
+    fit : dict
+        label, detectfn, D_model, g0_model, npar, logLik, AIC, AICc,
+        converged, estimates {param: {estimate, SE, lcl, ucl}}, esa,
+        E_N {estimate, SE, lcl, ucl} over the mask
+    """
+    if detectfn not in DETECTFNS:
+        raise ValueError(f"Unknown detection function: {detectfn}")
+    label = label or f"{detectfn}.null"
+    lik = _Likelihood(data, mask_xy, cell_area, detectfn)
+
+    start = min(_start_values(data, detectfn), key=lik.profile)
+    opt = minimize(lik.profile, start, method='BFGS')
+    if not opt.success:
+        retry = minimize(lik.profile, opt.x, method='Nelder-Mead',
+                         options={'xatol': 1e-8, 'fatol': 1e-10, 'maxiter': 5000})
+        if retry.fun <= opt.fun:
+            opt = retry
+
+    theta = opt.x
+    esa = lik.esa(np.r_[0.0, theta])
+    beta = np.r_[np.log(data.n / esa), theta]
+    log_lik = float(lik.loglik(beta))
+    npar = len(beta)
+
+    H = _hessian(lambda b: -lik.loglik(b), beta)
+    try:
+        vcov = np.linalg.inv(H)
+        se_beta = np.sqrt(np.where(np.diag(vcov) > 0, np.diag(vcov), np.nan))
+    except np.linalg.LinAlgError:
+        se_beta = np.full(npar, np.nan)
+
+    D, g0, sigma, z = _unpack(beta, detectfn)
+    params = [('D', D, 'log'), ('g0', g0, 'logit'), ('sigma', sigma, 'log')]
+    if detectfn == 'HR':
+        params.append(('z', z, 'log'))
+    estimates = {}
+    for (name, est, link), se_link in zip(params, se_beta):
+        # Delta method back to the natural scale
+        se = est * se_link if link == 'log' else est * (1 - est) * se_link
+        lcl, ucl = _interval(est, se_link, link)
+        estimates[name] = {'estimate': float(est), 'SE': float(se), 'lcl': lcl, 'ucl': ucl}
+
+    # Expected N in the mask (region.N: lognormal interval)
+    area = len(mask_xy) * cell_area
+    n_hat = D * area
+    se_n = area * estimates['D']['SE']
+    if np.isfinite(se_n) and n_hat > 0:
+        c = np.exp(Z_CRIT * np.sqrt(np.log(1 + (se_n / n_hat) ** 2)))
+        n_lcl, n_ucl = n_hat / c, n_hat * c
+    else:
+        n_lcl = n_ucl = np.nan
+
+    n = data.n
+    aicc = -2 * log_lik + 2 * npar + 2 * npar * (npar + 1) / (n - npar - 1) if n - npar - 1 > 0 else np.nan
+    return {
+        'label': label,
+        'detectfn': detectfn,
+        'D_model': '~1',
+        'g0_model': '~1',
+        'npar': npar,
+        'logLik': log_lik,
+        'AIC': -2 * log_lik + 2 * npar,
+        'AICc': aicc,
+        'converged': bool(opt.success),
+        'estimates': estimates,
+        'esa': float(esa),
+        'mask_area': float(area),
+        'E_N': {'estimate': float(n_hat), 'SE': float(se_n), 'lcl': float(n_lcl), 'ucl': float(n_ucl)},
+    }
+
+
+def _model_detectfn(label):
+    detectfn = str(label).split('.')[0].upper()
+    if detectfn not in DETECTFNS:
+        raise ValueError(f"Unknown model '{label}' — expected one of {DEFAULT_MODELS}")
+    return detectfn
+
+
+def fit_models(data, mask_xy=None, cell_area=None, models=None, max_workers=None, pool=None):
+    """
+    Fit several models, in parallel worker processes when more than one CPU
+    is available. Models that fail are left out (and reported on stdout).
+
+    Parameters:
+    -----------
+    data : CaptureData
+    mask_xy, cell_area : mask points and cell area (ha); default make_mask(traps)
+    models : list of str
+        Model labels, e.g. ['HN.null', 'HR.null'] (default: DEFAULT_MODELS)
+    pool : Executor, optional
+        Existing process pool to fit on (e.g. the shared job runner's)
+
+    Returns:
+    --------
+    fits : list of dict (see fit_detectfn), in model order
+    """
+    models = list(models or DEFAULT_MODELS)
+    if mask_xy is None:
+        mask_xy, cell_area = make_mask(data.traps_xy)
+    jobs = [(data, mask_xy, cell_area, _model_detectfn(label), label) for label in models]
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    own_pool = None
+    if pool is None and workers > 1 and len(jobs) > 1:
+        own_pool = pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        if pool is None:
+            outcomes = []
+            for job in jobs:
+                try:
+                    outcomes.append(fit_detectfn(*job))
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            futures = [pool.submit(fit_detectfn, *job) for job in jobs]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
+
+    fits = []
+    for label, outcome in zip(models, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"  {label:<18} ✗ FAILED: {outcome}")
+        else:
+            fits.append(outcome)
+    return fits
+
+
+# ─── Results ──────────────────────────────────────────────────────────────────
+
+def aic_table(fits):
+    """Model ranking in the layout of the R script's aic_table.csv"""
+    table = pd.DataFrame([{
+        'model': f['label'],
+        'detectfn': f['detectfn'],
+        'D_model': f['D_model'],
+        'g0_model': f['g0_model'],
+        'k': f['npar'],
+        'logLik': f['logLik'],
+        'AIC': f['AIC'],
+        'AICc': f['AICc'],
+    } for f in fits])
+    # secr leaves AICc undefined for tiny samples; rank those on AIC
+    rank_on = 'AICc' if table['AICc'].notna().all() else 'AIC'
+    table = table.sort_values(rank_on, kind='stable').reset_index(drop=True)
+    table['deltaAICc'] = table[rank_on] - table[rank_on].min()
+    rel = np.exp(-0.5 * table['deltaAICc'])
+    table['weight'] = rel / rel.sum()
+    return table
+
+
+def _json_value(value):
+    if isinstance(value, (float, np.floating)) and not np.isfinite(value):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+def results_dict(fits, table, data, n_transients=0):
+    """secr_results.json contents, with the keys the R script writes"""
+    by_label = {f['label']: f for f in fits}
+    best = by_label[table['model'].iloc[0]]
+    est = best['estimates']
+    pop_est = {
+        'N_hat': best['E_N']['estimate'],
+        'N_lcl': best['E_N']['lcl'],
+        'N_ucl': best['E_N']['ucl'],
+        'D_hat': est['D']['estimate'],
+        'D_lcl': est['D']['lcl'],
+        'D_ucl': est['D']['ucl'],
+        'sigma': est['sigma']['estimate'],
+        'g0': est['g0']['estimate'],
+    }
+    ma_n = float(sum(w * by_label[m]['E_N']['estimate'] for m, w in zip(table['model'], table['weight'])))
+    n_hat = pop_est['N_hat']
+    results = {
+        'timestamp': datetime.now().isoformat(sep=' ', timespec='seconds'),
+        'package': 'secr_engine (NumPy/SciPy)',
+        'best_model': best['label'],
+        'models_fitted': table['model'].tolist(),
+        'model_count': len(table),
+        'n_individuals': data.n,
+        'n_occasions': data.n_occasions,
+        'n_detectors': len(data.trap_ids),
+        'total_captures': data.total_captures,
+        'n_transients': int(n_transients),
+        'population_estimate': pop_est,
+        'total_N_with_transients': n_hat + n_transients if np.isfinite(n_hat) else None,
+        'aic_table': table.to_dict('records'),
+        'model_averaged_N': ma_n,
+        'model_averaged_N_total': ma_n + n_transients,
+        'estimates': {f['label']: f['estimates'] for f in fits},
+    }
+    return _clean(results)
+
+
+def _clean(obj):
+    """NaN → None and NumPy scalars → Python, recursively (JSON-safe)"""
+    if isinstance(obj, dict):
+        return {k: _clean(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    return _json_value(obj)
+
+
+def run_secr(captures, traps, n_transients=0, models=None, n_occasions=None,
+             max_workers=None, pool=None, verbose=True, cache=None):
+    """
+    Fit the model set to secr-format captures/traps frames.
+
+    With a FitCache, a run on the same inputs, transients and model set
+    returns the stored results without fitting, and models already fitted
+    to the same inputs are reused (only the new ones are fitted).
+
+    Returns:
+    --------
+    results_dict : dict
+        secr_results.json contents
+    aic_df : DataFrame
+        aic_table.csv contents
+    """
+    models = list(models or DEFAULT_MODELS)
+    if cache is not None:
+        engine = f"native-{ENGINE_VERSION}-{MASK_NX}-{MASK_BUFFER_SPACINGS}"
+        data_key = data_fingerprint(captures, traps, n_occasions, engine=engine)
+        run_key = run_fingerprint(data_key, n_transients, models)
+        hit = cache.get_results(run_key)
+        if hit is not None:
+            cache.last_lookup = {'results': True, 'reused': models, 'fitted': []}
+            if verbose:
+                print("  Cached results for these inputs and models")
+            return hit
+
+    data = CaptureData(captures, traps, n_occasions=n_occasions)
+    if data.n < 2:
+        raise ValueError(f"Need at least 2 detected individuals, got {data.n}")
+    mask_xy, cell_area = make_mask(data.traps_xy)
+    if verbose:
+        print(f"  capthist: {data.n} individuals, {data.n_occasions} occasions, {len(data.trap_ids)} detectors")
+        print(f"  Auto mask: {len(mask_xy)} pixels\n")
+
+    cached = cache.get_fits(data_key, models) if cache is not None else {}
+    missing = [label for label in models if label not in cached]
+    new_fits = fit_models(data, mask_xy, cell_area, models=missing, max_workers=max_workers, pool=pool) if missing else []
+    by_label = {**cached, **{f['label']: f for f in new_fits}}
+    fits = [by_label[label] for label in models if label in by_label]
+    if not fits:
+        raise RuntimeError("No models completed — check your input data")
+    table = aic_table(fits)
+    if verbose:
+        for row in table.itertuples():
+            print(f"  {row.model:<18} AICc = {row.AICc:9.2f}  (logLik = {row.logLik:.2f}, k = {row.k})")
+    results = results_dict(fits, table, data, n_transients)
+
+    if cache is not None:
+        cache.put_fits(data_key, new_fits)
+        # A run with failed models is not stored, so the next click retries them
+        if len(fits) == len(models):
+            cache.put_results(run_key, results, table)
+        cache.last_lookup = {'results': False, 'reused': [m for m in models if m in cached],
+                             'fitted': [f['label'] for f in new_fits]}
+    return results, table
+
+
+def run_directory(data_dir, output_dir, models=None, **kwargs):
+    """
+    Same inputs and outputs as `Rscript secr_multi_model.R data_dir output_dir`:
+    reads captures.csv, traps.csv and transients.txt, writes
+    secr_results.json and aic_table.csv.
+    """
+    data_dir, output_dir = Path(data_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    captures = pd.read_csv(data_dir / 'captures.csv')
+    traps = pd.read_csv(data_dir / 'traps.csv')
+    transient_file = data_dir / 'transients.txt'
+    n_transients = int(transient_file.read_text().split()[0]) if transient_file.exists() else 0
+
+    results, table = run_secr(captures, traps, n_transients=n_transients, models=models, **kwargs)
+    with open(output_dir / 'secr_results.json', 'w') as f:
+        json.dump(results, f, indent=2)
+    table.to_csv(output_dir / 'aic_table.csv', index=False)
+    return results, table
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python secr_engine.py <data_dir> <output_dir> [models_json]")
+        sys.exit(1)
+    models_arg = json.loads(sys.argv[3]) if len(sys.argv) > 3 else None
+    if models_arg and isinstance(models_arg[0], dict):
+        models_arg = [m['label'] for m in models_arg]
+    run_directory(sys.argv[1], sys.argv[2], models=models_arg)
@@ -0,0 +1,257 @@
+"""
+Validation and timing of the native SECR engine (secr_engine.py).
+
+Simulates a fixture survey (a grid of proximity detectors, activity centres
+from a Poisson process, half-normal detection over several occasions) and:
+
+* checks the vectorized log-likelihood against a direct per-individual,
+  per-occasion product over the mask
+* fits the default model set and checks the half-normal fit recovers the
+  simulated density, g0 and sigma within its confidence intervals
+* times a cold run, a cached re-run and adding one model with a FitCache
+* checks the committed fixture in r_reference/ (captures.csv, traps.csv,
+  transients.txt) is still what make_fixture() builds, and compares the
+  native fit with the secr_multi_model.R outputs committed next to it
+  (aic_table.csv, secr_results.json), so no R is needed at check time;
+  exits non-zero while those outputs are missing or out of tolerance
+* when Rscript with the secr package is on the PATH, also runs
+  secr_multi_model.R on the fixture and compares the AIC tables and
+  population estimates
+
+    python secr_analysis/secr_engine_benchmark.py                 # fixture, R reference, live R if available
+    python secr_analysis/secr_engine_benchmark.py --compare <data_dir> <r_output_dir>
+    python secr_analysis/secr_engine_benchmark.py --make-reference    # needs Rscript + secr
+
+`--compare` checks an existing R run: data_dir holds the captures.csv /
+traps.csv / transients.txt the R script read, r_output_dir its
+aic_table.csv and secr_results.json. `--make-reference` rewrites
+r_reference/ from the fixture and one R run; commit the files it writes.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from secr_analysis.fit_cache import FitCache  # noqa: E402
+from secr_analysis.secr_engine import (  # noqa: E402
+    CaptureData, _Likelihood, make_mask, run_directory, run_secr,
+)
+
+R_SCRIPT = Path(__file__).resolve().parent / "secr_multi_model.R"
+# Fixture inputs and the R script's outputs on them, committed
+REFERENCE_DIR = Path(__file__).resolve().parent / "r_reference"
+# Agreement required with the R fits (same likelihood and mask; optimiser tolerance only)
+LOGLIK_TOL = 0.05
+AICC_TOL = 2 * LOGLIK_TOL
+PARAM_REL_TOL = 0.02
+N_REL_TOL = 0.02
+# Real parameters compared per model (z is HR-only and poorly determined)
+COMPARED_PARAMS = ('D', 'g0', 'sigma')
+
+
+# ─── Fixture ──────────────────────────────────────────────────────────────────
+
+def make_fixture(seed=11, grid=8, spacing=500.0, density=0.02, g0=0.3, sigma=400.0, occasions=5):
+    """Simulated survey: (captures, traps, truth) in the captures.csv / traps.csv layout"""
+    rng = np.random.default_rng(seed)
+    gx, gy = np.meshgrid(np.arange(grid) * spacing, np.arange(grid) * spacing)
+    traps = pd.DataFrame({'Detector': np.arange(1, grid * grid + 1), 'x': gx.ravel(), 'y': gy.ravel()})
+    buffer = 8 * sigma
+    lo, hi = -buffer, (grid - 1) * spacing + buffer
+    n_centres = rng.poisson(density * (hi - lo) ** 2 / 10_000)
+    centres = rng.uniform(lo, hi, size=(n_centres, 2))
+
+    d = np.hypot(centres[:, None, 0] - traps['x'].to_numpy(), centres[:, None, 1] - traps['y'].to_numpy())
+    p = g0 * np.exp(-d ** 2 / (2 * sigma ** 2))
+    hits = rng.random((occasions, *p.shape)) < p                    # (occasion, animal, trap)
+    occ, animal, trap = np.nonzero(hits)
+    captures = pd.DataFrame({
+        'Session': 'S1',
+        'ID': [f"GIR{a:04d}" for a in animal],
+        'Occasion': occ + 1,
+        'Detector': trap + 1,
+    })
+    return captures, traps, {'D': density, 'g0': g0, 'sigma': sigma}
+
+
+def direct_loglik(captures, traps, beta, nx=16):
+    """log L by explicit products over occasions and traps (HN), for checking"""
+    data = CaptureData(captures, traps)
+    mask_xy, cell_area = make_mask(data.traps_xy, nx=nx)
+    D, g0, sigma = np.exp(beta[0]), 1 / (1 + np.exp(-beta[1])), np.exp(beta[2])
+    d = np.hypot(mask_xy[:, None, 0] - data.traps_xy[:, 0], mask_xy[:, None, 1] - data.traps_xy[:, 1])
+    g = g0 * np.exp(-d ** 2 / (2 * sigma ** 2))
+    S = data.n_occasions
+    total = 0.0
+    trap_pos = {t: i for i, t in enumerate(data.trap_ids)}
+    for _, rows in captures.groupby('ID'):
+        w = np.zeros((S, len(data.trap_ids)))
+        w[rows['Occasion'] - 1, [trap_pos[str(t)] for t in rows['Detector']]] = 1
+        pr = np.ones(len(mask_xy))
+        for s in range(S):
+            pr *= np.prod(np.where(w[s] == 1, g, 1 - g), axis=1)
+        total += np.log(pr.sum())
+    n = data.n
+    a = cell_area * (1 - np.prod((1 - g) ** S, axis=1)).sum()
+    lik = _Likelihood(data, mask_xy, cell_area, 'HN')
+    direct = (n * np.log(D) + n * np.log(cell_area) - D * a - gammaln(n + 1) + data.logmultinom + total)
+    return direct, lik.loglik(np.asarray(beta))
+
+
+# ─── Comparison with R ────────────────────────────────────────────────────────
+
+def compare(data_dir, r_output_dir):
+    """Native fit of data_dir vs. the R script's outputs; raises AssertionError on mismatch"""
+    r_table = pd.read_csv(Path(r_output_dir) / 'aic_table.csv')
+    with open(Path(r_output_dir) / 'secr_results.json') as f:
+        r_results = json.load(f)
+    with tempfile.TemporaryDirectory() as out:
+        results, table = run_directory(data_dir, out, models=r_table['model'].tolist(), verbose=False)
+
+    merged = r_table.merge(table, on='model', suffixes=('_R', '_py'))
+    print(merged[['model', 'k_R', 'k_py', 'logLik_R', 'logLik_py', 'AICc_R', 'AICc_py', 'weight_R', 'weight_py']]
+          .to_string(index=False))
+    assert len(merged) == len(r_table), "models missing from the native fit"
+    assert (merged['k_R'] == merged['k_py']).all(), "parameter counts differ"
+    assert r_table['model'].iloc[0] == table['model'].iloc[0], "best model differs"
+
+    # Per model: logLik, AICc and the real-parameter estimates
+    assert 'estimates' in r_results, (
+        "secr_results.json has no per-model 'estimates' — regenerate it with the current secr_multi_model.R")
+    failures = []
+    print(f"\n{'model':<8} {'quantity':<8} {'R':>12} {'native':>12}")
+    for row in merged.itertuples(index=False):
+        checks = [('logLik', row.logLik_R, row.logLik_py, abs(row.logLik_R - row.logLik_py) <= LOGLIK_TOL),
+                  ('AICc', row.AICc_R, row.AICc_py, abs(row.AICc_R - row.AICc_py) <= AICC_TOL)]
+        r_est = r_results['estimates'].get(row.model, {})
+        py_est = results['estimates'][row.model]
+        for name in COMPARED_PARAMS:
+            if name not in r_est:
+                failures.append(f"{row.model} {name}: missing from the R estimates")
+                continue
+            r_value, py_value = float(r_est[name]['estimate']), py_est[name]['estimate']
+            checks.append((name, r_value, py_value, abs(py_value - r_value) <= PARAM_REL_TOL * abs(r_value)))
+        for name, r_value, py_value, ok in checks:
+            print(f"{row.model:<8} {name:<8} {r_value:>12.6g} {py_value:>12.6g}{'' if ok else '   ✗'}")
+            if not ok:
+                failures.append(f"{row.model} {name}: R {r_value:.6g}, native {py_value:.6g}")
+    assert not failures, "outside tolerance:\n  " + "\n  ".join(failures)
+
+    r_n = r_results['population_estimate']['N_hat']
+    py_n = results['population_estimate']['N_hat']
+    print(f"\nN_hat  R {float(r_n):.2f}   native {py_n:.2f}")
+    if r_n not in (None, 'NA'):
+        assert abs(py_n - float(r_n)) <= N_REL_TOL * float(r_n), "N_hat differs"
+    print("✓ native engine matches the R outputs")
+
+
+def write_fixture(data_dir, captures, traps, n_transients=0):
+    """captures.csv / traps.csv / transients.txt as the app writes them for R"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    captures.to_csv(data_dir / 'captures.csv', index=False)
+    traps.to_csv(data_dir / 'traps.csv', index=False)
+    (data_dir / 'transients.txt').write_text(str(n_transients))
+
+
+def check_reference():
+    """Committed fixture matches make_fixture(); native fit matches the committed R outputs"""
+    captures, traps, _ = make_fixture()
+    pd.testing.assert_frame_equal(pd.read_csv(REFERENCE_DIR / 'captures.csv'), captures, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(REFERENCE_DIR / 'traps.csv'), traps, check_dtype=False)
+    print(f"[OK] {REFERENCE_DIR.name}/ captures.csv and traps.csv match the fixture")
+    if not ((REFERENCE_DIR / 'aic_table.csv').exists() and (REFERENCE_DIR / 'secr_results.json').exists()):
+        sys.exit(f"[MISSING] no R outputs in {REFERENCE_DIR.name}/ — run --make-reference where Rscript and secr "
+                 "are installed and commit aic_table.csv and secr_results.json")
+    try:
+        compare(REFERENCE_DIR, REFERENCE_DIR)
+    except AssertionError as e:
+        sys.exit(f"[FAIL] native engine vs {REFERENCE_DIR.name}/: {e}")
+    print(f"[OK] native engine matches the R outputs in {REFERENCE_DIR.name}/")
+
+
+def make_reference():
+    """Write the fixture to r_reference/ and run secr_multi_model.R on it there"""
+    captures, traps, _ = make_fixture()
+    write_fixture(REFERENCE_DIR, captures, traps)
+    if not run_r(REFERENCE_DIR, REFERENCE_DIR):
+        sys.exit("Rscript with the secr and jsonlite packages is needed to write the R reference outputs")
+    compare(REFERENCE_DIR, REFERENCE_DIR)
+    print(f"Wrote {REFERENCE_DIR} — commit captures.csv, traps.csv, transients.txt, aic_table.csv, secr_results.json")
+
+
+def run_r(data_dir, output_dir):
+    """Run secr_multi_model.R if Rscript and secr are available; True on success"""
+    rscript = shutil.which('Rscript')
+    if not rscript:
+        return False
+    proc = subprocess.run([rscript, str(R_SCRIPT), str(data_dir), str(output_dir)],
+                          capture_output=True, text=True, timeout=1200)
+    if proc.returncode != 0:
+        print(proc.stdout[-2000:], proc.stderr[-2000:])
+        return False
+    return True
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--compare':
+        compare(sys.argv[2], sys.argv[3])
+        return
+    if sys.argv[1:] == ['--make-reference']:
+        make_reference()
+        return
+
+    captures, traps, truth = make_fixture()
+    direct, vectorized = direct_loglik(captures, traps, [np.log(0.02), -0.5, np.log(450)])
+    assert np.isclose(direct, vectorized, rtol=1e-10), (direct, vectorized)
+    print(f"log-likelihood  direct {direct:.6f}   vectorized {vectorized:.6f}")
+
+    start = time.perf_counter()
+    results, table = run_secr(captures, traps, max_workers=1)
+    elapsed = time.perf_counter() - start
+    est = results['estimates']['HN.null']
+    print()
+    for name, true_value in truth.items():
+        e = est[name]
+        print(f"  {name:<6} true {true_value:<8g} est {e['estimate']:<10.4g} 95% CI {e['lcl']:.4g} – {e['ucl']:.4g}")
+        assert e['lcl'] <= true_value <= e['ucl'], f"{name} CI misses the simulated value"
+    print(f"\n{len(table)} models fitted in {elapsed:.2f} s (no R)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FitCache(Path(tmp) / 'secr_fits.sqlite3')
+        models = table['model'].tolist()
+        for step, run_models in (('cold', models[:-1]), ('cached', models[:-1]), ('add one model', models)):
+            start = time.perf_counter()
+            cached_results, _ = run_secr(captures, traps, models=run_models, max_workers=1,
+                                         verbose=False, cache=cache)
+            print(f"  {step:<14} {time.perf_counter() - start:6.2f} s   fitted {cache.last_lookup['fitted']}")
+        assert cached_results['estimates'] == results['estimates'], "cached fits differ from a fresh run"
+    print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, r_out = Path(tmp) / 'data', Path(tmp) / 'r'
+        write_fixture(data_dir, captures, traps)
+        start = time.perf_counter()
+        if run_r(data_dir, r_out):
+            print(f"R secr_multi_model.R: {time.perf_counter() - start:.1f} s\n")
+            compare(data_dir, r_out)
+        else:
+            print("Rscript / secr not available — skipped the live comparison with R")
+    print()
+    check_reference()
+
+
+if __name__ == "__main__":
+    main()
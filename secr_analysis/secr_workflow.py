@@ -27,13 +27,20 @@ try:
 except ImportError:
     ECOSCOPE_AVAILABLE = False
 
+try:
+    from secr_analysis.capture_history import build_capture_history
+    from secr_analysis.secr_engine import CaptureData, fit_detectfn
+except ImportError:
+    from capture_history import build_capture_history
+    from secr_engine import CaptureData, fit_detectfn
+
 
 class SECRAnalysis:
     """
     Spatially-Explicit Capture-Recapture Analysis
     
-    This class implements a basic SECR model using half-normal detection function.
-    For production analysis, consider using specialized R packages like 'secr' or 'oSCR'.
+    Fits a D~1 g0~1 sigma~1 SECR model by maximum likelihood (secr_engine.py),
+    integrating over the state-space grid; half-normal detection by default.
     """
     
     def __init__(self, capture_data, trap_locations, state_space_buffer=5000):
@@ -71,18 +78,12 @@ class SECRAnalysis:
         print(f"  • State space area: {self._calculate_state_space_area():.2f} km²")
     
     def _create_capture_history(self):
-        """Create binary capture history matrix"""
-        individuals = sorted(self.capture_data['individual_id'].unique())
+        """Create binary capture history matrix (individuals x traps)"""
         traps = sorted(self.trap_locations['trap_id'].unique())
+        ch = build_capture_history(self.capture_data, occasion_col=None, trap_col='trap_id', traps=traps)
         
-        # Initialize matrix with zeros
-        history = pd.DataFrame(0, index=individuals, columns=traps)
-        
-        # Fill in captures (1 = captured, 0 = not captured)
-        for _, row in self.capture_data.iterrows():
-            history.loc[row['individual_id'], row['trap_id']] = 1
-        
-        return history
+        # 1 = captured at the trap, 0 = not captured
+        return pd.DataFrame((ch.by_trap() > 0).astype(int), index=ch.ids, columns=traps)
     
     def _create_state_space(self, grid_spacing=200):
         """Create grid of potential activity centers (state space)"""
@@ -97,6 +98,8 @@ class SECRAnalysis:
         y_coords = np.arange(y_min, y_max, grid_spacing)
         xx, yy = np.meshgrid(x_coords, y_coords)
         
+        self.grid_spacing = grid_spacing
+        
         # Flatten to get list of grid points
         state_space = pd.DataFrame({
             'x': xx.flatten(),
@@ -116,27 +119,56 @@ class SECRAnalysis:
         """Half-normal detection function"""
         return g0 * np.exp(-(distances**2) / (2 * sigma**2))
     
-    def fit_model(self, initial_params=None):
-        """Fit SECR model using maximum likelihood (simplified for demo)"""
-        if initial_params is None:
-            initial_params = [0.5, 1000, np.log(0.01)]
+    def fit_model(self, initial_params=None, detectfn='HN'):
+        """
+        Fit the SECR model by maximum likelihood over the state space
+        
+        Parameters:
+        -----------
+        initial_params : list, optional
+            Unused — start values come from the data (spatial spread of
+            recaptures); kept for backwards compatibility
+        detectfn : str
+            'HN' (half-normal), 'HR' (hazard-rate) or 'EX' (exponential)
+        
+        Returns:
+        --------
+        results : dict
+            g0, sigma, density (per ha / km²), N over the state space with
+            SE and 95% CI, logLik / AIC / AICc and convergence
+        """
+        captures = pd.DataFrame({
+            'ID': self.capture_data['individual_id'],
+            'Detector': self.capture_data['trap_id'],
+            # Without occasions every capture counts as one survey occasion
+            'Occasion': (pd.factorize(self.capture_data['occasion'], sort=True)[0] + 1
+                         if 'occasion' in self.capture_data.columns else 1),
+        })
+        traps = self.trap_locations.rename(columns={'trap_id': 'Detector'})
+        data = CaptureData(captures, traps)
+        mask_xy = self.state_space[['x', 'y']].to_numpy(dtype=float)
+        fit = fit_detectfn(data, mask_xy, self.grid_spacing ** 2 / 10_000, detectfn=detectfn)
         
-        # For now, return basic estimates
-        # In production, implement full likelihood optimization
+        est = fit['estimates']
+        density_per_ha = est['D']['estimate']
         results = {
-            'g0': 0.4,
-            'sigma': 1500,
-            'density': 0.01,
-            'density_per_ha': 0.01,
-            'density_per_km2': 1.0,
-            'N': self.n_individuals * 1.5,  # Rough estimate
-            'se_N': self.n_individuals * 0.3,
-            'ci_lower': self.n_individuals * 1.2,
-            'ci_upper': self.n_individuals * 1.8,
-            'area_ha': self._calculate_state_space_area() * 100,
-            'area_km2': self._calculate_state_space_area(),
+            'detectfn': detectfn,
+            'g0': est['g0']['estimate'],
+            'sigma': est['sigma']['estimate'],
+            'density': density_per_ha,
+            'density_per_ha': density_per_ha,
+            'density_per_km2': density_per_ha * 100,
+            'N': fit['E_N']['estimate'],
+            'se_N': fit['E_N']['SE'],
+            'ci_lower': fit['E_N']['lcl'],
+            'ci_upper': fit['E_N']['ucl'],
+            'area_ha': fit['mask_area'],
+            'area_km2': fit['mask_area'] / 100,
             'n_detected': self.n_individuals,
-            'convergence': True
+            'logLik': fit['logLik'],
+            'AIC': fit['AIC'],
+            'AICc': fit['AICc'],
+            'convergence': fit['converged']
         }
         
         return results
@@ -0,0 +1,140 @@
+"""
+Benchmark: GiraffeSpotter encounter download — serial hydration vs. the
+concurrent, cached `GiraffeSpotterClient.download_encounters`.
+
+`FakeWildbookClient` stands in for pywildbook's WildbookClient offline: it
+serves a synthetic survey's encounters through `search_encounters` /
+`get_encounter` with a fixed per-request latency and counts the calls, so
+the download path can be exercised without GiraffeSpotter credentials:
+
+    from secr_analysis.bailey_analysis import GiraffeSpotterClient
+    from secr_analysis.wildbook_benchmark import FakeWildbookClient
+
+    gs = GiraffeSpotterClient(client=FakeWildbookClient(500, latency=0))
+    gs.login("user", "pass")
+    encounters = gs.download_encounters(location="EHGR", size=2000)
+
+The benchmark checks serial, concurrent and warm-cache downloads return the
+same records in the same order, and that a repeat download after editing a
+few encounters only re-fetches those.
+
+    python secr_analysis/wildbook_benchmark.py              # 3000 encounters, 20 ms per request
+    python secr_analysis/wildbook_benchmark.py 1000 0.05
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from secr_analysis.bailey_analysis import GiraffeSpotterClient  # noqa: E402
+
+
+# ─── Fake Wildbook ────────────────────────────────────────────────────────────
+
+class FakeWildbookClient:
+    """
+    In-memory WildbookClient: `n_encounters` encounters of one survey, search
+    hits without coordinates, full records with them.
+    """
+
+    def __init__(self, n_encounters=3000, latency=0.02, seed=7, location='EHGR'):
+        rng = np.random.default_rng(seed)
+        self.latency = latency
+        self.calls = {'search': 0, 'get': 0}
+        self._lock = threading.Lock()
+        self._authenticated = False
+        self.encounters = []
+        for i in range(n_encounters):
+            self.encounters.append({
+                'id': f"enc-{i:06d}",
+                'individualId': f"GIR{int(rng.integers(0, n_encounters // 4 + 1)):04d}" if i % 11 else '',
+                'verbatimEventDate': f"2025-06-{1 + int(rng.integers(0, 5)):02d}",
+                'locationId': location,
+                'version': 1,
+                'decimalLatitude': round(-22.1 + float(rng.normal(0, 0.05)), 6),
+                'decimalLongitude': round(29.1 + float(rng.normal(0, 0.05)), 6),
+            })
+        self._by_id = {enc['id']: enc for enc in self.encounters}
+
+    def _wait(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def is_authenticated(self):
+        return self._authenticated
+
+    def login(self, username=None, password=None):
+        self._authenticated = bool(username and password)
+        return {'success': self._authenticated}
+
+    def search_encounters(self, query, from_=0, size=10, sort=None, sort_order=None):
+        self._wait('search')
+        hits = [
+            {key: enc[key] for key in ('id', 'individualId', 'verbatimEventDate', 'locationId', 'version')}
+            for enc in self.encounters[from_:from_ + size]
+        ]
+        return {'hits': hits, 'total': len(self.encounters)}
+
+    def get_encounter(self, encounter_id):
+        self._wait('get')
+        return dict(self._by_id[encounter_id])
+
+    def edit(self, encounter_ids):
+        """Bump the version of some encounters, as an edit on the site would"""
+        for enc_id in encounter_ids:
+            enc = self._by_id[enc_id]
+            enc['version'] += 1
+            enc['decimalLatitude'] = round(enc['decimalLatitude'] + 0.001, 6)
+
+    def reset_calls(self):
+        self.calls = {'search': 0, 'get': 0}
+
+
+# ─── Benchmark ────────────────────────────────────────────────────────────────
+
+def download(fake, cache_dir, **kwargs):
+    gs = GiraffeSpotterClient(client=fake, cache_dir=cache_dir, **kwargs)
+    gs.login('benchmark', 'benchmark')
+    fake.reset_calls()
+    start = time.perf_counter()
+    encounters = gs.download_encounters(size=len(fake.encounters))
+    return encounters, time.perf_counter() - start, dict(fake.calls)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    fake = FakeWildbookClient(n, latency=latency)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        serial, t_serial, _ = download(fake, cache_dir, use_cache=False, max_workers=1)
+        cold, t_cold, calls_cold = download(fake, cache_dir)
+        warm, t_warm, calls_warm = download(fake, cache_dir)
+        edited = [enc['id'] for enc in fake.encounters[::20]]
+        fake.edit(edited)
+        partial, t_partial, calls_partial = download(fake, cache_dir)
+
+    assert serial == cold == warm, "concurrent / cached download differs from serial"
+    assert calls_cold['get'] == n and calls_warm['get'] == 0
+    assert calls_partial['get'] == len(edited)
+    assert partial == fake.encounters, "edited encounters not re-fetched"
+
+    print(f"\n{n:,} encounters, {latency * 1000:.0f} ms per request\n")
+    print(f"{'serial hydration':<34} {t_serial:8.2f} s")
+    print(f"{'concurrent, empty cache':<34} {t_cold:8.2f} s   ({t_serial / t_cold:.1f}x)")
+    print(f"{'concurrent, warm cache':<34} {t_warm:8.2f} s   ({calls_warm['get']} encounter requests)")
+    print(f"{f'after editing {len(edited)} encounters':<34} {t_partial:8.2f} s   "
+          f"({calls_partial['get']} encounter requests)")
+
+
+if __name__ == "__main__":
+    main()
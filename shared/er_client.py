@@ -0,0 +1,384 @@
+"""
+Shared EarthRanger REST client for Twiga Tools pages and scripts.
+
+Every ER-backed page used to page through the API its own way (raw
+`requests.get` loops, hand-rolled `next` following, silent result caps) and
+the historical push scripts opened a new connection per request. This module
+gives them one implementation:
+
+* a pooled `requests.Session` (keep-alive, sized for thread fan-outs)
+* retry with jittered exponential backoff on 429 / 5xx / connection errors,
+  honouring `Retry-After`
+* page iteration that follows `next` links, shrinks the page size when the
+  server times out (ER returns 504 for big pages) and grows it again while
+  pages come back quickly
+* parallel prefetch of the remaining pages once the first page reports a
+  total `count`
+* a streaming interface (`iter_results`) so callers can build frames or
+  aggregates incrementally instead of holding every raw record
+
+It has no Streamlit dependency, so scripts can use it too. The server URL is
+a constructor argument, which lets it run against a local fake ER server.
+
+    from shared.er_client import ERClient
+
+    client = ERClient.login(username, password)           # scripts
+    client = ERClient.from_earthranger_io(er_io)          # pages (ecoscope session)
+
+    for event in client.iter_results("activity/events/",
+                                     {"event_type": type_id, "include_details": "true"}):
+        ...
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ER_SERVER = "https://twiga.pamdas.org"
+API_PREFIX = "/api/v1.0/"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT = (15, 90)   # (connect, read) seconds
+DEFAULT_POOL_SIZE = 16
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 0.5        # seconds; doubles per attempt, plus jitter
+MAX_BACKOFF = 30.0
+
+# Adaptive paging: pages faster than this grow, timeouts shrink
+FAST_PAGE_SECONDS = 3.0
+MIN_PAGE_SIZE = 25
+
+
+class ERClientError(Exception):
+    """Raised when an EarthRanger request fails after all retries."""
+
+
+def make_session(pool_size: int = DEFAULT_POOL_SIZE, retries: int = 0) -> requests.Session:
+    """
+    A keep-alive session whose connection pool fits `pool_size` threads.
+
+    With `retries`, idempotent requests (GET/PATCH/...) that hit 429/5xx or a
+    dropped connection are retried by urllib3 with jittered backoff. POSTs are
+    never retried at this level — a 502 after ER accepted an event would
+    otherwise create a duplicate. ERClient does its own retrying, so it uses
+    the default of 0.
+    """
+    session = requests.Session()
+    max_retries = 0
+    if retries:
+        retry_kwargs = dict(
+            total=retries,
+            backoff_factor=DEFAULT_BACKOFF,
+            status_forcelist=sorted(RETRY_STATUSES),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"},
+            raise_on_status=False,
+        )
+        try:
+            max_retries = Retry(backoff_jitter=DEFAULT_BACKOFF, backoff_max=MAX_BACKOFF, **retry_kwargs)
+        except TypeError:   # urllib3 < 2 has no jitter / max options
+            max_retries = Retry(**retry_kwargs)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def unwrap_page(payload) -> tuple[list, Optional[str], Optional[int]]:
+    """
+    Normalise the page shapes ER returns.
+
+    Handles a bare list, `{"results": [...], "next": ..., "count": N}` and
+    the same wrapped in `{"data": ...}`.
+
+    Returns:
+        (items, next_url, total_count)
+    """
+    inner = payload.get("data", payload) if isinstance(payload, dict) else payload
+    if isinstance(inner, list):
+        return inner, None, None
+    if isinstance(inner, dict):
+        items = inner.get("results", inner.get("data", []))
+        if not isinstance(items, list):
+            items = []
+        return items, inner.get("next"), inner.get("count")
+    return [], None, None
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class ERClient:
+    """
+    Thread-safe EarthRanger REST client.
+
+    Args:
+        server:      ER base URL
+        token:       bearer token (or pass `auth_headers`)
+        auth_headers: callable returning auth headers per request — used to
+                     follow a token that another client (ecoscope) refreshes
+        session:     requests.Session to reuse; a pooled one is created if omitted
+        max_workers: concurrency for parallel page prefetch
+    """
+
+    def __init__(self, server: str = ER_SERVER, token: Optional[str] = None, *,
+                 auth_headers: Optional[Callable[[], dict]] = None,
+                 session: Optional[requests.Session] = None,
+                 max_workers: int = 4,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 timeout=DEFAULT_TIMEOUT):
+        self.server = server.rstrip("/")
+        self._token = token
+        self._auth_headers = auth_headers
+        self.session = session or make_session(max(DEFAULT_POOL_SIZE, max_workers))
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0}
+
+    # ── construction ─────────────────────────────────────────────────────────
+    @classmethod
+    def login(cls, username: str, password: str, server: str = ER_SERVER, **kwargs) -> "ERClient":
+        """Password-grant login (the flow the historical push scripts use)."""
+        client = cls(server, **kwargs)
+        resp = client.request(
+            "POST", f"{client.server}/oauth2/token",
+            data={
+                "grant_type": "password",
+                "username": username,
+                "password": password,
+                "client_id": "das_web_client",
+            },
+            authenticate=False,
+        )
+        client._token = resp.json()["access_token"]
+        return client
+
+    @classmethod
+    def from_earthranger_io(cls, er_io, **kwargs) -> "ERClient":
+        """Reuse an authenticated ecoscope EarthRangerIO's token and server."""
+        server = getattr(er_io, "server", None)
+        if not server:
+            root = getattr(er_io, "service_root", None) or ""
+            server = root.split("/api/")[0] or ER_SERVER
+        return cls(server, auth_headers=er_io.auth_headers, **kwargs)
+
+    # ── low level ────────────────────────────────────────────────────────────
+    def url(self, path: str) -> str:
+        """Absolute URL for an API path such as 'activity/events/'."""
+        if path.startswith(("http://", "https://")):
+            return path
+        if path.startswith("/"):
+            return f"{self.server}{path}"
+        return f"{self.server}{API_PREFIX}{path}"
+
+    def headers(self) -> dict:
+        if self._auth_headers is not None:
+            return dict(self._auth_headers())
+        if self._token:
+            return {"Authorization": f"Bearer {self._token}"}
+        return {}
+
+    def request(self, method: str, path: str, *, authenticate: bool = True,
+                timeout=None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying 429/5xx and connection errors with backoff.
+
+        Raises:
+            ERClientError: the final attempt still failed
+        """
+        url = self.url(path)
+        headers = kwargs.pop("headers", {}) or {}
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if authenticate:
+                headers = {**self.headers(), **headers}
+            wait = None
+            try:
+                with self._stats_lock:
+                    self.stats["requests"] += 1
+                resp = self.session.request(method, url, headers=headers,
+                                            timeout=timeout or self.timeout, **kwargs)
+                if resp.status_code not in RETRY_STATUSES:
+                    if not resp.ok:
+                        raise ERClientError(f"{method} {url} → {resp.status_code}: {resp.text[:300]}")
+                    return resp
+                last_error = ERClientError(f"{method} {url} → {resp.status_code}")
+                wait = _retry_after_seconds(resp)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_error = exc
+            if attempt >= self.max_retries:
+                break
+            with self._stats_lock:
+                self.stats["retries"] += 1
+            if wait is None:
+                wait = min(MAX_BACKOFF, self.backoff * (2 ** attempt))
+                wait += random.uniform(0, wait)
+            time.sleep(wait)
+        if isinstance(last_error, ERClientError):
+            raise last_error
+        raise ERClientError(f"{method} {url} failed: {last_error}") from last_error
+
+    def get(self, path: str, params: Optional[dict] = None, **kwargs):
+        """GET and return parsed JSON."""
+        return self.request("GET", path, params=params, **kwargs).json()
+
+    def post(self, path: str, json=None, **kwargs) -> requests.Response:
+        return self.request("POST", path, json=json, **kwargs)
+
+    def patch(self, path: str, json=None, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, json=json, **kwargs)
+
+    # ── paging ───────────────────────────────────────────────────────────────
+    def _get_page(self, path, params):
+        start = time.monotonic()
+        items, next_url, count = unwrap_page(self.get(path, params))
+        return items, next_url, count, time.monotonic() - start
+
+    def iter_pages(self, path: str, params: Optional[dict] = None, *,
+                   page_size: int = 100, max_page_size: int = 1000,
+                   prefetch: bool = True, limit: Optional[int] = None) -> Iterator[list]:
+        """
+        Yield pages of results in order.
+
+        If the first page reports a total `count`, the remaining pages are
+        requested in parallel (bounded by max_workers) and yielded in order
+        as they arrive. Otherwise `next` links are followed and the page size
+        adapts: halved after a timeout / 5xx that exhausted retries, doubled
+        while pages return in under FAST_PAGE_SECONDS.
+
+        Args:
+            limit: stop after this many records (None = everything)
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        size = page_size
+        fetched = 0
+
+        # First page — tells us whether the endpoint reports a total count
+        while True:
+            try:
+                items, next_url, count, elapsed = self._get_page(
+                    path, {**params, "page_size": size, "page": 1})
+                break
+            except ERClientError:
+                if size <= MIN_PAGE_SIZE:
+                    raise
+                size = max(MIN_PAGE_SIZE, size // 2)
+
+        if next_url and 0 < len(items) < size:
+            size = len(items)   # server capped the page size; page numbers follow its cap
+        if limit is not None:
+            items = items[:limit]
+        if items:
+            yield items
+        fetched += len(items)
+        if not next_url or not items or (limit is not None and fetched >= limit):
+            return
+
+        total = count if limit is None or count is None else min(count, limit)
+        if prefetch and total is not None and self.max_workers > 1:
+            yield from self._prefetch_pages(path, params, size, total, fetched)
+            return
+
+        # Sequential: page numbers with an adaptive page size. Offsets stay
+        # aligned because sizes only ever halve, or double on a boundary.
+        page_url = next_url
+        while page_url and (limit is None or fetched < limit):
+            try:
+                if elapsed < FAST_PAGE_SECONDS and size * 2 <= max_page_size and fetched % (size * 2) == 0:
+                    size *= 2
+                items, page_url, _, elapsed = self._get_page(
+                    path, {**params, "page_size": size, "page": fetched // size + 1})
+                if page_url and 0 < len(items) < size:
+                    # Grew past the server's page-size cap: fall back to the
+                    # last size that returned full pages and stop growing
+                    size = max_page_size = max(MIN_PAGE_SIZE, size // 2)
+                    page_url = True
+                    continue
+            except ERClientError:
+                if size <= MIN_PAGE_SIZE:
+                    raise
+                size = max(MIN_PAGE_SIZE, size // 2)
+                elapsed = float("inf")
+                continue
+            if limit is not None:
+                items = items[:limit - fetched]
+            if not items:
+                return
+            fetched += len(items)
+            yield items
+
+    def _prefetch_pages(self, path, params, size, total, fetched) -> Iterator[list]:
+        """Fetch pages 2..N concurrently, yielding them in page order."""
+        last_page = (total + size - 1) // size
+        pages = iter(range(2, last_page + 1))
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            in_flight = []
+            for page in pages:
+                in_flight.append(pool.submit(self._get_page, path, {**params, "page_size": size, "page": page}))
+                if len(in_flight) >= window:
+                    break
+            while in_flight:
+                items = in_flight.pop(0).result()[0]
+                nxt = next(pages, None)
+                if nxt is not None:
+                    in_flight.append(pool.submit(self._get_page, path, {**params, "page_size": size, "page": nxt}))
+                remaining = total - fetched
+                if remaining <= 0:
+                    break
+                items = items[:remaining]
+                if items:
+                    fetched += len(items)
+                    yield items
+
+    def iter_results(self, path: str, params: Optional[dict] = None, **kwargs) -> Iterator[dict]:
+        """Yield individual records across all pages (see iter_pages)."""
+        for page in self.iter_pages(path, params, **kwargs):
+            yield from page
+
+    def iter_next(self, path: str, params: Optional[dict] = None) -> Iterator[list]:
+        """
+        Yield pages by following `next` links only, for endpoints whose
+        paging is cursor-based (e.g. observations) rather than page-numbered.
+        """
+        url, req_params = path, params
+        while url:
+            items, url, _ = unwrap_page(self.get(url, req_params))
+            req_params = None   # the next URL already carries the query
+            if items:
+                yield items
+
+    def get_all(self, path: str, params: Optional[dict] = None, **kwargs) -> list:
+        """Every record as a list — prefer iter_results for large pulls."""
+        return list(self.iter_results(path, params, **kwargs))
+
+
+def with_params(url: str, **params) -> str:
+    """Return url with query parameters added or replaced."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({k: v for k, v in params.items() if v is not None})
+    return urlunsplit(parts._replace(query=urlencode(query)))
@@ -0,0 +1,141 @@
+"""
+Process-wide pool of authenticated EarthRangerIO clients.
+
+Every `EarthRangerIO(server=..., username=..., password=...)` performs a full
+password login, and the dashboards build one inside each cached loader — a
+unit-check sweep over 200 collars used to log in 200 times. `get_er_io()`
+hands back one shared client per (server, username, password):
+
+* the first caller logs in; concurrent callers with the same credentials
+  wait for that login instead of starting their own
+* tokens are refreshed shortly before they expire, on checkout, so worker
+  threads don't race each other into erclient's lazy refresh mid-request
+* a failed login is never cached, and `invalidate()` drops a client (e.g.
+  after a password change)
+* clients idle for IDLE_TTL are dropped, and at most MAX_CLIENTS are kept
+  (least recently used first), so a long-running server does not hold a
+  session for every user who ever logged in
+
+Clients are keyed on a hash of the password, never the password itself.
+
+    from shared.er_pool import get_er_io, pool_stats
+
+    er = get_er_io(ER_SERVER, username, password)
+    pool_stats()   # {'logins': 1, 'reused': 199, 'refreshes': 0, 'failures': 0, 'evictions': 0, 'clients': 1}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+# Refresh a token this long before EarthRangerIO considers it expired
+REFRESH_MARGIN = timedelta(minutes=2)
+# Drop a client nobody has checked out for this long (seconds)
+IDLE_TTL = 2 * 3600
+# Most clients kept at once
+MAX_CLIENTS = 32
+
+# key -> (EarthRangerIO, last checkout on the monotonic clock), oldest first
+_clients: OrderedDict = OrderedDict()
+_key_locks: dict = {}
+_lock = threading.Lock()
+_stats = {"logins": 0, "reused": 0, "refreshes": 0, "failures": 0, "evictions": 0}
+
+
+def _key(server: str, username: str, password: str) -> tuple:
+    digest = hashlib.sha256(f"{username}\0{password}".encode()).hexdigest()
+    return (server.rstrip("/"), username, digest)
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def _evict(now: float) -> None:
+    """Drop idle / least recently used clients and unused key locks. Caller holds _lock."""
+    while _clients:
+        key, (_, last_used) = next(iter(_clients.items()))
+        if now - last_used <= IDLE_TTL and len(_clients) <= MAX_CLIENTS:
+            break
+        del _clients[key]
+        _stats["evictions"] += 1
+    for key in list(_key_locks):
+        if key not in _clients and not _key_locks[key].locked():
+            del _key_locks[key]
+
+
+def _checkout(key: tuple, er) -> None:
+    now = time.monotonic()
+    with _lock:
+        _clients[key] = (er, now)
+        _clients.move_to_end(key)
+        _evict(now)
+
+
+def _refresh_if_expiring(er) -> None:
+    """Refresh (or re-login) when the token is within REFRESH_MARGIN of expiry."""
+    expires = getattr(er, "auth_expires", None)
+    if expires is None:
+        return
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    if expires - datetime.now(timezone.utc) > REFRESH_MARGIN:
+        return
+    try:
+        refreshed = er.refresh_token()
+    except Exception:
+        refreshed = False
+    if not refreshed:
+        er.login()
+    _count("refreshes")
+
+
+def get_er_io(server: str, username: str, password: str):
+    """
+    Shared, logged-in EarthRangerIO for these credentials.
+
+    Raises whatever EarthRangerIO raises when the login fails.
+    """
+    from ecoscope.io.earthranger import EarthRangerIO
+
+    key = _key(server, username, password)
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        er = _clients.get(key, (None, 0))[0]
+        if er is not None:
+            _refresh_if_expiring(er)
+            _count("reused")
+            _checkout(key, er)
+            return er
+        try:
+            er = EarthRangerIO(server=server, username=username, password=password)
+        except Exception:
+            _count("failures")
+            raise
+        _count("logins")
+        _checkout(key, er)
+        return er
+
+
+def invalidate(server: str, username: str, password: str = None) -> None:
+    """Drop pooled clients for a user (all of them when password is None)."""
+    server = server.rstrip("/")
+    with _lock:
+        for key in list(_clients):
+            if key[0] == server and key[1] == username and (
+                password is None or key == _key(server, username, password)
+            ):
+                del _clients[key]
+
+
+def pool_stats() -> dict:
+    """Counters since process start; `reused` is the number of logins avoided."""
+    with _lock:
+        return {**_stats, "clients": len(_clients)}
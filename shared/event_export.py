@@ -0,0 +1,273 @@
+"""
+Columnar flattening of EarthRanger events for the Event download page.
+
+The page used to flatten exports column by column with row-wise `.apply`
+lambdas (geometry via `apply(axis=1)`, geojson datetimes parsed one row at a
+time, a Python regex per cell to spot UUID columns), which took minutes for a
+year of monitoring events. Here each stage runs once per column:
+
+* geometry — Point geojson built in one `shapely.points` call, other shapes
+  via `shape()`; lon/lat read with `shapely.get_x/get_y`
+* time — geojson datetimes collected in one pass, parsed by a single
+  `pd.to_datetime`
+* event_details — one `json_normalize` over all rows; list-of-dict repeat
+  groups exploded column-wise
+* UUID names — the UUID test runs on each column's unique values only and
+  names are attached with a dict `map` (a hash join), not per-row lookups
+
+`flatten_events()` returns the same frame the page displays and exports.
+No Streamlit dependency, so `shared/event_export_benchmark.py` can time it.
+"""
+
+from __future__ import annotations
+
+import re
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+COLS_STRIP = [
+    "level_8", "index", "location", "reported_by", "event_details",
+    "geojson", "attributes", "notes", "patrols", "patrol_segments",
+    "is_contained_in", "related_subjects", "location_lat", "location_lon",
+    "message", "provenance", "event_category", "priority_label", "comment",
+    "end_time", "sort_at", "icon_id", "url", "image_url", "external_source",
+]
+
+PREFERRED_COLS = [
+    "event_id", "serial_number", "event_type", "subject_name", "subject_id",
+    "longitude", "latitude", "event_datetime",
+    "priority", "title", "state", "updated_at", "created_at", "is_collection",
+]
+
+_META_COLS = [
+    "time", "id", "serial_number", "event_type", "priority", "title",
+    "state", "updated_at", "created_at", "is_collection",
+    "reported_by", "longitude", "latitude", "subject_name", "subject_id",
+]
+
+
+# ─── Column helpers ───────────────────────────────────────────────────────────
+
+def _dict_get(values, key, default=None) -> list:
+    """[v.get(key, default) for dict v, else default] in one pass."""
+    return [v.get(key, default) if isinstance(v, dict) else default for v in values]
+
+
+def geometry_from_geojson(geojson: pd.Series) -> gpd.GeoSeries:
+    """Shapely geometries for a column of geojson dicts (None where missing/invalid)."""
+    values = geojson.to_numpy(dtype=object)
+    geoms = np.full(len(values), None, dtype=object)
+    point_idx, coords = [], []
+    for i, g in enumerate(values):
+        if not isinstance(g, dict):
+            continue
+        geom = g.get("geometry", g) if g.get("type") == "Feature" else g
+        if not isinstance(geom, dict):
+            continue
+        xy = geom.get("coordinates")
+        if geom.get("type") == "Point" and isinstance(xy, (list, tuple)) and len(xy) >= 2:
+            point_idx.append(i)
+            coords.append(xy[:2])
+            continue
+        try:
+            geoms[i] = shape(geom)
+        except Exception:
+            pass
+    if point_idx:
+        try:
+            geoms[point_idx] = shapely.points(np.asarray(coords, dtype=float))
+        except (TypeError, ValueError):
+            for i, xy in zip(point_idx, coords):
+                try:
+                    geoms[i] = shapely.Point(float(xy[0]), float(xy[1]))
+                except (TypeError, ValueError):
+                    pass
+    return gpd.GeoSeries(geoms, index=geojson.index, crs=4326)
+
+
+def datetime_from_geojson(geojson: pd.Series) -> pd.Series:
+    """geojson.properties.datetime as UTC timestamps (NaT where missing)."""
+    props = _dict_get(geojson, "properties")
+    raw = [v or None for v in _dict_get(props, "datetime")]
+    return pd.Series(pd.to_datetime(raw, utc=True, errors="coerce", format="mixed"), index=geojson.index)
+
+
+def _normalize(records: list) -> pd.DataFrame:
+    """json_normalize for a list of dicts, skipping its per-record recursion when no value is nested."""
+    if not records:
+        return pd.DataFrame()
+    df = pd.DataFrame.from_records(records)
+    for col in df.columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) == "mixed" and any(type(v) is dict for v in df[col]):
+            return pd.json_normalize(records)
+    return df
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    """True where a value is NA or a whitespace-only string."""
+    blank = values.isna()
+    is_str = values.map(type).eq(str)
+    if is_str.any():
+        blank |= values[is_str].str.strip().eq("").reindex(values.index, fill_value=False)
+    return blank
+
+
+def resolve_uuid_columns(df: pd.DataFrame, uuid_to_name: dict, col_prefix: str = "detail_") -> pd.DataFrame:
+    """
+    For each column whose values look mostly like UUIDs, insert a companion
+    '<col>_name' column immediately after it with resolved display names.
+    Only adds the name column when at least one value resolves successfully.
+    """
+    if not uuid_to_name:
+        return df
+
+    inserts = []
+    for i, col in enumerate(df.columns):
+        if col.endswith("_name") or not col.startswith(col_prefix):
+            continue
+        series = df[col]
+        if series.dtype != object and not pd.api.types.is_string_dtype(series.dtype):
+            continue
+        present = int(series.notna().sum())
+        if not present:
+            continue
+        # The UUID test and the name lookup run once per distinct string, then
+        # map back onto the column (a hash join rather than per-row work)
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind not in ("string", "mixed", "mixed-integer"):
+            continue
+        values = series.to_numpy(dtype=object)
+        if kind == "string":
+            is_str = series.notna().to_numpy()
+        else:
+            is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+            if not is_str.any():
+                continue
+        strings = pd.Series(values[is_str], index=series.index[is_str])
+        uniques = strings.unique()
+        stripped = [u.strip() for u in uniques]
+        is_uuid = dict(zip(uniques, (bool(_UUID_RE.match(u)) for u in stripped)))
+        if strings.map(is_uuid).sum() / present < 0.5:
+            continue
+        to_name = {u: uuid_to_name.get(k, "") for u, k in zip(uniques, stripped)}
+        if any(to_name.values()):
+            names = strings.map(to_name).reindex(series.index).fillna("")
+            inserts.append((i + 1, col + "_name", names))
+
+    result = df.copy()
+    for offset, (pos, name_col, series) in enumerate(inserts):
+        if name_col not in result.columns:
+            result.insert(pos + offset, name_col, series.values)
+    return result
+
+
+# ─── Pipeline ─────────────────────────────────────────────────────────────────
+
+def _repair_orphan_rows(events_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    The ER API returns 1 parent row (event metadata, no individual data) +
+    N child rows (individual data, no event metadata).  Forward-fill the
+    metadata onto child rows then drop the now-superseded parent rows.
+    """
+    id_col = next((c for c in ["serial_number", "time", "event_type"] if c in events_gdf.columns), None)
+    if not id_col:
+        return events_gdf
+    orphan = _blank(events_gdf[id_col])
+    if not orphan.any() or orphan.all():
+        return events_gdf
+
+    meta_cols = [c for c in _META_COLS if c in events_gdf.columns]
+    events_gdf[meta_cols] = events_gdf[meta_cols].ffill()
+    geom = events_gdf.geometry
+    missing = geom.isna() | geom.is_empty
+    filled = pd.Series(geom.to_numpy(dtype=object), index=geom.index).where(~missing).ffill()
+    filled = filled.astype(object).where(filled.notna(), None)
+    events_gdf = events_gdf.set_geometry(gpd.GeoSeries(filled.to_numpy(dtype=object), index=geom.index, crs=4326))
+    parent_mask = (~orphan) & orphan.shift(-1, fill_value=False)
+    return gpd.GeoDataFrame(
+        events_gdf[~parent_mask].reset_index(drop=True),
+        geometry="geometry", crs=4326,
+    )
+
+
+def _explode_list_columns(events_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Explode detail_ columns holding lists of dicts (repeat groups such as Herd)."""
+    def holds_dict_lists(values):
+        return any(isinstance(x, list) and x and isinstance(x[0], dict) for x in values)
+
+    list_dict_cols = [
+        col for col in events_gdf.columns
+        if col.startswith("detail_") and events_gdf[col].dtype == object and holds_dict_lists(events_gdf[col])
+    ]
+    for col in list_dict_cols:
+        events_gdf[col] = [x if (isinstance(x, list) and x) else [{}] for x in events_gdf[col]]
+        events_gdf = events_gdf.explode(col, ignore_index=True)
+        nested = _normalize([x if isinstance(x, dict) else {} for x in events_gdf[col]])
+        events_gdf = gpd.GeoDataFrame(
+            pd.concat([events_gdf.drop(columns=[col]).reset_index(drop=True), nested], axis=1),
+            geometry="geometry", crs=4326,
+        )
+    return events_gdf
+
+
+def flatten_events(events_gdf: gpd.GeoDataFrame, uuid_to_name: dict) -> pd.DataFrame:
+    """
+    Flatten event_details, explode list-of-dict columns, resolve UUIDs and
+    order the columns for display / export.
+    """
+    events_gdf = events_gdf.copy()
+
+    # Coordinates
+    if "geometry" in events_gdf.columns:
+        geom = events_gdf.geometry.to_numpy(dtype=object)
+        missing = pd.isna(geom) | shapely.is_empty(geom)
+        events_gdf["longitude"] = np.where(missing, np.nan, shapely.get_x(geom))
+        events_gdf["latitude"] = np.where(missing, np.nan, shapely.get_y(geom))
+
+    # Datetime fallback from geojson
+    if "time" not in events_gdf.columns and "geojson" in events_gdf.columns:
+        events_gdf["time"] = datetime_from_geojson(events_gdf["geojson"])
+
+    # reported_by → subject_name / subject_id
+    if "reported_by" in events_gdf.columns:
+        reported_by = events_gdf["reported_by"]
+        events_gdf["subject_name"] = _dict_get(reported_by, "name", "")
+        if "subject_id" not in events_gdf.columns:
+            events_gdf["subject_id"] = _dict_get(reported_by, "id", "")
+
+    events_gdf = _repair_orphan_rows(events_gdf)
+
+    # Unnest event_details in one pass
+    if "event_details" in events_gdf.columns:
+        details = [d if isinstance(d, dict) else {} for d in events_gdf["event_details"]]
+        details_df = _normalize(details)
+        details_df.columns = ["detail_" + c for c in details_df.columns]
+        geom_col = events_gdf.geometry.reset_index(drop=True)
+        events_gdf = gpd.GeoDataFrame(
+            pd.concat([events_gdf.reset_index(drop=True), details_df], axis=1),
+            geometry=geom_col, crs=4326,
+        )
+
+    events_gdf = _explode_list_columns(events_gdf)
+    events_gdf = resolve_uuid_columns(events_gdf, uuid_to_name, col_prefix="")
+
+    # Display / export frame
+    display_cols = [c for c in events_gdf.columns if c not in ("geometry", "geojson")]
+    display_df = pd.DataFrame(events_gdf[display_cols])
+    display_df = display_df.drop(columns=[c for c in COLS_STRIP if c in display_df.columns])
+    display_df = display_df.rename(columns={"id": "event_id", "time": "event_datetime"})
+
+    detail_cols = sorted(c for c in display_df.columns if c.startswith("detail_"))
+    item_cols = sorted(
+        c for c in display_df.columns if not c.startswith("detail_") and c not in PREFERRED_COLS
+    )
+    ordered = [c for c in PREFERRED_COLS if c in display_df.columns]
+    ordered += detail_cols + [c for c in item_cols if c not in ordered]
+    ordered += [c for c in display_df.columns if c not in ordered]
+    return display_df[ordered]
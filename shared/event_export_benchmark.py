@@ -0,0 +1,214 @@
+"""
+Benchmark: columnar event flattening vs. the Event download page's previous
+row-wise implementation.
+
+Builds a synthetic frame of monitoring events (Feature geojson, reported_by,
+event_details with UUID fields and a list-of-dict Herd repeat group), checks
+both implementations produce the same export frame on a sample, then times
+geometry extraction and the full flatten on the full frame.
+
+    python shared/event_export_benchmark.py            # 100,000 events
+    python shared/event_export_benchmark.py 20000
+"""
+
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import shape
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.event_export import (  # noqa: E402
+    COLS_STRIP, PREFERRED_COLS, flatten_events, geometry_from_geojson,
+)
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+
+# ─── Synthetic data ───────────────────────────────────────────────────────────
+
+def make_events(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    subjects = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(300)]
+    users = [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Ranger {i}"} for i in range(40)]
+    rows = []
+    for i in range(n):
+        lon, lat = 13 + rng.random() * 5, -22 + rng.random() * 4
+        ts = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:15:00+02:00"
+        herd = [
+            {"Sex": rng.choice(["male", "female"]), "Age": rng.choice(["adult", "sub", "calf"]),
+             "subject": rng.choice(subjects)}
+            for _ in range(rng.randint(0, 4))
+        ]
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "serial_number": 100000 + i,
+            "event_type": "giraffe_survey_encounter_nam",
+            "time": ts,
+            "priority": 0,
+            "title": None,
+            "state": "new",
+            "reported_by": rng.choice(users),
+            "location": {"latitude": lat, "longitude": lon},
+            "geojson": {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"datetime": ts},
+            },
+            "event_details": {
+                "herd_size": len(herd),
+                "observer": rng.choice(users)["id"],
+                "collar": rng.choice(subjects) if i % 3 else None,
+                "habitat": rng.choice(["mopane", "riverine", "open"]),
+                "Herd": herd,
+            },
+        })
+    return pd.DataFrame(rows)
+
+
+def lookup_for(df: pd.DataFrame) -> dict:
+    names = {r["id"]: r["name"] for r in df["reported_by"]}
+    for details in df["event_details"]:
+        for h in details["Herd"]:
+            names.setdefault(h["subject"], f"GIR{len(names):04d}")
+    return names
+
+
+# ─── Previous implementation (row-wise) ───────────────────────────────────────
+
+def legacy_extract_geometry(row):
+    geojson = row.get("geojson")
+    if geojson and isinstance(geojson, dict):
+        try:
+            return shape(geojson)
+        except Exception:
+            pass
+    return None
+
+
+def legacy_resolve_uuid_columns(df, uuid_to_name, col_prefix="detail_"):
+    if not uuid_to_name:
+        return df
+
+    def _is_uuid(val):
+        return isinstance(val, str) and bool(_UUID_RE.match(val.strip()))
+
+    inserts = []
+    for i, col in enumerate(df.columns):
+        if col.endswith("_name") or not col.startswith(col_prefix):
+            continue
+        sample = df[col].dropna()
+        if sample.empty:
+            continue
+        if sample.apply(_is_uuid).mean() >= 0.5:
+            name_series = df[col].apply(
+                lambda v: uuid_to_name.get(str(v).strip(), "") if isinstance(v, str) else ""
+            )
+            if name_series.str.len().sum() > 0:
+                inserts.append((i + 1, col + "_name", name_series))
+
+    result = df.copy()
+    for offset, (pos, name_col, series) in enumerate(inserts):
+        if name_col not in result.columns:
+            result.insert(pos + offset, name_col, series.values)
+    return result
+
+
+def legacy_flatten(events_gdf, uuid_to_name):
+    if "geometry" in events_gdf.columns:
+        events_gdf["longitude"] = events_gdf.geometry.apply(lambda g: g.x if g else None)
+        events_gdf["latitude"] = events_gdf.geometry.apply(lambda g: g.y if g else None)
+    if "reported_by" in events_gdf.columns:
+        events_gdf["subject_name"] = events_gdf["reported_by"].apply(
+            lambda x: x.get("name", "") if isinstance(x, dict) else ""
+        )
+        if "subject_id" not in events_gdf.columns:
+            events_gdf["subject_id"] = events_gdf["reported_by"].apply(
+                lambda x: x.get("id", "") if isinstance(x, dict) else ""
+            )
+    _id_check = next((c for c in ["serial_number", "time", "event_type"] if c in events_gdf.columns), None)
+    if _id_check:
+        _orphan = events_gdf[_id_check].apply(
+            lambda x: pd.isna(x) or (isinstance(x, str) and x.strip() == "")
+        )
+        if _orphan.any() and not _orphan.all():
+            raise NotImplementedError("synthetic data has no orphan rows")
+    if "event_details" in events_gdf.columns:
+        details_df = pd.json_normalize(events_gdf["event_details"]).reset_index(drop=True)
+        details_df.columns = ["detail_" + c for c in details_df.columns]
+        geom_col = events_gdf.geometry.reset_index(drop=True)
+        events_gdf = gpd.GeoDataFrame(
+            pd.concat([events_gdf.reset_index(drop=True), details_df], axis=1),
+            geometry=geom_col, crs=4326,
+        )
+    list_dict_cols = [
+        col for col in events_gdf.columns
+        if col.startswith("detail_") and events_gdf[col].apply(
+            lambda x: isinstance(x, list) and len(x) > 0 and isinstance(x[0], dict)
+        ).any()
+    ]
+    for col in list_dict_cols:
+        events_gdf[col] = events_gdf[col].apply(lambda x: x if (isinstance(x, list) and len(x) > 0) else [{}])
+        events_gdf = events_gdf.explode(col, ignore_index=True)
+        nested = pd.json_normalize(events_gdf[col].apply(lambda x: x if isinstance(x, dict) else {}))
+        events_gdf = gpd.GeoDataFrame(
+            pd.concat([events_gdf.drop(columns=[col]).reset_index(drop=True), nested], axis=1),
+            geometry="geometry", crs=4326,
+        )
+    events_gdf = legacy_resolve_uuid_columns(events_gdf, uuid_to_name, col_prefix="")
+    display_cols = [c for c in events_gdf.columns if c not in ("geometry", "geojson")]
+    display_df = events_gdf[display_cols].copy()
+    display_df = display_df.drop(columns=[c for c in COLS_STRIP if c in display_df.columns])
+    display_df = display_df.rename(columns={"id": "event_id", "time": "event_datetime"})
+    detail_cols = sorted(c for c in display_df.columns if c.startswith("detail_"))
+    item_cols = sorted(c for c in display_df.columns if not c.startswith("detail_") and c not in PREFERRED_COLS)
+    ordered = [c for c in PREFERRED_COLS if c in display_df.columns]
+    ordered += detail_cols + [c for c in item_cols if c not in ordered]
+    ordered += [c for c in display_df.columns if c not in ordered]
+    return pd.DataFrame(display_df[ordered])
+
+
+# ─── Timing ───────────────────────────────────────────────────────────────────
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    events = make_events(n)
+    lookup = lookup_for(events)
+
+    # Parity on a sample
+    sample = events.head(2000)
+    old_gdf = gpd.GeoDataFrame(sample.assign(geometry=sample.apply(legacy_extract_geometry, axis=1)),
+                               geometry="geometry", crs=4326)
+    new_gdf = gpd.GeoDataFrame(sample.assign(geometry=geometry_from_geojson(sample["geojson"])),
+                               geometry="geometry", crs=4326)
+    pd.testing.assert_frame_equal(
+        legacy_flatten(old_gdf, lookup), flatten_events(new_gdf, lookup), check_dtype=False)
+
+    print(f"{n:,} events\n")
+    old_geom, t_old = timed(lambda df: df.apply(legacy_extract_geometry, axis=1), events)
+    new_geom, t_new = timed(geometry_from_geojson, events["geojson"])
+    print(f"{'geometry  apply(axis=1)':<32} {t_old:8.2f} s")
+    print(f"{'geometry  geometry_from_geojson':<32} {t_new:8.2f} s   ({t_old / t_new:.1f}x)")
+
+    old_gdf = gpd.GeoDataFrame(events.assign(geometry=old_geom), geometry="geometry", crs=4326)
+    new_gdf = gpd.GeoDataFrame(events.assign(geometry=new_geom), geometry="geometry", crs=4326)
+    old_df, t_old = timed(legacy_flatten, old_gdf, lookup)
+    new_df, t_new = timed(flatten_events, new_gdf, lookup)
+    print(f"{'flatten   row-wise':<32} {t_old:8.2f} s")
+    print(f"{'flatten   flatten_events':<32} {t_new:8.2f} s   ({t_old / t_new:.1f}x)")
+    print(f"\n{len(new_df):,} export rows x {new_df.shape[1]} columns")
+
+
+if __name__ == "__main__":
+    main()
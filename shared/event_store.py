@@ -0,0 +1,367 @@
+"""
+Persistent on-disk store of EarthRanger events shared by the dashboards.
+
+Mortality, Translocation, Genetic, the survey dashboards (EHGR, NANW, ZMB)
+and Event download all pull overlapping slices of the same event categories.
+`st.cache_data` only lives as long as the process, so every new pod refetched
+years of events on first paint. This store keeps them in SQLite under a cache
+directory, partitioned by query scope (event_category / event_type) and
+calendar month:
+
+* months never fetched for a scope are pulled in one paged request per
+  contiguous gap
+* months already held are refreshed with `updated_since`, so a warm load is a
+  single small request for whatever changed since the last sync
+* reads come straight from SQLite, so pages asking for the same category share
+  one local copy
+
+One database per (server, username): ER permissions differ between accounts,
+so events are never served to a user who didn't fetch them with their own
+credentials. Events deleted on the server are not pruned — call `clear()` to
+rebuild a store from scratch.
+
+    from shared.event_store import load_events
+
+    gdf = load_events(er_io, event_category="veterinary",
+                      since="2024-01-01T00:00:00Z", until="2024-12-31T23:59:59Z")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from shared.er_client import ERClient
+except ImportError:
+    from er_client import ERClient
+
+# Root of every on-disk store (events, observations, jobs, fit caches, ...);
+# each creates its directory through private_dir()
+CACHE_DIR = Path(os.environ.get("GCF_CACHE_DIR", Path(tempfile.gettempdir()) / "gcf_cache"))
+# Held months are re-synced with updated_since once they are this old
+REFRESH_AFTER_SECONDS = 5 * 60
+# Re-read a little before the last sync to cover clock skew with the server
+SYNC_OVERLAP = timedelta(minutes=5)
+# Lower bound used when a page asks for "all time"
+EARLIEST = "2010-01-01T00:00:00+00:00"
+
+
+def private_dir(path) -> Path:
+    """
+    Create `path` (mode 0700) and check it is a real directory owned by this
+    user. Every store under CACHE_DIR goes through this, so on a shared host
+    another account can neither read the cached ER data nor plant a database
+    or job directory for us to open.
+
+    Raises:
+        PermissionError: `path` is a symlink or owned by someone else
+    """
+    path = Path(path)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):   # Windows: per-user temp dirs, no uid
+        return path
+    info = path.lstat()
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(
+            f"{path} is not a directory owned by this user; set GCF_CACHE_DIR to a private directory")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id         TEXT PRIMARY KEY,
+    time       TEXT,
+    updated_at TEXT,
+    payload    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS event_scopes (
+    scope    TEXT NOT NULL,
+    month    TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (scope, event_id)
+);
+CREATE INDEX IF NOT EXISTS event_scopes_month ON event_scopes (scope, month);
+CREATE TABLE IF NOT EXISTS partitions (
+    scope     TEXT NOT NULL,
+    month     TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (scope, month)
+);
+"""
+
+
+# ─── Time helpers ─────────────────────────────────────────────────────────────
+
+def _to_utc(value) -> datetime:
+    """Parse an ISO string / date / datetime as an aware UTC datetime."""
+    if isinstance(value, datetime):
+        dt = value
+    elif hasattr(value, "year") and hasattr(value, "month"):   # datetime.date
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _month(dt: datetime) -> str:
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+
+def _months(start: datetime, end: datetime) -> list[str]:
+    """Every YYYY-MM partition between two datetimes, inclusive."""
+    months = []
+    y, m = start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def _month_bounds(first: str, last: str) -> tuple[str, str]:
+    """ISO lower/upper bounds covering months first..last."""
+    lower = datetime.strptime(first, "%Y-%m").replace(tzinfo=timezone.utc)
+    y, m = map(int, last.split("-"))
+    upper = datetime(y + (m == 12), 1 if m == 12 else m + 1, 1, tzinfo=timezone.utc)
+    return lower.isoformat(), (upper - timedelta(microseconds=1)).isoformat()
+
+
+def _runs(months: list[str], all_months: list[str]) -> list[tuple[str, str]]:
+    """Group a subset of all_months into contiguous (first, last) runs."""
+    wanted = set(months)
+    runs, start, prev = [], None, None
+    for month in all_months:
+        if month in wanted:
+            start = start or month
+            prev = month
+        elif start:
+            runs.append((start, prev))
+            start = None
+    if start:
+        runs.append((start, prev))
+    return runs
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+class EventStore:
+    """
+    SQLite-backed event store for one ER account.
+
+    Thread-safe: each call opens its own connection, and syncs of the same
+    store are serialised so concurrent sessions don't fetch the same gap twice.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        private_dir(self.path.parent)
+        self._sync_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_account(cls, server: str, username: str, cache_dir=None) -> "EventStore":
+        """The shared store for a (server, username) pair."""
+        key = hashlib.sha256(f"{server.rstrip('/')}|{username}".encode()).hexdigest()[:16]
+        path = Path(cache_dir or CACHE_DIR) / f"er_events_{key}.sqlite3"
+        with _stores_lock:
+            if path not in _stores:
+                _stores[path] = cls(path)
+            return _stores[path]
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def scope_key(event_category=None, event_type=None) -> str:
+        """Stable key for the server-side filter a partition was fetched with."""
+        if isinstance(event_type, (list, tuple, set)):
+            event_type = ",".join(sorted(event_type))
+        return json.dumps({"event_category": event_category, "event_type": event_type}, sort_keys=True)
+
+    # ── sync ─────────────────────────────────────────────────────────────────
+    def _fetch_into(self, client: ERClient, scope: str, filters: dict,
+                    lower: str, upper: str, updated_since: Optional[str] = None) -> int:
+        params = {
+            **filters,
+            "include_details": "true",
+            "include_notes": "true",
+            "filter": json.dumps({"date_range": {"lower": lower, "upper": upper}}),
+            "updated_since": updated_since,
+        }
+        written = 0
+        with closing(self._connect()) as conn:
+            for page in client.iter_pages("activity/events/", params, page_size=500):
+                rows, memberships = [], []
+                for event in page:
+                    event_id = event.get("id")
+                    if not event_id or not event.get("time"):
+                        continue
+                    month = _month(_to_utc(event["time"]))
+                    rows.append((event_id, event["time"], event.get("updated_at"), json.dumps(event)))
+                    memberships.append((scope, month, event_id))
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO events (id, time, updated_at, payload) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET time=excluded.time, "
+                        "updated_at=excluded.updated_at, payload=excluded.payload",
+                        rows,
+                    )
+                    conn.executemany(
+                        "INSERT INTO event_scopes (scope, month, event_id) VALUES (?, ?, ?) "
+                        "ON CONFLICT(scope, event_id) DO UPDATE SET month=excluded.month",
+                        memberships,
+                    )
+                written += len(rows)
+        return written
+
+    def sync(self, client: ERClient, *, event_category=None, event_type=None,
+             since=None, until=None, refresh_after: float = REFRESH_AFTER_SECONDS) -> dict:
+        """
+        Bring the store up to date for a scope and time range.
+
+        Returns:
+            dict: {'fetched_months', 'refreshed_months', 'events_written'}
+        """
+        scope = self.scope_key(event_category, event_type)
+        filters = {"event_category": event_category,
+                   "event_type": ",".join(event_type) if isinstance(event_type, (list, tuple, set)) else event_type}
+        now = datetime.now(timezone.utc)
+        start = _to_utc(since or EARLIEST)
+        end = min(_to_utc(until), now) if until else now
+        wanted = _months(start, end) if start <= end else []
+        stats = {"fetched_months": 0, "refreshed_months": 0, "events_written": 0}
+        if not wanted:
+            return stats
+
+        with self._sync_lock:
+            with closing(self._connect()) as conn:
+                held = dict(conn.execute(
+                    "SELECT month, synced_at FROM partitions WHERE scope = ? AND month BETWEEN ? AND ?",
+                    (scope, wanted[0], wanted[-1]),
+                ).fetchall())
+
+            stale_cutoff = now - timedelta(seconds=refresh_after)
+            missing = [m for m in wanted if m not in held]
+            stale = [m for m in wanted if m in held and _to_utc(held[m]) < stale_cutoff]
+            synced_at = now.isoformat()
+
+            # Gaps: full fetch of each contiguous run of missing months
+            for first, last in _runs(missing, wanted):
+                lower, upper = _month_bounds(first, last)
+                stats["events_written"] += self._fetch_into(client, scope, filters, lower, upper)
+            stats["fetched_months"] = len(missing)
+
+            # Held months: one incremental request for anything updated since
+            if stale:
+                oldest = min(_to_utc(held[m]) for m in stale) - SYNC_OVERLAP
+                lower, upper = _month_bounds(stale[0], stale[-1])
+                stats["events_written"] += self._fetch_into(
+                    client, scope, filters, lower, upper, updated_since=oldest.isoformat())
+                stats["refreshed_months"] = len(stale)
+
+            if missing or stale:
+                with closing(self._connect()) as conn, conn:
+                    conn.executemany(
+                        "INSERT INTO partitions (scope, month, synced_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(scope, month) DO UPDATE SET synced_at=excluded.synced_at",
+                        [(scope, m, synced_at) for m in missing + stale],
+                    )
+        return stats
+
+    # ── read ─────────────────────────────────────────────────────────────────
+    def read(self, *, event_category=None, event_type=None, since=None, until=None) -> list[dict]:
+        """Stored events for a scope within [since, until], oldest first."""
+        scope = self.scope_key(event_category, event_type)
+        start = _to_utc(since or EARLIEST)
+        end = _to_utc(until) if until else datetime.now(timezone.utc)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT e.payload FROM event_scopes s JOIN events e ON e.id = s.event_id "
+                "WHERE s.scope = ? AND s.month BETWEEN ? AND ?",
+                (scope, _month(start), _month(end)),
+            ).fetchall()
+        events = []
+        for (payload,) in rows:
+            event = json.loads(payload)
+            if start <= _to_utc(event["time"]) <= end:
+                events.append(event)
+        events.sort(key=lambda e: _to_utc(e["time"]))
+        return events
+
+    def events(self, client: ERClient, **query) -> list[dict]:
+        """sync() then read() — the usual entry point."""
+        refresh_after = query.pop("refresh_after", REFRESH_AFTER_SECONDS)
+        self.sync(client, refresh_after=refresh_after, **query)
+        return self.read(**query)
+
+    def clear(self):
+        """Drop every stored event and partition for this account."""
+        with self._sync_lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM event_scopes")
+            conn.execute("DELETE FROM partitions")
+            conn.execute("DELETE FROM events")
+
+
+# ─── ecoscope-compatible entry point ──────────────────────────────────────────
+
+def events_frame(events: list[dict], drop_null_geometry: bool = False):
+    """
+    Shape stored events like EarthRangerIO.get_events() output: `time` parsed,
+    point geometry from `location`, sorted by time, indexed by event id.
+    Returns a GeoDataFrame when geopandas is installed, else a DataFrame.
+    """
+    df = pd.DataFrame.from_records(events)
+    if df.empty:
+        return df
+    df["time"] = pd.to_datetime(df["time"], utc=True, format="ISO8601")
+    location = df["location"] if "location" in df.columns else pd.Series(None, index=df.index)
+    lon = pd.to_numeric(location.map(lambda x: x.get("longitude") if isinstance(x, dict) else None), errors="coerce")
+    lat = pd.to_numeric(location.map(lambda x: x.get("latitude") if isinstance(x, dict) else None), errors="coerce")
+    if drop_null_geometry:
+        keep = lon.notna() & lat.notna()
+        df, lon, lat = df[keep], lon[keep], lat[keep]
+    try:
+        import geopandas as gpd
+        points = gpd.points_from_xy(lon, lat)
+        df = gpd.GeoDataFrame(df, geometry=[None if p.is_empty else p for p in points], crs=4326)
+    except ImportError:
+        pass
+    return df.sort_values("time").set_index("id")
+
+
+def load_events(er_io, *, event_category=None, event_type=None, since=None, until=None,
+                drop_null_geometry: bool = False, refresh_after: float = REFRESH_AFTER_SECONDS):
+    """
+    Drop-in for `er_io.get_events(...)` served from the persistent store.
+
+    Always includes details and notes. Returns an empty frame (rather than
+    raising like ecoscope) when there are no events.
+    """
+    client = ERClient.from_earthranger_io(er_io, max_workers=4)
+    store = EventStore.for_account(client.server, getattr(er_io, "username", None) or "")
+    events = store.events(client, event_category=event_category, event_type=event_type,
+                          since=since, until=until, refresh_after=refresh_after)
+    return events_frame(events, drop_null_geometry=drop_null_geometry)
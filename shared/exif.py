@@ -0,0 +1,239 @@
+"""
+Header-only EXIF reader shared by the image upload paths.
+
+Camera-trap and survey uploads only ever need two EXIF values:
+DateTimeOriginal (for renaming / month folders) and GPSImgDirection
+(ZMB coordinate reprojection). Opening each image with PIL and walking
+`_getexif()` decodes every tag and, for bytes sources, needs the whole
+file in memory. This module reads just the JPEG APP1 segment (or the
+TIFF header) and walks the two IFDs that hold those tags.
+
+Sources can be raw bytes, a file path, a readable file-like object
+(Streamlit UploadedFile, ZipExtFile) or a member of an open ZipFile.
+File and ZIP reads are kept in a small LRU cache keyed by (path, size,
+mtime) and (archive, member, CRC32) respectively. Bytes are parsed
+directly — hashing a 64 KB header costs more than parsing it.
+
+    from shared.exif import read_exif, get_exif_datetime
+
+    info = read_exif(img_bytes)
+    info.datetime_original   # datetime | None
+    info.gps_img_direction   # float | None
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+# A JPEG APP1 segment is at most 64 KB, so this always covers the EXIF block
+EXIF_HEADER_BYTES = 64 * 1024
+CACHE_SIZE = 4096
+
+_EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+# TIFF tag ids
+_TAG_EXIF_IFD = 0x8769
+_TAG_GPS_IFD = 0x8825
+_TAG_DATETIME_ORIGINAL = 0x9003
+_TAG_GPS_IMG_DIRECTION = 0x0011
+
+# TIFF field types we decode
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+_TYPE_RATIONAL = 5
+
+
+class ExifInfo(NamedTuple):
+    """The EXIF values used by the upload tools."""
+    datetime_original: Optional[datetime] = None
+    gps_img_direction: Optional[float] = None
+
+
+_EMPTY = ExifInfo()
+
+
+# ─── Parsing ──────────────────────────────────────────────────────────────────
+
+def _parse_tiff(tiff: bytes) -> ExifInfo:
+    """Walk IFD0 → Exif IFD / GPS IFD of a TIFF structure for our two tags."""
+    if len(tiff) < 8:
+        return _EMPTY
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return _EMPTY
+
+    def entries(offset):
+        """Yield (tag, type, count, value_or_offset_bytes) for one IFD."""
+        if offset + 2 > len(tiff):
+            return
+        (n,) = struct.unpack_from(endian + "H", tiff, offset)
+        for i in range(n):
+            pos = offset + 2 + 12 * i
+            if pos + 12 > len(tiff):
+                return
+            tag, typ, count = struct.unpack_from(endian + "HHI", tiff, pos)
+            yield tag, typ, count, pos + 8
+
+    def long_value(pos):
+        return struct.unpack_from(endian + "I", tiff, pos)[0]
+
+    (ifd0,) = struct.unpack_from(endian + "I", tiff, 4)
+    exif_ifd = gps_ifd = None
+    for tag, typ, _, pos in entries(ifd0):
+        if tag == _TAG_EXIF_IFD and typ == _TYPE_LONG:
+            exif_ifd = long_value(pos)
+        elif tag == _TAG_GPS_IFD and typ == _TYPE_LONG:
+            gps_ifd = long_value(pos)
+
+    dt = None
+    if exif_ifd is not None:
+        for tag, typ, count, pos in entries(exif_ifd):
+            if tag != _TAG_DATETIME_ORIGINAL or typ != _TYPE_ASCII:
+                continue
+            start = pos if count <= 4 else long_value(pos)
+            raw = tiff[start:start + count].split(b"\x00", 1)[0]
+            try:
+                dt = datetime.strptime(raw.decode("ascii").strip(), _EXIF_DATE_FORMAT)
+            except (UnicodeDecodeError, ValueError):
+                dt = None
+            break
+
+    direction = None
+    if gps_ifd is not None:
+        for tag, typ, _, pos in entries(gps_ifd):
+            if tag != _TAG_GPS_IMG_DIRECTION or typ != _TYPE_RATIONAL:
+                continue
+            start = long_value(pos)
+            if start + 8 <= len(tiff):
+                num, den = struct.unpack_from(endian + "II", tiff, start)
+                if den:
+                    direction = num / den
+            break
+
+    return ExifInfo(dt, direction)
+
+
+def parse_exif(data: bytes) -> ExifInfo:
+    """
+    Extract DateTimeOriginal / GPSImgDirection from the start of an image.
+
+    `data` only needs to contain the file header — the first
+    EXIF_HEADER_BYTES of a JPEG are always enough. Malformed or
+    unsupported images return an empty ExifInfo rather than raising.
+    """
+    try:
+        if data[:4] in (b"II*\x00", b"MM\x00*"):
+            return _parse_tiff(bytes(data))
+        if data[:2] != b"\xff\xd8":
+            return _EMPTY
+
+        pos = 2
+        while pos + 4 <= len(data):
+            if data[pos] != 0xFF:
+                return _EMPTY
+            marker = data[pos + 1]
+            if marker == 0xFF:          # fill byte
+                pos += 1
+                continue
+            if marker in (0xD9, 0xDA):  # EOI / SOS — no EXIF before image data
+                return _EMPTY
+            (length,) = struct.unpack_from(">H", data, pos + 2)
+            if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+                return _parse_tiff(bytes(data[pos + 10:pos + 2 + length]))
+            pos += 2 + length
+    except (struct.error, IndexError):
+        pass
+    return _EMPTY
+
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+
+_cache: "OrderedDict[tuple, ExifInfo]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(key, load) -> ExifInfo:
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    info = load()
+    with _cache_lock:
+        _cache[key] = info
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def clear_cache() -> None:
+    """Drop all cached EXIF results."""
+    with _cache_lock:
+        _cache.clear()
+
+
+# ─── Public readers ───────────────────────────────────────────────────────────
+
+def read_exif_from_zip(zip_ref: zipfile.ZipFile, member) -> ExifInfo:
+    """Read EXIF from a ZIP member, decompressing only its header."""
+    info = member if isinstance(member, zipfile.ZipInfo) else zip_ref.getinfo(member)
+    key = ("zip", zip_ref.filename, info.filename, info.CRC, info.file_size)
+
+    def load():
+        with zip_ref.open(info) as fh:
+            return parse_exif(fh.read(EXIF_HEADER_BYTES))
+
+    return _cached(key, load)
+
+
+def read_exif(source) -> ExifInfo:
+    """
+    Read DateTimeOriginal and GPSImgDirection from an image.
+
+    Args:
+        source: Image bytes, a file path, or a readable file-like object.
+                File-like objects are rewound to their original position.
+
+    Returns:
+        ExifInfo (fields are None when the tag is absent or unreadable)
+    """
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return parse_exif(source[:EXIF_HEADER_BYTES])
+
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            stat = os.stat(path)
+
+            def load():
+                with open(path, "rb") as fh:
+                    return parse_exif(fh.read(EXIF_HEADER_BYTES))
+
+            return _cached(("path", path, stat.st_size, stat.st_mtime_ns), load)
+
+        # File-like (UploadedFile, ZipExtFile): read just the header
+        pos = source.tell() if hasattr(source, "tell") else None
+        header = source.read(EXIF_HEADER_BYTES)
+        if pos is not None and hasattr(source, "seek"):
+            source.seek(pos)
+        return read_exif(header)
+    except (OSError, ValueError):
+        return _EMPTY
+
+
+def get_exif_datetime(source) -> Optional[datetime]:
+    """DateTimeOriginal of an image, or None."""
+    return read_exif(source).datetime_original
+
+
+def get_exif_gps_direction(source) -> Optional[float]:
+    """GPSImgDirection (degrees) of an image, or None."""
+    return read_exif(source).gps_img_direction
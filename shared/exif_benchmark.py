@@ -0,0 +1,112 @@
+"""
+Micro-benchmark: header-only EXIF reader vs. the PIL `_getexif()` path.
+
+Builds synthetic camera-trap JPEGs (EXIF with DateTimeOriginal + GPS), then
+times reading DateTimeOriginal with both implementations — from in-memory
+bytes and from files on disk (cold, then warm LRU cache) — and reports
+seconds per 10k images.
+
+    python shared/exif_benchmark.py            # 2,000 images, scaled to 10k
+    python shared/exif_benchmark.py 10000
+"""
+
+import io
+import sys
+import tempfile
+import time
+from datetime import datetime
+from fractions import Fraction
+from pathlib import Path
+
+from PIL import Image, TiffImagePlugin
+from PIL.ExifTags import TAGS
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared import exif as fast_exif  # noqa: E402
+
+
+def make_jpeg(i: int) -> bytes:
+    """A 1920x1080 JPEG with a realistic EXIF block."""
+    ex = Image.Exif()
+    ex[0x010F] = "Bushnell"
+    ex[0x0110] = "Core DS-4K"
+    ex[0x8769] = {0x9003: f"2024:{1 + i % 12:02d}:{1 + i % 28:02d} 10:11:12"}
+    ex[0x8825] = {0x11: TiffImagePlugin.IFDRational(Fraction(i % 360, 1))}
+    buf = io.BytesIO()
+    Image.new("RGB", (1920, 1080), (i % 255, 80, 40)).save(
+        buf, "JPEG", quality=85, exif=ex.tobytes()
+    )
+    return buf.getvalue()
+
+
+def pil_datetime(image_data: bytes):
+    """The previous implementation used by the upload paths."""
+    try:
+        img = Image.open(io.BytesIO(image_data))
+        exif = img._getexif()
+        if exif:
+            for tag_id, value in exif.items():
+                if TAGS.get(tag_id) == "DateTimeOriginal":
+                    return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        pass
+    return None
+
+
+def pil_datetime_path(path):
+    """scripts/upload_camera_trap.py opened files directly with PIL."""
+    try:
+        with Image.open(path) as img:
+            exif = img._getexif()
+            if exif:
+                for tag_id, value in exif.items():
+                    if TAGS.get(tag_id) == "DateTimeOriginal":
+                        return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        pass
+    return None
+
+
+def bench(label, fn, images):
+    start = time.perf_counter()
+    for data in images:
+        fn(data)
+    elapsed = time.perf_counter() - start
+    per_10k = elapsed / len(images) * 10_000
+    print(f"{label:<28} {len(images) / elapsed:>10,.0f} img/s   {per_10k:>8.2f} s per 10k")
+    return per_10k
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # Re-use a small pool of distinct images so generation doesn't dominate
+    pool = [make_jpeg(i) for i in range(50)]
+    images = [pool[i % len(pool)] for i in range(n)]
+
+    # Parity check before timing
+    for data in pool:
+        assert pil_datetime(data) == fast_exif.get_exif_datetime(data)
+
+    print(f"{n:,} images, {sum(map(len, pool)) / len(pool) / 1024:.0f} KB average\n")
+    print("From bytes")
+    slow = bench("  PIL _getexif()", pil_datetime, images)
+    fast = bench("  shared.exif", fast_exif.get_exif_datetime, images)
+    print(f"  speed-up: {slow / fast:.1f}x\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n):
+            path = Path(tmp) / f"IMG{i:05d}.JPG"
+            path.write_bytes(pool[i % len(pool)])
+            paths.append(path)
+        fast_exif.clear_cache()
+        fast_exif.CACHE_SIZE = max(fast_exif.CACHE_SIZE, n)
+        print("From files")
+        slow = bench("  PIL _getexif()", pil_datetime_path, paths)
+        fast = bench("  shared.exif (cold)", fast_exif.get_exif_datetime, paths)
+        bench("  shared.exif (LRU warm)", fast_exif.get_exif_datetime, paths)
+        print(f"  speed-up (cold): {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
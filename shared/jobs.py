@@ -0,0 +1,443 @@
+"""
+Background jobs for long-running page operations.
+
+Exports, report builds and uploads used to run inside the Streamlit script
+thread: the session blocked until they finished, a rerun or websocket drop
+threw the work away, and one user's long run held up everyone sharing the
+server. Pages now hand such work to a process-wide runner and poll it:
+
+* work runs on a shared thread pool, or a process pool for CPU-bound
+  functions (`process=True`; the function must be importable by module name)
+* each job has a directory under the shared cache dir holding its status
+  (state, progress, message, error) as JSON and its result, so a page can be
+  left and revisited, and results survive a server restart
+* results are stored as raw bytes, Parquet (DataFrames) and JSON, never
+  pickled, and the cache and jobs directories must be private to the server's
+  user (event_store.private_dir), so nothing placed in a shared temp dir can
+  run code in the server. A result
+  that can't be stored that way (e.g. a GeoDataFrame) is kept in memory only
+* jobs report progress and notice cancellation through that directory,
+  which works the same from a worker thread or a worker process
+* a `key` makes a submission idempotent — resubmitting identical work while
+  it runs, or after it finished, returns the existing job
+
+A job function takes a `JobContext` first:
+
+    from shared.jobs import get_runner, poll_job
+
+    def build(ctx, rows):
+        for i, row in enumerate(rows):
+            ctx.check()                                   # raises JobCancelled if cancelled
+            ...
+            ctx.progress((i + 1) / len(rows), f"Row {i + 1}/{len(rows)}")
+        return b"..."
+
+    runner = get_runner()
+    job_id = runner.submit(build, rows, key=content_hash, label="Export", owner=username)
+    status = poll_job(job_id)                             # progress bar + cancel; reruns while active
+    if status["state"] == "done":
+        data = runner.result(job_id)
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from shared.event_store import CACHE_DIR, private_dir
+except ImportError:
+    from event_store import CACHE_DIR, private_dir
+
+JOBS_DIR = CACHE_DIR / "jobs"
+DEFAULT_THREADS = 4
+DEFAULT_PROCESSES = max(1, min(2, os.cpu_count() or 1))
+# Finished jobs (and their results) are removed after this long
+RETENTION = timedelta(days=3)
+# Minimum gap between progress writes, so tight loops don't hammer the disk
+PROGRESS_INTERVAL = 0.5
+# Results that can only be kept in memory; older ones are dropped first
+MAX_MEMORY_RESULTS = 16
+RESULT_FILE = "result.json"
+
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("done", "failed", "cancelled", "interrupted")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by `JobContext.check()` once it has been cancelled."""
+
+
+# ─── Job directory I/O ────────────────────────────────────────────────────────
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_json(path: Path, data: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".status", suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+# ─── Result files ─────────────────────────────────────────────────────────────
+
+class _Unstorable(Exception):
+    """A result holds something that has no safe on-disk form."""
+
+
+def _encode(value, job_dir: Path, parts: list):
+    """JSON-able form of `value`; bytes and DataFrames go to side files listed in `parts`."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (bytes, bytearray)):
+        name = f"result-{len(parts)}.bin"
+        parts.append(name)
+        (job_dir / name).write_bytes(bytes(value))
+        return {"$bytes": name}
+    if type(value) is pd.DataFrame:
+        name = f"result-{len(parts)}.parquet"
+        parts.append(name)
+        try:
+            value.to_parquet(job_dir / name)
+        except Exception as e:   # no pyarrow, or object columns Parquet can't hold
+            raise _Unstorable(str(e)) from e
+        return {"$frame": name}
+    if isinstance(value, list):
+        return [_encode(v, job_dir, parts) for v in value]
+    if isinstance(value, tuple):
+        return {"$tuple": [_encode(v, job_dir, parts) for v in value]}
+    if isinstance(value, dict):
+        if all(isinstance(k, str) and not k.startswith("$") for k in value):
+            return {k: _encode(v, job_dir, parts) for k, v in value.items()}
+        return {"$items": [[_encode(k, job_dir, parts), _encode(v, job_dir, parts)] for k, v in value.items()]}
+    raise _Unstorable(type(value).__name__)
+
+
+def _decode(data, job_dir: Path):
+    if isinstance(data, list):
+        return [_decode(v, job_dir) for v in data]
+    if not isinstance(data, dict):
+        return data
+    if "$bytes" in data:
+        return (job_dir / Path(data["$bytes"]).name).read_bytes()
+    if "$frame" in data:
+        return pd.read_parquet(job_dir / Path(data["$frame"]).name)
+    if "$tuple" in data:
+        return tuple(_decode(v, job_dir) for v in data["$tuple"])
+    if "$items" in data:
+        return {_decode(k, job_dir): _decode(v, job_dir) for k, v in data["$items"]}
+    return {k: _decode(v, job_dir) for k, v in data.items()}
+
+
+def _store_result(job_dir: Path, result) -> bool:
+    """Write `result` to the job directory; False (nothing left behind) if it can't be stored."""
+    parts = []
+    try:
+        encoded = _encode(result, job_dir, parts)
+    except _Unstorable:
+        for name in parts:
+            (job_dir / name).unlink(missing_ok=True)
+        return False
+    _write_json(job_dir / RESULT_FILE, {"result": encoded})
+    return True
+
+
+def _load_result(job_dir: Path):
+    data = _read_json(job_dir / RESULT_FILE)
+    if data is None:
+        raise FileNotFoundError(job_dir / RESULT_FILE)
+    return _decode(data["result"], job_dir)
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+class JobContext:
+    """
+    Handed to a job function as its first argument. Picklable (it only holds
+    the job's directory), so it works the same in a worker process.
+    """
+
+    def __init__(self, job_dir):
+        self.job_dir = Path(job_dir)
+        self._last_write = 0.0
+
+    def _update(self, **fields) -> None:
+        status = _read_json(self.job_dir / "status.json") or {}
+        status.update(fields)
+        _write_json(self.job_dir / "status.json", status)
+
+    def progress(self, fraction: float, message: str = None) -> None:
+        """Report progress in [0, 1] with an optional message."""
+        now = time.monotonic()
+        if fraction < 1 and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        fields = {"progress": max(0.0, min(1.0, float(fraction)))}
+        if message is not None:
+            fields["message"] = message
+        self._update(**fields)
+
+    @property
+    def cancelled(self) -> bool:
+        return (self.job_dir / "cancel").exists()
+
+    def check(self) -> None:
+        """Raise JobCancelled if the job has been cancelled — call between steps."""
+        if self.cancelled:
+            raise JobCancelled()
+
+
+def _execute(job_dir, fn, args, kwargs):
+    """
+    Run one job and record its outcome (in a pool thread or process).
+
+    Returns the result when it could not be written to the job directory, so
+    the runner can keep it in memory; None otherwise.
+    """
+    ctx = JobContext(job_dir)
+    if ctx.cancelled:
+        ctx._update(state="cancelled", finished=_now())
+        return None
+    ctx._update(state="running", started=_now(), pid=os.getpid())
+    try:
+        result = fn(ctx, *args, **kwargs)
+        stored = _store_result(ctx.job_dir, result)
+        ctx._update(state="done", progress=1.0, finished=_now(), stored=stored)
+        return None if stored else result
+    except JobCancelled:
+        ctx._update(state="cancelled", message="Cancelled", finished=_now())
+    except Exception as e:
+        ctx._update(state="failed", error=f"{type(e).__name__}: {e}",
+                    traceback=traceback.format_exc(limit=20), finished=_now())
+    return None
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+class JobRunner:
+    """Process-wide job registry over a thread pool and a (spawned) process pool."""
+
+    def __init__(self, root=None, max_threads: int = DEFAULT_THREADS, max_processes: int = DEFAULT_PROCESSES):
+        if root is None:
+            private_dir(CACHE_DIR)
+        self.root = private_dir(Path(root or JOBS_DIR))
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self._lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+        self._futures: dict = {}
+        self._results: OrderedDict = OrderedDict()   # results only held in memory
+        self._by_key: dict = {}
+        self._recover()
+
+    def _recover(self) -> None:
+        """Index existing jobs; ones whose worker died with a previous server are 'interrupted'."""
+        for job_dir in self.root.iterdir():
+            status = _read_json(job_dir / "status.json")
+            if not status:
+                continue
+            if status["state"] in ACTIVE_STATES and not _pid_alive(status.get("pid")):
+                status.update(state="interrupted", finished=_now())
+                _write_json(job_dir / "status.json", status)
+            if status.get("key") and status["state"] in ACTIVE_STATES + ("done",):
+                self._by_key[status["key"]] = status["id"]
+        self.purge()
+
+    def _pool(self, process: bool):
+        if process:
+            # A worker that died (e.g. OOM) breaks the whole pool — start a new one
+            if self._processes is None or getattr(self._processes, "_broken", False):
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="job")
+        return self._threads
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        """The shared process pool, for jobs that fan CPU-bound pieces out themselves."""
+        with self._lock:
+            return self._pool(process=True)
+
+    # ── submit / cancel ──────────────────────────────────────────────────────
+    def submit(self, fn, *args, key: str = None, label: str = "", owner: str = "",
+               process: bool = False, **kwargs) -> str:
+        """
+        Queue `fn(ctx, *args, **kwargs)` and return its job id.
+
+        With a `key`, an active or finished job for the same key is returned
+        instead of starting another; failed/cancelled ones are retried.
+        """
+        with self._lock:
+            if key is not None and key in self._by_key:
+                existing = self.status(self._by_key[key])
+                if existing and (existing["state"] in ACTIVE_STATES
+                                 or (existing["state"] == "done" and self._has_result(existing["id"]))):
+                    return existing["id"]
+            job_id = uuid.uuid4().hex[:16]
+            job_dir = self._dir(job_id)
+            private_dir(self.root)
+            job_dir.mkdir(mode=0o700)
+            _write_json(job_dir / "status.json", {
+                "id": job_id, "key": key, "label": label, "owner": owner, "state": "queued",
+                "progress": 0.0, "message": "Queued", "error": None, "created": _now(),
+                "started": None, "finished": None, "pid": os.getpid(), "process": process,
+            })
+            if key is not None:
+                self._by_key[key] = job_id
+            future = self._pool(process).submit(_execute, str(job_dir), fn, args, kwargs)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+        return job_id
+
+    def _finished(self, job_id: str, future) -> None:
+        value = None if future.cancelled() or future.exception() else future.result()
+        with self._lock:
+            if value is not None:
+                self._results[job_id] = value
+                while len(self._results) > MAX_MEMORY_RESULTS:
+                    self._results.popitem(last=False)
+            self._futures.pop(job_id, None)
+        # A worker process that died (or an unpicklable job) never wrote its outcome
+        status = self.status(job_id)
+        if status and status["state"] in ACTIVE_STATES and not future.cancelled():
+            error = future.exception()
+            status.update(state="failed", finished=_now(),
+                          error=f"{type(error).__name__}: {error}" if error else "Worker exited")
+            _write_json(self._dir(job_id) / "status.json", status)
+
+    def cancel(self, job_id: str) -> None:
+        """Ask a job to stop: queued jobs never start, running ones stop at their next `check()`."""
+        job_dir = self._dir(job_id)
+        if not job_dir.exists():
+            return
+        (job_dir / "cancel").touch()
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            JobContext(job_dir)._update(state="cancelled", message="Cancelled", finished=_now())
+
+    # ── reads ────────────────────────────────────────────────────────────────
+    def _dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def status(self, job_id: str):
+        """The job's status dict, or None for an unknown / purged job."""
+        return _read_json(self._dir(job_id) / "status.json") if job_id else None
+
+    def _has_result(self, job_id: str) -> bool:
+        return job_id in self._results or (self._dir(job_id) / RESULT_FILE).exists()
+
+    def result(self, job_id: str):
+        """
+        The finished job's return value.
+
+        Raises:
+            FileNotFoundError: the job has no result (not finished, purged, or
+                an in-memory result lost with a restart)
+            PermissionError: the jobs directory is no longer private
+        """
+        with self._lock:
+            if job_id in self._results:
+                return self._results[job_id]
+            future = self._futures.get(job_id)
+        if future is not None:
+            # Finished moments ago; its in-memory result arrives with the future
+            value = future.result()
+            if value is not None:
+                return value
+        private_dir(self.root)
+        return _load_result(self._dir(job_id))
+
+    def find(self, key: str):
+        """Id of the job last submitted under `key`, if any."""
+        return self._by_key.get(key)
+
+    def jobs(self, owner: str = None) -> list:
+        """Status dicts of every known job (optionally one owner's), newest first."""
+        statuses = [s for s in (_read_json(d / "status.json") for d in self.root.iterdir()) if s]
+        if owner is not None:
+            statuses = [s for s in statuses if s.get("owner") == owner]
+        return sorted(statuses, key=lambda s: s["created"], reverse=True)
+
+    def purge(self, older_than: timedelta = RETENTION) -> int:
+        """Remove finished jobs older than `older_than`; returns how many."""
+        cutoff = (datetime.now(timezone.utc) - older_than).isoformat()
+        removed = 0
+        for job_dir in list(self.root.iterdir()):
+            status = _read_json(job_dir / "status.json")
+            if status is None or (status["state"] in FINAL_STATES and (status.get("finished") or "") < cutoff):
+                shutil.rmtree(job_dir, ignore_errors=True)
+                if status:
+                    self._results.pop(status["id"], None)
+                if status and self._by_key.get(status.get("key")) == status["id"]:
+                    del self._by_key[status["key"]]
+                removed += 1
+        return removed
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    """The process-wide runner (created on first use)."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
+
+
+# ─── Streamlit polling ────────────────────────────────────────────────────────
+
+def poll_job(job_id: str, interval: float = 1.0, cancellable: bool = True):
+    """
+    Show a job's progress on the page and rerun every `interval` seconds while
+    it is queued or running. Returns its status dict (None if unknown); final
+    states are left for the caller to render.
+    """
+    import streamlit as st
+
+    runner = get_runner()
+    status = runner.status(job_id)
+    if status is None or status["state"] not in ACTIVE_STATES:
+        return status
+    st.progress(status["progress"], text=status.get("message") or status["state"].capitalize())
+    if cancellable and st.button("✖ Cancel", key=f"cancel_job_{job_id}"):
+        runner.cancel(job_id)
+        st.rerun()
+    time.sleep(interval)
+    st.rerun()
@@ -0,0 +1,154 @@
+"""
+Compact typed observation frames and their on-disk snapshots.
+
+A multi-year pull across hundreds of collars is tens of millions of fixes; as
+per-record dicts turned into an object-dtype DataFrame (string ids, Python
+Timestamps, float64) that costs well over 100 bytes a row before any analysis
+starts. Here a pull is kept as three typed columns:
+
+* `source_id` — categorical (int32 codes over the sorted source ids)
+* `epoch`     — int64 seconds since 1970-01-01 UTC (`recorded_at`)
+* `battery`   — float32, NaN where the fix carried no battery reading
+
+about 16 bytes a row, and day numbers (`epoch // SECONDS_PER_DAY`) give
+per-source daily groupings without building a date object per fix.
+
+Snapshots write the frame to Parquet when pyarrow (or fastparquet) is
+installed, and to a NumPy `.npz` of the same arrays otherwise, so nothing here
+adds a hard dependency.
+
+    from shared.observation_frame import observation_frame, write_snapshot, find_snapshot, read_snapshot
+
+    obs = observation_frame([(source_id, epochs, battery), ...])
+    write_snapshot(obs, CACHE_DIR / "obs_1a2b3c")        # → obs_1a2b3c.parquet / .npz
+    path = find_snapshot(CACHE_DIR / "obs_1a2b3c")
+    obs = read_snapshot(path) if path else None
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+OBS_COLUMNS = ["source_id", "epoch", "battery"]
+
+
+# ─── Typed frames ─────────────────────────────────────────────────────────────
+
+def _frame(codes: np.ndarray, categories, epoch: np.ndarray, battery: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({
+        "source_id": pd.Categorical.from_codes(codes.astype(np.int32, copy=False), categories=categories),
+        "epoch": epoch.astype(np.int64, copy=False),
+        "battery": battery.astype(np.float32, copy=False),
+    })
+
+
+def empty_observations() -> pd.DataFrame:
+    """A zero-row observation frame with the typed columns."""
+    return _frame(np.empty(0, np.int32), pd.Index([], dtype=object), np.empty(0, np.int64), np.empty(0, np.float32))
+
+
+def observation_frame(parts) -> pd.DataFrame:
+    """
+    Stack per-source (source_id, epoch, battery) arrays into one typed frame.
+
+    Rows keep the order they were given in; categories are the sorted ids of
+    sources with at least one row.
+    """
+    parts = [(str(sid), np.asarray(e, dtype=np.int64), np.asarray(b, dtype=np.float32))
+             for sid, e, b in parts if len(e)]
+    if not parts:
+        return empty_observations()
+    categories = sorted({sid for sid, _, _ in parts})
+    code_of = {sid: i for i, sid in enumerate(categories)}
+    codes = np.concatenate([np.full(len(e), code_of[sid], dtype=np.int32) for sid, e, _ in parts])
+    epoch = np.concatenate([e for _, e, _ in parts])
+    battery = np.concatenate([b for _, _, b in parts])
+    return _frame(codes, pd.Index(categories, dtype=object), epoch, battery)
+
+
+def epoch_seconds(values) -> np.ndarray:
+    """Aware timestamps (Series / Index / list) → int64 seconds since the epoch, floored."""
+    ns = pd.DatetimeIndex(values).as_unit("ns").asi8
+    return ns // 1_000_000_000
+
+
+def parse_epochs(recorded_at) -> np.ndarray:
+    """ER `recorded_at` strings → int64 epoch seconds; -1 marks unparseable values."""
+    times = pd.to_datetime(list(recorded_at), utc=True, errors="coerce", format="ISO8601")
+    return np.where(times.isna(), -1, times.as_unit("ns").asi8 // 1_000_000_000)
+
+
+# ─── Snapshots ────────────────────────────────────────────────────────────────
+
+def parquet_available() -> bool:
+    """True when pandas can write Parquet here (pyarrow or fastparquet installed)."""
+    return any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+
+
+def _replace_atomically(path: Path, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_snapshot(df: pd.DataFrame, base) -> Path:
+    """
+    Write a typed observation frame next to `base` (a path without suffix).
+
+    Returns the file written: `<base>.parquet`, or `<base>.npz` without a
+    Parquet engine. Replaces any earlier snapshot of either kind atomically.
+    """
+    base = Path(base)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    if parquet_available():
+        path = base.with_suffix(".parquet")
+        _replace_atomically(path, lambda fh: df[OBS_COLUMNS].to_parquet(fh, index=False))
+    else:
+        path = base.with_suffix(".npz")
+        source = df["source_id"].cat
+        _replace_atomically(path, lambda fh: np.savez(
+            fh,
+            codes=source.codes.to_numpy(),
+            categories=np.asarray(source.categories, dtype=str),
+            epoch=df["epoch"].to_numpy(),
+            battery=df["battery"].to_numpy(),
+        ))
+    for stale in (base.with_suffix(".parquet"), base.with_suffix(".npz")):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def find_snapshot(base):
+    """The snapshot file written for `base`, or None."""
+    base = Path(base)
+    for path in (base.with_suffix(".parquet"), base.with_suffix(".npz")):
+        if path.exists() and (path.suffix == ".npz" or parquet_available()):
+            return path
+    return None
+
+
+def read_snapshot(path) -> pd.DataFrame:
+    """Load a snapshot written by `write_snapshot` back into a typed frame."""
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path, allow_pickle=False) as z:
+            categories = pd.Index(z["categories"].astype(object), dtype=object)
+            return _frame(z["codes"], categories, z["epoch"], z["battery"])
+    df = pd.read_parquet(path)
+    source = df["source_id"].astype(str)
+    categories = pd.Index(sorted(source.unique()), dtype=object)
+    codes = categories.get_indexer(source)
+    return _frame(codes, categories, df["epoch"].to_numpy(), df["battery"].to_numpy())
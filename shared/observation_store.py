@@ -0,0 +1,238 @@
+"""
+Incremental per-source observation store.
+
+The Unit Performance Report pulls every fix a fleet has ever sent. Cached
+per exact (since, until) pair, moving the end date by a day threw away a
+multi-year download and started again. This store keeps what was pulled, per
+source, under the shared cache directory:
+
+* each source's fixes live in one typed snapshot file (int64 epoch seconds,
+  float32 battery — see observation_frame.py), rewritten when new fixes merge in
+* each source remembers the interval it covers; a request only pulls what lies
+  outside it, and the open end (up to now) is re-pulled from the last-synced
+  point minus SYNC_OVERLAP to catch late uploads
+* reads filter the stored arrays to the requested window
+
+so regenerating last month's report next month is a pull of the new weeks.
+One store per (server, username, name) — `name` separates pulls whose
+per-fix values differ, e.g. battery read as voltage vs. percentage.
+Fixes uploaded for times older than SYNC_OVERLAP before the last sync are
+not picked up — call `clear()` to rebuild.
+
+    from shared.observation_store import ObservationStore
+
+    store = ObservationStore.for_account(ER_SERVER, username, "battery_voltage")
+    store.sync(fetch, source_ids, "2023-01-01", "2025-06-30")   # fetch(source_id, since_iso, until_iso) -> (epoch, battery)
+    obs = store.frame(source_ids, "2023-01-01", "2025-06-30")  # typed frame, as observation_frame()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from shared.event_store import CACHE_DIR, private_dir
+    from shared.observation_frame import find_snapshot, observation_frame, read_snapshot, write_snapshot
+except ImportError:
+    from event_store import CACHE_DIR, private_dir
+    from observation_frame import find_snapshot, observation_frame, read_snapshot, write_snapshot
+
+# Re-pull the open end of a source's coverage once it is this old
+REFRESH_AFTER = timedelta(minutes=15)
+# Collars upload in batches; re-read this far behind the last sync
+SYNC_OVERLAP = timedelta(days=2)
+# Parallel per-source observation pulls
+DEFAULT_WORKERS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS coverage (
+    source_id TEXT PRIMARY KEY,
+    lower     TEXT NOT NULL,
+    upper     TEXT NOT NULL
+);
+"""
+
+
+# ─── Time helpers ─────────────────────────────────────────────────────────────
+
+def _to_utc(value) -> datetime:
+    """Parse an ISO string / date / datetime as an aware UTC datetime."""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime.combine(value, time.min)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _epoch(dt: datetime) -> int:
+    """Aware datetime → whole epoch seconds (floored, as stored fixes are)."""
+    return int(dt.timestamp() // 1)
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+class ObservationStore:
+    """
+    Per-source typed observation files plus their covered intervals (SQLite).
+
+    Thread-safe: syncs of the same store are serialised so concurrent sessions
+    don't pull the same source twice; reads never block on a sync.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        private_dir(self.root)
+        self._sync_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_account(cls, server: str, username: str, name: str, cache_dir=None) -> "ObservationStore":
+        """The shared store called `name` for a (server, username) pair."""
+        key = hashlib.sha256(f"{server.rstrip('/')}|{username}".encode()).hexdigest()[:16]
+        root = private_dir(Path(cache_dir or CACHE_DIR)) / f"er_observations_{key}" / re.sub(r"[^\w.-]", "_", name)
+        with _stores_lock:
+            if root not in _stores:
+                _stores[root] = cls(root)
+            return _stores[root]
+
+    def _connect(self):
+        conn = sqlite3.connect(self.root / "coverage.sqlite3", timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _base(self, source_id: str) -> Path:
+        return self.root / hashlib.sha256(source_id.encode()).hexdigest()[:24]
+
+    def _load(self, source_id: str) -> tuple:
+        """(epoch, battery) stored for a source, empty arrays when none."""
+        path = find_snapshot(self._base(source_id))
+        if path is None:
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+        df = read_snapshot(path)
+        return df["epoch"].to_numpy(), df["battery"].to_numpy()
+
+    # ── sync ─────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _gaps(covered, lower: datetime, upper: datetime, now: datetime) -> list:
+        """(since, until) pulls needed so coverage spans [lower, upper]."""
+        if covered is None:
+            return [(lower, upper)]
+        cov_lower, cov_upper = map(_to_utc, covered)
+        gaps = []
+        if lower < cov_lower:
+            gaps.append((lower, cov_lower))
+        if upper > cov_upper and (upper < now or now - cov_upper > REFRESH_AFTER):
+            gaps.append((max(cov_upper - SYNC_OVERLAP, cov_lower), upper))
+        return gaps
+
+    def _sync_source(self, fetch, source_id: str, gaps: list, covered,
+                     lower: datetime, upper: datetime) -> int:
+        """Pull a source's gaps, merge them into its file and widen its coverage."""
+        pulled = [(since, until, *fetch(source_id, since.isoformat(), until.isoformat())) for since, until in gaps]
+
+        epoch, battery = self._load(source_id)
+        # Re-pulled stretches replace what was stored for them
+        keep = np.ones(len(epoch), dtype=bool)
+        for since, until, _, _ in pulled:
+            keep &= (epoch < _epoch(since)) | (epoch > _epoch(until))
+        epoch = np.concatenate([epoch[keep], *(np.asarray(e, np.int64) for _, _, e, _ in pulled)])
+        battery = np.concatenate([battery[keep], *(np.asarray(b, np.float32) for _, _, _, b in pulled)])
+        order = np.argsort(epoch, kind="stable")
+        write_snapshot(observation_frame([(source_id, epoch[order], battery[order])]), self._base(source_id))
+
+        if covered:
+            lower, upper = min(lower, _to_utc(covered[0])), max(upper, _to_utc(covered[1]))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO coverage (source_id, lower, upper) VALUES (?, ?, ?) "
+                "ON CONFLICT(source_id) DO UPDATE SET lower=excluded.lower, upper=excluded.upper",
+                (source_id, lower.isoformat(), upper.isoformat()),
+            )
+        return sum(len(e) for _, _, e, _ in pulled)
+
+    def sync(self, fetch, source_ids, since, until, max_workers: int = DEFAULT_WORKERS) -> dict:
+        """
+        Make sure every source's fixes in [since, until] are stored.
+
+        `fetch(source_id, since_iso, until_iso)` returns that window's fixes as
+        (epoch seconds, battery) arrays. Sources whose pull fails keep their
+        previous data and coverage and are listed under 'failed'.
+
+        Returns:
+            dict: {'pulled_sources', 'observations', 'failed'}
+        """
+        now = datetime.now(timezone.utc)
+        lower, upper = _to_utc(since), min(_to_utc(until), now)
+        stats = {"pulled_sources": 0, "observations": 0, "failed": []}
+        if lower > upper:
+            return stats
+
+        with self._sync_lock:
+            with closing(self._connect()) as conn:
+                covered = {sid: (lo, up) for sid, lo, up in conn.execute(
+                    "SELECT source_id, lower, upper FROM coverage")}
+            todo = {}
+            for sid in source_ids:
+                gaps = self._gaps(covered.get(sid), lower, upper, now)
+                if gaps:
+                    todo[sid] = gaps
+            if not todo:
+                return stats
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(self._sync_source, fetch, sid, gaps, covered.get(sid), lower, upper): sid
+                    for sid, gaps in todo.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        stats["observations"] += future.result()
+                        stats["pulled_sources"] += 1
+                    except Exception:
+                        stats["failed"].append(futures[future])
+        return stats
+
+    # ── reads ────────────────────────────────────────────────────────────────
+    def frame(self, source_ids, since, until):
+        """Typed observation frame (see observation_frame.py) of stored fixes in [since, until]."""
+        lo, hi = _epoch(_to_utc(since)), _epoch(_to_utc(until))
+        parts = []
+        for sid in source_ids:
+            epoch, battery = self._load(sid)
+            in_range = (epoch >= lo) & (epoch <= hi)
+            parts.append((sid, epoch[in_range], battery[in_range]))
+        return observation_frame(parts)
+
+    def coverage(self) -> dict:
+        """{source_id: (lower, upper)} covered intervals as aware datetimes."""
+        with closing(self._connect()) as conn:
+            return {sid: (_to_utc(lo), _to_utc(up)) for sid, lo, up in conn.execute(
+                "SELECT source_id, lower, upper FROM coverage")}
+
+    def clear(self):
+        """Drop every stored fix and coverage interval in this store."""
+        with self._sync_lock:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM coverage")
+            for path in self.root.iterdir():
+                if path.suffix in (".parquet", ".npz"):
+                    path.unlink(missing_ok=True)
@@ -0,0 +1,254 @@
+"""
+Persistent per-source observation activity index.
+
+The unit check page used to answer "did this collar report?" with one
+`observations/?page_size=1` request per source × billing month — 300 collars
+over a year is 3,600 requests, repeated whenever the cache expired. This index
+records, per source and UTC day, how many observations ER holds, in SQLite
+under the shared cache directory:
+
+* the first time a source is asked about, one streamed observation pull over
+  the requested window fills its days
+* each source remembers the interval it covers; later requests only pull what
+  lies outside it, and the open end (up to now) is re-pulled from the
+  last-synced point minus SYNC_OVERLAP to catch late uploads
+* recently-active and active-month checks are then plain index lookups
+
+One database per (server, username), as for the event store. Observations that
+arrive for days older than SYNC_OVERLAP before the last sync are not picked up
+— call `clear()` to rebuild.
+
+    from shared.source_activity import SourceActivityIndex
+
+    index = SourceActivityIndex.for_account(ER_SERVER, username)
+    index.sync(client, source_ids, "2024-01-01", "2024-12-31")
+    index.active_sources(source_ids, "2024-12-01", "2024-12-31")   # {'a1b2…', …}
+    index.active_months(source_ids, "2024-01-01", "2024-12-31")    # {'a1b2…': {(2024, 1), …}}
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from shared.event_store import CACHE_DIR, private_dir
+except ImportError:
+    from event_store import CACHE_DIR, private_dir
+
+# Re-pull the open end of a source's coverage once it is this old
+REFRESH_AFTER = timedelta(minutes=15)
+# Collars upload in batches; re-read this far behind the last sync
+SYNC_OVERLAP = timedelta(days=2)
+# Parallel per-source observation pulls
+DEFAULT_WORKERS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity (
+    source_id TEXT NOT NULL,
+    day       TEXT NOT NULL,
+    n         INTEGER NOT NULL,
+    PRIMARY KEY (source_id, day)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    source_id TEXT PRIMARY KEY,
+    lower     TEXT NOT NULL,
+    upper     TEXT NOT NULL
+);
+"""
+
+
+# ─── Time helpers ─────────────────────────────────────────────────────────────
+
+def _to_utc(value) -> datetime:
+    """Parse an ISO string / date / datetime as an aware UTC datetime."""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime.combine(value, time.min)
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _day_bounds(since, until) -> tuple[datetime, datetime]:
+    """[start of since's day, end of until's day] in UTC — windows are whole days."""
+    lower = datetime.combine(_to_utc(since).date(), time.min, tzinfo=timezone.utc)
+    upper = datetime.combine(_to_utc(until).date(), time.max, tzinfo=timezone.utc)
+    return lower, upper
+
+
+# ─── Index ────────────────────────────────────────────────────────────────────
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+class SourceActivityIndex:
+    """
+    SQLite-backed daily observation counts for one ER account.
+
+    Thread-safe: each call opens its own connection, and syncs of the same
+    index are serialised so concurrent sessions don't pull the same source twice.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        private_dir(self.path.parent)
+        self._sync_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_account(cls, server: str, username: str, cache_dir=None) -> "SourceActivityIndex":
+        """The shared index for a (server, username) pair."""
+        key = hashlib.sha256(f"{server.rstrip('/')}|{username}".encode()).hexdigest()[:16]
+        path = Path(cache_dir or CACHE_DIR) / f"er_source_activity_{key}.sqlite3"
+        with _indexes_lock:
+            if path not in _indexes:
+                _indexes[path] = cls(path)
+            return _indexes[path]
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ── sync ─────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _gaps(covered, lower: datetime, upper: datetime, now: datetime) -> list:
+        """Whole-day (since, until) pulls needed so coverage spans [lower, upper]."""
+        if covered is None:
+            return [(lower, upper)]
+        cov_lower, cov_upper = map(_to_utc, covered)
+        gaps = []
+        if lower < cov_lower:
+            gaps.append((lower, cov_lower - timedelta(microseconds=1)))   # coverage starts on a day boundary
+        if upper > cov_upper and (upper < now or now - cov_upper > REFRESH_AFTER):
+            gaps.append((_day_bounds(cov_upper - SYNC_OVERLAP, upper)[0], upper))
+        return gaps
+
+    @staticmethod
+    def _day_counts(client, source_id: str, since: datetime, until: datetime) -> Counter:
+        """Stream a source's observations over a window into per-UTC-day counts."""
+        counts = Counter()
+        params = {"source_id": source_id, "since": since.isoformat(),
+                  "until": until.isoformat(), "page_size": 4000}
+        for page in client.iter_next("observations/", params):
+            times = pd.to_datetime([o.get("recorded_at") for o in page],
+                                   utc=True, errors="coerce", format="ISO8601")
+            counts.update(times.dropna().strftime("%Y-%m-%d"))
+        return counts
+
+    def _sync_source(self, client, source_id: str, gaps: list, covered,
+                     lower: datetime, upper: datetime) -> int:
+        """Pull a source's gaps and write its day counts and widened coverage."""
+        rows = []
+        for since, until in gaps:
+            counts = self._day_counts(client, source_id, since, until)
+            # Gaps are whole days, so every day in them is rewritten — days
+            # without observations are stored as 0
+            day = since.date()
+            while day <= until.date():
+                rows.append((source_id, day.isoformat(), counts.get(day.isoformat(), 0)))
+                day += timedelta(days=1)
+        if covered:
+            lower, upper = min(lower, _to_utc(covered[0])), max(upper, _to_utc(covered[1]))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO activity (source_id, day, n) VALUES (?, ?, ?) "
+                "ON CONFLICT(source_id, day) DO UPDATE SET n=excluded.n",
+                rows,
+            )
+            conn.execute(
+                "INSERT INTO coverage (source_id, lower, upper) VALUES (?, ?, ?) "
+                "ON CONFLICT(source_id) DO UPDATE SET lower=excluded.lower, upper=excluded.upper",
+                (source_id, lower.isoformat(), upper.isoformat()),
+            )
+        return sum(n for _, _, n in rows)
+
+    def sync(self, client, source_ids, since, until, max_workers: int = DEFAULT_WORKERS) -> dict:
+        """
+        Make sure every source's days in [since, until] are indexed.
+
+        `client` is a shared.er_client.ERClient. Sources whose pull fails keep
+        their previous coverage and are listed under 'failed'.
+
+        Returns:
+            dict: {'pulled_sources', 'observations', 'failed'}
+        """
+        now = datetime.now(timezone.utc)
+        lower, upper = _day_bounds(since, until)
+        upper = min(upper, now)
+        stats = {"pulled_sources": 0, "observations": 0, "failed": []}
+        if lower > upper:
+            return stats
+
+        with self._sync_lock:
+            with closing(self._connect()) as conn:
+                covered = {sid: (lo, up) for sid, lo, up in conn.execute(
+                    "SELECT source_id, lower, upper FROM coverage")}
+            todo = {}
+            for sid in source_ids:
+                gaps = self._gaps(covered.get(sid), lower, upper, now)
+                if gaps:
+                    todo[sid] = gaps
+            if not todo:
+                return stats
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(self._sync_source, client, sid, gaps, covered.get(sid), lower, upper): sid
+                    for sid, gaps in todo.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        stats["observations"] += future.result()
+                        stats["pulled_sources"] += 1
+                    except Exception:
+                        stats["failed"].append(futures[future])
+        return stats
+
+    # ── lookups ──────────────────────────────────────────────────────────────
+    def days(self, source_ids, since, until) -> dict:
+        """{source_id: {day: observation count}} for days in [since, until] with data."""
+        lower, upper = _day_bounds(since, until)
+        wanted = set(source_ids)
+        out = {sid: {} for sid in wanted}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT source_id, day, n FROM activity WHERE day BETWEEN ? AND ? AND n > 0",
+                (lower.date().isoformat(), upper.date().isoformat()),
+            )
+            for sid, day, n in rows:
+                if sid in wanted:
+                    out[sid][date.fromisoformat(day)] = n
+        return out
+
+    def active_sources(self, source_ids, since, until) -> set:
+        """Sources with at least one observation in [since, until]."""
+        return {sid for sid, days in self.days(source_ids, since, until).items() if days}
+
+    def active_months(self, source_ids, since, until) -> dict:
+        """{source_id: {(year, month), …}} for months in [since, until] with any observation."""
+        return {
+            sid: {(d.year, d.month) for d in days}
+            for sid, days in self.days(source_ids, since, until).items()
+        }
+
+    def clear(self):
+        """Drop every indexed day and coverage interval for this account."""
+        with self._sync_lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM activity")
+            conn.execute("DELETE FROM coverage")
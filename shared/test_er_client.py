@@ -0,0 +1,203 @@
+"""
+Offline check of shared/er_client.py against a local fake EarthRanger server.
+
+FakeERServer serves `activity/events/` (page-numbered, optionally with a
+total `count` and a page-size cap) and `observations/` (cursor `next` links
+that ignore page numbers) from a numbered list of records on a
+ThreadingHTTPServer on localhost. It can also answer 429 / 503 once per page
+and 504 for pages over a size, so the retry and page-size paths run too.
+Every case checks all records come back once and in order:
+
+    python shared/test_er_client.py
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.er_client import ERClient, ERClientError  # noqa: E402
+
+
+# ─── Fake ER ──────────────────────────────────────────────────────────────────
+
+class FakeERServer:
+    """
+    Local fake of the ER paging endpoints.
+
+    Args:
+        total:        number of records served
+        with_count:   include `count` in page-numbered responses
+        page_cap:     largest page size the server honours
+        fail_once:    {page_or_cursor: status} answered once before succeeding
+        timeout_over: page sizes above this answer 504
+        cursor_page:  page size of the cursor endpoint
+    """
+
+    def __init__(self, total, *, with_count=True, page_cap=None, fail_once=None,
+                 timeout_over=None, cursor_page=40):
+        self.total = total
+        self.with_count = with_count
+        self.page_cap = page_cap
+        self.fail_once = dict(fail_once or {})
+        self.timeout_over = timeout_over
+        self.cursor_page = cursor_page
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _records(self, start, stop):
+        return [{"id": i} for i in range(start, min(stop, self.total))]
+
+    def _take_failure(self, key):
+        with self._lock:
+            return self.fail_once.pop(key, None)
+
+    def respond(self, path, query):
+        """(status, payload) for one GET."""
+        with self._lock:
+            self.requests.append((path, query))
+        if path.endswith("/observations/"):
+            cursor = int(query.get("cursor", 0))
+            status = self._take_failure(f"cursor={cursor}")
+            if status:
+                return status, {}
+            stop = cursor + self.cursor_page
+            next_url = (f"{self.url}{path}?{urlencode({'cursor': stop})}"
+                        if stop < self.total else None)
+            return 200, {"data": {"results": self._records(cursor, stop), "next": next_url}}
+
+        page = int(query.get("page", 1))
+        size = int(query.get("page_size", 100))
+        if self.timeout_over and size > self.timeout_over:
+            return 504, {}
+        status = self._take_failure(page)
+        if status:
+            return status, {}
+        if self.page_cap:
+            size = min(size, self.page_cap)
+        start = (page - 1) * size
+        next_url = (f"{self.url}{path}?{urlencode({'page': page + 1, 'page_size': size})}"
+                    if start + size < self.total else None)
+        body = {"results": self._records(start, start + size), "next": next_url}
+        if self.with_count:
+            body["count"] = self.total
+        return 200, {"data": body}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                status, payload = server.respond(parts.path, query)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# ─── Checks ───────────────────────────────────────────────────────────────────
+
+def _client(server, **kwargs):
+    return ERClient(server.url, token="test", backoff=0.001, **kwargs)
+
+
+def _ids(records):
+    return [r["id"] for r in records]
+
+
+def check_count_paging():
+    with FakeERServer(1234, with_count=True) as server:
+        records = _client(server, max_workers=4).get_all("activity/events/", page_size=100)
+        assert _ids(records) == list(range(1234))
+        pages = sorted(int(q["page"]) for _, q in server.requests)
+        assert pages == list(range(1, 14)), pages
+    print("[OK] count paging: pages 2..N prefetched in parallel, returned in order")
+
+
+def check_no_count_paging():
+    with FakeERServer(1234, with_count=False) as server:
+        records = _client(server, max_workers=4).get_all("activity/events/", page_size=50)
+        assert _ids(records) == list(range(1234))
+        sizes = [int(q["page_size"]) for _, q in server.requests]
+        assert max(sizes) > 50, "page size never grew"
+    print(f"[OK] no-count paging: next links followed, page size grew to {max(sizes)}")
+
+
+def check_page_cap():
+    for with_count in (True, False):
+        with FakeERServer(777, with_count=with_count, page_cap=60) as server:
+            records = _client(server).get_all("activity/events/", page_size=100)
+            assert _ids(records) == list(range(777)), f"with_count={with_count}"
+    print("[OK] server page cap: page numbers follow the capped size, nothing skipped or repeated")
+
+
+def check_retries():
+    with FakeERServer(500, fail_once={1: 429, 3: 503, 4: 502}) as server:
+        client = _client(server, max_workers=2)
+        records = client.get_all("activity/events/", page_size=100)
+        assert _ids(records) == list(range(500))
+        assert client.stats["retries"] == 3, client.stats
+    with FakeERServer(100) as server:
+        server.fail_once = {1: 500}
+        client = _client(server, max_retries=0)
+        try:
+            client.get("activity/events/", {"page": 1})
+        except ERClientError:
+            pass
+        else:
+            raise AssertionError("a 500 with no retries left should raise")
+    print("[OK] 429 (Retry-After) and 5xx retried with backoff; exhausted retries raise")
+
+
+def check_timeouts_shrink_pages():
+    with FakeERServer(400, with_count=False, timeout_over=100) as server:
+        records = _client(server, max_retries=1).get_all("activity/events/", page_size=400)
+        assert _ids(records) == list(range(400))
+    print("[OK] 504 on big pages: page size halved until the server answers")
+
+
+def check_cursor_next():
+    with FakeERServer(230, fail_once={"cursor=80": 503}) as server:
+        pages = list(_client(server).iter_next("observations/", {"subject_id": "abc"}))
+        assert _ids(r for page in pages for r in page) == list(range(230))
+        assert "page" not in {k for _, q in server.requests for k in q}
+        assert server.requests[0][1] == {"subject_id": "abc"}
+    print("[OK] cursor paging: next links followed, query sent once, 503 retried")
+
+
+def main() -> None:
+    check_count_paging()
+    check_no_count_paging()
+    check_page_cap()
+    check_retries()
+    check_timeouts_shrink_pages()
+    check_cursor_next()
+
+
+if __name__ == "__main__":
+    main()
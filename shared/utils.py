@@ -6,11 +6,15 @@ import os
 import re
 from datetime import datetime
 from PIL import Image
-from PIL.ExifTags import TAGS
 import io
 import streamlit as st
 from pathlib import Path
 
+try:
+    from shared.exif import get_exif_datetime
+except ImportError:  # shared/ itself is on sys.path
+    from exif import get_exif_datetime
+
 BRAND_ORANGE = "#DB580F"
 
 # ── Global brand CSS ────────────────────────────────────────────────────────
@@ -205,23 +209,11 @@ def get_image_metadata(file_data):
             'size_bytes': len(file_data)
         }
         
-        # Try to get EXIF data if available
-        if hasattr(image, '_getexif') and image._getexif():
-            exif = image._getexif()
-            metadata['exif'] = exif
-            
-            # Extract DateTimeOriginal if available
-            if exif:
-                for tag_id, value in exif.items():
-                    tag = TAGS.get(tag_id, tag_id)
-                    if tag == 'DateTimeOriginal':
-                        try:
-                            # Parse EXIF date format: 'YYYY:MM:DD HH:MM:SS'
-                            dt = datetime.strptime(value, '%Y:%m:%d %H:%M:%S')
-                            metadata['datetime_original'] = dt
-                            metadata['date_taken'] = dt.strftime('%Y%m%d')
-                        except ValueError:
-                            pass
+        # DateTimeOriginal from the EXIF header only (no full tag decode)
+        dt = get_exif_datetime(file_data)
+        if dt:
+            metadata['datetime_original'] = dt
+            metadata['date_taken'] = dt.strftime('%Y%m%d')
         
         return metadata
     except Exception as e:
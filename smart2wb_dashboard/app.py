@@ -11,8 +11,8 @@ from pathlib import Path
 
 import pandas as pd
 import streamlit as st
-from PIL import Image
-from PIL.ExifTags import TAGS
+
+from shared.exif import get_exif_datetime
 
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
@@ -83,17 +83,7 @@ def clean_str(val) -> str:
 
 def extract_exif_datetime(img_file) -> datetime | None:
     """Extract DateTimeOriginal from an uploaded image file."""
-    try:
-        img = Image.open(img_file)
-        exif_data = img._getexif()
-        if not exif_data:
-            return None
-        for tag_id, val in exif_data.items():
-            if TAGS.get(tag_id) == "DateTimeOriginal":
-                return datetime.strptime(val, "%Y:%m:%d %H:%M:%S")
-    except Exception:
-        return None
-    return None
+    return get_exif_datetime(img_file)
 
 
 def match_images(smrt_dttms: pd.Series, image_files: list, minute_buffer: int) -> pd.DataFrame:
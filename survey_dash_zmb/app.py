@@ -13,9 +13,19 @@ import plotly.graph_objects as go
 import folium
 import streamlit.components.v1 as components
 from datetime import datetime, timedelta, date
+import sys
+from pathlib import Path
+
 from pandas import json_normalize
 from ecoscope.io.earthranger import EarthRangerIO
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_pool import get_er_io  # noqa: E402
+from shared.event_store import load_events  # noqa: E402
+
 ER_SERVER = "https://twiga.pamdas.org"
 SUBJECT_GROUP = "ZMB_Luangwa_giraffe"
 
@@ -31,7 +41,7 @@ TRACK_COLOURS = [
 
 def _er_login(username: str, password: str) -> bool:
     try:
-        er = EarthRangerIO(server=ER_SERVER, username=username, password=password)
+        er = get_er_io(ER_SERVER, username, password)
         er.get_subjects(limit=1)
         return True
     except Exception:
@@ -39,7 +49,7 @@ def _er_login(username: str, password: str) -> bool:
 
 
 def _get_er(username: str, password: str) -> EarthRangerIO:
-    return EarthRangerIO(server=ER_SERVER, username=username, password=password)
+    return get_er_io(ER_SERVER, username, password)
 
 
 # ─── Data fetches ─────────────────────────────────────────────────────────────
@@ -50,12 +60,12 @@ def load_survey_events(er_username: str, er_password: str,
     """Fetch giraffe_survey_monitoring_zmb events and flatten to one row per event."""
     er = _get_er(er_username, er_password)
     try:
-        gdf = er.get_events(
+        gdf = load_events(
+            er,
             event_category="monitoring_zmb",
             since=since_str,
             until=until_str,
-            include_details=True,
-            drop_null_geometry=False,
+            drop_null_geometry=False
         )
     except Exception as exc:
         st.error(f"❌ Error fetching survey events: {exc}")
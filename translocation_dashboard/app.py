@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, date
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+import sys
 from pathlib import Path
 
 # Ecoscope kept for optional debug mode only — main data path uses requests directly
@@ -14,6 +15,13 @@ try:
 except ImportError:
     ECOSCOPE_AVAILABLE = False
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_client import ERClient, unwrap_page  # noqa: E402
+from shared.event_store import EventStore  # noqa: E402
+
 _ER_BASE   = "https://twiga.pamdas.org"
 _AUTH_TIMEOUT = 15   # seconds — login request
 _DATA_TIMEOUT = 45   # seconds — event data request
@@ -30,71 +38,38 @@ def _get_token(username, password):
     return r.json()["access_token"]
 
 
-def _fetch_events(token, event_type_value, since=None, until=None):
+def _fetch_events(token, event_type_value, since=None, until=None, username=""):
     """
-    Fetch events from the ER REST API filtered to a single event_type value.
+    Fetch events filtered to a single event_type value.
     Resolves the type to a UUID first (fast, ~1 s) so the events query only
     returns the records we actually want.  Falls back to event_category filter
     if the UUID lookup fails.
+
+    Events come from the user's on-disk store (shared.event_store), so only
+    months not yet held, or events updated since the last sync, are requested.
     """
-    headers = {"Authorization": f"Bearer {token}"}
+    client = ERClient(_ER_BASE, token, timeout=(_AUTH_TIMEOUT, _DATA_TIMEOUT))
 
     # ── resolve event type value → UUID ───────────────────────────────────────
     event_type_id = None
     try:
-        et_r = _requests.get(
-            f"{_ER_BASE}/api/v1.0/activity/events/eventtypes/",
-            headers=headers,
-            timeout=_AUTH_TIMEOUT,
-        )
-        if et_r.ok:
-            items = et_r.json()
-            if not isinstance(items, list):
-                items = items.get("results", items.get("data", []))
-            for item in items:
-                if item.get("value") == event_type_value:
-                    event_type_id = item.get("id")
-                    break
+        items, _, _ = unwrap_page(client.get("activity/events/eventtypes/", timeout=_AUTH_TIMEOUT))
+        for item in items:
+            if item.get("value") == event_type_value:
+                event_type_id = item.get("id")
+                break
     except Exception:
         pass
 
-    # ── build query params ────────────────────────────────────────────────────
-    params = {
-        "include_details": "true",
-        "include_notes":   "true",
-        "page_size":       100,
-    }
+    # ── scope ─────────────────────────────────────────────────────────────────
     if event_type_id:
-        params["event_type"] = event_type_id
+        scope = {"event_type": event_type_id}
     else:
         # fallback: fetch by category and filter client-side
-        params["event_category"] = "veterinary"
-
-    if since:
-        params["since"] = since
-    if until:
-        params["until"] = until
-
-    # ── paginate ──────────────────────────────────────────────────────────────
-    results = []
-    url = f"{_ER_BASE}/api/v1.0/events/"
-    req_params = params
+        scope = {"event_category": "veterinary"}
 
-    while url and len(results) < 500:
-        r = _requests.get(url, headers=headers, params=req_params, timeout=_DATA_TIMEOUT)
-        r.raise_for_status()
-        req_params = None          # subsequent pages use the `next` URL directly
-        data = r.json()
-
-        if isinstance(data, list):
-            results.extend(data)
-            break
-
-        batch = data.get("results", data.get("data", []))
-        results.extend(batch)
-        url = data.get("next")
-
-    return results
+    store = EventStore.for_account(_ER_BASE, username)
+    return store.events(client, since=since, until=until, **scope)
 
 # Location area data for range calculations (in km²)
 LOCATION_AREAS = {
@@ -200,12 +175,10 @@ def get_mortality_events(start_date=None, end_date=None, username=None, _passwor
         since = start_date.strftime('%Y-%m-%dT00:00:00Z') if isinstance(start_date, date) and start_date else None
         until = end_date.strftime('%Y-%m-%dT23:59:59Z')   if isinstance(end_date,   date) and end_date   else None
 
-        events = _fetch_events(token, "giraffe_mortality", since=since, until=until)
-        if not events:
+        df = pd.DataFrame.from_records(_fetch_events(token, "giraffe_mortality", since=since, until=until, username=username))
+        if df.empty:
             return pd.DataFrame()
 
-        df = pd.DataFrame(events)
-
         # Client-side safety filter
         if 'event_type' in df.columns:
             df = df[df['event_type'] == 'giraffe_mortality']
@@ -247,12 +220,10 @@ def get_translocation_events(start_date=None, end_date=None, username=None, _pas
         since = start_date.strftime('%Y-%m-%dT00:00:00Z') if isinstance(start_date, date) and start_date else None
         until = end_date.strftime('%Y-%m-%dT23:59:59Z')   if isinstance(end_date,   date) and end_date   else None
 
-        events = _fetch_events(token, "giraffe_translocation_3", since=since, until=until)
-        if not events:
+        df = pd.DataFrame.from_records(_fetch_events(token, "giraffe_translocation_3", since=since, until=until, username=username))
+        if df.empty:
             return pd.DataFrame()
 
-        df = pd.DataFrame(events)
-
         # Client-side safety filter
         if 'event_type' in df.columns:
             df = df[df['event_type'] == 'giraffe_translocation_3']
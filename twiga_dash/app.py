@@ -3,6 +3,8 @@ Twiga Dash — GPS Subject Tracking Dashboard
 Provides a live summary of all GPS-collared giraffe subjects in EarthRanger.
 """
 
+import json
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -405,48 +407,81 @@ def fetch_subjects(_username: str, _password: str) -> pd.DataFrame:
     return df.reset_index(drop=True)
 
 
-def _parse_assigned_range(assigned_range) -> tuple:
-    """Extract (start_dt, end_dt) from an assigned_range value.
+# ─── Subject summary (columnar) ───────────────────────────────────────────────
+# build_summary_df used to walk raw.iterrows() and parse every subject's
+# dates, species and position one row at a time. Each field is now pulled out
+# of the raw column in a single pass and parsed/matched as a whole column:
+# dates go through one pd.to_datetime per source, species aliases are matched
+# once per distinct string, and tracking hours / days-since are array maths.
+# twiga_dash/summary_benchmark.py checks parity with the row-wise version.
+
+# Deployment-date fallbacks, in priority order
+_ADDITIONAL_START_KEYS = ("deployment_start", "collar_start", "date_start",
+                          "start_date", "date_of_deployment")
+_ROW_START_COLS = ("date_added", "created_at", "date_birth")
+# 'additional' keys that may name the species, in priority order
+_ADDITIONAL_SPECIES_KEYS = ("subspecies", "Subspecies", "species", "Species",
+                            "sub_species", "taxon", "type", "common_name")
+
+
+def _column(raw: pd.DataFrame, col: str, default=None) -> pd.Series:
+    """raw[col] as an object Series, or `default` on every row when absent."""
+    if col in raw.columns:
+        return raw[col].astype(object)
+    return pd.Series([default] * len(raw), index=raw.index, dtype=object)
+
+
+def _parse_dt_column(values) -> pd.Series:
+    """Best-effort parse of datetime-like values to UTC in one call.
+
+    Empty / falsy values, containers and anything unparseable become NaT.
+    """
+    cleaned = pd.Series(
+        [None if not isinstance(v, (str, datetime, pd.Timestamp, np.datetime64, int, float))
+         or isinstance(v, bool) or not v else v for v in values],
+        dtype=object,
+    )
+    try:
+        return pd.to_datetime(cleaned, utc=True, errors="coerce", format="mixed")
+    except (TypeError, ValueError, OverflowError):
+        # Mixed numeric/string input pandas refuses to parse together
+        parsed = []
+        for v in cleaned:
+            try:
+                parsed.append(pd.to_datetime(v, utc=True, errors="coerce"))
+            except (TypeError, ValueError, OverflowError):
+                parsed.append(pd.NaT)
+        return pd.to_datetime(pd.Series(parsed, dtype=object), utc=True)
+
+
+def _assigned_range_bounds(values) -> tuple:
+    """Parse a column of assigned_range values into (start, end) UTC Series.
 
     The ER REST API returns assigned_range as a dict:
       {'start_time': <iso>, 'end_time': <iso|null>}
     When delivered via the ecoscope SDK the same dict may come through
-    serialised as-is, or the field may simply be absent from the DataFrame.
+    serialised as a JSON string, or the field may be absent altogether.
     Also handles JSONB half-open ranges stored as 'lower'/'upper'.
-    Returns (start_dt | None, end_dt | None).
     """
-    if assigned_range is None:
-        return None, None
-    # If it came through as a string (JSON-encoded dict)
-    if isinstance(assigned_range, str):
-        try:
-            import json as _json
-            assigned_range = _json.loads(assigned_range)
-        except Exception:
-            return None, None
-    if not isinstance(assigned_range, dict):
-        return None, None
-    start_raw = assigned_range.get("start_time") or assigned_range.get("lower")
-    end_raw   = assigned_range.get("end_time")   or assigned_range.get("upper")
-    start_dt = pd.to_datetime(start_raw, utc=True, errors="coerce") if start_raw else None
-    end_dt   = pd.to_datetime(end_raw,   utc=True, errors="coerce") if end_raw   else None
-    # Treat NaT as None
-    if start_dt is not None and pd.isna(start_dt):
-        start_dt = None
-    if end_dt is not None and pd.isna(end_dt):
-        end_dt = None
-    return start_dt, end_dt
-
-
-def _try_parse_dt(val) -> "pd.Timestamp | None":
-    """Best-effort parse of any datetime-like value to a UTC Timestamp."""
-    if val is None:
-        return None
-    try:
-        result = pd.to_datetime(val, utc=True, errors="coerce")
-        return None if pd.isna(result) else result
-    except Exception:
-        return None
+    starts, ends = [], []
+    for ar in values:
+        if isinstance(ar, str):
+            try:
+                ar = json.loads(ar)
+            except ValueError:
+                ar = None
+        if isinstance(ar, dict):
+            starts.append(ar.get("start_time") or ar.get("lower"))
+            ends.append(ar.get("end_time") or ar.get("upper"))
+        else:
+            starts.append(None)
+            ends.append(None)
+    return _parse_dt_column(starts), _parse_dt_column(ends)
+
+
+def _text_column(values) -> pd.Series:
+    """str(value or '') for every value — matches how the table displays them."""
+    return pd.Series([str(v or "") for v in values], dtype=object)
 
 
 # Common EarthRanger naming patterns for each species key.
@@ -477,8 +512,14 @@ def _match_species_key(text: str) -> str | None:
     return None
 
 
-def _extract_species(row) -> str:
-    """Extract species from a subject row.
+def _species_lookup(texts: pd.Series) -> pd.Series:
+    """Species key per text (None where nothing matches), matched once per distinct value."""
+    keys = {t: _match_species_key(t) for t in pd.unique(texts)}
+    return texts.map(keys)
+
+
+def _species_column(raw: pd.DataFrame, additional: list) -> pd.Series:
+    """Species key for every subject row.
 
     Priority order:
       1. common_name     — EarthRanger stores the subspecies display name here
@@ -487,63 +528,49 @@ def _extract_species(row) -> str:
       3. additional dict — custom admin fields
       4. Name heuristic  — last resort
     """
-    # 1. common_name — preferred source
-    cn = str(row.get("common_name") or "")
-    m = _match_species_key(cn)
-    if m:
-        return m
-
-    # 2. subject_subtype slug
-    st_type = str(row.get("subject_subtype") or "")
-    m = _match_species_key(st_type)
-    if m:
-        return m
-
-    # 3. additional dict — custom fields added by the ER admin
-    additional = row.get("additional") or {}
-    if isinstance(additional, dict):
-        for key_name in ("subspecies", "Subspecies", "species", "Species",
-                          "sub_species", "taxon", "type", "common_name"):
-            val = str(additional.get(key_name) or "")
-            m = _match_species_key(val)
-            if m:
-                return m
-
-    # 4. Subject name heuristic
-    name = str(row.get("name") or "")
-    m = _match_species_key(name)
-    if m:
-        return m
-
-    return "unknown"
-
-
-# Keep old name as alias
-_extract_subspecies = _extract_species
-
-
-def _last_position(row):
-    """Return (lat, lon) from last_position field or None, None."""
-    lp = row.get("last_position")
-    if isinstance(lp, dict):
-        coords = lp.get("geometry", {}).get("coordinates") or lp.get("coordinates")
-        if coords and len(coords) >= 2:
-            return coords[1], coords[0]   # lat, lon
-    # GeoJSON geometry directly stored as last_position
-    if hasattr(lp, "y") and hasattr(lp, "x"):
-        return float(lp.y), float(lp.x)
-    return None, None
-
-
-def build_summary_df(raw: pd.DataFrame) -> tuple:
-    """Transform raw subjects DataFrame into (summary_df, debug_lines)."""
+    sources = [_text_column(_column(raw, "common_name")),
+               _text_column(_column(raw, "subject_subtype"))]
+    sources += [_text_column(a.get(k) for a in additional) for k in _ADDITIONAL_SPECIES_KEYS]
+    sources.append(_text_column(_column(raw, "name")))
+
+    species = pd.Series([None] * len(raw), dtype=object)
+    for texts in sources:
+        todo = species.isna()
+        if not todo.any():
+            break
+        species[todo] = _species_lookup(texts[todo])
+    return species.fillna("unknown")
+
+
+def _last_positions(values) -> tuple:
+    """(lat, lon) arrays from last_position dicts / point geometries, NaN where absent."""
+    lat = np.full(len(values), np.nan)
+    lon = np.full(len(values), np.nan)
+    for i, lp in enumerate(values):
+        if isinstance(lp, dict):
+            coords = (lp.get("geometry") or {}).get("coordinates") or lp.get("coordinates")
+            if coords and len(coords) >= 2:
+                lat[i], lon[i] = coords[1], coords[0]
+        # GeoJSON geometry directly stored as last_position
+        elif hasattr(lp, "y") and hasattr(lp, "x"):
+            lat[i], lon[i] = lp.y, lp.x
+    return lat, lon
+
+
+def build_summary_df(raw: pd.DataFrame, now: datetime | None = None) -> tuple:
+    """Transform raw subjects DataFrame into (summary_df, debug_lines).
+
+    Args:
+        raw: subjects as returned by fetch_subjects()
+        now: reference time for tracking hours / days since last fix
+             (defaults to the current UTC time)
+    """
     if raw.empty:
         return pd.DataFrame(), ["raw df is empty"]
 
-    rows = []
-    now = datetime.now(tz=timezone.utc)
+    now = pd.Timestamp(now or datetime.now(tz=timezone.utc))
 
-    # ── Per-dataset debug — collect once before the loop ──
+    # ── Per-dataset debug ──
     debug: list[str] = []
     cols = list(raw.columns)
     debug.append(f"Subject columns ({len(cols)}): {cols}")
@@ -578,69 +605,53 @@ def build_summary_df(raw: pd.DataFrame) -> tuple:
         sample_add = raw["additional"].dropna().head(3).tolist()
         debug.append(f"additional field samples: {[repr(x)[:300] for x in sample_add]}")
 
-    for _, row in raw.iterrows():
-        is_active = bool(row.get("tracks_available", False)) or bool(row.get("is_active", False))
-
-        # ── Tracking hours ──
-        # Primary: assigned_range field (ER REST API deployment record)
-        start_dt, end_dt = _parse_assigned_range(row.get("assigned_range"))
-
-        # Fallback 1: additional dict may hold deployment dates
-        if start_dt is None:
-            additional = row.get("additional") or {}
-            if isinstance(additional, dict):
-                for k in ("deployment_start", "collar_start", "date_start",
-                           "start_date", "date_of_deployment"):
-                    v = additional.get(k)
-                    if v:
-                        start_dt = _try_parse_dt(v)
-                        if start_dt:
-                            break
-
-        # Fallback 2: date columns on the subject row itself
-        if start_dt is None:
-            for col in ("date_added", "created_at", "date_birth"):
-                v = row.get(col)
-                if v:
-                    start_dt = _try_parse_dt(v)
-                    if start_dt:
-                        break
-
-        if start_dt is not None:
-            if end_dt is not None and end_dt < now:
-                effective_end = end_dt        # deployment finished
-            else:
-                effective_end = now           # still deployed
-            tracking_hours = max((effective_end - start_dt).total_seconds() / 3600, 0)
-        else:
-            tracking_hours = 0.0
-
-        # ── Last position ──
-        last_pos_date = row.get("last_position_date")
-        lp_dt = _try_parse_dt(last_pos_date)
-        days_since = (now - lp_dt).total_seconds() / 86400 if lp_dt else None
-
-        lat, lon = _last_position(row)
-
-        rows.append({
-            "id":              row.get("id", ""),
-            "name":            row.get("name", "Unknown"),
-            "is_active":       is_active,
-            "subspecies":      _extract_species(row),
-            "common_name":     str(row.get("common_name") or ""),
-            "subject_subtype": str(row.get("subject_subtype") or ""),
-            "subject_group":   str(row.get("subject_group_label") or ""),
-            "start_dt":        start_dt,
-            "end_dt":          end_dt,
-            "tracking_hours":  round(tracking_hours, 1),
-            "tracking_days":   round(tracking_hours / 24, 1),
-            "last_pos_date":   last_pos_date,
-            "days_since":      round(days_since, 1) if days_since is not None else None,
-            "lat":             lat,
-            "lon":             lon,
-        })
-
-    return pd.DataFrame(rows), debug
+    raw = raw.reset_index(drop=True)
+    additional = [a if isinstance(a, dict) else {} for a in _column(raw, "additional")]
+
+    is_active = (_column(raw, "tracks_available", False).to_numpy().astype(bool)
+                 | _column(raw, "is_active", False).to_numpy().astype(bool))
+
+    # ── Tracking hours ──
+    # Primary: assigned_range field (ER REST API deployment record)
+    start_dt, end_dt = _assigned_range_bounds(_column(raw, "assigned_range"))
+
+    # Fallback 1: additional dict may hold deployment dates
+    # Fallback 2: date columns on the subject row itself
+    fallbacks = [[a.get(k) for a in additional] for k in _ADDITIONAL_START_KEYS]
+    fallbacks += [_column(raw, c) for c in _ROW_START_COLS]
+    for values in fallbacks:
+        todo = start_dt.isna()
+        if not todo.any():
+            break
+        start_dt = start_dt.where(~todo, _parse_dt_column(values))
+
+    # Finished deployments stop at end_dt, everything else runs to now
+    effective_end = end_dt.where(end_dt < now, now)
+    tracking_hours = ((effective_end - start_dt).dt.total_seconds() / 3600).clip(lower=0).fillna(0.0)
+
+    # ── Last position ──
+    last_pos_date = _column(raw, "last_position_date")
+    days_since = ((now - _parse_dt_column(last_pos_date)).dt.total_seconds() / 86400).round(1)
+    lat, lon = _last_positions(_column(raw, "last_position").to_numpy())
+
+    summary = pd.DataFrame({
+        "id":              _column(raw, "id", ""),
+        "name":            _column(raw, "name", "Unknown"),
+        "is_active":       is_active,
+        "subspecies":      _species_column(raw, additional),
+        "common_name":     _text_column(_column(raw, "common_name")),
+        "subject_subtype": _text_column(_column(raw, "subject_subtype")),
+        "subject_group":   _text_column(_column(raw, "subject_group_label")),
+        "start_dt":        start_dt,
+        "end_dt":          end_dt,
+        "tracking_hours":  tracking_hours.round(1),
+        "tracking_days":   (tracking_hours / 24).round(1),
+        "last_pos_date":   last_pos_date,
+        "days_since":      days_since,
+        "lat":             lat,
+        "lon":             lon,
+    })
+    return summary, debug
 
 
 def build_project_sites_df(summary: pd.DataFrame) -> pd.DataFrame:
@@ -0,0 +1,228 @@
+"""
+Benchmark: columnar Twiga Dash subject summary vs. the previous row-wise
+implementation.
+
+Builds synthetic ER subjects covering every source the summary reads
+(assigned_range as dict / JSON string / lower-upper, deployment dates in
+'additional', row-level date fallbacks, species from common_name, subtype,
+'additional' or name, last_position dicts), checks both implementations
+produce the same summary frame, then times them. The regression check on a
+fixed fixture is test_summary.py.
+
+    python twiga_dash/summary_benchmark.py            # 10,000 subjects
+    python twiga_dash/summary_benchmark.py 50000
+"""
+
+import importlib.util
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+_app_file = Path(__file__).resolve().parent / "app.py"
+_spec = importlib.util.spec_from_file_location("twiga_dash_app", _app_file)
+app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(app)
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+# ─── Synthetic data ───────────────────────────────────────────────────────────
+
+def _iso(rng: random.Random, start_year: int = 2016) -> str:
+    dt = datetime(start_year, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(9 * 365 * 86400))
+    return dt.isoformat() if rng.random() < 0.7 else dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def make_subjects(n: int, seed: int = 11) -> pd.DataFrame:
+    rng = random.Random(seed)
+    common_names = ["Masai_Masai", "Reticulated", "Southern_Angolan", "Northern_Nubian",
+                    "Masai_Luangwa", "Southern_SouthAfrican", "Giraffe", None, ""]
+    subtypes = ["giraffe", "giraffe_tippelskirchi", "giraffe_peralta", None]
+    rows = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.5:
+            assigned = {"start_time": _iso(rng), "end_time": _iso(rng) if rng.random() < 0.3 else None}
+        elif kind < 0.6:
+            assigned = json.dumps({"start_time": _iso(rng), "end_time": None})
+        elif kind < 0.7:
+            assigned = {"lower": _iso(rng), "upper": _iso(rng, 2024)}
+        elif kind < 0.75:
+            assigned = "not json"
+        else:
+            assigned = None
+        additional = {}
+        if rng.random() < 0.3:
+            additional[rng.choice(["deployment_start", "collar_start", "start_date"])] = (
+                _iso(rng) if rng.random() < 0.8 else "unknown")
+        if rng.random() < 0.2:
+            additional[rng.choice(["subspecies", "Species", "taxon"])] = rng.choice(
+                ["Kordofan", "West African", "thornicrofti", "none"])
+        if rng.random() < 0.7:
+            lp = {"geometry": {"coordinates": [rng.uniform(10, 40), rng.uniform(-30, 10)]}}
+        elif rng.random() < 0.5:
+            lp = {"coordinates": [rng.uniform(10, 40), rng.uniform(-30, 10)]}
+        else:
+            lp = None
+        rows.append({
+            "id": f"subj-{i:06d}",
+            "name": rng.choice(["GIR", "Rothschild", "Niger", "Namibian"]) + f"_{i}",
+            "subject_subtype": rng.choice(subtypes),
+            "common_name": rng.choice(common_names),
+            "is_active": rng.random() < 0.4,
+            "tracks_available": rng.choice([True, False, None]),
+            "assigned_range": assigned,
+            "additional": additional if rng.random() < 0.9 else None,
+            "created_at": _iso(rng) if rng.random() < 0.5 else None,
+            "date_added": _iso(rng) if rng.random() < 0.2 else "",
+            "last_position_date": _iso(rng, 2024) if rng.random() < 0.8 else None,
+            "last_position": lp,
+            "subject_group_label": rng.choice(["KEN_MaraNorth", "NAM_Damaraland", "ZMB_NorthLuangwa"]),
+        })
+    return pd.DataFrame(rows)
+
+
+# ─── Previous implementation (row-wise) ───────────────────────────────────────
+
+def legacy_parse_assigned_range(assigned_range) -> tuple:
+    if assigned_range is None:
+        return None, None
+    if isinstance(assigned_range, str):
+        try:
+            assigned_range = json.loads(assigned_range)
+        except Exception:
+            return None, None
+    if not isinstance(assigned_range, dict):
+        return None, None
+    start_raw = assigned_range.get("start_time") or assigned_range.get("lower")
+    end_raw = assigned_range.get("end_time") or assigned_range.get("upper")
+    start_dt = pd.to_datetime(start_raw, utc=True, errors="coerce") if start_raw else None
+    end_dt = pd.to_datetime(end_raw, utc=True, errors="coerce") if end_raw else None
+    if start_dt is not None and pd.isna(start_dt):
+        start_dt = None
+    if end_dt is not None and pd.isna(end_dt):
+        end_dt = None
+    return start_dt, end_dt
+
+
+def legacy_try_parse_dt(val):
+    if val is None:
+        return None
+    try:
+        result = pd.to_datetime(val, utc=True, errors="coerce")
+        return None if pd.isna(result) else result
+    except Exception:
+        return None
+
+
+def legacy_extract_species(row) -> str:
+    m = app._match_species_key(str(row.get("common_name") or ""))
+    if m:
+        return m
+    m = app._match_species_key(str(row.get("subject_subtype") or ""))
+    if m:
+        return m
+    additional = row.get("additional") or {}
+    if isinstance(additional, dict):
+        for key_name in ("subspecies", "Subspecies", "species", "Species",
+                         "sub_species", "taxon", "type", "common_name"):
+            m = app._match_species_key(str(additional.get(key_name) or ""))
+            if m:
+                return m
+    m = app._match_species_key(str(row.get("name") or ""))
+    if m:
+        return m
+    return "unknown"
+
+
+def legacy_last_position(row):
+    lp = row.get("last_position")
+    if isinstance(lp, dict):
+        coords = lp.get("geometry", {}).get("coordinates") or lp.get("coordinates")
+        if coords and len(coords) >= 2:
+            return coords[1], coords[0]
+    if hasattr(lp, "y") and hasattr(lp, "x"):
+        return float(lp.y), float(lp.x)
+    return None, None
+
+
+def legacy_build_summary_df(raw: pd.DataFrame, now: datetime) -> pd.DataFrame:
+    rows = []
+    for _, row in raw.iterrows():
+        is_active = bool(row.get("tracks_available", False)) or bool(row.get("is_active", False))
+        start_dt, end_dt = legacy_parse_assigned_range(row.get("assigned_range"))
+        if start_dt is None:
+            additional = row.get("additional") or {}
+            if isinstance(additional, dict):
+                for k in ("deployment_start", "collar_start", "date_start",
+                          "start_date", "date_of_deployment"):
+                    v = additional.get(k)
+                    if v:
+                        start_dt = legacy_try_parse_dt(v)
+                        if start_dt:
+                            break
+        if start_dt is None:
+            for col in ("date_added", "created_at", "date_birth"):
+                v = row.get(col)
+                if v:
+                    start_dt = legacy_try_parse_dt(v)
+                    if start_dt:
+                        break
+        if start_dt is not None:
+            effective_end = end_dt if end_dt is not None and end_dt < now else now
+            tracking_hours = max((effective_end - start_dt).total_seconds() / 3600, 0)
+        else:
+            tracking_hours = 0.0
+        last_pos_date = row.get("last_position_date")
+        lp_dt = legacy_try_parse_dt(last_pos_date)
+        days_since = (now - lp_dt).total_seconds() / 86400 if lp_dt else None
+        lat, lon = legacy_last_position(row)
+        rows.append({
+            "id":              row.get("id", ""),
+            "name":            row.get("name", "Unknown"),
+            "is_active":       is_active,
+            "subspecies":      legacy_extract_species(row),
+            "common_name":     str(row.get("common_name") or ""),
+            "subject_subtype": str(row.get("subject_subtype") or ""),
+            "subject_group":   str(row.get("subject_group_label") or ""),
+            "start_dt":        start_dt,
+            "end_dt":          end_dt,
+            "tracking_hours":  round(tracking_hours, 1),
+            "tracking_days":   round(tracking_hours / 24, 1),
+            "last_pos_date":   last_pos_date,
+            "days_since":      round(days_since, 1) if days_since is not None else None,
+            "lat":             lat,
+            "lon":             lon,
+        })
+    return pd.DataFrame(rows)
+
+
+# ─── Timing ───────────────────────────────────────────────────────────────────
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    raw = make_subjects(n)
+
+    old, t_old = timed(legacy_build_summary_df, raw, NOW)
+    (new, _debug), t_new = timed(app.build_summary_df, raw, NOW)
+    from test_summary import assert_same_summary
+    ties = assert_same_summary(old, new)
+
+    print(f"{n:,} subjects  (parity OK, {ties} x.x5 h ties rounded to even)\n")
+    print(f"{'row-wise iterrows':<28} {t_old:8.2f} s")
+    print(f"{'columnar build_summary_df':<28} {t_new:8.2f} s   ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
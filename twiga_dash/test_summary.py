@@ -0,0 +1,105 @@
+"""
+Regression check for twiga_dash.app.build_summary_df.
+
+1. A handful of hand-built subjects with known tracking hours / days, days
+   since the last fix and last position, one per date source the summary
+   reads.
+2. Parity with the previous row-wise implementation (kept in
+   summary_benchmark.py) on a fixed 2,000-subject fixture. Every column must
+   match exactly, except that tracking_hours may differ by 0.1 where the
+   duration falls exactly on x.x5 h: NumPy rounds those ties to even,
+   Python's round() goes by the binary value.
+
+    python twiga_dash/test_summary.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from summary_benchmark import NOW, app, legacy_build_summary_df, make_subjects
+
+H = pd.Timedelta(hours=1)
+
+
+def _subject(sid, **fields):
+    row = {"id": sid, "name": sid, "is_active": False, "tracks_available": None,
+           "assigned_range": None, "additional": None, "created_at": None,
+           "date_added": None, "last_position_date": None, "last_position": None}
+    row.update(fields)
+    return row
+
+
+def _iso(ts):
+    return pd.Timestamp(ts).isoformat()
+
+
+FIXTURE = [
+    # id, fields, (tracking_hours, tracking_days, days_since)
+    ("range-dict-open", dict(assigned_range={"start_time": _iso(NOW - 744 * H), "end_time": None},
+                             last_position_date=_iso(NOW - 36 * H),
+                             last_position={"geometry": {"coordinates": [36.8, -1.3]}}),
+     (744.0, 31.0, 1.5)),
+    ("range-json-ended", dict(assigned_range='{"start_time": "2025-05-31T00:00:00Z", '
+                                             '"end_time": "2025-05-31T12:00:00Z"}'),
+     (12.0, 0.5, None)),
+    ("range-upper-future", dict(assigned_range={"lower": _iso(NOW - 48 * H), "upper": "2030-01-01T00:00:00Z"}),
+     (48.0, 2.0, None)),
+    ("additional-start", dict(additional={"collar_start": _iso(NOW - 6 * H)}, is_active=True),
+     (6.0, 0.2, None)),
+    ("row-created-at", dict(created_at=_iso(NOW - 24 * H)), (24.0, 1.0, None)),
+    ("no-dates", dict(assigned_range="not json"), (0.0, 0.0, None)),
+    # 27.5975 h: days come from the unrounded hours (1.1499 -> 1.1), not 27.6 / 24 -> 1.2
+    ("days-from-unrounded", dict(assigned_range={"start_time": _iso(NOW - pd.Timedelta(seconds=99351))}),
+     (27.6, 1.1, None)),
+]
+
+
+def check_fixture():
+    raw = pd.DataFrame([_subject(sid, **fields) for sid, fields, _ in FIXTURE])
+    summary, _ = app.build_summary_df(raw, NOW)
+    summary = summary.set_index("id")
+    for sid, _, (hours, days, days_since) in FIXTURE:
+        row = summary.loc[sid]
+        assert row["tracking_hours"] == hours, (sid, row["tracking_hours"])
+        assert row["tracking_days"] == days, (sid, row["tracking_days"])
+        if days_since is None:
+            assert pd.isna(row["days_since"]), (sid, row["days_since"])
+        else:
+            assert row["days_since"] == days_since, (sid, row["days_since"])
+    first = summary.loc["range-dict-open"]
+    assert (first["lat"], first["lon"]) == (-1.3, 36.8)
+    assert summary.loc["additional-start", "is_active"]
+    print(f"[OK] {len(FIXTURE)} hand-built subjects")
+
+
+def assert_same_summary(old: pd.DataFrame, new: pd.DataFrame) -> int:
+    """Assert the two summaries match; return the number of tie-rounding differences."""
+    hours_old = old["tracking_hours"].astype(float).to_numpy()
+    hours_new = new["tracking_hours"].astype(float).to_numpy()
+    ties = ~np.isclose(hours_old, hours_new, rtol=0, atol=1e-9)
+    assert np.allclose(hours_old, hours_new, rtol=0, atol=0.1 + 1e-9)
+    start = pd.to_datetime(old["start_dt"], utc=True)
+    end = pd.to_datetime(old["end_dt"], utc=True)
+    exact = (end.where(end < NOW, NOW) - start).dt.total_seconds() / 3600
+    assert np.allclose((exact[ties] * 10) % 1, 0.5, atol=1e-6), "hours differ away from a x.x5 tie"
+
+    rest = [c for c in old.columns if c != "tracking_hours"]
+    pd.testing.assert_frame_equal(old[rest], new[rest], check_dtype=False, check_exact=True)
+    return int(ties.sum())
+
+
+def check_parity():
+    raw = make_subjects(2000, seed=11)
+    old = legacy_build_summary_df(raw, NOW)
+    new, _ = app.build_summary_df(raw, NOW)
+    ties = assert_same_summary(old, new)
+    print(f"[OK] parity with the row-wise builder on 2,000 subjects ({ties} x.x5 h ties)")
+
+
+def main() -> None:
+    check_fixture()
+    check_parity()
+
+
+if __name__ == "__main__":
+    main()
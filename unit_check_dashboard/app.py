@@ -2,15 +2,22 @@ import streamlit as st
 import pandas as pd
 import calendar
 from datetime import date, datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import plotly.express as px
 import plotly.graph_objects as go
-from ecoscope.io.earthranger import EarthRangerIO
 import gspread
 from google.oauth2.service_account import Credentials
 import json
+import sys
 from pathlib import Path
 
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.er_client import ERClient  # noqa: E402
+from shared.er_pool import get_er_io  # noqa: E402
+from shared.source_activity import SourceActivityIndex  # noqa: E402
+
 
 def main():
     """Main application entry point"""
@@ -438,11 +445,7 @@ def stock_planning_tab():
 def er_login(username, password):
     """Create EarthRanger connection and test it"""
     try:
-        er_io = EarthRangerIO(
-            server="https://twiga.pamdas.org",
-            username=username,
-            password=password
-        )
+        er_io = get_er_io("https://twiga.pamdas.org", username, password)
         er_io.get_sources(limit=1)
         return er_io
     except Exception as e:
@@ -478,21 +481,13 @@ def authenticate_earthranger():
 @st.cache_data(ttl=3600)
 def get_all_sources(_username, _password):
     """Fetch all tracking sources (cached for 1 hour)"""
-    er = EarthRangerIO(
-        server="https://twiga.pamdas.org",
-        username=_username,
-        password=_password
-    )
+    er = get_er_io("https://twiga.pamdas.org", _username, _password)
     return er.get_sources()
 
 
 def get_last_7_days(source_id, username, password):
     """Fetch last 7 days of locations and battery data for a source"""
-    er = EarthRangerIO(
-        server="https://twiga.pamdas.org",
-        username=username,
-        password=password
-    )
+    er = get_er_io("https://twiga.pamdas.org", username, password)
     since = (datetime.utcnow() - timedelta(days=7)).isoformat()
 
     try:
@@ -801,11 +796,7 @@ def unit_check_tab():
 def fetch_unit_update_events(source_ids, source_labels, username, password):
     """Fetch and display unit update events for selected sources"""
     try:
-        er = EarthRangerIO(
-            server="https://twiga.pamdas.org",
-            username=username,
-            password=password
-        )
+        er = get_er_io("https://twiga.pamdas.org", username, password)
     except Exception as e:
         st.error(f"Error connecting to EarthRanger: {e}")
         return
@@ -957,11 +948,7 @@ def render_unit_update_upload_tab():
     password = st.session_state.password
 
     try:
-        er = EarthRangerIO(
-            server="https://twiga.pamdas.org",
-            username=username,
-            password=password,
-        )
+        er = get_er_io("https://twiga.pamdas.org", username, password)
     except Exception as e:
         st.error(f"Could not connect to EarthRanger: {e}")
         return
@@ -1039,7 +1026,7 @@ ER_SERVER = "https://twiga.pamdas.org"
 @st.cache_data(ttl=1800, show_spinner=False)
 def fetch_subjectsources_all(_username, _password):
     """Fetch all subject-source assignments (deployment dates) from EarthRanger."""
-    er = EarthRangerIO(server=ER_SERVER, username=_username, password=_password)
+    er = get_er_io(ER_SERVER, _username, _password)
     all_results = []
     url = f"{ER_SERVER}/api/v1.0/subjectsources/?page_size=500&include_inactive=true"
     while url:
@@ -1061,73 +1048,44 @@ def fetch_subjectsources_all(_username, _password):
     return all_results
 
 
+def _synced_activity_index(_username, _password, source_ids_tuple, since_iso, until_iso):
+    """Bring the persistent source activity index up to date for these sources.
+
+    Only days the index doesn't hold yet (plus the recent edge) are pulled —
+    one streamed observations/ request per source, up to 10 sources at a time.
+    """
+    er = get_er_io(ER_SERVER, _username, _password)
+    client = ERClient.from_earthranger_io(er, max_workers=1)
+    index = SourceActivityIndex.for_account(ER_SERVER, _username)
+    index.sync(client, source_ids_tuple, since_iso, until_iso)
+    return index
+
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def fetch_recently_active_sources(_username, _password, source_ids_tuple, since_iso, until_iso):
     """Return the subset of source IDs that have any observation between since_iso and until_iso.
 
-    Requests run in parallel (up to 10 threads) to avoid sequential HTTP round-trips.
+    Answered from the source activity index (shared/source_activity.py).
     """
-    er = EarthRangerIO(server=ER_SERVER, username=_username, password=_password)
-    headers = er.auth_headers()
-
-    def _check(source_id):
-        url = (
-            f"{ER_SERVER}/api/v1.0/observations/"
-            f"?source_id={source_id}&since={since_iso}&until={until_iso}&page_size=1"
-        )
-        try:
-            resp = er._http_session.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get('results') or data.get('data', {}).get('results', [])
-            return source_id if items else None
-        except Exception:
-            return None
-
-    active = set()
-    with ThreadPoolExecutor(max_workers=10) as pool:
-        for result in as_completed(pool.submit(_check, sid) for sid in source_ids_tuple):
-            sid = result.result()
-            if sid:
-                active.add(sid)
-    return active
+    index = _synced_activity_index(_username, _password, source_ids_tuple, since_iso, until_iso)
+    return index.active_sources(source_ids_tuple, since_iso, until_iso)
 
 
 def fetch_all_source_active_months(_username, _password, source_ids_tuple, billing_months_tuple):
     """Check which billing months each source had GPS observations.
 
-    Runs all source × month checks in parallel (up to 10 threads).
+    Answered from the source activity index (shared/source_activity.py).
     Returns dict: source_id → set of (year, month) tuples.
     """
-    er = EarthRangerIO(server=ER_SERVER, username=_username, password=_password)
-    headers = er.auth_headers()
-    results = {sid: set() for sid in source_ids_tuple}
-
-    def _check(source_id, y, m):
-        m_start = date(y, m, 1).isoformat()
-        m_end = date(y, m, calendar.monthrange(y, m)[1]).isoformat()
-        url = (
-            f"{ER_SERVER}/api/v1.0/observations/"
-            f"?source_id={source_id}&since={m_start}&until={m_end}&page_size=1"
-        )
-        try:
-            resp = er._http_session.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get('results') or data.get('data', {}).get('results', [])
-            return source_id, y, m, bool(items)
-        except Exception:
-            return source_id, y, m, False
-
-    tasks = [(sid, y, m) for sid in source_ids_tuple for y, m in billing_months_tuple]
-    with ThreadPoolExecutor(max_workers=10) as pool:
-        futures = [pool.submit(_check, sid, y, m) for sid, y, m in tasks]
-        for future in as_completed(futures):
-            source_id, y, m, had_data = future.result()
-            if had_data:
-                results[source_id].add((y, m))
-
-    return results
+    if not billing_months_tuple:
+        return {sid: set() for sid in source_ids_tuple}
+    (y0, m0), (y1, m1) = billing_months_tuple[0], billing_months_tuple[-1]
+    since = date(y0, m0, 1)
+    until = date(y1, m1, calendar.monthrange(y1, m1)[1])
+    index = _synced_activity_index(_username, _password, source_ids_tuple, since, until)
+    active = index.active_months(source_ids_tuple, since, until)
+    wanted = set(billing_months_tuple)
+    return {sid: active.get(sid, set()) & wanted for sid in source_ids_tuple}
 
 
 @st.cache_data(ttl=1800, show_spinner=False)
@@ -1137,7 +1095,7 @@ def fetch_unit_updates_for_billing(_username, _password, since_iso, until_iso):
     Returns columns: source_id (str, the ER source UUID from unitupdate_unitid),
     action (str, lowercased + normalised), time.
     """
-    er = EarthRangerIO(server=ER_SERVER, username=_username, password=_password)
+    er = get_er_io(ER_SERVER, _username, _password)
     try:
         gdf = er.get_events(
             event_category='monitoring',
@@ -1394,11 +1352,9 @@ def iridium_invoice_tab():
     # ── Check which months each source had GPS activity ───────────────────────
     billing_ym = _billing_months(start_date, end_date)
     month_labels = [datetime(y, m, 1).strftime("%b %Y") for y, m in billing_ym]
-    n_checks = len(source_ids) * len(billing_ym)
-
     with st.spinner(
         f"Checking activity for {len(source_ids)} {manufacturer} units × "
-        f"{len(billing_ym)} months ({n_checks} requests) — cached for 30 min…"
+        f"{len(billing_ym)} months from the source activity index…"
     ):
         active_months_per_source = fetch_all_source_active_months(
             st.session_state.username,
@@ -7,7 +7,6 @@ Usage: python run_upload.py <csv_file> <username> <password>
 import sys
 import os
 import pandas as pd
-import requests
 import json
 import getpass
 from datetime import datetime
@@ -49,7 +48,7 @@ def main():
             'client_id': 'das_web_client'
         }
         
-        response = requests.post(uploader.token_url, data=token_data)
+        response = uploader.session.post(uploader.token_url, data=token_data)
         
         if response.status_code == 200:
             token_info = response.json()
@@ -75,7 +74,7 @@ def main():
     # Test API connection
     print("🔍 Testing API connection...")
     test_url = f"{uploader.api_base}/activity/events"
-    test_response = requests.get(test_url, headers=uploader.headers, params={'limit': 1})
+    test_response = uploader.session.get(test_url, headers=uploader.headers, params={'limit': 1})
     
     if test_response.status_code != 200:
         print(f"❌ API connection test failed: {test_response.status_code}")
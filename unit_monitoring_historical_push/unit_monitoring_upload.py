@@ -34,7 +34,6 @@ Version: 1.0
 """
 
 import pandas as pd
-import requests
 import json
 import getpass
 from datetime import datetime, timedelta
@@ -44,6 +43,9 @@ from pathlib import Path
 import logging
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from shared.er_client import make_session  # noqa: E402
+
 class UnitMonitoringUploader:
     """Upload historical unit monitoring events to EarthRanger"""
     
@@ -53,6 +55,8 @@ class UnitMonitoringUploader:
         self.token_url = f"{self.server_url}/oauth2/token"
         self.access_token = None
         self.headers = {'Content-Type': 'application/json'}
+        # Pooled keep-alive connections; GET/PATCH retried with backoff on 429/5xx
+        self.session = make_session(retries=3)
         self.setup_logging()
         
     def setup_logging(self):
@@ -87,7 +91,7 @@ class UnitMonitoringUploader:
                 'client_id': 'das_web_client'
             }
             
-            response = requests.post(self.token_url, data=token_data)
+            response = self.session.post(self.token_url, data=token_data)
             
             if response.status_code == 200:
                 token_info = response.json()
@@ -263,7 +267,7 @@ class UnitMonitoringUploader:
             try:
                 payload = self.create_event_payload(row)
                 
-                response = requests.post(url, headers=self.headers, data=json.dumps(payload))
+                response = self.session.post(url, headers=self.headers, data=json.dumps(payload))
                 
                 if response.status_code in [200, 201]:
                     success_count += 1
@@ -427,7 +431,7 @@ def main():
                 # Test connection
                 print("🔍 Testing API connection...")
                 test_url = f"{uploader.api_base}/activity/events"
-                test_response = requests.get(test_url, headers=uploader.headers, params={'limit': 1})
+                test_response = uploader.session.get(test_url, headers=uploader.headers, params={'limit': 1})
                 
                 if test_response.status_code != 200:
                     print(f"❌ API connection test failed: {test_response.status_code}")
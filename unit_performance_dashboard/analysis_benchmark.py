@@ -0,0 +1,212 @@
+"""
+Benchmark: typed-array Unit Performance analysis vs. the previous
+object-frame implementation.
+
+Builds a synthetic fleet (GSat-style units on 4–48 fixes/day with dropped
+fixes and battery gaps, deployments that start/end inside the window, some
+units without a deployment row, units on the manual-schedule lists), checks
+both implementations produce the same battery, fix-rate and summary tables,
+then times them and compares the in-memory size of the observation frames.
+
+    python unit_performance_dashboard/analysis_benchmark.py            # 200 units x 365 days
+    python unit_performance_dashboard/analysis_benchmark.py 400 730
+"""
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_app_file = Path(__file__).resolve().parent / "app.py"
+_spec = importlib.util.spec_from_file_location("unit_performance_app", _app_file)
+app = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(app)
+
+START = pd.Timestamp("2024-09-01", tz="UTC")
+
+
+# ─── Synthetic data ───────────────────────────────────────────────────────────
+
+def make_fleet(n_units: int, n_days: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    manual = sorted(app.GSAT_MANUAL_6PERDAY | app.GSAT_MANUAL_12PERDAY)
+    source_ids = [f"src-{i:05d}" for i in range(n_units)]
+    tags = [manual[i] if i < len(manual) else f"{900000000 + i:09d}" for i in range(n_units)]
+    sources_df = pd.DataFrame({"id": source_ids, "tagID": tags})
+
+    assignments, metadata, groups, parts = [], {}, {}, []
+    for i, sid in enumerate(source_ids):
+        subject = f"subj-{i:05d}"
+        metadata[subject] = {"name": f"GIR{i:04d}", "subtype": "giraffe" if i % 17 else "elephant"}
+        groups[subject] = (rng.choice(["NA", "KE", "ZA"]), rng.choice(["North", "South", None]), "g", "gid")
+        dep_start = START + pd.Timedelta(seconds=int(rng.integers(0, 40 * 86400)))
+        dep_end = dep_start + pd.Timedelta(days=int(rng.integers(60, n_days))) if i % 3 == 0 else pd.NaT
+        if i % 23:
+            assignments.append({"source_id": sid, "subject_id": subject, "subName": "",
+                                "depStart": dep_start, "depEnd": dep_end})
+
+        per_day = int(rng.choice([4, 6, 12, 24, 48]))
+        slots = n_days * per_day
+        # Unique, strictly increasing fix times (dropped fixes are skipped slots)
+        offsets = np.arange(slots) * (86400 // per_day) + int(rng.integers(0, 86400 // per_day))
+        offsets = offsets[rng.random(slots) > rng.uniform(0.02, 0.4)]
+        epoch = START.value // 10**9 + offsets
+        battery = (4.2 - 0.6 * np.arange(len(offsets)) / max(len(offsets), 1)
+                   + rng.normal(0, 0.02, len(offsets))).astype(np.float32)
+        battery[rng.random(len(offsets)) < 0.3] = np.nan
+        parts.append((sid, epoch, battery))
+
+    obs = app.observation_frame(parts)
+    assignments_df = pd.DataFrame(assignments)
+    assignments_df["depEnd"] = pd.to_datetime(assignments_df["depEnd"], utc=True)
+    return sources_df, assignments_df, obs, metadata, groups
+
+
+def legacy_frame(obs: pd.DataFrame) -> pd.DataFrame:
+    """The previous fetch_observation_history output for the same fixes."""
+    return pd.DataFrame({
+        "source_id": obs["source_id"].astype(str).astype(object),
+        "obsDatetime": pd.to_datetime(obs["epoch"], unit="s", utc=True),
+        "battery": obs["battery"].astype(np.float64),
+    })
+
+
+# ─── Previous implementation (object frame, per-source loops) ─────────────────
+
+def legacy_auto_scheduled_fixes(mode_daily, is_gsat):
+    if is_gsat:
+        if mode_daily >= 40:
+            return 48
+        elif mode_daily >= 20:
+            return 24
+        elif mode_daily >= 8:
+            return 12
+        elif mode_daily >= 3:
+            return 4
+        return 4
+    else:
+        if mode_daily >= 90:
+            return 96
+        elif mode_daily >= 40:
+            return 48
+        elif mode_daily >= 20:
+            return 24
+        elif mode_daily >= 10:
+            return 12
+        elif mode_daily >= 6:
+            return 8
+        elif mode_daily >= 3:
+            return 4
+        return 24
+
+
+def legacy_mode(series):
+    counts = series.value_counts()
+    return counts.index[0] if len(counts) else np.nan
+
+
+def legacy_kernels(cfg, asn, obs_df, tag_map, is_gsat):
+    """Trim, battery trend, CV and daily fix-rate sections of the old analyze_manufacturer."""
+    dep_window = asn.groupby("source_id").agg(dep_start=("depStart", "min"), dep_end=("depEndEffective", "max"))
+    obs_trimmed = obs_df.copy()
+    obs_trimmed["date"] = obs_trimmed["obsDatetime"].dt.date
+    obs_trimmed = obs_trimmed.merge(dep_window, left_on="source_id", right_index=True, how="left")
+    obs_trimmed["dep_start_date"] = obs_trimmed["dep_start"].dt.date
+    obs_trimmed["dep_end_date"] = obs_trimmed["dep_end"].dt.date
+    obs_trimmed = obs_trimmed[
+        (obs_trimmed["date"] > obs_trimmed["dep_start_date"]) & (obs_trimmed["date"] < obs_trimmed["dep_end_date"])
+    ].drop(columns=["dep_start", "dep_end", "dep_start_date", "dep_end_date"])
+
+    obs_batt = obs_trimmed.dropna(subset=["battery"]).copy()
+    obs_batt = obs_batt[obs_batt["battery"] > 0]
+    obs_batt = obs_batt.sort_values(["source_id", "obsDatetime"])
+
+    battery_rows, cv_rows = [], []
+    for sid, g in obs_batt.groupby("source_id"):
+        start_v = g["battery"].iloc[0]
+        current_v = g["battery"].iloc[-1]
+        days = (g["obsDatetime"].iloc[-1] - g["obsDatetime"].iloc[0]).days
+        drop = start_v - current_v
+        rate = drop / days if days > 0 else 0.0
+        projected = (current_v - cfg["battery_floor"]) / rate if rate > 0 else np.nan
+        battery_rows.append(dict(
+            source_id=sid, start_voltage=start_v, current_voltage=current_v,
+            days_deployed=days, voltage_drop_per_day=rate, projected_life_days=projected,
+        ))
+        if len(g) >= 5:
+            m, sdv = g["battery"].mean(), g["battery"].std()
+            cv_rows.append(dict(source_id=sid, cv=(sdv / m if m else np.nan)))
+    battery_df = pd.DataFrame(battery_rows)
+    cv_df = pd.DataFrame(cv_rows)
+    battery_daily = obs_batt.groupby(["source_id", "date"])["battery"].mean().reset_index()
+
+    daily = obs_trimmed.groupby(["source_id", "date"]).size().reset_index(name="daily_locations")
+    schedule_rows = []
+    for sid, g in daily.groupby("source_id"):
+        mode_daily = legacy_mode(g["daily_locations"])
+        schedule_rows.append(dict(source_id=sid, mode_daily=mode_daily,
+                                  scheduled_fixes=legacy_auto_scheduled_fixes(mode_daily, is_gsat)))
+    daily = daily.merge(pd.DataFrame(schedule_rows)[["source_id", "scheduled_fixes"]], on="source_id", how="left")
+    if is_gsat:
+        for sid_set, fixes in [(app.GSAT_MANUAL_6PERDAY, 6), (app.GSAT_MANUAL_12PERDAY, 12)]:
+            mask = daily["source_id"].map(lambda s: tag_map.get(s) in sid_set)
+            daily.loc[mask, "scheduled_fixes"] = fixes
+    daily["fix_rate"] = daily["daily_locations"] / daily["scheduled_fixes"]
+    last_tx = obs_df.groupby("source_id")["obsDatetime"].max().rename("last_transmission")
+    return battery_df, cv_df, battery_daily, daily, last_tx
+
+
+def prepared_assignments(cfg, sources_df, assignments_df, metadata):
+    """The assignment-side preparation both implementations share."""
+    now = pd.Timestamp.now(tz="UTC")
+    asn = assignments_df[assignments_df["source_id"].isin(sources_df["id"])].copy()
+    asn = asn[asn["subject_id"].map(lambda s: metadata[s]["subtype"]) == app.GIRAFFE_SUBJECT_SUBTYPE]
+    asn["depEndEffective"] = asn["depEnd"].fillna(now).clip(upper=now)
+    return asn
+
+
+# ─── Timing ───────────────────────────────────────────────────────────────────
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    n_units = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    cfg = app.MANUFACTURERS["GSat Solar (ear)"]
+    sources_df, assignments_df, obs, metadata, groups = make_fleet(n_units, n_days)
+    old_obs = legacy_frame(obs)
+    tag_map = dict(zip(sources_df["id"], sources_df["tagID"]))
+    asn = prepared_assignments(cfg, sources_df, assignments_df, metadata)
+
+    new, t_new = timed(app.analyze_manufacturer, "GSat", cfg, sources_df, assignments_df, obs, {}, groups, metadata)
+    (battery_df, cv_df, battery_daily, daily, last_tx), t_old = timed(
+        legacy_kernels, cfg, asn, old_obs, tag_map, True)
+
+    # Parity — the battery column is float32 in both, so values match exactly
+    pd.testing.assert_frame_equal(new["battery_df"], battery_df, check_dtype=False)
+    pd.testing.assert_frame_equal(new["cv_df"], cv_df, check_dtype=False)
+    battery_daily["date"] = pd.to_datetime(battery_daily["date"])
+    pd.testing.assert_frame_equal(new["battery_daily"], battery_daily, check_dtype=False)
+    daily["date"] = pd.to_datetime(daily["date"])
+    pd.testing.assert_frame_equal(new["daily"], daily[new["daily"].columns], check_dtype=False)
+    summary_tx = new["summary"].set_index("source_id")["last_transmission"]
+    pd.testing.assert_series_equal(summary_tx, last_tx.reindex(summary_tx.index), check_names=False)
+
+    old_mb = old_obs.memory_usage(deep=True).sum() / 1e6
+    new_mb = obs.memory_usage(deep=True).sum() / 1e6
+    print(f"{n_units} units x {n_days} days = {len(obs):,} observations\n")
+    print(f"{'observation frame  object dtypes':<36} {old_mb:8.1f} MB")
+    print(f"{'observation frame  typed arrays':<36} {new_mb:8.1f} MB   ({old_mb / new_mb:.1f}x smaller)")
+    print(f"{'analysis  object frame (kernels only)':<36} {t_old:8.2f} s")
+    print(f"{'analysis  analyze_manufacturer':<36} {t_new:8.2f} s   ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,15 @@ ER_performReport R scripts, and packages the result into a downloadable
 .docx report styled after the existing GCF_unitPerformance Google Docs.
 """
 
+import hashlib
 import io
 import json
-import random
 import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from pathlib import Path
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import requests
@@ -32,6 +29,11 @@ from docx.shared import Inches
 
 sys.path.append(str(Path(__file__).parent.parent))
 from shared.auth import require_earthranger_login
+from shared.er_client import ERClient
+from shared.observation_frame import SECONDS_PER_DAY, epoch_seconds, observation_frame, parse_epochs
+from shared.jobs import get_runner, poll_job
+from shared.observation_store import ObservationStore
+from unit_performance_dashboard.report_charts import frame_digest, render_charts
 
 ER_SERVER = "https://twiga.pamdas.org"
 UNIT_UPDATE_EVENT_TYPE = "7bb99e0c-9d37-405b-b8e7-edca8e9b5d6b"
@@ -325,64 +327,65 @@ def _extract_battery(obs_details, device_status, battery_unit):
     return None
 
 
-def _fetch_one_source_history(session, headers, source_id, since_iso, until_iso, battery_unit):
-    # Extract the battery value immediately per-record rather than accumulating the
-    # full raw observation_details/device_status_properties payload for the whole
-    # history in memory — for a full multi-year fetch across hundreds of devices,
-    # keeping only the raw payloads is a significant, avoidable memory amplifier.
-    records = []
-    url = (
-        f"{ER_SERVER}/api/v1.0/observations/"
-        f"?source_id={source_id}&since={since_iso}&until={until_iso}"
-        f"&include_details=true&page_size=4000"
-    )
-    while url:
-        resp = session.get(url, headers=headers)
-        resp.raise_for_status()
-        data = resp.json()
-        inner = data.get("data", data) if isinstance(data, dict) else data
-        if isinstance(inner, dict):
-            items = inner.get("results", [])
-            url = inner.get("next")
-        elif isinstance(inner, list):
-            items = inner
-            url = None
-        else:
-            items, url = [], None
+def _fetch_one_source_history(client, source_id, since_iso, until_iso, battery_unit):
+    # Reduce each record to (recorded_at, battery) as it streams in rather than
+    # accumulating the raw observation_details/device_status_properties payloads —
+    # for a full multi-year fetch across hundreds of devices those are a
+    # significant, avoidable memory amplifier. Returns typed arrays
+    # (int64 epoch seconds, float32 battery), as the observation store keeps them.
+    recorded_at, battery = [], []
+    params = {
+        "source_id": source_id,
+        "since": since_iso,
+        "until": until_iso,
+        "include_details": "true",
+        "page_size": 4000,
+    }
+    for items in client.iter_next("observations/", params):
         for it in items:
-            battery = _extract_battery(it.get("observation_details"), it.get("device_status_properties"), battery_unit)
-            records.append({
-                "source_id": source_id,
-                "obsDatetime": it.get("recorded_at"),
-                "battery": battery,
-            })
-    return records
+            recorded_at.append(it.get("recorded_at"))
+            battery.append(_extract_battery(it.get("observation_details"), it.get("device_status_properties"), battery_unit))
+    epoch = parse_epochs(recorded_at)
+    parsed = epoch >= 0
+    return epoch[parsed], np.array(battery, dtype=np.float32)[parsed]
 
 
 # Bounds worst-case cache memory: without a cap, every distinct (manufacturer,
 # date-range) combination — including ad-hoc test windows from the date-range
 # override — accumulates its own full-history DataFrame for the whole TTL with
-# no eviction, which can add up fast for a report this data-heavy.
+# no eviction, which can add up fast for a report this data-heavy. A miss is
+# cheap when use_store is on: only the part of the range not already in the
+# on-disk observation store is pulled from ER.
 @st.cache_data(ttl=1800, show_spinner=False, max_entries=8)
-def fetch_observation_history(_er, source_ids_tuple, since_iso, until_iso, battery_unit):
-    headers = _er.auth_headers()
-    all_records = []
+def fetch_observation_history(_er, source_ids_tuple, since_iso, until_iso, battery_unit, use_store=True):
+    """
+    Typed observation frame (categorical source_id, int64 epoch, float32 battery)
+    for these sources over [since, until].
+    """
+    # One pooled, retrying client shared by all worker threads (429/5xx are
+    # retried with backoff instead of silently dropping that unit's history)
+    client = ERClient.from_earthranger_io(_er, max_workers=10)
+
+    def fetch(sid, since, until):
+        return _fetch_one_source_history(client, sid, since, until, battery_unit)
+
+    if use_store:
+        store = ObservationStore.for_account(
+            str(getattr(_er, "server", ER_SERVER)), getattr(_er, "username", None) or "", f"battery_{battery_unit}",
+        )
+        # Units whose pull fails fall back to whatever the store already holds
+        store.sync(fetch, source_ids_tuple, since_iso, until_iso, max_workers=10)
+        return store.frame(source_ids_tuple, since_iso, until_iso)
+
+    parts = []
     with ThreadPoolExecutor(max_workers=10) as pool:
-        futures = {
-            pool.submit(_fetch_one_source_history, _er._http_session, headers, sid, since_iso, until_iso, battery_unit): sid
-            for sid in source_ids_tuple
-        }
+        futures = {pool.submit(fetch, sid, since_iso, until_iso): sid for sid in source_ids_tuple}
         for fut in as_completed(futures):
             try:
-                all_records.extend(fut.result())
+                parts.append((futures[fut], *fut.result()))
             except Exception:
                 pass
-    if not all_records:
-        return pd.DataFrame(columns=["source_id", "obsDatetime", "battery"])
-    df = pd.DataFrame(all_records)
-    df["obsDatetime"] = pd.to_datetime(df["obsDatetime"], utc=True, errors="coerce")
-    df = df.dropna(subset=["obsDatetime"])
-    return df[["source_id", "obsDatetime", "battery"]].reset_index(drop=True)
+    return observation_frame(parts)
 
 
 @st.cache_data(ttl=1800, show_spinner=False)
@@ -424,36 +427,24 @@ def fetch_deactivation_notes(_er, source_ids_tuple):
 # Scheduled-fix detection
 # ═══════════════════════════════════════════════════════════════════════════
 
+# (minimum modal fixes/day, scheduled fixes/day), highest first, and the
+# schedule assumed below the lowest step
+_GSAT_SCHEDULES = ((40, 48), (20, 24), (8, 12), (3, 4))
+_GSAT_DEFAULT_SCHEDULE = 4
+_SCHEDULES = ((90, 96), (40, 48), (20, 24), (10, 12), (6, 8), (3, 4))
+_DEFAULT_SCHEDULE = 24
+
+
 def _auto_scheduled_fixes(mode_daily, is_gsat):
-    if is_gsat:
-        if mode_daily >= 40:
-            return 48
-        elif mode_daily >= 20:
-            return 24
-        elif mode_daily >= 8:
-            return 12
-        elif mode_daily >= 3:
-            return 4
-        return 4
-    else:
-        if mode_daily >= 90:
-            return 96
-        elif mode_daily >= 40:
-            return 48
-        elif mode_daily >= 20:
-            return 24
-        elif mode_daily >= 10:
-            return 12
-        elif mode_daily >= 6:
-            return 8
-        elif mode_daily >= 3:
-            return 4
-        return 24
-
-
-def _mode(series):
-    counts = series.value_counts()
-    return counts.index[0] if len(counts) else np.nan
+    """Scheduled fixes/day for an array of modal daily fix counts."""
+    steps, default = (_GSAT_SCHEDULES, _GSAT_DEFAULT_SCHEDULE) if is_gsat else (_SCHEDULES, _DEFAULT_SCHEDULE)
+    mode_daily = np.asarray(mode_daily)
+    return np.select([mode_daily >= low for low, _ in steps], [fixes for _, fixes in steps], default)
+
+
+def _day_number(d):
+    """Calendar date → days since 1970-01-01, comparable with epoch // SECONDS_PER_DAY."""
+    return (d - date(1970, 1, 1)).days
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -508,84 +499,113 @@ def analyze_manufacturer(label, cfg, sources_df, assignments_df, obs_df, deactiv
     tag_map = dict(zip(src["id"].astype(str), src["tagID"]))
     asn["tagID"] = asn["source_id"].map(tag_map)
 
+    # ── Observation arrays ───────────────────────────────────────────────────
+    # Everything below works on the typed columns directly: category codes
+    # index per-source lookups, day numbers stand in for calendar dates, and
+    # only the per-source / per-day aggregates are ever turned back into labels.
+    sources = obs_df["source_id"].cat.categories
+    codes = obs_df["source_id"].cat.codes.to_numpy()
+    epoch = obs_df["epoch"].to_numpy()
+    day = epoch // SECONDS_PER_DAY
+    battery = obs_df["battery"].to_numpy()
+
     # ── Per-source deployment window (for first/last-day exclusion) ──────────
     dep_window = asn.groupby("source_id").agg(dep_start=("depStart", "min"), dep_end=("depEndEffective", "max"))
+    dep_window = dep_window.reindex(sources)
+    deployed = dep_window["dep_start"].notna().to_numpy()
+    start_day = np.full(len(sources), np.iinfo(np.int64).max)
+    end_day = np.full(len(sources), np.iinfo(np.int64).min)
+    start_day[deployed] = epoch_seconds(dep_window["dep_start"][deployed]) // SECONDS_PER_DAY
+    end_day[deployed] = epoch_seconds(dep_window["dep_end"][deployed]) // SECONDS_PER_DAY
 
     # ── Trim the first & last calendar day of each unit's deployment ─────────
     # Activation/deactivation happens partway through those days, so both
     # location counts and battery readings are artificially low on them —
     # exclude from every battery/fix-rate metric and chart (matches the R report's
     # existing fix-rate handling, now applied consistently to battery too).
-    obs_trimmed = obs_df.copy()
-    obs_trimmed["date"] = obs_trimmed["obsDatetime"].dt.date
-    obs_trimmed = obs_trimmed.merge(dep_window, left_on="source_id", right_index=True, how="left")
-    obs_trimmed["dep_start_date"] = obs_trimmed["dep_start"].dt.date
-    obs_trimmed["dep_end_date"] = obs_trimmed["dep_end"].dt.date
-    obs_trimmed = obs_trimmed[
-        (obs_trimmed["date"] > obs_trimmed["dep_start_date"]) & (obs_trimmed["date"] < obs_trimmed["dep_end_date"])
-    ].drop(columns=["dep_start", "dep_end", "dep_start_date", "dep_end_date"])
+    # Units with no deployment row drop out entirely.
+    trimmed = (day > start_day[codes]) & (day < end_day[codes])
 
     # ── Battery (trimmed) ────────────────────────────────────────────────────
-    obs_batt = obs_trimmed.dropna(subset=["battery"]).copy()
-    obs_batt = obs_batt[obs_batt["battery"] > 0]
-    obs_batt = obs_batt.sort_values(["source_id", "obsDatetime"])
-
-    battery_rows, cv_rows = [], []
-    for sid, g in obs_batt.groupby("source_id"):
-        if g.empty:
-            continue
-        start_v = g["battery"].iloc[0]
-        current_v = g["battery"].iloc[-1]
-        days = (g["obsDatetime"].iloc[-1] - g["obsDatetime"].iloc[0]).days
-        drop = start_v - current_v
-        rate = drop / days if days > 0 else 0.0
-        floor = cfg["battery_floor"]
-        projected = (current_v - floor) / rate if rate > 0 else np.nan
-        battery_rows.append(dict(
-            source_id=sid, start_voltage=start_v, current_voltage=current_v,
-            days_deployed=days, voltage_drop_per_day=rate, projected_life_days=projected,
-        ))
-        if len(g) >= 5:
-            m, sdv = g["battery"].mean(), g["battery"].std()
-            cv_rows.append(dict(source_id=sid, cv=(sdv / m if m else np.nan)))
-    battery_df = pd.DataFrame(battery_rows) if battery_rows else pd.DataFrame(
-        columns=["source_id", "start_voltage", "current_voltage", "days_deployed",
-                 "voltage_drop_per_day", "projected_life_days"]
+    with_battery = trimmed & (battery > 0)
+    obs_batt = pd.DataFrame({
+        "code": codes[with_battery],
+        "epoch": epoch[with_battery],
+        "day": day[with_battery],
+        "battery": battery[with_battery].astype(np.float64),
+    })
+    obs_batt = obs_batt.iloc[np.lexsort((obs_batt["epoch"].to_numpy(), obs_batt["code"].to_numpy()))]
+
+    trend = obs_batt.groupby("code").agg(
+        start_voltage=("battery", "first"), current_voltage=("battery", "last"),
+        first_epoch=("epoch", "first"), last_epoch=("epoch", "last"),
+        n=("battery", "size"), mean=("battery", "mean"), std=("battery", "std"),
     )
-    cv_df = pd.DataFrame(cv_rows) if cv_rows else pd.DataFrame(columns=["source_id", "cv"])
+    days = (trend["last_epoch"] - trend["first_epoch"]) // SECONDS_PER_DAY
+    drop = trend["start_voltage"] - trend["current_voltage"]
+    rate = (drop / days.where(days > 0)).fillna(0.0)
+    floor = cfg["battery_floor"]
+    battery_df = pd.DataFrame({
+        "source_id": sources.take(trend.index).to_numpy(),
+        "start_voltage": trend["start_voltage"].to_numpy(),
+        "current_voltage": trend["current_voltage"].to_numpy(),
+        "days_deployed": days.to_numpy(),
+        "voltage_drop_per_day": rate.to_numpy(),
+        "projected_life_days": ((trend["current_voltage"] - floor) / rate.where(rate > 0)).to_numpy(),
+    })
+    variable = trend[trend["n"] >= 5]
+    cv_df = pd.DataFrame({
+        "source_id": sources.take(variable.index).to_numpy(),
+        "cv": (variable["std"] / variable["mean"].where(variable["mean"] != 0)).to_numpy(),
+    })
+
+    # Daily mean battery per unit — all the battery chart needs
+    battery_daily = obs_batt.groupby(["code", "day"])["battery"].mean().reset_index()
+    battery_daily.insert(0, "source_id", sources.take(battery_daily["code"]).to_numpy())
+    battery_daily["date"] = pd.to_datetime(battery_daily["day"] * SECONDS_PER_DAY, unit="s")
+    battery_daily = battery_daily[["source_id", "date", "battery"]]
 
     # ── Fix rate (trimmed) — counts every location fix, not just battery-bearing ones ──
-    daily = obs_trimmed.groupby(["source_id", "date"]).size().reset_index(name="daily_locations")
+    daily = (
+        pd.DataFrame({"code": codes[trimmed], "day": day[trimmed]})
+        .groupby(["code", "day"]).size().rename("daily_locations").reset_index()
+    )
 
-    schedule_rows = []
-    for sid, g in daily.groupby("source_id"):
-        mode_daily = _mode(g["daily_locations"])
-        schedule_rows.append(dict(source_id=sid, mode_daily=mode_daily,
-                                   scheduled_fixes=_auto_scheduled_fixes(mode_daily, is_gsat)))
-    schedule_df = pd.DataFrame(schedule_rows)
-    daily = daily.merge(schedule_df[["source_id", "scheduled_fixes"]], on="source_id", how="left")
+    # Each unit's schedule is inferred from its modal daily count (ties go to
+    # the count seen first), in one pass over every unit's (count, frequency)
+    counts = daily.groupby(["code", "daily_locations"]).agg(freq=("day", "size"), first_day=("day", "min"))
+    counts = counts.reset_index().sort_values(
+        ["code", "freq", "first_day"], ascending=[True, False, True], kind="stable"
+    )
+    mode_daily = counts.drop_duplicates("code").set_index("code")["daily_locations"]
+    scheduled = pd.Series(_auto_scheduled_fixes(mode_daily.to_numpy(), is_gsat), index=mode_daily.index)
+    daily["scheduled_fixes"] = scheduled.reindex(daily["code"]).to_numpy()
+    daily.insert(0, "source_id", sources.take(daily["code"]).to_numpy())
+    daily["date"] = pd.to_datetime(daily["day"] * SECONDS_PER_DAY, unit="s")
 
     tag_to_sources = {}
     for s, t in tag_map.items():
         tag_to_sources.setdefault(t, []).append(s)
 
     if is_gsat:
+        daily_tags = daily["source_id"].map(tag_map)
         for sid_set, fixes in [(GSAT_MANUAL_6PERDAY, 6), (GSAT_MANUAL_12PERDAY, 12)]:
-            mask = daily["source_id"].map(lambda s: tag_map.get(s) in sid_set)
-            daily.loc[mask, "scheduled_fixes"] = fixes
+            daily.loc[daily_tags.isin(sid_set), "scheduled_fixes"] = fixes
+        change_day = _day_number(GSAT_SCHEDULE_CHANGE_DATE)
         for tag_id in GSAT_SCHEDULE_CHANGE_UNITS:
             for sid in tag_to_sources.get(tag_id, []):
                 mask = (daily["source_id"] == sid)
-                daily.loc[mask & (daily["date"] < GSAT_SCHEDULE_CHANGE_DATE), "scheduled_fixes"] = 12
-                daily.loc[mask & (daily["date"] >= GSAT_SCHEDULE_CHANGE_DATE), "scheduled_fixes"] = 24
+                daily.loc[mask & (daily["day"] < change_day), "scheduled_fixes"] = 12
+                daily.loc[mask & (daily["day"] >= change_day), "scheduled_fixes"] = 24
     if is_spoortrack:
         for tag_id, periods in SPOORTRACK_TEST_PERIODS.items():
             for sid in tag_to_sources.get(tag_id, []):
                 mask = (daily["source_id"] == sid)
                 for start_p, end_p, fixes in periods:
-                    period_mask = mask & (daily["date"] >= start_p) & (daily["date"] <= end_p)
+                    period_mask = mask & (daily["day"] >= _day_number(start_p)) & (daily["day"] <= _day_number(end_p))
                     daily.loc[period_mask, "scheduled_fixes"] = fixes
 
+    daily = daily.drop(columns=["code", "day"])
     daily["fix_rate"] = daily["daily_locations"] / daily["scheduled_fixes"]
     overall_mean_fix_rate = daily["fix_rate"].mean() if not daily.empty else np.nan
     per_source_fix_rate = daily.groupby("source_id")["fix_rate"].mean().rename("mean_fix_rate")
@@ -594,7 +614,11 @@ def analyze_manufacturer(label, cfg, sources_df, assignments_df, obs_df, deactiv
     # last_transmission/days_since_last_tx use the FULL (untrimmed) history —
     # this is a liveness check ("is the unit still talking to us"), not a
     # performance metric, so it shouldn't discard the most recent day's data.
-    last_tx = obs_df.groupby("source_id")["obsDatetime"].max().rename("last_transmission")
+    last_epoch = pd.Series(epoch).groupby(codes).max()
+    last_tx = pd.Series(
+        pd.to_datetime(last_epoch.to_numpy(), unit="s", utc=True),
+        index=pd.Index(sources.take(last_epoch.index), name="source_id"), name="last_transmission",
+    )
     summary = asn.merge(last_tx, on="source_id", how="left")
     summary["days_since_last_tx"] = (now - summary["last_transmission"]).dt.days
     summary = summary.merge(
@@ -629,7 +653,7 @@ def analyze_manufacturer(label, cfg, sources_df, assignments_df, obs_df, deactiv
 
     return dict(
         label=label, cfg=cfg, summary=summary, loc=loc, country_totals=country_totals,
-        battery_df=battery_df, cv_df=cv_df, battery_obs=obs_batt, daily=daily,
+        battery_df=battery_df, cv_df=cv_df, battery_daily=battery_daily, daily=daily,
         overall_mean_fix_rate=overall_mean_fix_rate,
         excellent=excellent, good=good, poor=poor, total_scored=total_scored,
         first_deployed=first_deployed,
@@ -637,77 +661,47 @@ def analyze_manufacturer(label, cfg, sources_df, assignments_df, obs_df, deactiv
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# Charts (matplotlib, returned as PNG bytes for both st display & docx embed)
+# Background report build (shared job runner; charts on its process pool)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _fig_to_png(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+# Everything build_docx() writes, hashed — identical requests share one job
+_REPORT_FRAMES = ("summary", "loc", "country_totals", "battery_df", "cv_df", "battery_daily", "daily")
+REPORT_STATE_KEY = "unit_performance_report"
+
+
+def _report_key(author, report_date, results, comments_by_label):
+    h = hashlib.sha256(f"unit_performance\0{author}\0{report_date}".encode())
+    for r in results:
+        h.update(f"\0{r['label']}\0{comments_by_label.get(r['label'], '')}".encode())
+        for name in _REPORT_FRAMES:
+            h.update(frame_digest(r[name]).encode())
+        h.update(repr((r["overall_mean_fix_rate"], r["excellent"], r["good"], r["poor"],
+                       r["total_scored"], r["first_deployed"])).encode())
+    return h.hexdigest()[:32]
+
+
+def _build_report(ctx, author, report_date, results, comments_by_label):
+    """Background job: charts on the shared process pool, then the DOCX."""
+    def progress(done, total):
+        ctx.check()
+        ctx.progress(0.8 * done / max(total, 1), f"Rendering charts ({done}/{total})...")
+
+    charts = render_charts(results, get_runner().process_pool(), progress)
+    ctx.progress(0.9, "Assembling Word document...")
+    return {"charts": charts, "docx": build_docx(author, report_date, results, comments_by_label, charts=charts)}
 
 
-def chart_deployment(result):
-    df = result["summary"].copy()
-    df["loc_label"] = df["country"].fillna("Unknown") + np.where(
-        df["region"].notna(), " - " + df["region"].fillna(""), ""
+def submit_report(author, report_date, results, comments_by_label):
+    """
+    Job id of the background build of this report. A report already built —
+    by this or any other session, within the job retention — is returned as
+    its finished job, so its DOCX is available immediately.
+    """
+    return get_runner().submit(
+        _build_report, author, report_date, results, comments_by_label,
+        key=_report_key(author, report_date, results, comments_by_label),
+        label="Unit Performance Report",
     )
-    fig, ax = plt.subplots(figsize=(9, 5))
-    categories = sorted(df["loc_label"].unique())
-    cat_x = {c: i for i, c in enumerate(categories)}
-    rng = random.Random(42)
-    colors = {"Active": "#2E8B57", "Ended": "#CD5C5C"}
-    for status, group in df.groupby("status"):
-        xs = [cat_x[c] + rng.uniform(-0.2, 0.2) for c in group["loc_label"]]
-        ax.scatter(xs, group["deployment_length_days"], s=40, alpha=0.8,
-                   color=colors.get(status, "gray"), label=status)
-    mean_len = df["deployment_length_days"].mean()
-    ax.axhline(mean_len, linestyle="--", color="black", alpha=0.7)
-    ax.text(len(categories) - 0.5, mean_len, f"Mean: {mean_len:.0f} days", va="bottom", ha="right", fontsize=9)
-    ax.set_xticks(range(len(categories)))
-    ax.set_xticklabels(categories, rotation=45, ha="right")
-    ax.set_ylabel("Deployment length (days)")
-    ax.set_title(f"{result['label']} — deployment duration by location", loc="right")
-    ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0))
-    fig.tight_layout()
-    return _fig_to_png(fig)
-
-
-def chart_battery(result):
-    unit = result["cfg"]["battery_unit"]
-    obs = result["battery_obs"]
-    daily_mean = obs.groupby(["source_id", "date"])["battery"].mean().reset_index()
-    fig, ax = plt.subplots(figsize=(9, 5))
-    for sid, g in daily_mean.groupby("source_id"):
-        ax.plot(g["date"], g["battery"], alpha=0.5, linewidth=1)
-    overall_mean = daily_mean["battery"].mean()
-    ax.axhline(overall_mean, linestyle="--", color="black", linewidth=1.5, alpha=0.8)
-    label = f"Mean: {overall_mean:.2f} {'V' if unit == 'voltage' else '%'}"
-    ax.text(daily_mean["date"].max(), overall_mean, label, ha="right", va="bottom", fontsize=9)
-    ax.set_ylabel("Battery voltage (V)" if unit == "voltage" else "Battery percentage (%)")
-    ax.set_xlabel("Date")
-    ax.set_title(f"{result['label']} — battery performance over time", loc="right")
-    fig.autofmt_xdate(rotation=45)
-    fig.tight_layout()
-    return _fig_to_png(fig)
-
-
-def chart_fixrate(result):
-    daily = result["daily"]
-    fig, ax = plt.subplots(figsize=(9, 5))
-    for sid, g in daily.groupby("source_id"):
-        ax.plot(g["date"], g["fix_rate"], alpha=0.5, linewidth=1)
-    overall_mean = daily["fix_rate"].mean() if not daily.empty else 0
-    ax.axhline(overall_mean, linestyle="--", color="black", linewidth=1.5, alpha=0.8)
-    ax.text(daily["date"].max() if not daily.empty else 0, overall_mean,
-            f"Mean: {overall_mean:.2f}", ha="right", va="bottom", fontsize=9)
-    ax.set_ylabel("Fix rate (received / scheduled)")
-    ax.set_xlabel("Date")
-    ax.set_title(f"{result['label']} — fix rate performance (actual/scheduled)", loc="right")
-    fig.autofmt_xdate(rotation=45)
-    fig.tight_layout()
-    return _fig_to_png(fig)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -743,7 +737,9 @@ def _add_toc(document):
         )
 
 
-def build_docx(author, report_date, results, comments_by_label):
+def build_docx(author, report_date, results, comments_by_label, charts=None):
+    """The report as .docx bytes; `charts` are render_charts() PNGs (rendered here when None)."""
+    charts = charts or render_charts(results)
     document = Document()
 
     if GCF_LOGO.exists():
@@ -816,7 +812,7 @@ def build_docx(author, report_date, results, comments_by_label):
             )
         not_transmitting = summary[(summary["status"] == "Active") & (summary["days_since_last_tx"] > 30)]
         document.add_paragraph(f"Active units not transmitting >30 days: {len(not_transmitting)}")
-        document.add_picture(io.BytesIO(chart_deployment(result)), width=Inches(6))
+        document.add_picture(io.BytesIO(charts[(label, "deployment")]), width=Inches(6))
         document.add_paragraph(f"Figure 1. Deployment lengths of {label} units deployed since "
                                 f"{result['first_deployed'].strftime('%d %B %Y')}.")
         document.add_page_break()
@@ -837,7 +833,7 @@ def build_docx(author, report_date, results, comments_by_label):
         )
         consistent = int((result["cv_df"]["cv"] < 0.3).sum()) if not result["cv_df"].empty else 0
         document.add_paragraph(f"Highly consistent batteries (CV < 0.3): {consistent} / {len(result['cv_df'])}")
-        document.add_picture(io.BytesIO(chart_battery(result)), width=Inches(6))
+        document.add_picture(io.BytesIO(charts[(label, "battery")]), width=Inches(6))
         document.add_paragraph(f"Figure 2. Mean battery {cfg['battery_unit']} of {label} units deployed since "
                                 f"{result['first_deployed'].strftime('%d %B %Y')}.")
         document.add_page_break()
@@ -845,7 +841,7 @@ def build_docx(author, report_date, results, comments_by_label):
         # ── Success rate ───────────────────────────────────────────────────
         document.add_heading("Success rate", level=2)
         document.add_paragraph(f"Mean fix rate: {result['overall_mean_fix_rate']:.2f} (recorded/scheduled)")
-        document.add_picture(io.BytesIO(chart_fixrate(result)), width=Inches(6))
+        document.add_picture(io.BytesIO(charts[(label, "fixrate")]), width=Inches(6))
         document.add_paragraph(f"Figure 3. Fix rate (received/scheduled) of {label} units deployed since "
                                 f"{result['first_deployed'].strftime('%d %B %Y')}.")
         # Single combined view: grouped by site (full history) so regional clustering
@@ -924,7 +920,8 @@ def _main_implementation():
 
     st.info(
         "This pulls **full device history** from EarthRanger for every unit ever deployed on each "
-        "programme, so it can take a few minutes for large fleets. Results are cached for 30–60 minutes."
+        "programme, so the first run can take a few minutes for large fleets. Observation history is "
+        "saved per unit, so later reports only download what's new; results are cached for 30–60 minutes."
     )
 
     with st.expander("⚙️ Report settings", expanded=True):
@@ -954,9 +951,30 @@ def _main_implementation():
                 "deliberately scoped custom report, not the standard quarterly output."
             )
 
-    if not st.button("🚀 Generate report", type="primary"):
-        return
+        use_store = st.checkbox(
+            "Only download observations not already saved",
+            value=True,
+            help="Observation history is kept on this server per unit; a new report only pulls "
+                 "what falls outside the range already saved (e.g. the last few weeks) plus the "
+                 "last two days again to catch late uploads. Untick to download everything afresh.",
+        )
+
+    if st.button("🚀 Generate report", type="primary"):
+        results = _collect_results(er, override_range, custom_since, custom_until, use_store)
+        if not results:
+            st.session_state.pop(REPORT_STATE_KEY, None)
+            return
+        job_id = submit_report(author, report_date, results, comments_by_label)
+        st.session_state[REPORT_STATE_KEY] = dict(job_id=job_id, results=results, author=author,
+                                                  report_date=report_date, comments=comments_by_label)
+
+    report = st.session_state.get(REPORT_STATE_KEY)
+    if report is not None:
+        _render_report(report)
 
+
+def _collect_results(er, override_range, custom_since, custom_until, use_store):
+    """Fetch and analyse every device type; None/[] when there is nothing to report."""
     results = []
     with st.spinner("Fetching subject groups (country/region)..."):
         country_region_map, group_debug_info = fetch_subject_country_region(er)
@@ -999,10 +1017,13 @@ def _main_implementation():
                 if cfg.get("since_filter")
                 else assignments_df["depStart"].min().isoformat()
             )
-            until_iso = pd.Timestamp.now(tz="UTC").isoformat()
+            # Rounded up to the half hour so a re-run shortly after hits the
+            # same cache entry instead of re-reading the store for a new "now"
+            until_iso = pd.Timestamp.now(tz="UTC").ceil("30min").isoformat()
 
         with st.spinner(f"Fetching {label} observation history — this is the slow part..."):
-            obs_df = fetch_observation_history(er, source_ids, since_iso, until_iso, cfg["battery_unit"])
+            obs_df = fetch_observation_history(er, source_ids, since_iso, until_iso, cfg["battery_unit"],
+                                               use_store=use_store)
 
         with st.spinner(f"Checking {label} deactivation notes..."):
             deactivation_notes = fetch_deactivation_notes(er, source_ids)
@@ -1016,7 +1037,20 @@ def _main_implementation():
 
     if not results:
         st.error("No data available for any device type — nothing to report.")
-        return
+    return results
+
+
+def _render_report(report):
+    """Preview + download for a generated report; polls its background build until done."""
+    results, report_date = report["results"], report["report_date"]
+    runner = get_runner()
+    status = runner.status(report["job_id"])
+    if status is None:
+        # Purged, or the cache dir was cleared — build again
+        report["job_id"] = submit_report(report["author"], report_date, results, report["comments"])
+        status = runner.status(report["job_id"])
+    built = runner.result(report["job_id"]) if status["state"] == "done" else {}
+    charts = built.get("charts", {})
 
     st.markdown("---")
     st.subheader("📋 Preview")
@@ -1029,26 +1063,33 @@ def _main_implementation():
             c2.metric("Active", int((summary["status"] == "Active").sum()))
             c3.metric("Mean fix rate", f"{result['overall_mean_fix_rate']:.2f}")
             c4.metric("Mean deployment (days)", f"{summary['deployment_length_days'].mean():.0f}")
-            st.image(chart_deployment(result), use_container_width=True)
-            st.image(chart_battery(result), use_container_width=True)
-            st.image(chart_fixrate(result), use_container_width=True)
-
-    with st.spinner("Building Word document..."):
-        docx_bytes = build_docx(author, report_date, results, comments_by_label)
+            for kind in ("deployment", "battery", "fixrate"):
+                png = charts.get((result["label"], kind))
+                if png is not None:
+                    st.image(png, use_container_width=True)
 
     st.markdown("---")
-    st.success("Report generated.")
-    st.download_button(
-        "⬇️ Download report (.docx)",
-        data=docx_bytes,
-        file_name=f"GCF_unitPerformance_{report_date.strftime('%y%m%d')}.docx",
-        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        type="primary",
-    )
-    st.caption(
-        "Upload this to Drive and open with Google Docs (or File → Open with Google Docs). "
-        "Update the table of contents field and adjust wording as needed."
-    )
+    if status["state"] == "done":
+        st.success("Report generated.")
+        st.download_button(
+            "⬇️ Download report (.docx)",
+            data=built["docx"],
+            file_name=f"GCF_unitPerformance_{report_date.strftime('%y%m%d')}.docx",
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            type="primary",
+        )
+        st.caption(
+            "Upload this to Drive and open with Google Docs (or File → Open with Google Docs). "
+            "Update the table of contents field and adjust wording as needed."
+        )
+    elif status["state"] in ("failed", "interrupted"):
+        st.error(f"Building the report failed: {status.get('error') or status['state']}. "
+                 "Click Generate report to try again.")
+    elif status["state"] == "cancelled":
+        st.info("Report build cancelled.")
+    else:
+        st.caption("Charts and the Word document are built in the background — you can leave this page and come back.")
+        poll_job(report["job_id"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""
+Unit Performance Report charts, rendered off the Streamlit thread.
+
+The three matplotlib charts per device type are rasterised to 150-dpi PNGs
+for both the on-page preview and the Word report. Each one is keyed on a
+content hash of exactly the data it draws (see `chart_key`), so:
+
+* `render_charts()` fans cache misses out to a process pool — matplotlib
+  holds the GIL while drawing, so threads would not overlap
+* rendered PNGs are kept under the shared cache directory; re-running the
+  report, or building the document after the preview, reuses them
+
+This lives outside app.py because pool workers import chart functions by
+module name, and the page module is exec'd without one.
+"""
+
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from pickle import PicklingError
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+_streamlit_root = Path(__file__).resolve().parent.parent
+if str(_streamlit_root) not in sys.path:
+    sys.path.insert(0, str(_streamlit_root))
+
+from shared.event_store import CACHE_DIR, private_dir  # noqa: E402
+
+CHART_DIR = CACHE_DIR / "unit_performance" / "charts"
+
+
+# ─── Charts (matplotlib, returned as PNG bytes for both st display & docx embed) ───
+
+def _fig_to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    buf.seek(0)
+    return buf.getvalue()
+
+
+def chart_deployment(result):
+    df = result["summary"].copy()
+    df["loc_label"] = df["country"].fillna("Unknown") + np.where(
+        df["region"].notna(), " - " + df["region"].fillna(""), ""
+    )
+    fig, ax = plt.subplots(figsize=(9, 5))
+    categories = sorted(df["loc_label"].unique())
+    cat_x = {c: i for i, c in enumerate(categories)}
+    rng = random.Random(42)
+    colors = {"Active": "#2E8B57", "Ended": "#CD5C5C"}
+    for status, group in df.groupby("status"):
+        xs = [cat_x[c] + rng.uniform(-0.2, 0.2) for c in group["loc_label"]]
+        ax.scatter(xs, group["deployment_length_days"], s=40, alpha=0.8,
+                   color=colors.get(status, "gray"), label=status)
+    mean_len = df["deployment_length_days"].mean()
+    ax.axhline(mean_len, linestyle="--", color="black", alpha=0.7)
+    ax.text(len(categories) - 0.5, mean_len, f"Mean: {mean_len:.0f} days", va="bottom", ha="right", fontsize=9)
+    ax.set_xticks(range(len(categories)))
+    ax.set_xticklabels(categories, rotation=45, ha="right")
+    ax.set_ylabel("Deployment length (days)")
+    ax.set_title(f"{result['label']} — deployment duration by location", loc="right")
+    ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0))
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+
+def chart_battery(result):
+    unit = result["cfg"]["battery_unit"]
+    daily_mean = result["battery_daily"]
+    fig, ax = plt.subplots(figsize=(9, 5))
+    for sid, g in daily_mean.groupby("source_id"):
+        ax.plot(g["date"], g["battery"], alpha=0.5, linewidth=1)
+    overall_mean = daily_mean["battery"].mean()
+    ax.axhline(overall_mean, linestyle="--", color="black", linewidth=1.5, alpha=0.8)
+    label = f"Mean: {overall_mean:.2f} {'V' if unit == 'voltage' else '%'}"
+    ax.text(daily_mean["date"].max(), overall_mean, label, ha="right", va="bottom", fontsize=9)
+    ax.set_ylabel("Battery voltage (V)" if unit == "voltage" else "Battery percentage (%)")
+    ax.set_xlabel("Date")
+    ax.set_title(f"{result['label']} — battery performance over time", loc="right")
+    fig.autofmt_xdate(rotation=45)
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+
+def chart_fixrate(result):
+    daily = result["daily"]
+    fig, ax = plt.subplots(figsize=(9, 5))
+    for sid, g in daily.groupby("source_id"):
+        ax.plot(g["date"], g["fix_rate"], alpha=0.5, linewidth=1)
+    overall_mean = daily["fix_rate"].mean() if not daily.empty else 0
+    ax.axhline(overall_mean, linestyle="--", color="black", linewidth=1.5, alpha=0.8)
+    ax.text(daily["date"].max() if not daily.empty else 0, overall_mean,
+            f"Mean: {overall_mean:.2f}", ha="right", va="bottom", fontsize=9)
+    ax.set_ylabel("Fix rate (received / scheduled)")
+    ax.set_xlabel("Date")
+    ax.set_title(f"{result['label']} — fix rate performance (actual/scheduled)", loc="right")
+    fig.autofmt_xdate(rotation=45)
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+
+CHARTS = {
+    "deployment": chart_deployment,
+    "battery": chart_battery,
+    "fixrate": chart_fixrate,
+}
+
+# The result fields each chart reads — all that is hashed and shipped to a worker
+_CHART_FRAMES = {
+    "deployment": ("summary", ["country", "region", "status", "deployment_length_days"]),
+    "battery": ("battery_daily", ["source_id", "date", "battery"]),
+    "fixrate": ("daily", ["source_id", "date", "fix_rate"]),
+}
+
+
+# ─── Content-hash cache + process-pool rendering ──────────────────────────────
+
+def chart_inputs(kind, result):
+    """The slice of an analyze_manufacturer() result that chart `kind` draws."""
+    frame, columns = _CHART_FRAMES[kind]
+    return {
+        "label": result["label"],
+        "cfg": {"battery_unit": result["cfg"]["battery_unit"]},
+        frame: result[frame][columns],
+    }
+
+
+def frame_digest(df):
+    """Stable hash of a DataFrame's columns and values."""
+    h = hashlib.sha256("|".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def chart_key(kind, inputs):
+    """Content hash identifying one rendered chart."""
+    frame, _ = _CHART_FRAMES[kind]
+    parts = [kind, inputs["label"], inputs["cfg"]["battery_unit"], frame_digest(inputs[frame])]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+
+
+def render_chart(kind, inputs):
+    """Draw one chart to PNG bytes (runs in a pool worker)."""
+    return CHARTS[kind](inputs)
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    """Write via a temp file so another session never reads a partial PNG."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def render_charts(results, pool=None, progress=None, cache_dir=None):
+    """
+    {(label, kind): PNG bytes} for every chart of every result.
+
+    Cached PNGs are read back; the rest are rendered on `pool` (a process pool,
+    or in this thread when None or broken) and cached. `progress(done, total)`
+    is called as charts complete.
+    """
+    if cache_dir is None:
+        private_dir(CACHE_DIR)
+    cache_dir = Path(cache_dir or CHART_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    todo, pngs = {}, {}
+    for result in results:
+        for kind in CHARTS:
+            inputs = chart_inputs(kind, result)
+            path = cache_dir / f"{chart_key(kind, inputs)}.png"
+            if path.exists():
+                pngs[(result["label"], kind)] = path.read_bytes()
+            else:
+                todo[(result["label"], kind)] = (kind, inputs, path)
+    total = len(pngs) + len(todo)
+    if progress:
+        progress(len(pngs), total)
+
+    def finish(name, png, path):
+        pngs[name] = png
+        try:
+            _write_atomically(path, png)
+        except OSError:
+            pass
+        if progress:
+            progress(len(pngs), total)
+
+    if pool is not None and todo:
+        try:
+            futures = {pool.submit(render_chart, kind, inputs): name for name, (kind, inputs, _) in todo.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                finish(name, future.result(), todo[name][2])
+        except (BrokenProcessPool, PicklingError):
+            # Pool died or an input could not be sent to it — draw what's left here
+            pass
+    for name, (kind, inputs, path) in todo.items():
+        if name not in pngs:
+            finish(name, render_chart(kind, inputs), path)
+    return pngs